@@ -1,16 +1,122 @@
 # ORBT Monitoring API Endpoints
 # Add these to your render-command-ops-connection.onrender.com FastAPI service
 
-from fastapi import FastAPI, HTTPException, Query, Body
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Body, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse
 from typing import Optional, List, Dict, Any
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import asyncio
 import asyncpg
+import hashlib
+import json
+import logging
 import os
-from pydantic import BaseModel
+import time
+import uuid
+from pydantic import BaseModel, ValidationError
+
+from orbt.admission_control import AdaptiveConcurrencyLimit, AdmissionController, AdmissionDecision
+from orbt.batch_codec import BatchDecodeError, decode_batch
+from orbt.bulk_export import EXTENSIONS, MEDIA_TYPES, ExportRequestError, build_export_query, stream_export
+from orbt.doctrine_cache import DoctrineCache, etag_matches
+from orbt.doctrine_headers import DoctrineHeaderMiddleware, DoctrineHeaderValidator
+from orbt.error_clustering import ErrorClusterIndex
+from orbt.error_search import SearchRequestError, search_errors
+from orbt.fast_json import dumps as render_json
+from orbt.heavy_hitters import HeavyHitters
+from orbt.ingest_dedup import IngestDedupWindow
+from orbt.ingest_spool import IngestSpool
+from orbt.live_feed import LiveFeedHub, SubscriptionClosed, split_filter
+from orbt.read_routing import ReadRouter
+from orbt.resolution_lookup import ResolutionLookup
+from orbt.todo_graph import TodoScheduler
 
 # Add these imports to your existing FastAPI app
 # from your existing app import app, get_database_connection
+# The orbt package (repository root) must be importable by the service.
+
+logger = logging.getLogger(__name__)
+
+# In-process doctrine store, loaded at startup (see orbt/doctrine_cache.py)
+doctrine_cache = DoctrineCache()
+
+# Known fixes from the troubleshooting guide and resolution library, kept in
+# memory so ingest never waits on a lookup (see orbt/resolution_lookup.py)
+resolution_lookup = ResolutionLookup()
+
+# Near-duplicate error clusters, assigned on ingest and shared with other
+# processes through orbt_error_clusters (see orbt/error_clustering.py)
+error_clusters = ErrorClusterIndex()
+ERROR_CLUSTER_REFRESH_INTERVAL = 60
+
+# Streaming top agents/patterns over 5m/1h/24h, fed by log_error
+# (see orbt/heavy_hitters.py)
+heavy_hitters = HeavyHitters()
+
+# Repeats of an agent's error within the window (after the second, which is
+# written so it escalates) are folded into a row's repeat_count (see
+# orbt/ingest_dedup.py)
+ingest_dedup = IngestDedupWindow(window_seconds=float(os.getenv("ORBT_DEDUP_WINDOW_SECONDS", "10")))
+DEDUP_FLUSH_INTERVAL = 2
+
+# Per-agent/per-project token buckets and an adaptive limit on in-flight
+# database writes for the ingest endpoints (see orbt/admission_control.py)
+admission = AdmissionController(
+    agent_rate=float(os.getenv("ORBT_AGENT_RATE", "50")),
+    agent_burst=float(os.getenv("ORBT_AGENT_BURST", "100")),
+    project_rate=float(os.getenv("ORBT_PROJECT_RATE", "200")),
+    project_burst=float(os.getenv("ORBT_PROJECT_BURST", "400")),
+    concurrency=AdaptiveConcurrencyLimit(
+        initial=int(os.getenv("ORBT_WRITE_CONCURRENCY", "20")),
+        max_limit=int(os.getenv("ORBT_WRITE_CONCURRENCY_MAX", "200"))
+    )
+)
+
+# Failures that mean the database could not take the write (as opposed to a
+# bad row), so the write is spooled instead of rejected
+DB_UNAVAILABLE_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.exceptions.InterfaceError,
+    asyncpg.exceptions.PostgresConnectionError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.TooManyConnectionsError
+)
+
+# Ingest writes are spooled to local disk while the database is down or over
+# its latency budget, then replayed in order (see orbt/ingest_spool.py);
+# rows the database rejects on replay go to the spool's dead-letter file
+ingest_spool = IngestSpool(
+    os.getenv("ORBT_SPOOL_DIR", "orbt_spool"),
+    latency_budget=float(os.getenv("ORBT_SPOOL_LATENCY_BUDGET", "1.0")),
+    unavailable_errors=DB_UNAVAILABLE_ERRORS
+)
+SPOOL_REPLAY_INTERVAL = 1
+
+# Read-only endpoints use streaming replicas (ORBT_READ_REPLICA_URLS, comma
+# separated) that are within ORBT_REPLICA_MAX_LAG seconds of the primary and
+# have replayed the caller's own writes; otherwise the primary
+# (see orbt/read_routing.py)
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("ORBT_READ_REPLICA_URLS", "").split(",") if url.strip()]
+read_router = ReadRouter(
+    lambda: get_database_connection(),
+    {f"replica-{i}": (lambda url=url: asyncpg.connect(url)) for i, url in enumerate(READ_REPLICA_URLS, 1)},
+    max_lag=float(os.getenv("ORBT_REPLICA_MAX_LAG", "5")),
+    unavailable_errors=DB_UNAVAILABLE_ERRORS
+)
+
+# Push feed of errors, escalations and status transitions from one LISTEN
+# connection to SSE/WebSocket subscribers (see orbt/live_feed.py)
+live_feed = LiveFeedHub(queue_size=int(os.getenv("ORBT_LIVE_FEED_QUEUE", "100")))
+LIVE_FEED_KEEPALIVE = 15
+
+# Todo dependency graphs per project, synced from shq.orbt_todo_progress
+# (see orbt/todo_graph.py)
+todo_scheduler = TodoScheduler()
+TODO_SYNC_INTERVAL = 15
+
+# Long-running startup tasks (held so they are not garbage collected)
+background_tasks: List[asyncio.Task] = []
 
 # Pydantic Models for Request/Response
 class ErrorLogEntry(BaseModel):
@@ -23,6 +129,7 @@ class ErrorLogEntry(BaseModel):
     section_number: Optional[str] = None
     project_context: Optional[str] = None
     render_endpoint: Optional[str] = None
+    event_id: Optional[str] = None  # Client-assigned, stable across retries (orbt/agent_client.py)
 
 class AgentMetrics(BaseModel):
     agent_id: str
@@ -45,52 +152,48 @@ class EscalationAlert(BaseModel):
     message: str
     requires_immediate_attention: bool = False
 
+# Doctrine header enforcement: writes without valid unique_id, process_id,
+# agent_signature and blueprint_id are rejected before reaching a handler
+app.add_middleware(
+    DoctrineHeaderMiddleware,
+    validator=DoctrineHeaderValidator(signing_key=os.getenv("DOCTRINE_SIGNING_KEY"))
+)
+
 # ORBT System Status Endpoints
+SYSTEM_STATUS_QUERY = """
+    SELECT 
+        overall_status,
+        active_agents,
+        green_count,
+        yellow_count,
+        red_count,
+        avg_execution_time_ms,
+        escalation_pending,
+        last_error_timestamp,
+        uptime_seconds,
+        updated_at
+    FROM orbt_system_status 
+    WHERE status_id = 'SYSTEM_STATUS_' || TO_CHAR(NOW(), 'YYYY_MM_DD')
+"""
+
 @app.get("/api/orbt/status")
 async def get_orbt_system_status():
     """Get real-time ORBT system status (Universal Rules 1-3)"""
     try:
-        conn = await get_database_connection()
-        
         # Get current system status
-        system_status = await conn.fetchrow("""
-            SELECT 
-                overall_status,
-                active_agents,
-                green_count,
-                yellow_count,
-                red_count,
-                avg_execution_time_ms,
-                escalation_pending,
-                last_error_timestamp,
-                uptime_seconds,
-                updated_at
-            FROM orbt_system_status 
-            WHERE status_id = 'SYSTEM_STATUS_' || TO_CHAR(NOW(), 'YYYY_MM_DD')
-        """)
+        async with read_router.connection() as conn:
+            system_status = await conn.fetchrow(SYSTEM_STATUS_QUERY)
         
         if not system_status:
-            # Initialize system status if not exists
-            await conn.execute("SELECT update_system_status()")
-            system_status = await conn.fetchrow("""
-                SELECT 
-                    overall_status,
-                    active_agents,
-                    green_count,
-                    yellow_count,
-                    red_count,
-                    avg_execution_time_ms,
-                    escalation_pending,
-                    last_error_timestamp,
-                    uptime_seconds,
-                    updated_at
-                FROM orbt_system_status 
-                WHERE status_id = 'SYSTEM_STATUS_' || TO_CHAR(NOW(), 'YYYY_MM_DD')
-            """)
+            # Initialize system status if not exists (a write, so on the primary)
+            conn = await get_database_connection()
+            try:
+                await conn.execute("SELECT update_system_status()")
+                system_status = await conn.fetchrow(SYSTEM_STATUS_QUERY)
+            finally:
+                await conn.close()
         
-        await conn.close()
-        
-        return {
+        return json_bytes_response({
             "system_status": system_status["overall_status"],
             "active_agents": system_status["active_agents"],
             "error_counts": {
@@ -106,9 +209,9 @@ async def get_orbt_system_status():
                 "pending": system_status["escalation_pending"]
             },
             "last_error": system_status["last_error_timestamp"],
-            "last_updated": system_status["updated_at"].isoformat(),
+            "last_updated": system_status["updated_at"],
             "orbt_compliance": "ACTIVE"  # Indicates ORBT system is running
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching system status: {str(e)}")
@@ -123,8 +226,6 @@ async def get_error_log(
 ):
     """Get global error log entries with filtering"""
     try:
-        conn = await get_database_connection()
-        
         # Build query with filters
         where_conditions = ["timestamp >= NOW() - INTERVAL '%s hours'" % hours]
         params = []
@@ -166,72 +267,161 @@ async def get_error_log(
         """
         
         params.append(limit)
-        errors = await conn.fetch(query, *params)
-        
-        await conn.close()
+        # Replica unless this agent's own recent writes are not there yet
+        async with read_router.connection(key=agent_id) as conn:
+            errors = await conn.fetch(query, *params)
         
-        error_list = []
-        for error in errors:
-            error_dict = dict(error)
-            error_dict["timestamp"] = error_dict["timestamp"].isoformat()
-            error_list.append(error_dict)
-        
-        return {
+        # Records are rendered as-is; no per-row conversion
+        return json_bytes_response({
             "status": "success",
-            "count": len(error_list),
+            "count": len(errors),
             "filters": {
                 "status": status,
                 "agent_id": agent_id,
                 "hours": hours,
                 "limit": limit
             },
-            "errors": error_list
-        }
+            "errors": errors
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching error log: {str(e)}")
 
+# Content search over error messages and stacks (GIN full-text / trigram
+# indexes, see orbt/error_search.py)
+@app.get("/api/orbt/errors/search")
+async def search_error_log(
+    q: str = Query(..., min_length=1, max_length=500),
+    mode: str = Query("text", regex="^(text|substring)$"),
+    hours: int = Query(168, le=2160),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    agent_id: Optional[str] = Query(None, description="Comma-separated agent ids"),
+    status: Optional[str] = Query(None, description="Comma-separated GREEN/YELLOW/RED"),
+    limit: int = Query(50, le=200)
+):
+    """Ranked errors matching q in the window, with highlighted snippets"""
+    # Times without an offset are UTC
+    end = end.replace(tzinfo=end.tzinfo or timezone.utc) if end else datetime.now(timezone.utc)
+    start = start.replace(tzinfo=start.tzinfo or timezone.utc) if start else end - timedelta(hours=hours)
+    try:
+        async with read_router.connection() as conn:
+            results = await search_errors(
+                conn, q, mode, start, end, split_filter(agent_id), split_filter(status), limit
+            )
+    except SearchRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error searching error log: {str(e)}")
+    
+    return json_bytes_response({
+        "status": "success",
+        "count": len(results),
+        "query": {"q": q, "mode": mode, "start": start, "end": end, "agent_id": agent_id, "status": status},
+        "results": results
+    })
+
 @app.post("/api/orbt/errors")
 async def log_error(error_data: ErrorLogEntry):
     """Log new error to global system (Universal Rule 4: Centralized logging)"""
+    # A repeat within the dedup window is counted against the row already
+    # written; no database round trip
+    dedup_key = ingest_dedup.key(error_data.agent_id, error_data.error_type, error_data.error_message)
+    repeat = repeat_result(error_data, dedup_key)
+    if repeat is not None:
+        return repeat
+    
+    decision = admission.admit("errors", error_data.agent_id, error_data.project_context)
+    if not decision.admitted:
+        return shed_response(decision)
+    if ingest_spool.should_spool():
+        admission.release()
+        return await spool_error(error_data)
+    started = time.monotonic()
+    failed = False
+    inserted = False
+    
     try:
         conn = await get_database_connection()
         
-        # Generate unique error ID using your 6-position format
-        error_id = await conn.fetchval("SELECT generate_error_id()")
+        # Generate unique error ID using your 6-position format; an event
+        # resent by the client maps to the id of its first attempt
+        if error_data.event_id:
+            error_id = event_error_id(error_data)
+        else:
+            error_id = await conn.fetchval("SELECT generate_error_id()")
         
         # Classify error status based on content
         orbt_status = classify_error_status(error_data.error_message, error_data.error_type)
         
+        # Attach a known fix if one exists (in-memory, no extra query)
+        known_fix = resolution_lookup.lookup(error_data.error_type, error_data.error_message)
+        
+        # Near-duplicate cluster for escalation grouping (in-memory LSH lookup)
+        cluster_id = error_clusters.assign(error_data.error_message, error_data.error_stack)
+        
         # Insert error log entry
         await conn.execute("""
             INSERT INTO orbt_error_log (
                 error_id, orbt_status, agent_id, agent_hierarchy, error_type,
                 error_message, error_stack, doctrine_violated, section_number,
-                project_context, render_endpoint
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11)
+                project_context, render_endpoint, error_cluster_id
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+            ON CONFLICT (error_id) DO NOTHING
         """, 
             error_id, orbt_status, error_data.agent_id, error_data.agent_hierarchy,
             error_data.error_type, error_data.error_message, error_data.error_stack,
             error_data.doctrine_violated, error_data.section_number,
-            error_data.project_context, error_data.render_endpoint
+            error_data.project_context, error_data.render_endpoint, cluster_id
         )
+        inserted = True
+        
+        # Publish a newly created cluster so other processes reuse its id
+        # (kept pending and retried by the refresh loop if this fails)
+        try:
+            await error_clusters.flush(conn)
+        except Exception as e:
+            logger.warning(f"Error cluster flush failed: {str(e)}")
         
         # Update system status
         await conn.execute("SELECT update_system_status()")
         
         await conn.close()
         
+        # This agent's reads stay on the primary until replicas replay the row
+        read_router.note_write(error_data.agent_id)
+        heavy_hitters.record(error_data.agent_id, cluster_id, error_data.error_message[:200])
+        
+        response = {
+            "orbt_status": orbt_status,
+            "escalation_triggered": orbt_status == "RED",
+            "known_fix": known_fix,
+            "cluster_id": cluster_id
+        }
+        ingest_dedup.remember(dedup_key, error_id, response)
+        accept_event(error_data, error_id, response)
+        
         return {
             "status": "logged",
             "error_id": error_id,
-            "orbt_status": orbt_status,
-            "timestamp": datetime.now().isoformat(),
-            "escalation_triggered": orbt_status == "RED"
+            **response,
+            "timestamp": datetime.now().isoformat()
         }
         
+    except DB_UNAVAILABLE_ERRORS as e:
+        failed = True
+        if inserted:
+            raise HTTPException(status_code=500, detail=f"Error logging error: {str(e)}")
+        ingest_spool.trip(f"{type(e).__name__}: {str(e)}")
+        return await spool_error(error_data)
     except Exception as e:
+        failed = True
         raise HTTPException(status_code=500, detail=f"Error logging error: {str(e)}")
+    finally:
+        latency = time.monotonic() - started
+        admission.release(latency, failed)
+        if not failed:
+            ingest_spool.record_write(latency)
 
 # Agent Performance Metrics
 @app.get("/api/orbt/metrics/{agent_id}")
@@ -242,28 +432,27 @@ async def get_agent_metrics(
 ):
     """Get performance metrics for specific agent"""
     try:
-        conn = await get_database_connection()
-        
-        metrics = await conn.fetch("""
-            SELECT 
-                metric_id,
-                agent_type,
-                execution_time_ms,
-                token_usage,
-                memory_usage_mb,
-                cpu_usage_percent,
-                success,
-                error_count,
-                retry_count,
-                operation_type,
-                project_context,
-                timestamp
-            FROM orbt_agent_metrics 
-            WHERE agent_id = $1 
-            AND timestamp >= NOW() - INTERVAL '%s hours'
-            ORDER BY timestamp DESC 
-            LIMIT $2
-        """, agent_id, limit)
+        async with read_router.connection(key=agent_id) as conn:
+            metrics = await conn.fetch("""
+                SELECT 
+                    metric_id,
+                    agent_type,
+                    execution_time_ms,
+                    token_usage,
+                    memory_usage_mb,
+                    cpu_usage_percent,
+                    success,
+                    error_count,
+                    retry_count,
+                    operation_type,
+                    project_context,
+                    timestamp
+                FROM orbt_agent_metrics 
+                WHERE agent_id = $1 
+                AND timestamp >= NOW() - $3 * INTERVAL '1 hour'
+                ORDER BY timestamp DESC 
+                LIMIT $2
+            """, agent_id, limit, hours)
         
         # Calculate summary statistics
         if metrics:
@@ -284,20 +473,12 @@ async def get_agent_metrics(
         else:
             summary = None
         
-        await conn.close()
-        
-        metric_list = []
-        for metric in metrics:
-            metric_dict = dict(metric)
-            metric_dict["timestamp"] = metric_dict["timestamp"].isoformat()
-            metric_list.append(metric_dict)
-        
-        return {
+        return json_bytes_response({
             "status": "success",
             "agent_id": agent_id,
             "summary": summary,
-            "metrics": metric_list
-        }
+            "metrics": metrics
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching agent metrics: {str(e)}")
@@ -305,12 +486,22 @@ async def get_agent_metrics(
 @app.post("/api/orbt/metrics")
 async def log_agent_metrics(metrics_data: AgentMetrics):
     """Log agent performance metrics"""
+    decision = admission.admit("metrics", metrics_data.agent_id, metrics_data.project_context)
+    if not decision.admitted:
+        return shed_response(decision)
+    
+    # Generate unique metric ID
+    metric_id = f"METRIC_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{metrics_data.agent_id}"
+    
+    if ingest_spool.should_spool():
+        admission.release()
+        return await spool_metrics(metric_id, metrics_data)
+    started = time.monotonic()
+    failed = False
+    
     try:
         conn = await get_database_connection()
         
-        # Generate unique metric ID
-        metric_id = f"METRIC_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{metrics_data.agent_id}"
-        
         await conn.execute("""
             INSERT INTO orbt_agent_metrics (
                 metric_id, agent_id, agent_type, execution_time_ms, token_usage,
@@ -328,14 +519,161 @@ async def log_agent_metrics(metrics_data: AgentMetrics):
         
         await conn.close()
         
+        read_router.note_write(metrics_data.agent_id)
+        
         return {
             "status": "logged",
             "metric_id": metric_id,
             "timestamp": datetime.now().isoformat()
         }
         
+    except DB_UNAVAILABLE_ERRORS as e:
+        # A single INSERT, so the row was not written
+        failed = True
+        ingest_spool.trip(f"{type(e).__name__}: {str(e)}")
+        return await spool_metrics(metric_id, metrics_data)
     except Exception as e:
+        failed = True
         raise HTTPException(status_code=500, detail=f"Error logging metrics: {str(e)}")
+    finally:
+        latency = time.monotonic() - started
+        admission.release(latency, failed)
+        if not failed:
+            ingest_spool.record_write(latency)
+
+# Batched ingest (used by orbt/agent_client.py): a gzip or plain JSON array
+# of events (orbt/batch_codec.py) with per-item results. Errors are written
+# with one set-based insert on one connection; each error's id comes from
+# its client event_id, so a batch resent after a client timeout inserts
+# nothing twice. Metrics are handled like single POSTs.
+ERROR_BATCH_INSERT_SQL = """
+    INSERT INTO orbt_error_log (
+        error_id, orbt_status, agent_id, agent_hierarchy, error_type,
+        error_message, error_stack, doctrine_violated, section_number,
+        project_context, render_endpoint, error_cluster_id
+    )
+    SELECT * FROM unnest(
+        $1::VARCHAR[], $2::VARCHAR[], $3::VARCHAR[], $4::VARCHAR[], $5::VARCHAR[],
+        $6::TEXT[], $7::TEXT[], $8::VARCHAR[], $9::VARCHAR[],
+        $10::VARCHAR[], $11::VARCHAR[], $12::VARCHAR[]
+    )
+    ON CONFLICT (error_id) DO NOTHING
+    RETURNING error_id
+"""
+
+@app.post("/api/orbt/errors/batch")
+async def log_error_batch(request: Request):
+    """Log a batch of errors in one insert; one result per event, in order"""
+    events = await read_batch(request)
+    results: List[Optional[Dict[str, Any]]] = [None] * len(events)
+    # (index, error_data, dedup_key, error_id, response) for each row to write
+    rows = []
+    holding_slot = False
+    
+    for index, event in enumerate(events):
+        try:
+            error_data = ErrorLogEntry(**event)
+        except ValidationError as e:
+            results[index] = {"status_code": 422, "detail": str(e)}
+            continue
+        
+        # Only windows opened by earlier requests fold repeats; occurrences
+        # within this batch are each written, so escalation counts stay exact
+        dedup_key = ingest_dedup.key(error_data.agent_id, error_data.error_type, error_data.error_message)
+        repeat = repeat_result(error_data, dedup_key)
+        if repeat is not None:
+            results[index] = batch_item(repeat)
+            continue
+        
+        decision = admission.admit("errors", error_data.agent_id, error_data.project_context)
+        if not decision.admitted:
+            results[index] = batch_item(shed_response(decision))
+            continue
+        # Each event is charged to its agent and project buckets, but the
+        # batch is one database write and holds one concurrency slot
+        if holding_slot:
+            admission.release()
+        holding_slot = True
+        
+        orbt_status = classify_error_status(error_data.error_message, error_data.error_type)
+        response = {
+            "orbt_status": orbt_status,
+            "escalation_triggered": orbt_status == "RED",
+            "known_fix": resolution_lookup.lookup(error_data.error_type, error_data.error_message),
+            "cluster_id": error_clusters.assign(error_data.error_message, error_data.error_stack)
+        }
+        rows.append((index, error_data, dedup_key, event_error_id(error_data), response))
+    
+    if rows and ingest_spool.should_spool():
+        admission.release()
+        await spool_error_rows(rows, results)
+    elif rows:
+        await write_error_rows(rows, results)
+    
+    return batch_response(results)
+
+async def write_error_rows(rows: List[tuple], results: List[Optional[Dict[str, Any]]]):
+    """Insert a batch's rows in one statement and fill in their results"""
+    started = time.monotonic()
+    failed = False
+    try:
+        conn = await get_database_connection()
+        try:
+            columns = list(zip(*(
+                (
+                    error_id, response["orbt_status"], data.agent_id, data.agent_hierarchy,
+                    data.error_type, data.error_message, data.error_stack, data.doctrine_violated,
+                    data.section_number, data.project_context, data.render_endpoint, response["cluster_id"]
+                )
+                for _, data, _, error_id, response in rows
+            )))
+            inserted = {row["error_id"] for row in await conn.fetch(ERROR_BATCH_INSERT_SQL, *columns)}
+            try:
+                await error_clusters.flush(conn)
+            except Exception as e:
+                logger.warning(f"Error cluster flush failed: {str(e)}")
+            await conn.execute("SELECT update_system_status()")
+        finally:
+            await conn.close()
+    except DB_UNAVAILABLE_ERRORS as e:
+        # Spooled with the same error ids, so rows that did commit are not
+        # written twice on replay
+        failed = True
+        ingest_spool.trip(f"{type(e).__name__}: {str(e)}")
+        await spool_error_rows(rows, results)
+        return
+    except Exception as e:
+        failed = True
+        for index, *_ in rows:
+            results[index] = {"status_code": 500, "detail": f"Error logging error: {str(e)}"}
+        return
+    finally:
+        latency = time.monotonic() - started
+        admission.release(latency, failed)
+        if not failed:
+            ingest_spool.record_write(latency)
+    
+    timestamp = datetime.now().isoformat()
+    for index, data, dedup_key, error_id, response in rows:
+        # A resent event the database already had is not a new occurrence
+        if error_id in inserted:
+            ingest_dedup.remember(dedup_key, error_id, response)
+            read_router.note_write(data.agent_id)
+        accept_event(data, error_id, response)
+        heavy_hitters.record(data.agent_id, response["cluster_id"], data.error_message[:200])
+        results[index] = {"status_code": 200, "status": "logged", "error_id": error_id, **response, "timestamp": timestamp}
+
+async def spool_error_rows(rows: List[tuple], results: List[Optional[Dict[str, Any]]]):
+    for index, data, _, error_id, _ in rows:
+        try:
+            results[index] = batch_item(await spool_error(data, error_id))
+        except HTTPException as e:
+            results[index] = {"status_code": e.status_code, "detail": e.detail}
+
+@app.post("/api/orbt/metrics/batch")
+async def log_agent_metrics_batch(request: Request):
+    """Log a batch of agent metrics; one result per event, in order"""
+    return await ingest_batch(request, AgentMetrics, log_agent_metrics)
 
 # Human Escalation (Universal Rule 5)
 @app.post("/api/escalation/human")
@@ -378,76 +716,69 @@ async def trigger_human_escalation(escalation_data: EscalationAlert):
         raise HTTPException(status_code=500, detail=f"Error triggering escalation: {str(e)}")
 
 # DPR Doctrine Integration
+@app.on_event("startup")
+async def load_doctrine_cache():
+    """Load doctrine into memory and subscribe to change notifications"""
+    try:
+        conn = await get_database_connection()
+        try:
+            await doctrine_cache.load(conn)
+        finally:
+            await conn.close()
+        
+        await doctrine_cache.listen(await get_database_connection())
+        
+    except Exception as e:
+        # Cache stays stale and is loaded by the first request instead
+        logger.warning(f"Doctrine cache warm-up failed: {str(e)}")
+
+@app.on_event("shutdown")
+async def close_doctrine_cache():
+    """Release the doctrine notification listener"""
+    await doctrine_cache.close()
+
 @app.get("/api/dpr/doctrine")
 async def get_dpr_doctrine(
+    request: Request,
     category: Optional[str] = None,
     doctrine_type: Optional[str] = None,
     enforcement_level: Optional[str] = None,
+    section_number: Optional[str] = None,
     limit: int = Query(100, le=1000)
 ):
-    """Access DPR doctrine system with filtering"""
+    """Access DPR doctrine system with filtering (served from the in-process cache)"""
     try:
-        conn = await get_database_connection()
+        # Only touches the database when the cache is stale or due a version
+        # check; after a change notification, only replicas that have the change
+        if doctrine_cache.needs_refresh():
+            async with read_router.connection(written_at=doctrine_cache.invalidated_at) as conn:
+                await doctrine_cache.refresh(conn)
         
-        # Build query with filters
-        where_conditions = []
-        params = []
-        
-        if category:
-            where_conditions.append("doctrine_category = $%d" % (len(params) + 1))
-            params.append(category)
-            
-        if doctrine_type:
-            where_conditions.append("doctrine_type = $%d" % (len(params) + 1))
-            params.append(doctrine_type)
-            
-        if enforcement_level:
-            where_conditions.append("enforcement_level = $%d" % (len(params) + 1))
-            params.append(enforcement_level)
-        
-        where_clause = " AND ".join(where_conditions) if where_conditions else "1=1"
-        
-        query = f"""
-            SELECT 
-                id,
-                section_number,
-                section_title,
-                doctrine_text,
-                doctrine_type,
-                enforcement_level,
-                doctrine_category,
-                sub_hive,
-                enforcement_target,
-                enforcement_scope,
-                created_at
-            FROM dpr.dpr_doctrine 
-            WHERE {where_clause}
-            ORDER BY section_number
-            LIMIT ${{len(params) + 1}}
-        """
+        filters = {
+            "category": category,
+            "doctrine_type": doctrine_type,
+            "enforcement_level": enforcement_level,
+            "section_number": section_number,
+            "limit": limit
+        }
         
-        params.append(limit)
-        doctrines = await conn.fetch(query, *params)
+        etag = doctrine_cache.etag(**filters)
+        cache_headers = {"ETag": etag, "Cache-Control": "no-cache"}
         
-        await conn.close()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=cache_headers)
         
-        doctrine_list = []
-        for doctrine in doctrines:
-            doctrine_dict = dict(doctrine)
-            doctrine_dict["created_at"] = doctrine_dict["created_at"].isoformat()
-            doctrine_list.append(doctrine_dict)
+        doctrine_list = doctrine_cache.query(**filters)
         
-        return {
-            "status": "success",
-            "count": len(doctrine_list),
-            "filters": {
-                "category": category,
-                "doctrine_type": doctrine_type,
-                "enforcement_level": enforcement_level,
-                "limit": limit
+        return json_bytes_response(
+            {
+                "status": "success",
+                "count": len(doctrine_list),
+                "filters": filters,
+                "doctrines": doctrine_list
             },
-            "doctrines": doctrine_list
-        }
+            headers=cache_headers
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching doctrines: {str(e)}")
@@ -488,7 +819,516 @@ async def log_training_intervention(training_data: dict = Body(...)):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error logging training: {str(e)}")
 
+# Known-fix lookup refresh
+@app.on_event("startup")
+async def start_resolution_lookup():
+    """Preload known fixes and keep them fresh in the background"""
+    async def refresh_loop():
+        while True:
+            try:
+                conn = await get_database_connection()
+                try:
+                    await resolution_lookup.load(conn)
+                finally:
+                    await conn.close()
+            except Exception as e:
+                logger.warning(f"Resolution lookup refresh failed: {str(e)}")
+            await asyncio.sleep(resolution_lookup.refresh_interval)
+    
+    background_tasks.append(asyncio.create_task(refresh_loop()))
+
+# Error cluster refresh
+@app.on_event("startup")
+async def start_error_clusters():
+    """Load error clusters and pick up clusters created by other processes"""
+    async def refresh_loop():
+        while True:
+            try:
+                conn = await get_database_connection()
+                try:
+                    await error_clusters.refresh(conn)
+                    await error_clusters.flush(conn)
+                    await error_clusters.flush_last_seen(conn)
+                finally:
+                    await conn.close()
+            except Exception as e:
+                logger.warning(f"Error cluster refresh failed: {str(e)}")
+            await asyncio.sleep(ERROR_CLUSTER_REFRESH_INTERVAL)
+    
+    background_tasks.append(asyncio.create_task(refresh_loop()))
+
+# Ingest dedup flush
+@app.on_event("startup")
+async def start_ingest_dedup():
+    """Write deduplicated repeat counts to their rows in the background"""
+    async def flush_loop():
+        while True:
+            try:
+                if not ingest_dedup.has_pending:
+                    ingest_dedup.expire()
+                    await asyncio.sleep(DEDUP_FLUSH_INTERVAL)
+                    continue
+                conn = await get_database_connection()
+                try:
+                    await ingest_dedup.flush(conn)
+                finally:
+                    await conn.close()
+            except Exception as e:
+                logger.warning(f"Ingest dedup flush failed: {str(e)}")
+            await asyncio.sleep(DEDUP_FLUSH_INTERVAL)
+    
+    background_tasks.append(asyncio.create_task(flush_loop()))
+
+@app.on_event("shutdown")
+async def flush_ingest_dedup():
+    """Write repeat counts still pending at shutdown"""
+    if not ingest_dedup.has_pending:
+        return
+    try:
+        conn = await get_database_connection()
+        try:
+            await ingest_dedup.flush(conn)
+        finally:
+            await conn.close()
+    except Exception as e:
+        logger.warning(f"Ingest dedup flush at shutdown failed: {str(e)}")
+
+# Ingest spool replay
+@app.on_event("startup")
+async def start_ingest_spool():
+    """Replay spooled writes once the database is reachable and within budget"""
+    async def replay_loop():
+        while True:
+            if ingest_spool.should_spool():
+                try:
+                    conn = await get_database_connection()
+                    try:
+                        await ingest_spool.replay(conn, write_spooled_batch)
+                    finally:
+                        await conn.close()
+                except Exception as e:
+                    logger.warning(f"Ingest spool replay failed: {str(e)}")
+            await asyncio.sleep(SPOOL_REPLAY_INTERVAL)
+    
+    background_tasks.append(asyncio.create_task(replay_loop()))
+
+@app.on_event("shutdown")
+async def close_ingest_spool():
+    """Sync and close the active spool segment"""
+    ingest_spool.close()
+
+# Live feed listener
+@app.on_event("startup")
+async def start_live_feed():
+    """Hold the LISTEN connection that feeds /api/orbt/stream and /api/orbt/ws"""
+    background_tasks.append(asyncio.create_task(live_feed.run(get_database_connection)))
+
+# Read replica lag checks
+@app.on_event("startup")
+async def start_read_router():
+    """Measure replica replay lag so reads can be routed away from the primary"""
+    if read_router.replicas:
+        background_tasks.append(asyncio.create_task(read_router.run()))
+
+# Todo Scheduling
+@app.on_event("startup")
+async def start_todo_scheduler():
+    """Build todo dependency graphs and apply progress updates in the background"""
+    async def sync_loop():
+        while True:
+            try:
+                conn = await get_database_connection()
+                try:
+                    await todo_scheduler.sync(conn)
+                finally:
+                    await conn.close()
+            except Exception as e:
+                logger.warning(f"Todo scheduler sync failed: {str(e)}")
+            await asyncio.sleep(TODO_SYNC_INTERVAL)
+    
+    background_tasks.append(asyncio.create_task(sync_loop()))
+
+@app.get("/api/orbt/todos/{project_name}/schedule")
+async def get_todo_schedule(
+    project_name: str,
+    limit: int = Query(50, le=500)
+):
+    """Todos ready to start, the critical path and dependency cycles for a project"""
+    graph = todo_scheduler.graph(project_name)
+    if graph is None:
+        raise HTTPException(status_code=404, detail=f"No todos found for project {project_name}")
+    
+    return json_bytes_response({
+        "status": "success",
+        "summary": graph.summary(),
+        "ready": graph.ready()[:limit],
+        "critical_path": graph.critical_path(),
+        "timestamp": datetime.now()
+    })
+
+# Noisiest agents and error patterns, answered from the in-memory sketch
+@app.get("/api/orbt/top")
+async def get_top_offenders(
+    dimension: str = Query("agents", regex="^(agents|patterns)$"),
+    window: str = Query("1h", regex="^(5m|1h|24h)$"),
+    limit: int = Query(10, le=100)
+):
+    """Top agents or error patterns by errors logged in the window (counts are upper bounds)"""
+    return json_bytes_response({
+        "status": "success",
+        **heavy_hitters.top(dimension, window, limit),
+        "timestamp": datetime.now()
+    })
+
+# Ingest admission counters (served from memory, so they stay readable while
+# the database is overloaded)
+@app.get("/api/orbt/admission")
+async def get_admission_stats():
+    """Admitted and shed ingest writes, per endpoint and shed reason"""
+    return {
+        "status": "success",
+        **admission.stats(),
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Bulk export of error/metrics history (server-side COPY, streamed in chunks;
+# see orbt/bulk_export.py and scripts/export-orbt-data.py)
+@app.get("/api/orbt/export/{dataset}")
+async def export_orbt_data(
+    dataset: str,
+    format: str = Query("csv", regex="^(csv|parquet|arrow)$"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns (default: all)"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    agent_id: Optional[str] = Query(None, description="Comma-separated agent ids"),
+    status: Optional[str] = Query(None, description="Comma-separated GREEN/YELLOW/RED (errors)"),
+    error_type: Optional[str] = None,
+    project_context: Optional[str] = None,
+    operation_type: Optional[str] = Query(None, description="Comma-separated operation types (metrics)")
+):
+    """Stream a time range of errors or metrics as CSV, Parquet or Arrow"""
+    filters = {
+        column: values
+        for column, values in (
+            ("agent_id", split_filter(agent_id)),
+            ("orbt_status", split_filter(status)),
+            ("error_type", split_filter(error_type)),
+            ("project_context", split_filter(project_context)),
+            ("operation_type", split_filter(operation_type))
+        )
+        if values
+    }
+    # Column order is kept, so not split_filter()
+    selected = [column.strip() for column in columns.split(",") if column.strip()] if columns else None
+    try:
+        query = build_export_query(dataset, format, selected, start, end, filters)
+    except ExportRequestError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async def chunks():
+        # Exports are reads, so a replica takes them when one is in rotation
+        async with read_router.connection() as conn:
+            try:
+                async for chunk in stream_export(conn, query):
+                    yield chunk
+            except Exception as e:
+                # Headers are already sent; the client sees a truncated body
+                logger.error(f"Export of {dataset} failed mid-stream: {str(e)}")
+                raise
+    
+    filename = f"orbt-{dataset}-{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXTENSIONS[format]}"
+    return StreamingResponse(
+        chunks(),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Live push feed (replaces polling /api/orbt/status and /api/orbt/errors)
+@app.get("/api/orbt/stream")
+async def stream_orbt_events(
+    request: Request,
+    agent_id: Optional[str] = Query(None, description="Comma-separated agent ids"),
+    status: Optional[str] = Query(None, description="Comma-separated GREEN/YELLOW/RED"),
+    types: Optional[str] = Query(None, description="Comma-separated error/escalation/status")
+):
+    """Server-sent events; reconnect with Last-Event-ID to resume"""
+    subscription = live_feed.subscribe(
+        split_filter(agent_id), split_filter(status), split_filter(types),
+        last_event_id=request.headers.get("last-event-id")
+    )
+    
+    async def events():
+        try:
+            yield b"retry: 3000\n\n"
+            while True:
+                event = await subscription.get(LIVE_FEED_KEEPALIVE)
+                if event is None:
+                    if await request.is_disconnected():
+                        return
+                    yield b": keepalive\n\n"
+                    continue
+                yield event.sse
+        except SubscriptionClosed as e:
+            yield f"event: dropped\ndata: {json.dumps({'reason': str(e)})}\n\n".encode("utf-8")
+        finally:
+            subscription.close()
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/api/orbt/ws")
+async def orbt_event_socket(
+    websocket: WebSocket,
+    agent_id: Optional[str] = None,
+    status: Optional[str] = None,
+    types: Optional[str] = None,
+    last_event_id: Optional[str] = None
+):
+    """Same feed as /api/orbt/stream over a WebSocket (JSON text frames)"""
+    await websocket.accept()
+    subscription = live_feed.subscribe(
+        split_filter(agent_id), split_filter(status), split_filter(types), last_event_id=last_event_id
+    )
+    try:
+        while True:
+            event = await subscription.get(LIVE_FEED_KEEPALIVE)
+            if event is None:
+                await websocket.send_text('{"type":"keepalive"}')
+                continue
+            await websocket.send_text(event.json)
+    except SubscriptionClosed as e:
+        # 1013: try again later (the client fell too far behind)
+        await websocket.close(code=1013, reason=str(e))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
 # Helper Functions
+def json_bytes_response(payload: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Render payload straight to JSON bytes (see orbt/fast_json.py), skipping jsonable_encoder"""
+    return Response(
+        content=render_json(payload),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+def shed_response(decision: AdmissionDecision) -> JSONResponse:
+    """429 for a write shed by admission control, with a retry hint"""
+    overloaded = decision.reason == "concurrency"
+    return JSONResponse(
+        status_code=429,
+        headers={"Retry-After": decision.retry_after_header},
+        content={
+            "status": "REJECTED",
+            "error": {
+                "code": "OVERLOADED" if overloaded else "RATE_LIMITED",
+                "message": "Database write capacity exhausted" if overloaded
+                           else f"Rate limit exceeded ({decision.reason})",
+                "reason": decision.reason,
+                "retry_after_seconds": round(decision.retry_after, 3)
+            }
+        }
+    )
+
+async def read_batch(request: Request) -> List[Dict[str, Any]]:
+    try:
+        return decode_batch(await request.body(), request.headers.get("content-encoding"))
+    except BatchDecodeError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def batch_item(result) -> Dict[str, Any]:
+    """Per-event batch result from a single-event handler's return value"""
+    if isinstance(result, JSONResponse):
+        return {"status_code": result.status_code, **json.loads(result.body)}
+    return {"status_code": 200, **result}
+
+async def ingest_batch(request: Request, model, handler) -> Dict[str, Any]:
+    """Run each event of a batch body through the single-event handler"""
+    events = await read_batch(request)
+    
+    results = []
+    for event in events:
+        try:
+            result = await handler(model(**event))
+        except ValidationError as e:
+            results.append({"status_code": 422, "detail": str(e)})
+            continue
+        except HTTPException as e:
+            results.append({"status_code": e.status_code, "detail": e.detail})
+            continue
+        results.append(batch_item(result))
+    
+    return batch_response(results)
+
+def batch_response(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    return {
+        "status": "processed",
+        "accepted": sum(1 for result in results if result["status_code"] < 300),
+        "results": results,
+        "timestamp": datetime.now().isoformat()
+    }
+
+# Error ids assigned before the row reaches the database keep the 6-position
+# format under their own tool code, so generate_error_id()'s sequence never
+# hands out the same id; the step is random rather than sequential. Kept to
+# 42 characters so 'ESC-' || error_id still fits escalation_id VARCHAR(50).
+INGEST_ERROR_ID_PREFIX = "01.99.01.02.25000."
+
+def ingest_error_id() -> str:
+    return INGEST_ERROR_ID_PREFIX + uuid.uuid4().hex[:24]
+
+def event_error_id(error_data: ErrorLogEntry) -> str:
+    """error_id for an incoming error: derived from its client event_id when it has one"""
+    if not error_data.event_id:
+        return ingest_error_id()
+    digest = hashlib.sha1(f"{error_data.agent_id}\n{error_data.event_id}".encode("utf-8")).hexdigest()
+    return INGEST_ERROR_ID_PREFIX + digest[:24]
+
+def accept_event(error_data: ErrorLogEntry, error_id: str, response: Dict[str, Any]):
+    """Remember an accepted client event so a resend gets the same answer"""
+    if error_data.event_id:
+        ingest_dedup.accept(event_error_id(error_data), error_id, response)
+
+def repeat_result(error_data: ErrorLogEntry, dedup_key) -> Optional[Dict[str, Any]]:
+    """Response for an error that needs no insert: a resent event, or a repeat folded by the dedup window"""
+    if error_data.event_id:
+        accepted = ingest_dedup.replayed(event_error_id(error_data))
+        if accepted is not None:
+            error_id, response = accepted
+            return {"status": "logged", "error_id": error_id, **response,
+                    "timestamp": datetime.now().isoformat(), "resent": True}
+    
+    repeat = ingest_dedup.hit(dedup_key)
+    if repeat is None:
+        return None
+    heavy_hitters.record(error_data.agent_id, repeat.response["cluster_id"], error_data.error_message[:200])
+    accept_event(error_data, repeat.error_id, repeat.response)
+    return {
+        "status": "logged",
+        "error_id": repeat.error_id,
+        **repeat.response,
+        "timestamp": datetime.now().isoformat(),
+        "deduplicated": True,
+        "occurrence_count": repeat.occurrences
+    }
+
+async def spool_error(error_data: ErrorLogEntry, error_id: Optional[str] = None) -> JSONResponse:
+    """Accept an error into the local spool (202); it is written on replay"""
+    # The id is fixed here so a batch replayed twice (crash between commit
+    # and cursor advance) inserts each error once, not as a second occurrence
+    error_id = error_id or event_error_id(error_data)
+    orbt_status = classify_error_status(error_data.error_message, error_data.error_type)
+    known_fix = resolution_lookup.lookup(error_data.error_type, error_data.error_message)
+    cluster_id = error_clusters.assign(error_data.error_message, error_data.error_stack)
+    try:
+        receipt = await ingest_spool.append("error", {
+            **error_data.dict(),
+            "error_id": error_id,
+            "orbt_status": orbt_status,
+            "error_cluster_id": cluster_id
+        })
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error spooling error: {str(e)}")
+    
+    heavy_hitters.record(error_data.agent_id, cluster_id, error_data.error_message[:200])
+    response = {
+        "status": "spooled",
+        "orbt_status": orbt_status,
+        "escalation_triggered": orbt_status == "RED",
+        "known_fix": known_fix,
+        "cluster_id": cluster_id
+    }
+    accept_event(error_data, error_id, response)
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            **response,
+            "spool_receipt": receipt,
+            "error_id": error_id,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+async def spool_metrics(metric_id: str, metrics_data: AgentMetrics) -> JSONResponse:
+    """Accept metrics into the local spool (202); they are written on replay"""
+    # The generated id has one-second resolution, so two metrics from an agent
+    # in the same second would share it and the second would be dropped by
+    # ON CONFLICT on replay. A spool-time suffix makes each record's id unique
+    # (ahead of the agent id, which is cut to fit VARCHAR(50)); the conflict
+    # clause then only skips a record replayed twice.
+    metric_id = f"{metric_id[:len('METRIC_YYYYmmdd_HHMMSS')]}_{uuid.uuid4().hex[:8]}_{metrics_data.agent_id}"[:50]
+    try:
+        receipt = await ingest_spool.append("metric", {**metrics_data.dict(), "metric_id": metric_id})
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Error spooling metrics: {str(e)}")
+    
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "spooled",
+            "spool_receipt": receipt,
+            "metric_id": metric_id,
+            "timestamp": datetime.now().isoformat()
+        }
+    )
+
+async def write_spooled_batch(conn, kind: str, records: List[Dict[str, Any]]):
+    """Bulk insert one batch of spooled records, keeping their original timestamps"""
+    async with conn.transaction():
+        if kind == "error":
+            # error_id is assigned at spool time (spool_error), so a conflict
+            # here is only this record being replayed again
+            await conn.executemany("""
+                INSERT INTO orbt_error_log (
+                    error_id, timestamp, orbt_status, agent_id, agent_hierarchy, error_type,
+                    error_message, error_stack, doctrine_violated, section_number,
+                    project_context, render_endpoint, error_cluster_id
+                ) VALUES (COALESCE($13, generate_error_id()), $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
+                ON CONFLICT (error_id) DO NOTHING
+            """, [
+                (
+                    datetime.fromtimestamp(record["ts"], timezone.utc), data["orbt_status"],
+                    data["agent_id"], data["agent_hierarchy"], data["error_type"],
+                    data["error_message"], data["error_stack"], data["doctrine_violated"],
+                    data["section_number"], data["project_context"], data["render_endpoint"],
+                    data["error_cluster_id"],
+                    # Records spooled before ids were assigned at spool time have none
+                    data.get("error_id")
+                )
+                for record in records
+                for data in (record["data"],)
+            ])
+            await conn.execute("SELECT update_system_status()")
+        elif kind == "metric":
+            # metric_id is made unique at spool time (spool_metrics), so a
+            # conflict here is only this record being replayed again
+            await conn.executemany("""
+                INSERT INTO orbt_agent_metrics (
+                    metric_id, timestamp, agent_id, agent_type, execution_time_ms, token_usage,
+                    memory_usage_mb, cpu_usage_percent, success, error_count, retry_count,
+                    project_context, render_endpoint, operation_type
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14)
+                ON CONFLICT (metric_id) DO NOTHING
+            """, [
+                (
+                    data["metric_id"], datetime.fromtimestamp(record["ts"], timezone.utc),
+                    data["agent_id"], data["agent_type"], data["execution_time_ms"],
+                    data["token_usage"], data["memory_usage_mb"], data["cpu_usage_percent"],
+                    data["success"], data["error_count"], data["retry_count"],
+                    data["project_context"], data["render_endpoint"], data["operation_type"]
+                )
+                for record in records
+                for data in (record["data"],)
+            ])
+        else:
+            raise ValueError(f"Unknown spooled record kind {kind!r}")
+
 def classify_error_status(error_message: str, error_type: str) -> str:
     """Classify error into GREEN/YELLOW/RED based on content"""
     error_msg_lower = error_message.lower()
@@ -550,6 +1390,12 @@ async def orbt_health_check():
             "orbt_system": "operational",
             "database_connection": "ok",
             "tables_initialized": tables_exist >= 3,
+            "resolution_lookup": resolution_lookup.stats(),
+            "ingest_dedup": ingest_dedup.stats(),
+            "admission": admission.stats(),
+            "ingest_spool": ingest_spool.stats(),
+            "live_feed": live_feed.stats(),
+            "read_routing": read_router.stats(),
             "timestamp": datetime.now().isoformat()
         }
         
@@ -559,6 +1405,7 @@ async def orbt_health_check():
             content={
                 "status": "unhealthy",
                 "error": str(e),
+                "ingest_spool": ingest_spool.stats(),
                 "timestamp": datetime.now().isoformat()
             }
         )
\ No newline at end of file
@@ -6,22 +6,30 @@ import asyncpg
 import json
 import smtplib
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from typing import Dict, List, Optional
 import logging
 import os
+import sys
+import time
+import uuid
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('orbt_escalation.log'),
-        logging.StreamHandler()
-    ]
-)
+# Shared ORBT modules live in the orbt package at the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.agent_catalog import load_catalog
+from orbt.anomaly_detection import RateAnomalyDetector, agent_key, pattern_key
+from orbt.archive_tier import ArchiveTier
+from orbt.auto_resolution import AUTO_RESOLVABLE_PATTERNS_QUERY, AutoResolutionExecutor
+from orbt.cascade_correlation import CascadeCorrelator
+from orbt.error_clustering import ErrorClusterIndex
+from orbt.resolution_lookup import ResolutionLookup
+from orbt.structured_logging import configure_logging, log_context
+from orbt.todo_rules import TodoRuleEngine
+
+# Handlers are installed by main() (configure_logging), not at import
 logger = logging.getLogger(__name__)
 
 class ORBTEscalationSystem:
@@ -32,7 +40,7 @@ class ORBTEscalationSystem:
     - Rule 5: 2+ occurrences trigger human escalation
     """
     
-    def __init__(self, database_url: str):
+    def __init__(self, database_url: str, auto_resolution_workers: int = 4, cascade_window_seconds: int = 600):
         self.database_url = database_url
         self.notification_channels = {
             "slack": os.getenv("SLACK_WEBHOOK_URL"),
@@ -47,6 +55,36 @@ class ORBTEscalationSystem:
             "webhook": os.getenv("ESCALATION_WEBHOOK_URL")
         }
         
+        # Known fixes attached to escalations without per-escalation queries
+        self.resolution_lookup = ResolutionLookup()
+        
+        # Handlers for patterns with auto_resolution_available, tried before
+        # human escalation (register via self.auto_resolver.handler(...))
+        self.auto_resolver = AutoResolutionExecutor(max_workers=auto_resolution_workers)
+        
+        # orbt_todo_generation_rules evaluated against new errors/escalations;
+        # rules limited to project types need ORBT_PROJECT_TYPES, a JSON map
+        # of project_context to type ({"HEIR-SYSTEM": "heir_project"})
+        self.todo_engine = TodoRuleEngine(project_types=json.loads(os.getenv("ORBT_PROJECT_TYPES", "{}")))
+        
+        # Agent tiers and delegation graph (compiled once, cached on disk)
+        self.agent_catalog = load_catalog()
+        
+        # Near-duplicate clusters, for errors written without a cluster id
+        self.error_clusters = ErrorClusterIndex()
+        
+        # Patterns from one incident across hierarchy layers escalate once
+        self.cascade_correlator = CascadeCorrelator(self.agent_catalog, window_seconds=cascade_window_seconds)
+        
+        # Error-rate baselines per agent and pattern, fed from new error log
+        # rows each cycle; the anomaly score feeds calculate_priority
+        self.anomaly_detector = RateAnomalyDetector()
+        self.rate_cursor = 0
+        
+        # Aged rows move to compressed local segments instead of being deleted
+        # (query them with scripts/query-archive.py)
+        self.archive = ArchiveTier(os.getenv("ORBT_ARCHIVE_DIR", "orbt_archive"))
+        
     async def monitor_and_escalate(self, check_interval: int = 300):
         """
         Main monitoring loop - runs every 5 minutes by default
@@ -55,30 +93,56 @@ class ORBTEscalationSystem:
         logger.info("Starting ORBT Escalation System monitoring...")
         
         while True:
-            try:
-                await self.check_for_escalations()
-                await self.process_pending_escalations()
-                await self.update_system_health()
-                await self.cleanup_old_entries()
-                
-                logger.info(f"Monitoring cycle completed. Next check in {check_interval} seconds.")
-                await asyncio.sleep(check_interval)
-                
-            except Exception as e:
-                logger.error(f"Error in monitoring loop: {str(e)}")
-                await asyncio.sleep(60)  # Wait 1 minute before retry
+            # Every record logged during the cycle carries its cycle_id
+            with log_context(cycle_id=uuid.uuid4().hex[:12]):
+                started = time.monotonic()
+                try:
+                    await self.check_for_escalations()
+                    await self.generate_todos()
+                    await self.process_pending_escalations()
+                    await self.update_system_health()
+                    await self.cleanup_old_entries()
+                    
+                    logger.info(f"Monitoring cycle completed. Next check in {check_interval} seconds.",
+                                extra={"cycle_ms": round((time.monotonic() - started) * 1000, 1)})
+                    logger.info(f"Resolution lookup stats: {self.resolution_lookup.stats()}")
+                    retry_in = check_interval
+                    
+                except Exception as e:
+                    logger.error(f"Error in monitoring loop: {str(e)}", exc_info=True)
+                    retry_in = 60  # Wait 1 minute before retry
+            await asyncio.sleep(retry_in)
     
     async def check_for_escalations(self):
         """Check for errors that need escalation (Universal Rule 5)"""
         conn = await asyncpg.connect(self.database_url)
         
         try:
-            # Find error patterns that occurred 2+ times in last 24 hours
+            try:
+                await self.resolution_lookup.refresh(conn)
+            except Exception as e:
+                logger.warning(f"Resolution lookup refresh failed: {str(e)}")
+            
+            try:
+                await self.assign_error_clusters(conn)
+            except Exception as e:
+                logger.warning(f"Error cluster assignment failed: {str(e)}")
+            
+            try:
+                await self.update_error_rates(conn)
+            except Exception as e:
+                logger.warning(f"Error rate update failed: {str(e)}")
+            
+            # Find error patterns that occurred 2+ times in last 24 hours;
+            # near-duplicates share a cluster, exact text is the fallback, and
+            # each row stands for itself plus the repeats ingest folded into it
             escalation_candidates = await conn.fetch("""
                 SELECT 
-                    error_message,
+                    (array_agg(error_message ORDER BY timestamp DESC))[1] as error_message,
+                    MAX(error_cluster_id) as error_cluster_id,
                     agent_id,
-                    COUNT(*) as occurrence_count,
+                    MAX(error_type) as error_type,
+                    SUM(1 + repeat_count) as occurrence_count,
                     MAX(error_id) as latest_error_id,
                     MAX(timestamp) as latest_occurrence,
                     MIN(timestamp) as first_occurrence,
@@ -88,82 +152,274 @@ class ORBTEscalationSystem:
                     timestamp >= NOW() - INTERVAL '24 hours'
                     AND requires_human = FALSE
                     AND resolved = FALSE
-                GROUP BY error_message, agent_id
-                HAVING COUNT(*) >= 2
+                GROUP BY COALESCE(error_cluster_id, error_message), agent_id
+                HAVING SUM(1 + repeat_count) >= 2
             """)
             
-            for candidate in escalation_candidates:
-                await self.create_escalation(conn, candidate)
+            # Known recurring errors get one automatic fix attempt first
+            escalation_candidates = await self.attempt_auto_resolution(conn, escalation_candidates)
+            
+            for group in self.cascade_correlator.correlate(escalation_candidates):
+                if group.escalation_id:
+                    await self.link_to_escalation(conn, group.escalation_id, group.children)
+                    self.cascade_correlator.remember(group, group.escalation_id)
+                else:
+                    escalation_id = await self.create_escalation(conn, group.root, group.children)
+                    self.cascade_correlator.remember(group, escalation_id)
                 
         finally:
             await conn.close()
     
-    async def create_escalation(self, conn, error_pattern):
-        """Create escalation entry for recurring error pattern"""
-        escalation_id = f"ESC_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{error_pattern['agent_id'][:8]}"
+    async def assign_error_clusters(self, conn, batch_size: int = 1000):
+        """Cluster recent errors that were logged without a cluster id"""
+        await self.error_clusters.refresh(conn)
         
-        # Determine priority based on occurrence count and agent type
-        priority = self.calculate_priority(
-            error_pattern['occurrence_count'],
-            error_pattern['agent_id']
-        )
+        while True:
+            rows = await conn.fetch("""
+                SELECT id, error_message, error_stack
+                FROM orbt_error_log 
+                WHERE 
+                    error_cluster_id IS NULL
+                    AND timestamp >= NOW() - INTERVAL '24 hours'
+                ORDER BY id
+                LIMIT $1
+            """, batch_size)
+            if not rows:
+                break
+            
+            assignments = [
+                (row['id'], self.error_clusters.assign(row['error_message'], row['error_stack']))
+                for row in rows
+            ]
+            await self.error_clusters.flush(conn)
+            await self.error_clusters.flush_last_seen(conn)
+            await conn.executemany(
+                "UPDATE orbt_error_log SET error_cluster_id = $2 WHERE id = $1",
+                assignments
+            )
+            if len(rows) < batch_size:
+                break
+    
+    async def update_error_rates(self, conn, batch_size: int = 5000):
+        """Feed errors logged since the last cycle to the rate anomaly detector"""
+        while True:
+            rows = await conn.fetch("""
+                SELECT id, agent_id, error_type, error_message, error_cluster_id, repeat_count, timestamp
+                FROM orbt_error_log 
+                WHERE 
+                    id > $1
+                    AND timestamp >= NOW() - INTERVAL '24 hours'
+                ORDER BY id
+                LIMIT $2
+            """, self.rate_cursor, batch_size)
+            
+            for row in rows:
+                observed_at = row['timestamp'].timestamp()
+                occurrences = 1 + row['repeat_count']
+                self.anomaly_detector.observe(agent_key(row['agent_id']), observed_at, occurrences)
+                self.anomaly_detector.observe(
+                    pattern_key(row['error_cluster_id'], row['error_type'], row['error_message']),
+                    observed_at,
+                    occurrences
+                )
+            if rows:
+                self.rate_cursor = rows[-1]['id']
+            if len(rows) < batch_size:
+                break
         
-        # Create escalation queue entry
-        await conn.execute("""
-            INSERT INTO orbt_escalation_queue (
-                escalation_id, error_id, priority, status, escalated_by,
-                escalated_at, due_at
-            ) VALUES ($1, $2, $3, 'PENDING', 'SYSTEM_AUTO', $4, $5)
-        """,
-            escalation_id,
-            error_pattern['latest_error_id'],
-            priority,
-            datetime.now(),
-            datetime.now() + timedelta(hours=self.get_response_time_hours(priority))
-        )
+        for key, score in self.anomaly_detector.anomalies()[:10]:
+            logger.warning(f"Error rate anomaly: {key} (score {score:.1f})")
+    
+    def anomaly_score(self, error_pattern) -> Optional[float]:
+        """Highest rate anomaly score of a pattern's agent and pattern, if either has a baseline"""
+        scores = [
+            score for score in (
+                self.anomaly_detector.score(agent_key(error_pattern['agent_id'])),
+                self.anomaly_detector.score(pattern_key(
+                    error_pattern.get('error_cluster_id'),
+                    error_pattern.get('error_type'),
+                    error_pattern['error_message']
+                ))
+            )
+            if score is not None
+        ]
+        return max(scores) if scores else None
+    
+    async def attempt_auto_resolution(self, conn, escalation_candidates):
+        """Run registered handlers for auto-resolvable patterns; return what still needs escalation"""
+        if not self.auto_resolver or not escalation_candidates:
+            return escalation_candidates
         
-        # Mark all related errors as escalated
-        for error_id in error_pattern['all_error_ids']:
-            await conn.execute("""
-                UPDATE orbt_error_log 
-                SET 
-                    requires_human = TRUE,
-                    escalation_level = 2,
-                    orbt_status = 'RED'
-                WHERE error_id = $1
-            """, error_id)
+        patterns = await conn.fetch(AUTO_RESOLVABLE_PATTERNS_QUERY)
+        jobs = self.auto_resolver.plan(escalation_candidates, patterns)
+        if not jobs:
+            return escalation_candidates
         
-        # Create escalation notification
-        escalation_data = {
-            "escalation_id": escalation_id,
-            "priority": priority,
-            "error_pattern": {
-                "message": error_pattern['error_message'],
-                "agent_id": error_pattern['agent_id'],
-                "occurrence_count": error_pattern['occurrence_count'],
-                "first_occurrence": error_pattern['first_occurrence'].isoformat(),
-                "latest_occurrence": error_pattern['latest_occurrence'].isoformat(),
-                "error_ids": error_pattern['all_error_ids']
-            },
-            "created_at": datetime.now().isoformat()
-        }
+        outcomes = await self.auto_resolver.run_all(jobs)
+        
+        resolved_ids = set()
+        for (candidate, pattern, handler), outcome in zip(jobs, outcomes):
+            if outcome["success"]:
+                resolved_ids.add(id(candidate))
+                await conn.execute("""
+                    UPDATE orbt_error_log 
+                    SET 
+                        resolved = TRUE,
+                        resolved_timestamp = NOW(),
+                        resolution_method = 'auto-resolution',
+                        resolution_notes = $2,
+                        updated_at = NOW()
+                    WHERE error_id = ANY($1)
+                """, candidate['all_error_ids'], outcome["notes"] or f"Resolved by {handler.name}")
+            
+            # Record outcome either way (Universal Rule 6)
+            await self.log_training_intervention(conn, {
+                "intervention_type": "auto_resolution",
+                "agent_id": candidate['agent_id'],
+                "problem_description": f"Error pattern detected: {candidate['error_message']}",
+                "solution_applied": f"Auto-resolution handler {handler.name}: {outcome['notes'] or 'completed'}",
+                "success": outcome["success"],
+                "recurring_issue": True,
+                "pattern_recognized": True,
+                "resolution_time_seconds": int(round(outcome["duration_seconds"])),
+                "error_id": candidate['latest_error_id']
+            })
         
-        # Send notifications
-        await self.send_escalation_notifications(escalation_data)
+        logger.info(f"Auto-resolution: {len(resolved_ids)} of {len(jobs)} matched patterns resolved")
+        
+        return [c for c in escalation_candidates if id(c) not in resolved_ids]
+    
+    async def create_escalation(self, conn, error_pattern, linked_patterns=()) -> str:
+        """Create escalation entry for recurring error pattern (plus any cascaded patterns)"""
+        escalation_id = f"ESC_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{error_pattern['agent_id'][:8]}"
         
-        logger.info(f"Created escalation {escalation_id} for error pattern: {error_pattern['error_message'][:50]}...")
+        with log_context(escalation_id=escalation_id):
+            # Determine priority based on occurrence count and agent type; a
+            # cascade takes the most urgent priority of any layer it reached
+            anomaly_score = self.anomaly_score(error_pattern)
+            priority = min(
+                (self.calculate_priority(p['occurrence_count'], p['agent_id'],
+                                         anomaly_score if p is error_pattern else self.anomaly_score(p))
+                 for p in [error_pattern, *linked_patterns]),
+                key=self.get_response_time_hours
+            )
+            
+            # Create escalation queue entry
+            await conn.execute("""
+                INSERT INTO orbt_escalation_queue (
+                    escalation_id, error_id, priority, status, escalated_by,
+                    escalated_at, due_at
+                ) VALUES ($1, $2, $3, 'PENDING', 'SYSTEM_AUTO', $4, $5)
+            """,
+                escalation_id,
+                error_pattern['latest_error_id'],
+                priority,
+                datetime.now(),
+                datetime.now() + timedelta(hours=self.get_response_time_hours(priority))
+            )
+            
+            # Mark all related errors as escalated
+            await self.mark_escalated(conn, [error_pattern, *linked_patterns])
+            
+            known_fix = self.resolution_lookup.lookup(
+                error_pattern['error_type'],
+                error_pattern['error_message']
+            )
+            
+            # Create escalation notification
+            escalation_data = {
+                "escalation_id": escalation_id,
+                "priority": priority,
+                "error_pattern": {
+                    "message": error_pattern['error_message'],
+                    "agent_id": error_pattern['agent_id'],
+                    "occurrence_count": error_pattern['occurrence_count'],
+                    "first_occurrence": error_pattern['first_occurrence'].isoformat(),
+                    "latest_occurrence": error_pattern['latest_occurrence'].isoformat(),
+                    "error_ids": error_pattern['all_error_ids']
+                },
+                "known_fix": known_fix,
+                "anomaly_score": round(anomaly_score, 2) if anomaly_score is not None else None,
+                "agent_level": self.agent_catalog.level(error_pattern['agent_id']),
+                "escalation_chain": self.agent_catalog.escalation_chain(error_pattern['agent_id']),
+                "linked_patterns": [
+                    {
+                        "message": p['error_message'],
+                        "agent_id": p['agent_id'],
+                        "occurrence_count": p['occurrence_count'],
+                        "first_occurrence": p['first_occurrence'].isoformat(),
+                        "error_ids": p['all_error_ids']
+                    }
+                    for p in linked_patterns
+                ],
+                "created_at": datetime.now().isoformat()
+            }
+            
+            # Send notifications
+            await self.send_escalation_notifications(escalation_data)
+            
+            logger.info(f"Created escalation {escalation_id} for error pattern: {error_pattern['error_message'][:50]}...")
+            
+            # Record training log entry (Universal Rule 6)
+            await self.log_training_intervention(conn, {
+                "intervention_type": "auto_escalation",
+                "agent_id": error_pattern['agent_id'],
+                "problem_description": f"Error pattern detected: {error_pattern['error_message']}",
+                "solution_applied": f"Escalated to human review (Priority: {priority})",
+                "success": True,
+                "recurring_issue": True,
+                "pattern_recognized": True,
+                "error_id": error_pattern['latest_error_id']
+            })
+            
+            return escalation_id
+    
+    async def link_to_escalation(self, conn, escalation_id: str, linked_patterns):
+        """Attach patterns that cascaded from an already escalated root; no new notification"""
+        with log_context(escalation_id=escalation_id):
+            await self.mark_escalated(conn, linked_patterns)
+            
+            for pattern in linked_patterns:
+                logger.info(f"Linked error pattern from {pattern['agent_id']} to escalation {escalation_id}")
+                await self.log_training_intervention(conn, {
+                    "intervention_type": "auto_escalation",
+                    "agent_id": pattern['agent_id'],
+                    "problem_description": f"Error pattern detected: {pattern['error_message']}",
+                    "solution_applied": f"Linked to cascading escalation {escalation_id}",
+                    "success": True,
+                    "recurring_issue": True,
+                    "pattern_recognized": True,
+                    "error_id": pattern['latest_error_id']
+                })
+    
+    async def mark_escalated(self, conn, error_patterns):
+        """Flag every error in the given patterns for human review"""
+        await conn.execute("""
+            UPDATE orbt_error_log 
+            SET 
+                requires_human = TRUE,
+                escalation_level = 2,
+                orbt_status = 'RED'
+            WHERE error_id = ANY($1)
+        """, [error_id for p in error_patterns for error_id in p['all_error_ids']])
+    
+    async def generate_todos(self):
+        """Create project todos from generation rules for new errors and escalations"""
+        conn = await asyncpg.connect(self.database_url)
         
-        # Record training log entry (Universal Rule 6)
-        await self.log_training_intervention(conn, {
-            "intervention_type": "auto_escalation",
-            "agent_id": error_pattern['agent_id'],
-            "problem_description": f"Error pattern detected: {error_pattern['error_message']}",
-            "solution_applied": f"Escalated to human review (Priority: {priority})",
-            "success": True,
-            "recurring_issue": True,
-            "pattern_recognized": True,
-            "error_id": error_pattern['latest_error_id']
-        })
+        try:
+            created = 0
+            while True:
+                result = await self.todo_engine.run_batch(conn)
+                created += result["created"]
+                if max(result["errors"], result["escalations"]) < self.todo_engine.batch_size:
+                    break
+            
+            if created:
+                logger.info(f"Generated {created} project todos from {self.todo_engine.rule_count} rules")
+                
+        finally:
+            await conn.close()
     
     async def process_pending_escalations(self):
         """Process escalations that are due for action"""
@@ -196,31 +452,32 @@ class ORBTEscalationSystem:
     
     async def handle_overdue_escalation(self, conn, escalation):
         """Handle escalations that haven't been addressed within SLA"""
-        logger.warning(f"Escalation {escalation['escalation_id']} is overdue!")
-        
-        # Increase priority for overdue escalations
-        new_priority = self.escalate_priority(escalation['priority'])
-        
-        await conn.execute("""
-            UPDATE orbt_escalation_queue 
-            SET 
-                priority = $1,
-                due_at = $2,
-                updated_at = NOW()
-            WHERE escalation_id = $3
-        """,
-            new_priority,
-            datetime.now() + timedelta(hours=self.get_response_time_hours(new_priority)),
-            escalation['escalation_id']
-        )
-        
-        # Send urgent notification
-        await self.send_urgent_notification({
-            "escalation_id": escalation['escalation_id'],
-            "original_priority": escalation['priority'],
-            "new_priority": new_priority,
-            "overdue_hours": (datetime.now() - escalation['due_at']).total_seconds() / 3600
-        })
+        with log_context(escalation_id=escalation['escalation_id']):
+            logger.warning(f"Escalation {escalation['escalation_id']} is overdue!")
+            
+            # Increase priority for overdue escalations
+            new_priority = self.escalate_priority(escalation['priority'])
+            
+            await conn.execute("""
+                UPDATE orbt_escalation_queue 
+                SET 
+                    priority = $1,
+                    due_at = $2,
+                    updated_at = NOW()
+                WHERE escalation_id = $3
+            """,
+                new_priority,
+                datetime.now() + timedelta(hours=self.get_response_time_hours(new_priority)),
+                escalation['escalation_id']
+            )
+            
+            # Send urgent notification
+            await self.send_urgent_notification({
+                "escalation_id": escalation['escalation_id'],
+                "original_priority": escalation['priority'],
+                "new_priority": new_priority,
+                "overdue_hours": (datetime.now() - escalation['due_at']).total_seconds() / 3600
+            })
     
     async def update_system_health(self):
         """Update system health status based on current state"""
@@ -234,7 +491,7 @@ class ORBTEscalationSystem:
             health_check = await conn.fetchrow("""
                 SELECT 
                     (SELECT COUNT(*) FROM orbt_escalation_queue WHERE status = 'PENDING') as pending_escalations,
-                    (SELECT COUNT(*) FROM orbt_error_log WHERE orbt_status = 'RED' AND timestamp >= NOW() - INTERVAL '1 hour') as recent_critical_errors,
+                    (SELECT COALESCE(SUM(1 + repeat_count), 0) FROM orbt_error_log WHERE orbt_status = 'RED' AND timestamp >= NOW() - INTERVAL '1 hour') as recent_critical_errors,
                     (SELECT COUNT(*) FROM orbt_agent_metrics WHERE success = false AND timestamp >= NOW() - INTERVAL '1 hour') as recent_failures,
                     (SELECT AVG(execution_time_ms) FROM orbt_agent_metrics WHERE timestamp >= NOW() - INTERVAL '1 hour') as avg_performance
             """)
@@ -250,56 +507,69 @@ class ORBTEscalationSystem:
             await conn.close()
     
     async def cleanup_old_entries(self):
-        """Clean up old entries to maintain performance"""
+        """Move old entries to the archive tier to keep the hot tables small"""
         conn = await asyncpg.connect(self.database_url)
+        now = datetime.now(timezone.utc)
         
         try:
-            # Archive old resolved escalations (older than 30 days)
-            deleted_escalations = await conn.execute("""
-                DELETE FROM orbt_escalation_queue 
-                WHERE status = 'RESOLVED' 
-                AND resolved_at < NOW() - INTERVAL '30 days'
-            """)
+            # Resolved escalations first (older than 30 days), so the errors
+            # they reference can age out too
+            archived_escalations = await self.archive.archive(
+                conn, "orbt_escalation_queue", now - timedelta(days=30)
+            )
             
-            # Archive old error logs (older than 90 days, keep only critical ones)
-            deleted_errors = await conn.execute("""
-                DELETE FROM orbt_error_log 
-                WHERE timestamp < NOW() - INTERVAL '90 days'
-                AND orbt_status != 'RED'
-                AND requires_human = FALSE
-            """)
+            # Error logs older than 90 days; critical ones stay in the table
+            archived_errors = await self.archive.archive(
+                conn, "orbt_error_log", now - timedelta(days=90)
+            )
             
-            # Archive old metrics (older than 7 days, keep daily averages)
-            deleted_metrics = await conn.execute("""
-                DELETE FROM orbt_agent_metrics 
-                WHERE timestamp < NOW() - INTERVAL '7 days'
-            """)
+            # Metrics older than 7 days
+            archived_metrics = await self.archive.archive(
+                conn, "orbt_agent_metrics", now - timedelta(days=7)
+            )
             
-            if deleted_escalations or deleted_errors or deleted_metrics:
-                logger.info(f"Cleanup completed - Deleted: {deleted_escalations} escalations, {deleted_errors} errors, {deleted_metrics} metrics")
+            if archived_escalations or archived_errors or archived_metrics:
+                logger.info(f"Cleanup completed - Archived: {archived_escalations} escalations, {archived_errors} errors, {archived_metrics} metrics")
                 
         finally:
             await conn.close()
     
-    def calculate_priority(self, occurrence_count: int, agent_id: str) -> str:
-        """Calculate escalation priority based on error pattern"""
-        # Higher priority for orchestrators vs specialists
-        if "orchestrator" in agent_id.lower():
-            base_priority = "HIGH"
-        elif "manager" in agent_id.lower():
-            base_priority = "MEDIUM"
-        else:
-            base_priority = "LOW"
+    def calculate_priority(self, occurrence_count: int, agent_id: str,
+                           anomaly_score: Optional[float] = None) -> str:
+        """Calculate escalation priority based on error pattern and its rate anomaly score"""
+        # Higher priority for orchestrators vs specialists; agents missing
+        # from the catalog fall back to their id
+        tier = self.agent_catalog.tier(agent_id)
+        if tier is None:
+            if "orchestrator" in agent_id.lower():
+                tier = "orchestrator"
+            elif "manager" in agent_id.lower():
+                tier = "manager"
+        base_priority = {"orchestrator": "HIGH", "manager": "MEDIUM"}.get(tier, "LOW")
+        
+        if anomaly_score is not None:
+            if anomaly_score >= self.anomaly_detector.critical_threshold:
+                return "CRITICAL"
+            if anomaly_score < 1.0:
+                # Chronic: the rate matches its baseline, so the count alone
+                # does not raise priority
+                return base_priority
         
         # Escalate based on occurrence count
         if occurrence_count >= 10:
-            return "CRITICAL"
+            priority = "CRITICAL"
         elif occurrence_count >= 5:
-            return "HIGH"
+            priority = "HIGH"
         elif occurrence_count >= 3 and base_priority != "LOW":
-            return "HIGH"
+            priority = "HIGH"
         else:
-            return base_priority
+            priority = base_priority
+        
+        # A rate spike raises priority one level
+        if anomaly_score is not None and anomaly_score >= self.anomaly_detector.threshold:
+            levels = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+            priority = levels[min(levels.index(priority) + 1, len(levels) - 1)]
+        return priority
     
     def get_response_time_hours(self, priority: str) -> int:
         """Get expected response time based on priority"""
@@ -403,6 +673,18 @@ class ORBTEscalationSystem:
                 ]
             }
             
+            linked = escalation_data.get("linked_patterns")
+            if linked:
+                message["blocks"].insert(3, {
+                    "type": "section",
+                    "text": {
+                        "type": "mrkdwn",
+                        "text": "*Cascaded to:*\n" + "\n".join(
+                            f"• {p['agent_id']} ({p['occurrence_count']}x): {p['message'][:100]}" for p in linked[:10]
+                        )
+                    }
+                })
+            
             response = requests.post(
                 self.notification_channels["slack"],
                 json=message,
@@ -519,13 +801,15 @@ class ORBTEscalationSystem:
     
     async def log_training_intervention(self, conn, training_data: Dict):
         """Log training intervention per Universal Rule 6"""
-        training_id = f"TRAIN_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        # Suffix keeps ids unique when several outcomes land in the same second
+        training_id = f"TRAIN_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
         
         await conn.execute("""
             INSERT INTO orbt_training_log (
                 training_id, intervention_type, agent_id, problem_description,
-                solution_applied, success, recurring_issue, pattern_recognized, error_id
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+                solution_applied, success, recurring_issue, pattern_recognized,
+                resolution_time_seconds, error_id
+            ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
         """,
             training_id,
             training_data.get("intervention_type"),
@@ -535,6 +819,7 @@ class ORBTEscalationSystem:
             training_data.get("success", False),
             training_data.get("recurring_issue", False),
             training_data.get("pattern_recognized", False),
+            training_data.get("resolution_time_seconds"),
             training_data.get("error_id")
         )
     
@@ -552,11 +837,27 @@ async def main():
     parser = argparse.ArgumentParser(description="ORBT Escalation System")
     parser.add_argument("--database-url", required=True, help="PostgreSQL database URL")
     parser.add_argument("--check-interval", type=int, default=300, help="Check interval in seconds (default: 300)")
+    parser.add_argument("--auto-resolution-workers", type=int, default=4, help="Concurrent auto-resolution handlers (default: 4)")
+    parser.add_argument("--log-file", default=os.getenv("ORBT_ESCALATION_LOG", "orbt_escalation.log"), help="JSON log file (default: orbt_escalation.log)")
+    parser.add_argument("--log-level", default="INFO", help="Log level (default: INFO)")
+    parser.add_argument("--log-max-mb", type=int, default=50, help="Rotate the log file at this size in MB (default: 50)")
+    parser.add_argument("--log-rotate-hours", type=float, default=24, help="Rotate the log file at least this often (default: 24)")
+    parser.add_argument("--log-backups", type=int, default=10, help="Rotated log files to keep (default: 10)")
     
     args = parser.parse_args()
     
-    escalation_system = ORBTEscalationSystem(args.database_url)
-    await escalation_system.monitor_and_escalate(args.check_interval)
+    log_pipeline = configure_logging(
+        args.log_file,
+        level=args.log_level.upper(),
+        max_bytes=args.log_max_mb * 1024 * 1024,
+        backup_count=args.log_backups,
+        rotate_interval=args.log_rotate_hours * 3600
+    )
+    try:
+        escalation_system = ORBTEscalationSystem(args.database_url, args.auto_resolution_workers)
+        await escalation_system.monitor_and_escalate(args.check_interval)
+    finally:
+        log_pipeline.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
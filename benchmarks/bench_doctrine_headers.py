@@ -0,0 +1,89 @@
+# Doctrine Header Middleware Benchmark
+# Measures per-request overhead of DoctrineHeaderMiddleware on top of a
+# no-op ASGI app, for cached and uncached signatures and for rejections.
+#
+# Usage: python benchmarks/bench_doctrine_headers.py [--requests 200000]
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.doctrine_headers import DoctrineHeaderMiddleware, DoctrineHeaderValidator, sign_agent
+
+
+async def noop_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def make_scope(signature: str, valid: bool = True):
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"unique_id", b"DB.03.PROC.API.10000.001" if valid else b"bad"),
+        (b"process_id", b"LogError"),
+        (b"blueprint_id", b"orbt-monitoring"),
+        (b"agent_signature", signature.encode("latin-1")),
+    ]
+    return {"type": "http", "method": "POST", "path": "/api/orbt/errors", "headers": headers}
+
+
+async def time_requests(app, scopes, requests: int) -> float:
+    count = len(scopes)
+    start = time.perf_counter()
+    for i in range(requests):
+        await app(scopes[i % count], receive, send)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def run(requests: int):
+    stamp = time.strftime("%Y%m%d%H%M%S", time.gmtime())
+    signing_key = "benchmark-key"
+
+    def signature(agent_id: str) -> str:
+        return f"{agent_id}:{stamp}:{sign_agent(signing_key.encode(), agent_id, stamp)}"
+
+    def middleware():
+        return DoctrineHeaderMiddleware(
+            noop_app, validator=DoctrineHeaderValidator(signing_key=signing_key)
+        )
+
+    cached = [make_scope(signature(f"agent-{i}")) for i in range(50)]
+    # Unique signatures every request -> every request pays full verification
+    uncached = [make_scope(signature(f"agent-{i}")) for i in range(requests)]
+    rejected = [make_scope(f"agent-0:{stamp}:x", valid=False)]
+
+    baseline = await time_requests(noop_app, cached, requests)
+    results = {
+        "no middleware": baseline,
+        "cached signature": await time_requests(middleware(), cached, requests),
+        "uncached signature": await time_requests(middleware(), uncached, requests),
+        "rejected request": await time_requests(middleware(), rejected, requests),
+    }
+
+    print(f"Doctrine header middleware, {requests} requests")
+    for name, micros in results.items():
+        overhead = micros - baseline
+        print(f"  {name:<20} {micros:8.2f} us/request  (+{overhead:6.2f} us overhead)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Doctrine header middleware benchmark")
+    parser.add_argument("--requests", type=int, default=200000, help="Requests per scenario")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Error Clustering Benchmark
+# Assigns a synthetic error stream to near-duplicate clusters and compares the
+# LSH candidate lookup with a linear scan over every cluster representative.
+#
+# Usage: python benchmarks/bench_error_clustering.py [--messages 1000000] [--templates 2000]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.error_clustering import ErrorClusterIndex, error_text, shingles, similarity
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_templates(count, rng):
+    # A failure: message words plus a stack of frames
+    templates = []
+    for _ in range(count):
+        words = [random_word(rng, rng.randint(3, 9)) for _ in range(rng.randint(6, 12))]
+        frames = [f"File {random_word(rng, 6)}.py line {{n}} in {random_word(rng, 8)}"
+                  for _ in range(rng.randint(4, 10))]
+        templates.append((words, frames))
+    return templates
+
+
+def make_variant(template, rng):
+    """Reword one message word or add/drop one frame; volatile numbers always change"""
+    words, frames = list(template[0]), list(template[1])
+    mutation = rng.random()
+    if mutation < 0.3:
+        words[rng.randrange(len(words))] = random_word(rng, 6)
+    elif mutation < 0.5:
+        frames.insert(rng.randrange(len(frames)), f"File {random_word(rng, 6)}.py line {{n}} in wrapper")
+    elif mutation < 0.6 and len(frames) > 4:
+        frames.pop(rng.randrange(len(frames)))
+    message = ' '.join(words) + f" after {rng.randint(1, 900)}ms (attempt {rng.randint(1, 5)})"
+    stack = '\n'.join(frame.format(n=rng.randint(1, 2000)) for frame in frames)
+    return message, stack
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error clustering benchmark")
+    parser.add_argument("--messages", type=int, default=1000000, help="Errors in the stream")
+    parser.add_argument("--templates", type=int, default=2000, help="Distinct underlying failures")
+    parser.add_argument("--variants", type=int, default=20, help="Textual variants per failure")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    templates = make_templates(args.templates, rng)
+    variants = [(t, make_variant(templates[t], rng)) for t in range(args.templates) for _ in range(args.variants)]
+
+    index = ErrorClusterIndex()
+    by_template = {}
+    started = time.perf_counter()
+    for _ in range(args.messages):
+        template_id, (message, stack) = variants[rng.randrange(len(variants))]
+        cluster_id = index.assign(message, stack)
+        by_template.setdefault(template_id, {}).setdefault(cluster_id, 0)
+        by_template[template_id][cluster_id] += 1
+    elapsed = time.perf_counter() - started
+
+    # Share of errors that landed in their failure's dominant cluster
+    dominant = sum(max(counts.values()) for counts in by_template.values())
+    stats = index.stats()
+    print(f"Error clustering, {args.messages} errors from {args.templates} failures x {args.variants} variants")
+    print(f"  assign: {args.messages / elapsed:10.0f} errors/s, {stats['clusters']} clusters, "
+          f"text cache hit rate {stats['hits'] / args.messages:.3f}, purity {dominant / args.messages:.3f}")
+
+    # Candidate lookup on fresh variants: LSH buckets vs comparing every representative
+    probes = [index.hasher.signature(shingles(error_text(*make_variant(templates[rng.randrange(args.templates)], rng))))
+              for _ in range(2000)]
+    representatives = list(index._signatures.items())
+
+    started = time.perf_counter()
+    lsh = [index.match(signature) for signature in probes]
+    lsh_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    linear = []
+    for signature in probes:
+        best, best_score = None, index.threshold
+        for cluster_id, representative in representatives:
+            score = similarity(signature, representative)
+            if score >= best_score:
+                best, best_score = cluster_id, score
+        linear.append(best)
+    linear_elapsed = time.perf_counter() - started
+
+    agreement = sum(1 for a, b in zip(lsh, linear) if a == b) / len(probes)
+    print(f"  lookup over {len(representatives)} clusters: LSH {lsh_elapsed / len(probes) * 1e6:8.1f} us, "
+          f"linear {linear_elapsed / len(probes) * 1e6:10.1f} us, agreement {agreement:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+# Error Search Benchmark
+# Loads a multi-million-row synthetic error log into a scratch schema and
+# times searches the old way (ILIKE over message and stack, no index) against
+# orbt.error_search's full-text and trigram-indexed queries.
+#
+# Usage: python benchmarks/bench_error_search.py --database-url postgresql://... [--rows 5000000] [--days 90]
+#
+# Needs CREATE privilege and the pg_trgm extension (or permission to create
+# it). Everything lives in the orbt_search_bench schema, dropped afterwards
+# unless --keep is given.
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.error_search import ERROR_SEARCH_STACK_CHARS, build_search_query
+
+SCHEMA = "orbt_search_bench"
+
+SETUP_SQL = f"""
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;
+    CREATE SCHEMA {SCHEMA};
+    SET search_path = {SCHEMA}, public;
+    CREATE TABLE orbt_error_log (
+        id BIGSERIAL PRIMARY KEY,
+        error_id VARCHAR(50) NOT NULL,
+        orbt_status VARCHAR(10) NOT NULL,
+        timestamp TIMESTAMPTZ NOT NULL,
+        agent_id VARCHAR(100) NOT NULL,
+        agent_hierarchy VARCHAR(20) NOT NULL,
+        error_type VARCHAR(50) NOT NULL,
+        error_message TEXT NOT NULL,
+        error_stack TEXT NULL,
+        error_cluster_id VARCHAR(50) NULL,
+        resolved BOOLEAN NOT NULL DEFAULT FALSE
+    );
+    CREATE FUNCTION orbt_error_search_vector(message TEXT, stack TEXT)
+    RETURNS tsvector AS $$
+        SELECT setweight(to_tsvector('english'::regconfig, COALESCE(message, '')), 'A') ||
+               setweight(to_tsvector('english'::regconfig, LEFT(COALESCE(stack, ''), {ERROR_SEARCH_STACK_CHARS})), 'B')
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+"""
+
+# Eight failure shapes with volatile numbers, hosts and agents, spread evenly
+# over the window; one row in 5000 carries a rare token
+LOAD_SQL = """
+    INSERT INTO orbt_error_log (
+        error_id, orbt_status, timestamp, agent_id, agent_hierarchy, error_type, error_message, error_stack
+    )
+    SELECT
+        'BENCH.' || g,
+        (ARRAY['GREEN', 'YELLOW', 'RED'])[1 + g % 3],
+        $3::TIMESTAMPTZ - (g::FLOAT8 / $2::FLOAT8) * ($4::INT * INTERVAL '1 day'),
+        'agent-' || (g % 200),
+        (ARRAY['orchestrator', 'manager', 'specialist'])[1 + g % 3],
+        (ARRAY['connection', 'validation', 'doctrine', 'escalation'])[1 + g % 4],
+        CASE g % 8
+            WHEN 0 THEN format('Database timeout after %ss on pool %s (host db-%s.internal)', g % 60, g % 7, g % 50)
+            WHEN 1 THEN format('ECONNRESET while calling payments-api /v1/charges/%s', g % 100000)
+            WHEN 2 THEN format('Validation failed for field %s: expected integer, got %s', 'field_' || (g % 300), 'string')
+            WHEN 3 THEN format('Doctrine section 1.5.%s.%s violated by agent-%s', g % 20, g % 9, g % 200)
+            WHEN 4 THEN format('Rate limit exceeded for project heir-%s (retry after %sms)', g % 40, g % 5000)
+            WHEN 5 THEN format('Render deploy failed: build step %s exited with code %s', g % 12, g % 3 + 1)
+            WHEN 6 THEN format('Token budget exhausted after %s tokens in %s', g % 90000, 'plan_' || (g % 30))
+            ELSE format('Unhandled KeyError: %s in orchestrator handoff', quote_literal('key_' || (g % 500)))
+        END || CASE WHEN g % 5000 = 0 THEN ' quarantined-shard-omega' ELSE '' END,
+        format(E'Traceback (most recent call last):\\n  File "/app/agents/%s.py", line %s, in %s\\n'
+               E'  File "/app/orbt/%s.py", line %s, in %s\\n    raise %s(%s)\\n',
+               'agent_' || (g % 200), g % 900, 'run_' || (g % 40),
+               (ARRAY['pool', 'client', 'doctrine', 'scheduler'])[1 + g % 4], g % 400, 'handle_' || (g % 25),
+               (ARRAY['TimeoutError', 'ConnectionResetError', 'ValueError', 'KeyError'])[1 + g % 4],
+               quote_literal('detail ' || (g % 1000)))
+    FROM generate_series($1::BIGINT, $1::BIGINT + $5::BIGINT - 1) AS g
+"""
+
+INDEX_SQL = f"""
+    CREATE INDEX ON orbt_error_log (timestamp DESC);
+    CREATE INDEX ON orbt_error_log USING GIN (orbt_error_search_vector(error_message, error_stack));
+    CREATE INDEX ON orbt_error_log USING GIN (error_message gin_trgm_ops);
+    CREATE INDEX ON orbt_error_log USING GIN (LEFT(error_stack, {ERROR_SEARCH_STACK_CHARS}) gin_trgm_ops);
+    ANALYZE orbt_error_log;
+"""
+
+# The ad-hoc query the search endpoint replaces
+ILIKE_SQL = """
+    SELECT error_id, timestamp, agent_id, error_message
+    FROM orbt_error_log
+    WHERE (error_message ILIKE $1 OR error_stack ILIKE $1)
+    AND timestamp >= $2 AND timestamp < $3
+    ORDER BY timestamp DESC
+    LIMIT 50
+"""
+
+# (label, search text, mode)
+SEARCHES = [
+    ("rare token", "quarantined-shard-omega", "text"),
+    ("rare token", "quarantined-shard-omega", "substring"),
+    ("common phrase", "database timeout", "text"),
+    ("identifier", "ECONNRESET", "substring"),
+    ("stack frame", "scheduler.py", "substring"),
+]
+
+
+async def timed(conn, sql, args, repeats):
+    await conn.fetch(sql, *args)
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = await conn.fetch(sql, *args)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), len(rows)
+
+
+async def run(args):
+    conn = await asyncpg.connect(args.database_url)
+    now = datetime.now(timezone.utc)
+    try:
+        await conn.execute(SETUP_SQL)
+        await conn.execute(f"SET search_path = {SCHEMA}, public")
+
+        started = time.perf_counter()
+        for offset in range(0, args.rows, 500000):
+            await conn.execute(LOAD_SQL, offset, args.rows, now, args.days, min(500000, args.rows - offset))
+        print(f"Loaded {args.rows} rows over {args.days} days in {time.perf_counter() - started:.1f}s")
+
+        windows = {"24h": now - timedelta(hours=24), "7d": now - timedelta(days=7), f"{args.days}d": now - timedelta(days=args.days)}
+
+        await conn.execute("ANALYZE orbt_error_log")
+        baseline = {}
+        for label, text, mode in SEARCHES:
+            for window, start in windows.items():
+                if (text, window) in baseline:
+                    continue
+                pattern = f"%{text}%"
+                baseline[(text, window)] = await timed(conn, ILIKE_SQL, [pattern, start, now], args.repeats)
+
+        started = time.perf_counter()
+        await conn.execute(INDEX_SQL)
+        print(f"Built search indexes in {time.perf_counter() - started:.1f}s")
+
+        print(f"\nMedian of {args.repeats} runs (ms); ILIKE = unindexed scan the endpoint replaces")
+        print(f"  {'search':<38} {'window':>6} {'ILIKE':>10} {'indexed':>10} {'speedup':>8} {'hits':>5}")
+        for label, text, mode in SEARCHES:
+            for window, start in windows.items():
+                sql, query_args = build_search_query(text, mode, start, now, limit=50)
+                indexed, hits = await timed(conn, sql, query_args, args.repeats)
+                ilike = baseline[(text, window)][0]
+                name = f"{label}: {text!r} ({mode})"
+                print(f"  {name:<38} {window:>6} {ilike:10.1f} {indexed:10.1f} {ilike / indexed:7.1f}x {hits:5d}")
+    finally:
+        if not args.keep:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Error search benchmark")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Scratch PostgreSQL database URL (default: $DATABASE_URL)")
+    parser.add_argument("--rows", type=int, default=5000000, help="Synthetic error log rows")
+    parser.add_argument("--days", type=int, default=90, help="Days the rows are spread over")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per query")
+    parser.add_argument("--keep", action="store_true", help="Keep the orbt_search_bench schema afterwards")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url or DATABASE_URL is required")
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
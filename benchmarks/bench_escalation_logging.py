@@ -0,0 +1,149 @@
+# Escalation Logging Benchmark
+# Monitoring-cycle latency under heavy logging: the escalation daemon's old
+# setup (basicConfig with a synchronous FileHandler + StreamHandler) against
+# orbt.structured_logging's queued JSON pipeline. A simulated cycle awaits
+# between stages and logs --lines records; a ticker task measures how long
+# the event loop stalls. --write-ms adds latency to every flush to stand in
+# for a slow or contended disk.
+#
+# Usage: python benchmarks/bench_escalation_logging.py [--cycles 50] [--lines 2000] [--write-ms 0.2]
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.structured_logging import CONSOLE_FORMAT, configure_logging, log_context
+
+logger = logging.getLogger("orbt.escalation.bench")
+
+
+class SlowFile:
+    """File wrapper whose flush takes write_ms, like a busy disk"""
+
+    def __init__(self, handle, write_ms):
+        self.handle = handle
+        self.write_ms = write_ms
+
+    def write(self, data):
+        return self.handle.write(data)
+
+    def flush(self):
+        self.handle.flush()
+        if self.write_ms:
+            time.sleep(self.write_ms / 1000)
+
+    def __getattr__(self, name):
+        return getattr(self.handle, name)
+
+
+def slow_down(handler, write_ms):
+    opener = handler._open
+    handler._open = lambda: SlowFile(opener(), write_ms)
+
+
+def sync_logging(path, devnull, write_ms):
+    """The daemon's previous configuration"""
+    file_handler = logging.FileHandler(path, delay=True)
+    slow_down(file_handler, write_ms)
+    handlers = [file_handler, logging.StreamHandler(devnull)]
+    for handler in handlers:
+        handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+    def stop():
+        for handler in handlers:
+            root.removeHandler(handler)
+            handler.close()
+    return stop
+
+
+def queued_logging(path, devnull, write_ms):
+    pipeline = configure_logging(path, console_stream=devnull, queue_size=100000)
+    slow_down(pipeline.handlers[0], write_ms)
+    return pipeline.stop
+
+
+async def cycle(lines, stages=10):
+    for stage in range(stages):
+        await asyncio.sleep(0)
+        for i in range(lines // stages):
+            with log_context(escalation_id=f"ESC_{stage}_{i % 7}"):
+                logger.info(f"Linked error pattern from agent-{i % 40} to escalation ESC_{stage}_{i % 7}")
+
+
+async def run_cycles(cycles, lines):
+    stalls = []
+    running = True
+
+    async def ticker():
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stalls.append((now - last) * 1000 - 1)
+            last = now
+
+    tick = asyncio.ensure_future(ticker())
+    latencies = []
+    for n in range(cycles):
+        with log_context(cycle_id=f"bench-{n}"):
+            started = time.perf_counter()
+            await cycle(lines)
+            latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(0.005)
+    running = False
+    await tick
+    return latencies, stalls
+
+
+def measure(setup, args, directory, devnull):
+    path = os.path.join(directory, f"{setup.__name__}.log")
+    stop = setup(path, devnull, args.write_ms)
+    try:
+        latencies, stalls = asyncio.run(run_cycles(args.cycles, args.lines))
+    finally:
+        started = time.perf_counter()
+        stop()
+        drain_ms = (time.perf_counter() - started) * 1000
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p99": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "stall": max(stalls),
+        "drain": drain_ms,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Escalation logging benchmark")
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--lines", type=int, default=2000, help="Log records per cycle")
+    parser.add_argument("--write-ms", type=float, default=0.2, help="Added latency per flush (0 for local disk as is)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        results = {
+            "sync FileHandler (before)": measure(sync_logging, args, directory, devnull),
+            "queued JSON pipeline": measure(queued_logging, args, directory, devnull),
+        }
+
+    print(f"Monitoring cycle, {args.lines} log records/cycle, {args.cycles} cycles, +{args.write_ms} ms per flush")
+    print(f"  {'':<28} {'p50 ms':>9} {'p99 ms':>9} {'max loop stall':>15} {'drain at stop':>14}")
+    for name, r in results.items():
+        print(f"  {name:<28} {r['p50']:9.1f} {r['p99']:9.1f} {r['stall']:12.1f} ms {r['drain']:11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# JSON Serialization Benchmark
+# CPU per 1000-row GET /api/orbt/errors response: the previous path (dict()
+# and isoformat() per row, then FastAPI's jsonable_encoder and json.dumps as
+# in JSONResponse) against orbt.fast_json rendering the rows directly.
+#
+# Usage: python benchmarks/bench_json_serialization.py [--rows 1000] [--responses 200]
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt import fast_json
+
+try:
+    from fastapi.encoders import jsonable_encoder
+except ImportError:
+    jsonable_encoder = None
+
+
+class BenchRecord:
+    """Stand-in for asyncpg.Record (keys/items/__getitem__)"""
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data):
+        self._data = data
+
+    def keys(self):
+        return self._data.keys()
+
+    def items(self):
+        return self._data.items()
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+
+def make_rows(count: int):
+    rng = random.Random(3)
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i in range(count):
+        rows.append(BenchRecord({
+            "error_id": f"01.99.01.00.25000.{i:03d}",
+            "orbt_status": rng.choice(["GREEN", "YELLOW", "RED"]),
+            "timestamp": now - timedelta(seconds=i * 37),
+            "agent_id": f"agent-{rng.randint(1, 40)}",
+            "agent_hierarchy": "specialist",
+            "error_type": "connection",
+            "error_message": f"Database timeout after {rng.randint(1, 60)}s on pool {i % 7}",
+            "error_stack": "Traceback (most recent call last):\n  File \"agent.py\", line 42\n" * 3,
+            "doctrine_violated": None,
+            "section_number": "1.5.1.10.5",
+            "occurrence_count": rng.randint(1, 9),
+            "escalation_level": 0,
+            "requires_human": False,
+            "project_context": "heir-agent-system",
+            "render_endpoint": "render-command-ops-connection.onrender.com",
+            "resolved": False,
+            "resolution_method": None,
+            "resolution_notes": None,
+            "memory_usage_mb": Decimal("512.25"),
+        }))
+    return rows
+
+
+def previous_path(rows) -> bytes:
+    error_list = []
+    for error in rows:
+        error_dict = dict(error)
+        error_dict["timestamp"] = error_dict["timestamp"].isoformat()
+        error_list.append(error_dict)
+    content = {"status": "success", "count": len(error_list), "errors": error_list}
+    if jsonable_encoder is not None:
+        content = jsonable_encoder(content)
+    else:
+        content = json.loads(fast_json.dumps_stdlib(content))
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_path(rows) -> bytes:
+    return fast_json.dumps({"status": "success", "count": len(rows), "errors": rows})
+
+
+def stdlib_path(rows) -> bytes:
+    return fast_json.dumps_stdlib({"status": "success", "count": len(rows), "errors": rows})
+
+
+def cpu_ms(render, rows, responses: int) -> float:
+    render(rows)
+    start = time.process_time()
+    for _ in range(responses):
+        render(rows)
+    return (time.process_time() - start) / responses * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON serialization benchmark")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--responses", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    assert json.loads(previous_path(rows)) == json.loads(fast_path(rows))
+
+    results = {
+        "dict/isoformat + jsonable_encoder" if jsonable_encoder else "dict/isoformat (no fastapi)":
+            cpu_ms(previous_path, rows, args.responses),
+        "fast_json (stdlib fallback)": cpu_ms(stdlib_path, rows, args.responses),
+        f"fast_json ({'orjson' if fast_json.orjson else 'stdlib'})": cpu_ms(fast_path, rows, args.responses),
+    }
+
+    baseline = next(iter(results.values()))
+    print(f"JSON rendering, {args.rows}-row error list, {args.responses} responses")
+    for name, millis in results.items():
+        print(f"  {name:<36} {millis:8.2f} ms CPU/response  ({baseline / millis:5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
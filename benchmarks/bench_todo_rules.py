@@ -0,0 +1,82 @@
+# Todo Rule Engine Benchmark
+# Shows evaluation throughput as the number of generation rules grows.
+#
+# Usage: python benchmarks/bench_todo_rules.py [--events 20000]
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.todo_rules import TodoRuleEngine
+
+MESSAGES = [
+    "Database connection timeout after {n}s on pool {p}",
+    "Stripe payment declined for customer {p} (code {n})",
+    "Schema validation failed: field {p} is required",
+    "Render deployment {p} exited with status {n}",
+    "Rate limit exceeded calling apify actor {p}, retry in {n}s",
+]
+
+
+def random_word(rng, length):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_rules(count, rng):
+    # A handful of rules that actually fire, the rest random noise keywords
+    rules = []
+    for i in range(count):
+        keywords = [random_word(rng, rng.randint(6, 12)) for _ in range(3)]
+        if i < 5:
+            keywords.append(["database", "payment", "schema", "deployment", "rate limit"][i])
+        rules.append({
+            "rule_id": f"RULE_{i:05d}",
+            "trigger_keywords": keywords,
+            "project_types": None,
+            "todo_template": {"title": f"Rule {i}", "description": "{requirement}"},
+            "auto_assign": False,
+            "priority_override": None,
+        })
+    return rules
+
+
+def make_events(count, rng):
+    return [{
+        "id": i,
+        "agent_id": f"agent-{i % 40}",
+        "error_type": "connection",
+        "error_message": rng.choice(MESSAGES).format(n=rng.randint(1, 999), p=random_word(rng, 8)),
+        "project_context": f"project-{i % 7}",
+    } for i in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Todo rule engine benchmark")
+    parser.add_argument("--events", type=int, default=20000, help="Events per measurement")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    events = make_events(args.events, rng)
+
+    print(f"Todo rule engine, {args.events} events per run")
+    for rule_count in (10, 100, 1000, 5000):
+        engine = TodoRuleEngine()
+        started = time.perf_counter()
+        engine.compile(make_rules(rule_count, rng))
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        todos = engine.evaluate(events, "error")
+        elapsed = time.perf_counter() - started
+
+        print(f"  {rule_count:>5} rules: compile {compile_ms:8.1f} ms, "
+              f"{args.events / elapsed:10.0f} events/s, {len(todos)} todos")
+
+
+if __name__ == "__main__":
+    main()
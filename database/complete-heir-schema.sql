@@ -16,9 +16,15 @@ CREATE TABLE IF NOT EXISTS shq.doctrine_schema_version (
     applied_by VARCHAR(100) NOT NULL,
     rollback_sql TEXT NULL,
     notes TEXT NULL,
+    checksum VARCHAR(64) NULL,
+    duration_ms INTEGER NULL,
     PRIMARY KEY (version)
 );
 
+-- Step checksums recorded by orbt/schema_migrations.py (databases deployed before 1.0.0 steps)
+ALTER TABLE shq.doctrine_schema_version ADD COLUMN IF NOT EXISTS checksum VARCHAR(64) NULL;
+ALTER TABLE shq.doctrine_schema_version ADD COLUMN IF NOT EXISTS duration_ms INTEGER NULL;
+
 -- =============================================================================
 -- ORBT ERROR LOGGING SYSTEM
 -- =============================================================================
@@ -358,6 +364,19 @@ CREATE TABLE IF NOT EXISTS shq.orbt_doctrine_integration (
     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Checkpoints for batched doctrine migrations (orbt/doctrine_migration.py)
+CREATE TABLE IF NOT EXISTS shq.orbt_migration_checkpoints (
+    migration_name VARCHAR(100) NOT NULL,
+    batch_key VARCHAR(50) NOT NULL,
+    first_section VARCHAR(20) NULL,
+    last_section VARCHAR(20) NULL,
+    row_count INTEGER NOT NULL,
+    checksum VARCHAR(32) NOT NULL,
+    duration_ms INTEGER NULL,
+    completed_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (migration_name, batch_key)
+);
+
 -- =============================================================================
 -- GATEKEEPER SECURITY (RLS Example)
 -- =============================================================================
@@ -377,7 +396,9 @@ CREATE TABLE IF NOT EXISTS shq.vault_events (
 ALTER TABLE shq.vault_events ENABLE ROW LEVEL SECURITY;
 
 -- Policy: Only database-gatekeeper can write
-CREATE POLICY IF NOT EXISTS vault_gatekeeper_write ON shq.vault_events
+-- (CREATE POLICY has no IF NOT EXISTS form; drop and recreate to stay idempotent)
+DROP POLICY IF EXISTS vault_gatekeeper_write ON shq.vault_events;
+CREATE POLICY vault_gatekeeper_write ON shq.vault_events
     FOR INSERT
     WITH CHECK (gatekeeper_signature LIKE 'database-gatekeeper:%');
 
@@ -439,7 +460,26 @@ CREATE TRIGGER trigger_error_escalation
     FOR EACH ROW
     EXECUTE FUNCTION shq.check_error_escalation();
 
+-- Doctrine change notification (invalidates API doctrine caches)
+-- Attach to dpr.dpr_doctrine where that table lives:
+--   CREATE TRIGGER trigger_doctrine_change AFTER INSERT OR UPDATE OR DELETE
+--   ON dpr.dpr_doctrine FOR EACH STATEMENT EXECUTE FUNCTION shq.notify_doctrine_change();
+CREATE OR REPLACE FUNCTION shq.notify_doctrine_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('orbt_doctrine_changed', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_doctrine_version_change ON shq.doctrine_schema_version;
+CREATE TRIGGER trigger_doctrine_version_change
+    AFTER INSERT OR UPDATE OR DELETE ON shq.doctrine_schema_version
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION shq.notify_doctrine_change();
+
 -- Doctrine migration function using exact DPR numbering system
+-- (row-at-a-time; scripts/migrate-dpr-doctrine.py is the batched, resumable equivalent)
 CREATE OR REPLACE FUNCTION shq.migrate_dpr_doctrine_exact()
 RETURNS TEXT AS $$
 DECLARE
@@ -552,4 +592,33 @@ ON CONFLICT (version) DO NOTHING;
 GRANT USAGE ON SCHEMA shq TO postgres;
 GRANT SELECT ON ALL TABLES IN SCHEMA shq TO postgres;
 GRANT INSERT, UPDATE ON shq.orbt_error_log TO postgres;
-GRANT INSERT ON shq.vault_events TO postgres;
\ No newline at end of file
+GRANT INSERT ON shq.vault_events TO postgres;
+
+-- =============================================================================
+-- VAULT EVENT CONSUMERS
+-- =============================================================================
+
+-- Per-group cursors for tailing shq.vault_events (orbt/vault_consumer.py)
+CREATE TABLE IF NOT EXISTS shq.vault_consumer_offsets (
+    consumer_group VARCHAR(100) PRIMARY KEY,
+    last_event_id INTEGER NOT NULL DEFAULT 0,
+    last_created_at TIMESTAMPTZ NULL,
+    events_consumed BIGINT NOT NULL DEFAULT 0,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+-- Wake tailing consumers once per inserting statement
+CREATE OR REPLACE FUNCTION shq.notify_vault_event()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_notify('orbt_vault_events', TG_TABLE_SCHEMA || '.' || TG_TABLE_NAME);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_vault_event_notify ON shq.vault_events;
+CREATE TRIGGER trigger_vault_event_notify
+    AFTER INSERT ON shq.vault_events
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION shq.notify_vault_event();
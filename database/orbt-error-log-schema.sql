@@ -22,6 +22,7 @@ CREATE TABLE IF NOT EXISTS orbt_error_log (
     error_type VARCHAR(50) NOT NULL, -- connection, validation, doctrine, escalation
     error_message TEXT NOT NULL,
     error_stack TEXT NULL,
+    error_cluster_id VARCHAR(50) NULL, -- Near-duplicate cluster (orbt_error_clusters)
     
     -- DPR Doctrine Integration
     doctrine_violated VARCHAR(50) NULL, -- Section number if doctrine violation
@@ -29,6 +30,7 @@ CREATE TABLE IF NOT EXISTS orbt_error_log (
     
     -- Escalation Tracking (Universal Rule 5: 2+ occurrences escalate)
     occurrence_count INTEGER NOT NULL DEFAULT 1,
+    repeat_count INTEGER NOT NULL DEFAULT 0, -- Repeats folded into this row by ingest dedup
     escalation_level INTEGER NOT NULL DEFAULT 0, -- 0=first, 1=second, 2=escalated
     requires_human BOOLEAN NOT NULL DEFAULT FALSE,
     
@@ -149,6 +151,7 @@ CREATE TABLE IF NOT EXISTS orbt_error_patterns (
     
     -- Pattern Details
     error_signature VARCHAR(500) NOT NULL, -- Unique pattern identifier
+    cluster_id VARCHAR(50) NULL, -- Near-duplicate cluster (orbt_error_clusters)
     occurrence_count INTEGER NOT NULL DEFAULT 1,
     first_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
     last_seen TIMESTAMPTZ NOT NULL DEFAULT NOW(),
@@ -170,6 +173,22 @@ CREATE TABLE IF NOT EXISTS orbt_error_patterns (
     updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
 );
 
+-- Near-Duplicate Error Clusters (MinHash representatives, see orbt/error_clustering.py)
+CREATE TABLE IF NOT EXISTS orbt_error_clusters (
+    id SERIAL PRIMARY KEY,
+    cluster_id VARCHAR(50) UNIQUE NOT NULL,
+    minhash_signature BIGINT[] NOT NULL,
+    representative_message TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_seen TIMESTAMPTZ NOT NULL DEFAULT NOW() -- Last match; only recently active clusters are loaded
+);
+
+-- Cluster columns for databases created before clustering
+ALTER TABLE orbt_error_log ADD COLUMN IF NOT EXISTS error_cluster_id VARCHAR(50) NULL;
+ALTER TABLE orbt_error_log ADD COLUMN IF NOT EXISTS repeat_count INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE orbt_error_patterns ADD COLUMN IF NOT EXISTS cluster_id VARCHAR(50) NULL;
+ALTER TABLE orbt_error_clusters ADD COLUMN IF NOT EXISTS last_seen TIMESTAMPTZ NOT NULL DEFAULT NOW();
+
 -- Escalation Queue Table
 CREATE TABLE IF NOT EXISTS orbt_escalation_queue (
     id SERIAL PRIMARY KEY,
@@ -209,6 +228,7 @@ CREATE INDEX IF NOT EXISTS idx_error_log_timestamp ON orbt_error_log(timestamp D
 CREATE INDEX IF NOT EXISTS idx_error_log_status ON orbt_error_log(orbt_status);
 CREATE INDEX IF NOT EXISTS idx_error_log_agent ON orbt_error_log(agent_id);
 CREATE INDEX IF NOT EXISTS idx_error_log_escalation ON orbt_error_log(requires_human, escalation_level);
+CREATE INDEX IF NOT EXISTS idx_error_log_cluster ON orbt_error_log(error_cluster_id, agent_id);
 
 CREATE INDEX IF NOT EXISTS idx_agent_metrics_timestamp ON orbt_agent_metrics(timestamp DESC);
 CREATE INDEX IF NOT EXISTS idx_agent_metrics_agent ON orbt_agent_metrics(agent_id);
@@ -220,6 +240,8 @@ CREATE INDEX IF NOT EXISTS idx_training_log_recurring ON orbt_training_log(recur
 
 CREATE INDEX IF NOT EXISTS idx_error_patterns_signature ON orbt_error_patterns(error_signature);
 CREATE INDEX IF NOT EXISTS idx_error_patterns_count ON orbt_error_patterns(occurrence_count DESC);
+CREATE INDEX IF NOT EXISTS idx_error_patterns_cluster ON orbt_error_patterns(cluster_id);
+CREATE INDEX IF NOT EXISTS idx_error_clusters_last_seen ON orbt_error_clusters(last_seen);
 
 CREATE INDEX IF NOT EXISTS idx_escalation_status ON orbt_escalation_queue(status);
 CREATE INDEX IF NOT EXISTS idx_escalation_priority ON orbt_escalation_queue(priority);
@@ -253,10 +275,10 @@ $$ LANGUAGE plpgsql;
 CREATE OR REPLACE FUNCTION check_error_escalation()
 RETURNS TRIGGER AS $$
 BEGIN
-    -- Count occurrences of this error pattern
+    -- Count occurrences of this error pattern (including deduplicated repeats)
     UPDATE orbt_error_log 
     SET occurrence_count = (
-        SELECT COUNT(*) 
+        SELECT SUM(1 + repeat_count) 
         FROM orbt_error_log 
         WHERE error_message = NEW.error_message 
         AND agent_id = NEW.agent_id
@@ -294,6 +316,55 @@ CREATE TRIGGER trigger_error_escalation
     FOR EACH ROW
     EXECUTE FUNCTION check_error_escalation();
 
+-- Repeats folded by ingest dedup arrive as repeat_count updates, not inserts;
+-- run the same Rule 5 check for them (once per row: skipped when escalated)
+CREATE OR REPLACE FUNCTION check_repeat_escalation()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.requires_human THEN
+        RETURN NEW;
+    END IF;
+
+    UPDATE orbt_error_log
+    SET occurrence_count = (
+        SELECT SUM(1 + repeat_count)
+        FROM orbt_error_log
+        WHERE error_message = NEW.error_message
+        AND agent_id = NEW.agent_id
+    )
+    WHERE error_id = NEW.error_id;
+
+    IF (SELECT occurrence_count FROM orbt_error_log WHERE error_id = NEW.error_id) >= 2 THEN
+        UPDATE orbt_error_log
+        SET
+            escalation_level = 2,
+            requires_human = TRUE,
+            orbt_status = 'RED'
+        WHERE error_id = NEW.error_id;
+
+        INSERT INTO orbt_escalation_queue (
+            escalation_id, error_id, priority, status, escalated_by
+        ) VALUES (
+            'ESC-' || NEW.error_id,
+            NEW.error_id,
+            'HIGH',
+            'PENDING',
+            'SYSTEM_AUTO'
+        )
+        ON CONFLICT (escalation_id) DO NOTHING;
+    END IF;
+
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_repeat_escalation ON orbt_error_log;
+CREATE TRIGGER trigger_repeat_escalation
+    AFTER UPDATE OF repeat_count ON orbt_error_log
+    FOR EACH ROW
+    WHEN (NEW.repeat_count > OLD.repeat_count)
+    EXECUTE FUNCTION check_repeat_escalation();
+
 -- Function to Update System Status
 CREATE OR REPLACE FUNCTION update_system_status()
 RETURNS VOID AS $$
@@ -345,6 +416,102 @@ BEGIN
 END;
 $$ LANGUAGE plpgsql;
 
+-- Live feed notifications (orbt/live_feed.py): new errors, escalation status
+-- changes and system status transitions on one channel, as small JSON payloads
+CREATE OR REPLACE FUNCTION notify_orbt_live_event()
+RETURNS TRIGGER AS $$
+DECLARE
+    payload JSON;
+    error_agent VARCHAR(100);
+    error_status VARCHAR(10);
+BEGIN
+    IF TG_TABLE_NAME = 'orbt_error_log' THEN
+        payload := json_build_object(
+            'type', 'error',
+            'error_id', NEW.error_id,
+            'agent_id', NEW.agent_id,
+            'orbt_status', NEW.orbt_status,
+            'error_type', NEW.error_type,
+            'error_message', LEFT(NEW.error_message, 500),
+            'error_cluster_id', NEW.error_cluster_id,
+            'project_context', NEW.project_context,
+            'timestamp', NEW.timestamp
+        );
+    ELSIF TG_TABLE_NAME = 'orbt_escalation_queue' THEN
+        IF TG_OP = 'UPDATE' AND OLD.status = NEW.status THEN
+            RETURN NULL;
+        END IF;
+        SELECT agent_id, orbt_status INTO error_agent, error_status
+        FROM orbt_error_log WHERE error_id = NEW.error_id;
+        payload := json_build_object(
+            'type', 'escalation',
+            'escalation_id', NEW.escalation_id,
+            'error_id', NEW.error_id,
+            'agent_id', error_agent,
+            'orbt_status', error_status,
+            'priority', NEW.priority,
+            'status', NEW.status,
+            'escalated_by', NEW.escalated_by,
+            'timestamp', NEW.updated_at
+        );
+    ELSE
+        IF TG_OP = 'UPDATE' AND OLD.overall_status = NEW.overall_status THEN
+            RETURN NULL;
+        END IF;
+        payload := json_build_object(
+            'type', 'status',
+            'orbt_status', NEW.overall_status,
+            'previous_status', CASE WHEN TG_OP = 'UPDATE' THEN OLD.overall_status END,
+            'green_count', NEW.green_count,
+            'yellow_count', NEW.yellow_count,
+            'red_count', NEW.red_count,
+            'escalation_pending', NEW.escalation_pending,
+            'timestamp', NEW.updated_at
+        );
+    END IF;
+    
+    PERFORM pg_notify('orbt_live_events', payload::TEXT);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trigger_error_live_event ON orbt_error_log;
+CREATE TRIGGER trigger_error_live_event
+    AFTER INSERT ON orbt_error_log
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_orbt_live_event();
+
+DROP TRIGGER IF EXISTS trigger_escalation_live_event ON orbt_escalation_queue;
+CREATE TRIGGER trigger_escalation_live_event
+    AFTER INSERT OR UPDATE OF status ON orbt_escalation_queue
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_orbt_live_event();
+
+DROP TRIGGER IF EXISTS trigger_status_live_event ON orbt_system_status;
+CREATE TRIGGER trigger_status_live_event
+    AFTER INSERT OR UPDATE OF overall_status ON orbt_system_status
+    FOR EACH ROW
+    EXECUTE FUNCTION notify_orbt_live_event();
+
+-- Error search (orbt/error_search.py, GET /api/orbt/errors/search): a
+-- full-text index over message + stack head and trigram indexes for
+-- substring search. Only the first 4000 characters of a stack are searchable
+-- (ERROR_SEARCH_STACK_CHARS), which bounds index size and to_tsvector cost.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE OR REPLACE FUNCTION orbt_error_search_vector(message TEXT, stack TEXT)
+RETURNS tsvector AS $$
+    SELECT setweight(to_tsvector('english'::regconfig, COALESCE(message, '')), 'A') ||
+           setweight(to_tsvector('english'::regconfig, LEFT(COALESCE(stack, ''), 4000)), 'B')
+$$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+
+CREATE INDEX IF NOT EXISTS idx_error_log_search ON orbt_error_log
+    USING GIN (orbt_error_search_vector(error_message, error_stack));
+CREATE INDEX IF NOT EXISTS idx_error_log_message_trgm ON orbt_error_log
+    USING GIN (error_message gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_error_log_stack_trgm ON orbt_error_log
+    USING GIN (LEFT(error_stack, 4000) gin_trgm_ops);
+
 -- Scheduled job to update system status (run every 5 minutes)
 -- Note: This would typically be handled by your application or cron job
 -- SELECT cron.schedule('update-orbt-status', '*/5 * * * *', 'SELECT update_system_status();');
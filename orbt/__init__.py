@@ -0,0 +1,4 @@
+# ORBT runtime support package
+# Shared building blocks for the monitoring API (api/) and the escalation
+# automation (automation/). Modules are imported directly, e.g.
+#   from orbt.doctrine_cache import DoctrineCache
@@ -0,0 +1,203 @@
+# ORBT Admission Control
+# Keeps one noisy agent (or project) from starving everyone else's writes on
+# the ingest endpoints, and keeps the database out of overload.
+#
+# Three checks run before a write touches Postgres:
+#   - a token bucket per agent_id
+#   - a token bucket per project_context (when one is given)
+#   - a global concurrency limit on in-flight database writes
+# The concurrency limit adapts to observed write latency (AIMD): it grows by
+# about one slot per limit's worth of fast writes, and shrinks by `backoff`
+# at most once per baseline round trip when latency rises past
+# `tolerance` x the recent minimum or a write fails. A rejected request is
+# shed with a retry hint instead of queueing, so p99 stays flat under load.
+#
+#   decision = admission.admit("errors", agent_id, project_context)
+#   if not decision.admitted: -> 429, Retry-After: decision.retry_after
+#   ... write ...
+#   admission.release(latency_seconds, failed)
+
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+SHED_REASONS = ("agent_rate", "project_rate", "concurrency")
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)"""
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class BucketTable:
+    """Token buckets by key, least recently used evicted past max_keys"""
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def get(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            # An evicted key comes back with a full burst
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD limit on in-flight writes driven by their latency"""
+
+    def __init__(self, initial: int = 20, min_limit: int = 2, max_limit: int = 200,
+                 tolerance: float = 2.0, backoff: float = 0.9, window_samples: int = 500):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.window_samples = window_samples
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self._window_min: Optional[float] = None
+        self._samples = 0
+        self._last_decrease = float("-inf")
+
+    def try_acquire(self) -> bool:
+        if self.in_flight >= int(self.limit):
+            return False
+        self.in_flight += 1
+        return True
+
+    def release(self, latency: Optional[float] = None, failed: bool = False, now: Optional[float] = None):
+        """Free a slot; latency None means the write never ran"""
+        self.in_flight = max(0, self.in_flight - 1)
+        if latency is None:
+            return
+        now = time.monotonic() if now is None else now
+
+        # Baseline is the minimum of the previous window, so it follows the
+        # database when its unloaded latency drifts
+        self._window_min = latency if self._window_min is None else min(self._window_min, latency)
+        if self.baseline is None or latency < self.baseline:
+            self.baseline = latency
+        self._samples += 1
+        if self._samples >= self.window_samples:
+            self.baseline = self._window_min
+            self._window_min = None
+            self._samples = 0
+
+        if failed or latency > self.baseline * self.tolerance:
+            # Decrease once per round trip, not once per slow write
+            if now - self._last_decrease >= self.baseline:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = now
+        elif self.in_flight + 1 >= self.limit / 2:
+            # Only grow while the limit is actually being used
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+
+    def retry_after(self) -> float:
+        """Rough time for a slot to free up"""
+        return max(self.baseline or 0.0, 0.1)
+
+
+class AdmissionDecision:
+    __slots__ = ("admitted", "reason", "retry_after")
+
+    def __init__(self, admitted: bool, reason: Optional[str] = None, retry_after: float = 0.0):
+        self.admitted = admitted
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        """Retry-After value (whole seconds, at least 1)"""
+        return str(max(1, math.ceil(self.retry_after)))
+
+
+ADMITTED = AdmissionDecision(True)
+
+
+class AdmissionController:
+    """Per-agent and per-project buckets in front of an adaptive concurrency limit"""
+
+    def __init__(self, agent_rate: float = 50.0, agent_burst: float = 100.0,
+                 project_rate: float = 200.0, project_burst: float = 400.0,
+                 concurrency: Optional[AdaptiveConcurrencyLimit] = None, max_keys: int = 10000):
+        self.agents = BucketTable(agent_rate, agent_burst, max_keys)
+        self.projects = BucketTable(project_rate, project_burst, max_keys)
+        self.concurrency = concurrency or AdaptiveConcurrencyLimit()
+        self.admitted: Dict[str, int] = {}
+        self.shed: Dict[str, Dict[str, int]] = {}
+
+    def _shed(self, endpoint: str, reason: str, retry_after: float) -> AdmissionDecision:
+        counts = self.shed.setdefault(endpoint, dict.fromkeys(SHED_REASONS, 0))
+        counts[reason] += 1
+        return AdmissionDecision(False, reason, retry_after)
+
+    def admit(self, endpoint: str, agent_id: str, project_context: Optional[str] = None,
+              now: Optional[float] = None) -> AdmissionDecision:
+        """Admit a write (holding a concurrency slot until release()) or shed it"""
+        now = time.monotonic() if now is None else now
+
+        # Check both buckets before taking from either, so a request shed for
+        # its project does not also cost its agent a token
+        agent_bucket = self.agents.get(agent_id, now)
+        wait = agent_bucket.wait_time(now)
+        if wait:
+            return self._shed(endpoint, "agent_rate", wait)
+        project_bucket = None
+        if project_context:
+            project_bucket = self.projects.get(project_context, now)
+            wait = project_bucket.wait_time(now)
+            if wait:
+                return self._shed(endpoint, "project_rate", wait)
+
+        if not self.concurrency.try_acquire():
+            return self._shed(endpoint, "concurrency", self.concurrency.retry_after())
+
+        agent_bucket.take()
+        if project_bucket is not None:
+            project_bucket.take()
+        self.admitted[endpoint] = self.admitted.get(endpoint, 0) + 1
+        return ADMITTED
+
+    def release(self, latency: Optional[float] = None, failed: bool = False, now: Optional[float] = None):
+        self.concurrency.release(latency, failed, now)
+
+    def stats(self) -> Dict:
+        baseline = self.concurrency.baseline
+        return {
+            "concurrency_limit": int(self.concurrency.limit),
+            "in_flight": self.concurrency.in_flight,
+            "baseline_latency_ms": round(baseline * 1000, 2) if baseline is not None else None,
+            "tracked_agents": len(self.agents),
+            "tracked_projects": len(self.projects),
+            "admitted": dict(self.admitted),
+            "shed": {endpoint: dict(counts) for endpoint, counts in self.shed.items()},
+        }
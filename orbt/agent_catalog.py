@@ -0,0 +1,269 @@
+# HEIR Agent Catalog
+# Loads global-agent-catalog.json, agent-library.json and agent-catalog.json
+# into one index of slotted agent records with a precomputed delegation graph.
+#
+# Catalogs disagree on level numbering (agent-catalog.json: orchestrator 1,
+# manager 2, specialist 3; global-agent-catalog.json: meta 0, domain 1,
+# specialist 2), so each record also carries a tier taken from the catalog
+# section it appears in. Earlier files win for scalar fields; delegation
+# edges are merged from every file.
+#
+# The compiled form (records + ancestor sets) is cached as JSON keyed by a
+# hash of the catalog files, so daemon startup skips merging and graph
+# closure while the catalogs are unchanged.
+
+import hashlib
+import json
+import logging
+import os
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+DEFAULT_CATALOG_FILES = (
+    os.path.join(REPO_ROOT, "global-agent-catalog.json"),
+    os.path.join(REPO_ROOT, "agent-library.json"),
+    os.path.join(REPO_ROOT, "agent-catalog.json"),
+)
+
+DEFAULT_CACHE_DIR = os.getenv("HEIR_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "heir"))
+
+# Bump when the compiled layout changes
+CACHE_FORMAT = 1
+
+# Catalog section -> tier
+SECTION_TIERS = {
+    "meta_system_agents": "orchestrator",
+    "domain_orchestrators": "orchestrator",
+    "orchestrators": "orchestrator",
+    "managers": "manager",
+    "specialist_library": "specialist",
+    "specialists": "specialist",
+    "legacy_battle_tested_agents": "specialist",
+}
+
+# Keys listing agents an agent hands work down to
+DELEGATION_KEYS = ("delegates_to", "specialists_managed", "specialists_assigned")
+
+# Group names used in delegates_to -> tier (None: every agent)
+DELEGATION_GROUPS = {
+    "all_agents": None,
+    "managers": "manager",
+    "all_managers": "manager",
+    "specialists": "specialist",
+    "all_specialists": "specialist",
+}
+
+
+class AgentRecord:
+    """One agent merged across catalogs"""
+
+    __slots__ = ("agent_id", "level", "tier", "role", "description", "file_location",
+                 "delegates_to", "integrates_with")
+
+    def __init__(self, agent_id: str, level: Optional[int], tier: str, role: Optional[str] = None,
+                 description: Optional[str] = None, file_location: Optional[str] = None,
+                 delegates_to: Tuple[str, ...] = (), integrates_with: Tuple[str, ...] = ()):
+        self.agent_id = agent_id
+        self.level = level
+        self.tier = tier
+        self.role = role
+        self.description = description
+        self.file_location = file_location
+        self.delegates_to = delegates_to
+        self.integrates_with = integrates_with
+
+    def to_list(self) -> list:
+        values = (getattr(self, name) for name in self.__slots__)
+        return [list(value) if isinstance(value, tuple) else value for value in values]
+
+    @classmethod
+    def from_list(cls, values: list) -> "AgentRecord":
+        return cls(*(tuple(value) if isinstance(value, list) else value for value in values))
+
+
+class AgentCatalog:
+    """Agent records indexed by id, with parents and ancestors precomputed"""
+
+    def __init__(self, records: Iterable[AgentRecord], ancestors: Optional[Dict[str, Iterable[str]]] = None):
+        self._records: Dict[str, AgentRecord] = {record.agent_id: record for record in records}
+        self._parents: Dict[str, Set[str]] = {agent_id: set() for agent_id in self._records}
+        for record in self._records.values():
+            for child in record.delegates_to:
+                self._parents[child].add(record.agent_id)
+
+        if ancestors is None:
+            ancestors = {agent_id: self._closure(agent_id) for agent_id in self._records}
+        self._ancestors: Dict[str, FrozenSet[str]] = {
+            agent_id: frozenset(ids) for agent_id, ids in ancestors.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, agent_id: str) -> bool:
+        return agent_id in self._records
+
+    def get(self, agent_id: str) -> Optional[AgentRecord]:
+        return self._records.get(agent_id)
+
+    def level(self, agent_id: str) -> Optional[int]:
+        record = self._records.get(agent_id)
+        return record.level if record else None
+
+    def tier(self, agent_id: str) -> Optional[str]:
+        record = self._records.get(agent_id)
+        return record.tier if record else None
+
+    def delegates(self, agent_id: str) -> Tuple[str, ...]:
+        record = self._records.get(agent_id)
+        return record.delegates_to if record else ()
+
+    def parents(self, agent_id: str) -> FrozenSet[str]:
+        return frozenset(self._parents.get(agent_id, ()))
+
+    def ancestors(self, agent_id: str) -> FrozenSet[str]:
+        """Every agent this one reports to, directly or transitively"""
+        return self._ancestors.get(agent_id, frozenset())
+
+    def escalation_chain(self, agent_id: str) -> List[str]:
+        """Ancestors nearest-first: direct supervisors, then theirs, and so on"""
+        chain: List[str] = []
+        seen = {agent_id}
+        queue = deque(sorted(self._parents.get(agent_id, ())))
+        while queue:
+            parent = queue.popleft()
+            if parent in seen:
+                continue
+            seen.add(parent)
+            chain.append(parent)
+            queue.extend(sorted(self._parents[parent]))
+        return chain
+
+    def _closure(self, agent_id: str) -> Set[str]:
+        found: Set[str] = set()
+        stack = list(self._parents[agent_id])
+        while stack:
+            parent = stack.pop()
+            if parent in found or parent == agent_id:
+                continue
+            found.add(parent)
+            stack.extend(self._parents[parent])
+        return found
+
+    def to_compiled(self) -> dict:
+        return {
+            "format": CACHE_FORMAT,
+            "agents": [record.to_list() for record in self._records.values()],
+            "ancestors": {agent_id: sorted(ids) for agent_id, ids in self._ancestors.items()},
+        }
+
+    @classmethod
+    def from_compiled(cls, compiled: dict) -> "AgentCatalog":
+        return cls([AgentRecord.from_list(values) for values in compiled["agents"]], compiled["ancestors"])
+
+
+def _agent_sections(document: dict):
+    for section, agents in document.items():
+        tier = SECTION_TIERS.get(section)
+        if tier is None or not isinstance(agents, dict):
+            continue
+        for agent_id, spec in agents.items():
+            # "// GROUP" keys are inline comments
+            if agent_id.startswith("//") or not isinstance(spec, dict):
+                continue
+            yield spec.get("agent_id", agent_id), tier, spec
+
+
+def parse_catalogs(documents: Iterable[dict]) -> List[AgentRecord]:
+    """Merge catalog documents into records with resolved delegation edges"""
+    records: Dict[str, AgentRecord] = {}
+    raw_edges: Dict[str, List[str]] = {}
+    peers: Dict[str, List[str]] = {}
+
+    for document in documents:
+        for agent_id, tier, spec in _agent_sections(document):
+            record = records.get(agent_id)
+            if record is None:
+                record = records[agent_id] = AgentRecord(agent_id, spec.get("level"), tier)
+            for name in ("level", "role", "description", "file_location"):
+                if getattr(record, name) is None and spec.get(name) is not None:
+                    setattr(record, name, spec[name])
+            record.integrates_with = tuple(dict.fromkeys(record.integrates_with + tuple(spec.get("integrates_with") or ())))
+            for key in DELEGATION_KEYS:
+                raw_edges.setdefault(agent_id, []).extend(spec.get(key) or ())
+            peers.setdefault(agent_id, []).extend(spec.get("coordinates_with") or ())
+
+    by_tier: Dict[str, List[str]] = {}
+    for agent_id, record in records.items():
+        by_tier.setdefault(record.tier, []).append(agent_id)
+
+    for agent_id, record in records.items():
+        targets: List[str] = []
+        for target in raw_edges.get(agent_id, ()):
+            if target in DELEGATION_GROUPS:
+                group_tier = DELEGATION_GROUPS[target]
+                targets.extend(records if group_tier is None else by_tier.get(group_tier, ()))
+            elif target in records:
+                targets.append(target)
+            else:
+                logger.debug(f"{agent_id} delegates to unknown agent {target}")
+        # coordinates_with only delegates when it points down the hierarchy
+        for target in peers.get(agent_id, ()):
+            other = records.get(target)
+            if other is not None and record.level is not None and other.level is not None and other.level > record.level:
+                targets.append(target)
+        record.delegates_to = tuple(dict.fromkeys(t for t in targets if t != agent_id))
+
+    return list(records.values())
+
+
+def _catalog_hash(contents: List[bytes]) -> str:
+    digest = hashlib.sha256()
+    for content in contents:
+        digest.update(hashlib.sha256(content).digest())
+    return digest.hexdigest()
+
+
+def load_catalog(paths: Iterable[str] = DEFAULT_CATALOG_FILES,
+                 cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> AgentCatalog:
+    """Load the catalogs, using the compiled cache when the files are unchanged"""
+    contents = []
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                contents.append(f.read())
+        except FileNotFoundError:
+            logger.warning(f"Agent catalog not found: {path}")
+
+    key = _catalog_hash(contents)
+    cache_path = os.path.join(cache_dir, f"agent-catalog-{key[:16]}.json") if cache_dir else None
+
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path) as f:
+                compiled = json.load(f)
+            if compiled.get("format") == CACHE_FORMAT and compiled.get("hash") == key:
+                return AgentCatalog.from_compiled(compiled)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.debug(f"Ignoring unreadable agent catalog cache {cache_path}: {str(e)}")
+
+    catalog = AgentCatalog(parse_catalogs(json.loads(content) for content in contents))
+
+    if cache_path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            compiled = catalog.to_compiled()
+            compiled["hash"] = key
+            tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(compiled, f, separators=(",", ":"))
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.debug(f"Could not write agent catalog cache: {str(e)}")
+
+    logger.info(f"Agent catalog loaded: {len(catalog)} agents")
+    return catalog
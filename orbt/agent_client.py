@@ -0,0 +1,345 @@
+# ORBT Agent Client
+# asyncio client for agents reporting to the ORBT ingest endpoints, instead
+# of one ad-hoc HTTP request per event.
+#
+# Events are buffered and sent as gzip-compressed batches to
+# /api/orbt/errors/batch and /api/orbt/metrics/batch over a pooled
+# keep-alive connection, with doctrine headers on every request. Failed
+# sends (transport errors, 5xx, 429) are retried with full-jitter backoff,
+# honouring Retry-After; items the server sheds individually are re-queued.
+# Each error carries an event_id that stays the same across retries, so the
+# server can drop a resent event instead of logging it twice.
+# Successful metrics can be sampled locally; failures are always sent.
+#
+#   async with OrbtAgentClient(url, "database-specialist", unique_id=...,
+#                              process_id="LogAgentEvents", blueprint_id=...) as client:
+#       client.log_error("connection", "Database timeout after 30s")
+#       async with client.track("repair"):
+#           ...   # execution_time_ms and success recorded on exit
+#
+# Requires httpx (imported when the client starts) unless an HTTP client
+# object is passed in.
+
+import asyncio
+import functools
+import logging
+import random
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from orbt.batch_codec import MAX_BATCH_EVENTS, encode_batch
+from orbt.doctrine_headers import PROCESS_ID_PATTERN, UNIQUE_ID_PATTERN, sign_agent
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATHS = {
+    "error": "/api/orbt/errors/batch",
+    "metric": "/api/orbt/metrics/batch",
+}
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def backoff_delay(attempt: int, base: float = 0.2, cap: float = 30.0, rng: Callable[[], float] = random.random) -> float:
+    """Full-jitter exponential backoff"""
+    return rng() * min(cap, base * (2 ** attempt))
+
+
+class OperationTimer:
+    """Times an agent operation and records its metrics; context manager or decorator"""
+
+    def __init__(self, client: "OrbtAgentClient", operation_type: str, fields: Dict[str, Any]):
+        self.client = client
+        self.operation_type = operation_type
+        self.fields = fields
+        self._started = 0.0
+
+    def _start(self):
+        self._started = time.perf_counter()
+
+    def _finish(self, exc: Optional[BaseException]):
+        elapsed_ms = int((time.perf_counter() - self._started) * 1000)
+        fields = dict(self.fields)
+        if exc is not None:
+            fields["error_count"] = fields.get("error_count", 0) + 1
+        self.client.record_metrics(self.operation_type, elapsed_ms, success=exc is None, **fields)
+
+    def __enter__(self):
+        self._start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._finish(exc)
+        return False
+
+    async def __aenter__(self):
+        self._start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self._finish(exc)
+        return False
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                async with OperationTimer(self.client, self.operation_type, self.fields):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with OperationTimer(self.client, self.operation_type, self.fields):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class OrbtAgentClient:
+    """Buffered, batching ORBT ingest client for one agent"""
+
+    def __init__(
+        self,
+        base_url: str,
+        agent_id: str,
+        unique_id: str,
+        process_id: str,
+        blueprint_id: str,
+        agent_hierarchy: str = "specialist",
+        project_context: Optional[str] = None,
+        signing_key: Optional[str] = None,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_buffer: int = 10000,
+        max_retries: int = 5,
+        metrics_sample_rate: float = 1.0,
+        timeout: float = 10.0,
+        max_connections: int = 4,
+        http: Any = None,
+        rng: Optional[random.Random] = None,
+    ):
+        if not UNIQUE_ID_PATTERN.match(unique_id):
+            raise ValueError(f"Invalid unique_id {unique_id!r}")
+        if not PROCESS_ID_PATTERN.match(process_id):
+            raise ValueError(f"Invalid process_id {process_id!r} (must be VerbObject)")
+        if not blueprint_id:
+            raise ValueError("blueprint_id is required")
+        if not 0.0 <= metrics_sample_rate <= 1.0:
+            raise ValueError("metrics_sample_rate must be between 0 and 1")
+
+        self.base_url = base_url.rstrip("/")
+        self.agent_id = agent_id
+        self.unique_id = unique_id
+        self.process_id = process_id
+        self.blueprint_id = blueprint_id
+        self.agent_hierarchy = agent_hierarchy
+        self.project_context = project_context
+        self.signing_key = signing_key.encode("utf-8") if signing_key else None
+        self.batch_size = min(batch_size, MAX_BATCH_EVENTS)
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.max_retries = max_retries
+        self.metrics_sample_rate = metrics_sample_rate
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.rng = rng or random.Random()
+
+        self._http = http
+        self._owns_http = http is None
+        # kind -> (event, attempts)
+        self._buffers: Dict[str, Deque[Tuple[Dict[str, Any], int]]] = {kind: deque() for kind in BATCH_PATHS}
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._not_before = 0.0
+        self.stats: Dict[str, int] = {"sent": 0, "dropped": 0, "sampled_out": 0, "retried": 0, "batches": 0}
+
+    # -- lifecycle --------------------------------------------------------
+
+    async def start(self):
+        if self._http is None:
+            import httpx
+            self._http = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Send everything still buffered, then release the connection pool"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            # Items the server sheds are re-buffered, so give them a few rounds
+            for attempt in range(self.max_retries + 1):
+                await self.flush(final=True)
+                if not any(self._buffers.values()):
+                    break
+                await asyncio.sleep(backoff_delay(attempt, rng=self.rng.random))
+            for buffer in self._buffers.values():
+                self.stats["dropped"] += len(buffer)
+                buffer.clear()
+        finally:
+            if self._owns_http and self._http is not None:
+                await self._http.aclose()
+                self._http = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+        return False
+
+    # -- recording --------------------------------------------------------
+
+    def _enqueue(self, kind: str, event: Dict[str, Any], attempts: int = 0):
+        buffer = self._buffers[kind]
+        if len(buffer) >= self.max_buffer:
+            buffer.popleft()
+            self.stats["dropped"] += 1
+        buffer.append((event, attempts))
+        if len(buffer) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+
+    def log_error(self, error_type: str, error_message: str, error_stack: Optional[str] = None, **fields):
+        """Buffer an error (ErrorLogEntry fields)"""
+        event = {
+            "agent_id": self.agent_id,
+            "agent_hierarchy": self.agent_hierarchy,
+            "error_type": error_type,
+            "error_message": error_message,
+            "error_stack": error_stack,
+            "project_context": self.project_context,
+            "event_id": f"{self.rng.getrandbits(128):032x}",
+        }
+        event.update(fields)
+        self._enqueue("error", event)
+
+    def record_metrics(self, operation_type: str, execution_time_ms: int, success: bool = True, **fields):
+        """Buffer agent metrics (AgentMetrics fields); successes are sampled"""
+        if success and self.metrics_sample_rate < 1.0 and self.rng.random() >= self.metrics_sample_rate:
+            self.stats["sampled_out"] += 1
+            return
+        event = {
+            "agent_id": self.agent_id,
+            "agent_type": self.agent_hierarchy,
+            "execution_time_ms": execution_time_ms,
+            "success": success,
+            "operation_type": operation_type,
+            "project_context": self.project_context,
+        }
+        event.update(fields)
+        self._enqueue("metric", event)
+
+    def track(self, operation_type: str, **fields) -> OperationTimer:
+        """Time an operation (async with / with / decorator) and record its metrics"""
+        return OperationTimer(self, operation_type, fields)
+
+    # -- sending ----------------------------------------------------------
+
+    def doctrine_headers(self) -> Dict[str, str]:
+        timestamp = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        hash_part = sign_agent(self.signing_key, self.agent_id, timestamp) if self.signing_key else "unsigned"
+        return {
+            "unique-id": self.unique_id,
+            "process-id": self.process_id,
+            "agent-signature": f"{self.agent_id}:{timestamp}:{hash_part}",
+            "blueprint-id": self.blueprint_id,
+        }
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"ORBT batch send failed: {str(e)}")
+
+    async def flush(self, final: bool = False):
+        """Send the events buffered now, one batch per kind at a time"""
+        for kind in BATCH_PATHS:
+            buffer = self._buffers[kind]
+            # Re-buffered items wait for the next flush
+            pending = len(buffer)
+            while pending > 0 and buffer:
+                if not final and time.monotonic() < self._not_before:
+                    return
+                batch = [buffer.popleft() for _ in range(min(self.batch_size, pending, len(buffer)))]
+                pending -= len(batch)
+                await self._send(kind, batch, final)
+
+    async def _send(self, kind: str, batch: List[Tuple[Dict[str, Any], int]], final: bool):
+        body, headers = encode_batch([event for event, _ in batch])
+        url = self.base_url + BATCH_PATHS[kind]
+
+        for attempt in range(self.max_retries + 1):
+            headers.update(self.doctrine_headers())
+            retry_after = None
+            try:
+                response = await self._http.post(url, content=body, headers=headers)
+                status = response.status_code
+                retry_after = response.headers.get("retry-after")
+            except Exception as e:
+                status = None
+                logger.debug(f"ORBT batch send error: {str(e)}")
+
+            if status is not None and status < 300:
+                self.stats["batches"] += 1
+                self._requeue_shed(kind, batch, response.json().get("results", []))
+                return
+            if status is not None and status not in RETRYABLE_STATUS:
+                # A rejected batch (bad headers or body) will not succeed on retry
+                self.stats["dropped"] += len(batch)
+                logger.warning(f"ORBT rejected {kind} batch with HTTP {status}; dropped {len(batch)} events")
+                return
+            if attempt == self.max_retries:
+                break
+            delay = backoff_delay(attempt, rng=self.rng.random)
+            if retry_after is not None:
+                try:
+                    delay = max(delay, float(retry_after))
+                except ValueError:
+                    pass
+            self.stats["retried"] += 1
+            await asyncio.sleep(delay)
+
+        # Out of retries: keep the events for a later flush unless closing
+        if final:
+            self.stats["dropped"] += len(batch)
+        else:
+            self._not_before = time.monotonic() + self.flush_interval
+            for event, attempts in reversed(batch):
+                self._buffers[kind].appendleft((event, attempts))
+
+    def _requeue_shed(self, kind: str, batch: List[Tuple[Dict[str, Any], int]], results: List[Dict[str, Any]]):
+        """Count accepted items; re-buffer ones the server shed or failed to write"""
+        if not results:
+            self.stats["sent"] += len(batch)
+            return
+        for (event, attempts), result in zip(batch, results):
+            status = result.get("status_code", 200)
+            if status < 300:
+                self.stats["sent"] += 1
+            elif status in RETRYABLE_STATUS and attempts < self.max_retries:
+                self.stats["retried"] += 1
+                self._enqueue(kind, event, attempts + 1)
+                retry_after = (result.get("error") or {}).get("retry_after_seconds")
+                if retry_after:
+                    self._not_before = max(self._not_before, time.monotonic() + retry_after)
+            else:
+                self.stats["dropped"] += 1
+                logger.warning(f"ORBT rejected {kind} event with HTTP {status}: {result.get('detail')}")
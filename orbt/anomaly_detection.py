@@ -0,0 +1,151 @@
+# ORBT Error Rate Anomaly Detection
+# Streaming per-key error-rate baselines, so escalation can tell a sudden
+# spike from a chronic low-rate error that has always been there.
+#
+# Errors are counted in fixed buckets (5 minutes by default). When a bucket
+# closes its count updates an EWMA mean/variance and an hour-of-day seasonal
+# mean for that key; a bucket's anomaly score is its z-score against the
+# seasonal mean (once a day of history exists) or the EWMA mean. State per
+# key is a handful of numbers plus 24 seasonal slots, so memory is O(keys)
+# and each observation is O(1).
+#
+#   detector.observe("agent:database-specialist", timestamp)
+#   detector.anomalies()        # keys whose rate spiked in this batch
+#   detector.score(key)         # None until the key has a baseline
+
+import math
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from orbt.fingerprint import error_fingerprint
+
+SEASON_SLOTS = 24
+SECONDS_PER_DAY = 86400
+
+
+def agent_key(agent_id: str) -> str:
+    return f"agent:{agent_id}"
+
+
+def pattern_key(error_cluster_id: Optional[str], error_type: Optional[str], error_message: Optional[str]) -> str:
+    """Near-duplicate cluster when assigned, otherwise the exact-text fingerprint"""
+    return f"pattern:{error_cluster_id or error_fingerprint(error_type, error_message)}"
+
+
+class RateState:
+    """Baseline for one key"""
+
+    __slots__ = ("bucket", "count", "mean", "var", "seasonal", "observed", "last_score")
+
+    def __init__(self, bucket: int):
+        self.bucket = bucket
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.seasonal: List[Optional[float]] = [None] * SEASON_SLOTS
+        self.observed = 0
+        self.last_score: Optional[float] = None
+
+
+class RateAnomalyDetector:
+    """EWMA + seasonal error-rate baselines keyed by agent or pattern"""
+
+    def __init__(self, bucket_seconds: int = 300, alpha: float = 0.1, seasonal_alpha: float = 0.2,
+                 warmup_buckets: int = 12, threshold: float = 3.0, critical_threshold: float = 6.0,
+                 max_keys: int = 50000):
+        self.bucket_seconds = bucket_seconds
+        self.alpha = alpha
+        self.seasonal_alpha = seasonal_alpha
+        self.warmup_buckets = warmup_buckets
+        self.threshold = threshold
+        self.critical_threshold = critical_threshold
+        self.max_keys = max_keys
+        self.buckets_per_day = SECONDS_PER_DAY // bucket_seconds
+        self._states: "OrderedDict[str, RateState]" = OrderedDict()
+        self._touched = set()
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _slot(self, bucket: int) -> int:
+        return (bucket * self.bucket_seconds % SECONDS_PER_DAY) * SEASON_SLOTS // SECONDS_PER_DAY
+
+    def _expected(self, state: RateState, bucket: int) -> float:
+        seasonal = state.seasonal[self._slot(bucket)]
+        if seasonal is not None and state.observed >= self.buckets_per_day:
+            return seasonal
+        return state.mean
+
+    def _z(self, state: RateState, count: int, bucket: int) -> float:
+        expected = self._expected(state, bucket)
+        # Poisson floor: a key with a flat history still has count noise
+        return (count - expected) / math.sqrt(max(state.var, expected, 1.0))
+
+    def _close(self, state: RateState, count: int, bucket: int):
+        if state.observed >= self.warmup_buckets:
+            state.last_score = self._z(state, count, bucket)
+        diff = count - state.mean
+        state.mean += self.alpha * diff
+        state.var = (1 - self.alpha) * (state.var + self.alpha * diff * diff)
+        slot = self._slot(bucket)
+        seasonal = state.seasonal[slot]
+        state.seasonal[slot] = count if seasonal is None else seasonal + self.seasonal_alpha * (count - seasonal)
+        state.observed += 1
+
+    def _advance(self, state: RateState, bucket: int):
+        """Close the open bucket and any empty buckets before `bucket`"""
+        if bucket <= state.bucket:
+            return
+        self._close(state, state.count, state.bucket)
+        empty = bucket - state.bucket - 1
+        # Beyond a day of silence, decay in closed form; replay the last day
+        # so every seasonal slot still sees its empty buckets
+        skipped = max(0, empty - self.buckets_per_day)
+        if skipped:
+            decay = (1 - self.alpha) ** skipped
+            state.mean *= decay
+            state.var *= decay
+            state.observed += skipped
+        for empty_bucket in range(state.bucket + 1 + skipped, bucket):
+            self._close(state, 0, empty_bucket)
+        state.bucket = bucket
+        state.count = 0
+
+    def observe(self, key: str, timestamp: Optional[float] = None, count: int = 1):
+        """Count `count` errors for key at timestamp (epoch seconds)"""
+        bucket = int((time.time() if timestamp is None else timestamp) // self.bucket_seconds)
+        state = self._states.get(key)
+        if state is None:
+            state = self._states[key] = RateState(bucket)
+            if len(self._states) > self.max_keys:
+                self._states.popitem(last=False)
+        else:
+            self._states.move_to_end(key)
+            self._advance(state, bucket)
+        # Late rows (bucket already closed) count toward the open bucket
+        state.count += count
+        self._touched.add(key)
+
+    def score(self, key: str, now: Optional[float] = None) -> Optional[float]:
+        """Anomaly score of the key's current rate; None until it has a baseline"""
+        state = self._states.get(key)
+        if state is None or state.observed < self.warmup_buckets:
+            return None
+        bucket = int((time.time() if now is None else now) // self.bucket_seconds)
+        if bucket - state.bucket > 1:
+            # Quiet since before the last bucket
+            return 0.0
+        # The open bucket is partial, so also consider the last full one
+        current = self._z(state, state.count, state.bucket)
+        return current if state.last_score is None else max(current, state.last_score)
+
+    def anomalies(self, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Keys observed since the last call whose score is at or above the threshold"""
+        flagged = []
+        for key in self._touched:
+            score = self.score(key, now)
+            if score is not None and score >= self.threshold:
+                flagged.append((key, score))
+        self._touched = set()
+        return sorted(flagged, key=lambda item: -item[1])
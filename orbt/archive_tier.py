@@ -0,0 +1,305 @@
+# ORBT Archive Tier
+# Aged rows are moved out of the hot tables into compressed, time-segmented
+# NDJSON files on local disk instead of being deleted, so trend analysis
+# keeps its history while orbt_error_log / orbt_agent_metrics stay small.
+#
+# Layout under the archive directory:
+#   <table>/<YYYY-MM-DD>/<first row time>-<token>.ndjson.zst   (.gz without zstandard)
+#   index.json   one entry per segment: time range, row count, agents
+# Each archive batch runs `DELETE ... RETURNING *` inside a transaction,
+# writes one segment per UTC day (fsynced), records the segments in the
+# index and only then commits. A failure before the commit rolls the delete
+# back, so a row is never lost; a crash between the index write and the
+# commit can archive a row twice, which query() drops by the table's key.
+#
+#   archive = ArchiveTier("orbt_archive")
+#   await archive.archive(conn, "orbt_error_log", cutoff)          # from the daemon
+#   for row in archive.query("orbt_error_log", start, end, agent_ids={"database-specialist"}):
+#       ...
+# query() opens only the segments whose time range and agent list can match.
+
+import asyncio
+import gzip
+import io
+import json
+import logging
+import os
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from orbt.fast_json import dumps as render_json
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional, gzip is used instead
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = "index.json"
+
+CODECS = ("zstd", "gzip")
+EXTENSIONS = {"zstd": ".ndjson.zst", "gzip": ".ndjson.gz"}
+
+# Segments with more distinct agents than this are indexed without an agent
+# list (always scanned for agent queries)
+MAX_INDEXED_AGENTS = 256
+
+
+class ArchiveTable:
+    """Which rows of a table age out, and how they are keyed and indexed"""
+
+    __slots__ = ("name", "key", "time_column", "agent_column", "where")
+
+    def __init__(self, name: str, key: str, time_column: str, agent_column: Optional[str], where: str):
+        self.name = name
+        self.key = key
+        self.time_column = time_column
+        self.agent_column = agent_column
+        # Selects archivable rows of `t`; $1 is the cutoff timestamp
+        self.where = where
+
+    def delete_sql(self) -> str:
+        return f"""
+            DELETE FROM {self.name}
+            WHERE id IN (
+                SELECT id FROM {self.name} t
+                WHERE {self.where}
+                ORDER BY {self.time_column}
+                LIMIT $2
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING *
+        """
+
+
+ARCHIVE_TABLES: Dict[str, ArchiveTable] = {
+    table.name: table for table in (
+        ArchiveTable(
+            "orbt_escalation_queue", "escalation_id", "resolved_at", None,
+            "t.status = 'RESOLVED' AND t.resolved_at < $1"
+        ),
+        # RED and human-flagged errors stay hot; so do errors an escalation
+        # still references
+        ArchiveTable(
+            "orbt_error_log", "error_id", "timestamp", "agent_id",
+            "t.timestamp < $1 AND t.orbt_status != 'RED' AND t.requires_human = FALSE"
+            " AND NOT EXISTS (SELECT 1 FROM orbt_escalation_queue q WHERE q.error_id = t.error_id)"
+        ),
+        ArchiveTable("orbt_agent_metrics", "metric_id", "timestamp", "agent_id", "t.timestamp < $1"),
+    )
+}
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """Archived ISO 8601 string (or datetime) -> aware datetime"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _fsync_directory(path: str):
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(path, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def _write_atomic(path: str, data: bytes):
+    with open(path + ".tmp", "wb") as handle:
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(path + ".tmp", path)
+    _fsync_directory(os.path.dirname(path))
+
+
+class ArchiveTier:
+    """Compressed, time-segmented archive of aged ORBT rows with a segment index"""
+
+    def __init__(self, directory: str, codec: Optional[str] = None, batch_size: int = 5000,
+                 compression_level: Optional[int] = None,
+                 tables: Optional[Dict[str, ArchiveTable]] = None):
+        if codec is None:
+            codec = "zstd" if zstandard is not None else "gzip"
+        if codec not in CODECS:
+            raise ValueError(f"Unknown archive codec {codec!r}")
+        if codec == "zstd" and zstandard is None:
+            raise ValueError("zstd archive codec requires the zstandard package")
+        self.directory = directory
+        self.codec = codec
+        self.batch_size = batch_size
+        self.compression_level = compression_level
+        self.tables = tables or ARCHIVE_TABLES
+        self._segments: Optional[List[Dict[str, Any]]] = None
+
+    # -- index ------------------------------------------------------------
+
+    @property
+    def segments_index(self) -> List[Dict[str, Any]]:
+        if self._segments is None:
+            path = os.path.join(self.directory, INDEX_FILE)
+            try:
+                with open(path, "rb") as handle:
+                    self._segments = json.loads(handle.read())["segments"]
+            except FileNotFoundError:
+                self._segments = []
+        return self._segments
+
+    def _save_index(self, entries: List[Dict[str, Any]]):
+        segments = self.segments_index + entries
+        os.makedirs(self.directory, exist_ok=True)
+        _write_atomic(
+            os.path.join(self.directory, INDEX_FILE),
+            json.dumps({"version": 1, "segments": segments}, separators=(",", ":")).encode("utf-8")
+        )
+        self._segments = segments
+
+    def segments(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                 agent_ids: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """Index entries for `table` that can hold rows in [start, end) for any of agent_ids"""
+        start, end = parse_time(start), parse_time(end)
+        agents = set(agent_ids) if agent_ids else None
+        matches = []
+        for entry in self.segments_index:
+            if entry["table"] != table:
+                continue
+            if start is not None and parse_time(entry["end"]) < start:
+                continue
+            if end is not None and parse_time(entry["start"]) >= end:
+                continue
+            if agents is not None and entry["agents"] is not None and agents.isdisjoint(entry["agents"]):
+                continue
+            matches.append(entry)
+        matches.sort(key=lambda entry: entry["start"])
+        return matches
+
+    # -- archiving --------------------------------------------------------
+
+    async def archive(self, conn, table: str, cutoff: datetime, max_batches: int = 10) -> int:
+        """Move rows of `table` older than cutoff into the archive; returns rows moved"""
+        spec = self.tables[table]
+        sql = spec.delete_sql()
+        loop = asyncio.get_running_loop()
+        moved = 0
+        for _ in range(max_batches):
+            async with conn.transaction():
+                rows = await conn.fetch(sql, cutoff, self.batch_size)
+                if not rows:
+                    break
+                # Compression and fsyncs stay off the event loop; the delete
+                # commits only once the segments and index are durable
+                await loop.run_in_executor(None, self._store, spec, rows)
+            moved += len(rows)
+            if len(rows) < self.batch_size:
+                break
+        if moved:
+            logger.info(f"Archived {moved} rows from {table}")
+        return moved
+
+    def _store(self, spec: ArchiveTable, rows: List[Any]):
+        by_day: Dict[str, List[Any]] = {}
+        for row in rows:
+            stamp = parse_time(row[spec.time_column])
+            by_day.setdefault(stamp.astimezone(timezone.utc).strftime("%Y-%m-%d"), []).append((stamp, row))
+
+        entries = []
+        for day, stamped in sorted(by_day.items()):
+            stamped.sort(key=lambda item: item[0])
+            entries.append(self._write_segment(spec, day, stamped))
+        self._save_index(entries)
+
+    def _write_segment(self, spec: ArchiveTable, day: str, stamped: List[Any]) -> Dict[str, Any]:
+        first, last = stamped[0][0], stamped[-1][0]
+        body = b"".join(render_json(row) + b"\n" for _, row in stamped)
+        if self.codec == "zstd":
+            level = self.compression_level if self.compression_level is not None else 10
+            data = zstandard.ZstdCompressor(level=level).compress(body)
+        else:
+            level = self.compression_level if self.compression_level is not None else 6
+            data = gzip.compress(body, compresslevel=level)
+
+        agents = None
+        if spec.agent_column is not None:
+            distinct = {row[spec.agent_column] for _, row in stamped}
+            agents = sorted(distinct) if len(distinct) <= MAX_INDEXED_AGENTS else None
+
+        relative = os.path.join(
+            spec.name, day,
+            f"{first.astimezone(timezone.utc):%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}{EXTENSIONS[self.codec]}"
+        )
+        path = os.path.join(self.directory, relative)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _write_atomic(path, data)
+
+        return {
+            "table": spec.name,
+            "file": relative,
+            "codec": self.codec,
+            "start": first.isoformat(),
+            "end": last.isoformat(),
+            "rows": len(stamped),
+            "bytes": len(data),
+            "raw_bytes": len(body),
+            "agents": agents,
+        }
+
+    # -- querying ---------------------------------------------------------
+
+    def _open_segment(self, entry: Dict[str, Any]):
+        path = os.path.join(self.directory, entry["file"])
+        if entry["codec"] == "zstd":
+            if zstandard is None:
+                raise RuntimeError(f"Segment {entry['file']} is zstd-compressed; install zstandard to read it")
+            raw = open(path, "rb")
+            return io.TextIOWrapper(zstandard.ZstdDecompressor().stream_reader(raw, closefd=True), encoding="utf-8")
+        return gzip.open(path, "rt", encoding="utf-8")
+
+    def query(self, table: str, start: Optional[datetime] = None, end: Optional[datetime] = None,
+              agent_ids: Optional[Iterable[str]] = None,
+              predicate: Optional[Callable[[Dict[str, Any]], bool]] = None,
+              limit: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Archived rows of `table` in [start, end), streamed segment by segment"""
+        spec = self.tables[table]
+        start, end = parse_time(start), parse_time(end)
+        agents = set(agent_ids) if agent_ids else None
+        seen = set()
+        returned = 0
+
+        for entry in self.segments(table, start, end, agents):
+            with self._open_segment(entry) as handle:
+                for line in handle:
+                    row = json.loads(line)
+                    if agents is not None and row.get(spec.agent_column) not in agents:
+                        continue
+                    if start is not None or end is not None:
+                        stamp = parse_time(row.get(spec.time_column))
+                        if (start is not None and stamp < start) or (end is not None and stamp >= end):
+                            continue
+                    if predicate is not None and not predicate(row):
+                        continue
+                    key = row.get(spec.key)
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    yield row
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+    def stats(self) -> Dict[str, Any]:
+        tables: Dict[str, Dict[str, int]] = {}
+        for entry in self.segments_index:
+            totals = tables.setdefault(entry["table"], {"segments": 0, "rows": 0, "bytes": 0, "raw_bytes": 0})
+            totals["segments"] += 1
+            totals["rows"] += entry["rows"]
+            totals["bytes"] += entry["bytes"]
+            totals["raw_bytes"] += entry["raw_bytes"]
+        return {"directory": self.directory, "codec": self.codec, "tables": tables}
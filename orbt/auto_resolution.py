@@ -0,0 +1,140 @@
+# ORBT Auto-Resolution Executor
+# Runs registered resolution handlers for error patterns flagged with
+# auto_resolution_available in orbt_error_patterns, before escalating to a
+# human. Handlers run concurrently in a bounded pool with per-handler timeouts.
+#
+# Registering a handler:
+#   executor = AutoResolutionExecutor(max_workers=4)
+#
+#   @executor.handler("restart_connection_pool", error_codes=["CONN_TIMEOUT"], timeout=20)
+#   async def restart_pool(context):
+#       ...                     # raise or return False on failure
+#       return "Pool recycled"  # optional notes for the training log
+
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from orbt.fingerprint import extract_error_codes, normalize_error_message
+
+logger = logging.getLogger(__name__)
+
+AUTO_RESOLVABLE_PATTERNS_QUERY = """
+    SELECT pattern_id, error_signature, known_solution, confidence_score
+    FROM orbt_error_patterns
+    WHERE auto_resolution_available = TRUE
+"""
+
+
+class ResolutionHandler:
+    """A registered handler and the patterns it applies to"""
+
+    __slots__ = ("name", "func", "timeout", "error_codes")
+
+    def __init__(self, name: str, func: Callable, timeout: float, error_codes: Iterable[str]):
+        self.name = name
+        self.func = func
+        self.timeout = timeout
+        self.error_codes = frozenset(code.upper() for code in error_codes)
+
+
+class AutoResolutionExecutor:
+    """
+    Matches error patterns to handlers and executes them.
+
+    A pattern matches a handler when its known_solution names the handler, or
+    when an error code in its error_signature is one the handler declared.
+    """
+
+    def __init__(self, max_workers: int = 4, default_timeout: float = 30.0):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self._handlers: Dict[str, ResolutionHandler] = {}
+        self._by_code: Dict[str, ResolutionHandler] = {}
+
+    def __bool__(self) -> bool:
+        return bool(self._handlers)
+
+    def register(self, name: str, func: Callable, timeout: Optional[float] = None,
+                 error_codes: Iterable[str] = ()):
+        handler = ResolutionHandler(name, func, timeout or self.default_timeout, error_codes)
+        self._handlers[name] = handler
+        for code in handler.error_codes:
+            self._by_code[code] = handler
+        return handler
+
+    def handler(self, name: str, timeout: Optional[float] = None, error_codes: Iterable[str] = ()):
+        """Decorator form of register()"""
+        def decorator(func):
+            self.register(name, func, timeout, error_codes)
+            return func
+        return decorator
+
+    def match(self, pattern) -> Optional[ResolutionHandler]:
+        known_solution = pattern.get("known_solution")
+        if known_solution and known_solution.strip() in self._handlers:
+            return self._handlers[known_solution.strip()]
+
+        for code in extract_error_codes(pattern.get("error_signature")):
+            if code in self._by_code:
+                return self._by_code[code]
+        return None
+
+    def plan(self, candidates, patterns) -> List[Tuple[Any, Any, ResolutionHandler]]:
+        """Pair escalation candidates with auto-resolvable patterns and handlers"""
+        by_signature = {
+            normalize_error_message(pattern["error_signature"]): pattern
+            for pattern in patterns
+        }
+
+        jobs = []
+        for candidate in candidates:
+            pattern = by_signature.get(normalize_error_message(candidate["error_message"]))
+            if pattern is None:
+                continue
+            handler = self.match(pattern)
+            if handler is not None:
+                jobs.append((candidate, pattern, handler))
+        return jobs
+
+    async def run_all(self, jobs) -> List[Dict[str, Any]]:
+        """Execute jobs concurrently, at most max_workers at a time"""
+        semaphore = asyncio.Semaphore(self.max_workers)
+
+        async def bounded(candidate, pattern, handler):
+            async with semaphore:
+                return await self.run(handler, {"candidate": candidate, "pattern": pattern})
+
+        return list(await asyncio.gather(*(bounded(*job) for job in jobs)))
+
+    async def run(self, handler: ResolutionHandler, context: Dict[str, Any]) -> Dict[str, Any]:
+        """Execute one handler with its timeout; never raises"""
+        started = time.monotonic()
+        outcome = {
+            "handler": handler.name,
+            "pattern_id": context["pattern"].get("pattern_id"),
+            "success": False,
+            "notes": None,
+        }
+
+        try:
+            if asyncio.iscoroutinefunction(handler.func):
+                call = handler.func(context)
+            else:
+                call = asyncio.get_running_loop().run_in_executor(None, handler.func, context)
+            result = await asyncio.wait_for(call, timeout=handler.timeout)
+
+            outcome["success"] = result is not False
+            if isinstance(result, str):
+                outcome["notes"] = result
+
+        except asyncio.TimeoutError:
+            outcome["notes"] = f"Timed out after {handler.timeout}s"
+        except Exception as e:
+            outcome["notes"] = f"{type(e).__name__}: {str(e)}"
+
+        outcome["duration_seconds"] = round(time.monotonic() - started, 3)
+        if not outcome["success"]:
+            logger.warning(f"Auto-resolution handler {handler.name} failed: {outcome['notes']}")
+        return outcome
@@ -0,0 +1,56 @@
+# ORBT Batch Codec
+# Wire format of the batched ingest endpoints (/api/orbt/errors/batch,
+# /api/orbt/metrics/batch): a JSON array of event objects, gzip-compressed
+# when large enough to be worth it. Shared by orbt/agent_client.py, which
+# encodes batches, and the monitoring API, which decodes them.
+#
+# Decoding is bounded: a small gzip body cannot expand past max_bytes, and a
+# batch holds at most max_events events.
+
+import gzip
+import json
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+# Per-request limits enforced by the batch endpoints
+MAX_BATCH_EVENTS = 500
+MAX_BATCH_BYTES = 8 * 1024 * 1024
+
+
+class BatchDecodeError(ValueError):
+    """A batch body that is not a bounded JSON array of events"""
+
+
+def encode_batch(events: List[Dict[str, Any]], min_compress_bytes: int = 1024) -> Tuple[bytes, Dict[str, str]]:
+    """JSON body for a batch, gzip-compressed when large enough to be worth it"""
+    body = json.dumps(events, separators=(",", ":"), default=str).encode("utf-8")
+    headers = {"content-type": "application/json"}
+    if len(body) >= min_compress_bytes:
+        body = gzip.compress(body, compresslevel=5)
+        headers["content-encoding"] = "gzip"
+    return body, headers
+
+
+def decode_batch(body: bytes, content_encoding: Optional[str] = None,
+                 max_bytes: int = MAX_BATCH_BYTES, max_events: int = MAX_BATCH_EVENTS) -> List[Dict[str, Any]]:
+    """Events from a batch body; bounded so a small gzip body cannot expand without limit"""
+    if content_encoding and content_encoding.lower() == "gzip":
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        try:
+            body = decompressor.decompress(body, max_bytes + 1)
+        except zlib.error as e:
+            raise BatchDecodeError(f"Invalid gzip body: {e}")
+    elif content_encoding and content_encoding.lower() != "identity":
+        raise BatchDecodeError(f"Unsupported content-encoding {content_encoding!r}")
+    if len(body) > max_bytes:
+        raise BatchDecodeError(f"Batch body exceeds {max_bytes} bytes")
+
+    try:
+        events = json.loads(body)
+    except ValueError as e:
+        raise BatchDecodeError(f"Invalid JSON body: {e}")
+    if not isinstance(events, list) or not all(isinstance(event, dict) for event in events):
+        raise BatchDecodeError("Batch body must be a JSON array of objects")
+    if len(events) > max_events:
+        raise BatchDecodeError(f"Batch has {len(events)} events (max {max_events})")
+    return events
@@ -0,0 +1,360 @@
+# ORBT Bulk Export
+# Streams large time ranges of orbt_error_log / orbt_agent_metrics out of
+# Postgres with server-side `COPY (SELECT ...) TO STDOUT`, for analysts who
+# otherwise page GET /api/orbt/errors 1000 rows at a time.
+#
+# Column selection and filters (time range, equality / IN on indexed
+# columns) are pushed into the SELECT, so only wanted rows and columns leave
+# the database. Output is produced chunk by chunk with a bounded queue
+# between COPY and the consumer, so memory stays flat whatever the range:
+#   csv      COPY's own CSV (with header), passed straight through
+#   parquet  one row group per `chunk_rows` rows (requires pyarrow)
+#   arrow    Arrow IPC stream, one record batch per `chunk_rows` rows (pyarrow)
+# The columnar formats read COPY's text format, where every row is one line
+# and NULL is unambiguous (\N), with timestamps as epoch microseconds.
+#
+#   query = build_export_query("errors", "parquet", columns=["timestamp", "agent_id", "error_message"],
+#                              start=start, filters={"orbt_status": ["RED"]})
+#   async for chunk in stream_export(conn, query):
+#       out.write(chunk)
+
+import asyncio
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+FORMATS = ("csv", "parquet", "arrow")
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrows"}
+
+
+class ExportRequestError(ValueError):
+    """Unknown dataset, column, filter or format"""
+
+
+class ExportTable:
+    """An exportable table: columns with their types, and filterable columns"""
+
+    __slots__ = ("name", "columns", "time_column", "filters")
+
+    def __init__(self, name: str, columns: Dict[str, str], time_column: str, filters: Iterable[str]):
+        self.name = name
+        # column -> one of text, int, float, bool, timestamp
+        self.columns = columns
+        self.time_column = time_column
+        self.filters = tuple(filters)
+
+
+EXPORT_TABLES: Dict[str, ExportTable] = {
+    "errors": ExportTable(
+        "orbt_error_log",
+        {
+            "id": "int", "error_id": "text", "orbt_status": "text", "timestamp": "timestamp",
+            "resolved_timestamp": "timestamp", "agent_id": "text", "agent_hierarchy": "text",
+            "error_type": "text", "error_message": "text", "error_stack": "text",
+            "error_cluster_id": "text", "doctrine_violated": "text", "section_number": "text",
+            "occurrence_count": "int", "repeat_count": "int", "escalation_level": "int",
+            "requires_human": "bool", "project_context": "text", "render_endpoint": "text",
+            "resolved": "bool", "resolution_method": "text", "resolution_notes": "text",
+            "downtime_seconds": "int", "affected_users": "int",
+            "created_at": "timestamp", "updated_at": "timestamp",
+        },
+        "timestamp",
+        ("agent_id", "orbt_status", "error_type", "agent_hierarchy", "project_context",
+         "error_cluster_id", "resolved", "requires_human"),
+    ),
+    "metrics": ExportTable(
+        "orbt_agent_metrics",
+        {
+            "id": "int", "metric_id": "text", "agent_id": "text", "agent_type": "text",
+            "execution_time_ms": "int", "token_usage": "int", "memory_usage_mb": "float",
+            "cpu_usage_percent": "float", "success": "bool", "error_count": "int",
+            "retry_count": "int", "project_context": "text", "render_endpoint": "text",
+            "operation_type": "text", "timestamp": "timestamp", "created_at": "timestamp",
+        },
+        "timestamp",
+        ("agent_id", "agent_type", "operation_type", "project_context", "success"),
+    ),
+}
+
+
+class ExportQuery:
+    """A validated export: the COPY query, its arguments and output columns"""
+
+    __slots__ = ("dataset", "format", "columns", "types", "sql", "args")
+
+    def __init__(self, dataset: str, fmt: str, columns: List[str], types: List[str], sql: str, args: List[Any]):
+        self.dataset = dataset
+        self.format = fmt
+        self.columns = columns
+        self.types = types
+        self.sql = sql
+        self.args = args
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ExportRequestError("parquet and arrow exports require pyarrow; use format=csv")
+    return pyarrow
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.strip().lower()
+    if lowered in ("true", "t", "1", "yes"):
+        return True
+    if lowered in ("false", "f", "0", "no"):
+        return False
+    raise ExportRequestError(f"Not a boolean: {value!r}")
+
+
+def build_export_query(dataset: str, fmt: str = "csv", columns: Optional[Iterable[str]] = None,
+                       start: Optional[datetime] = None, end: Optional[datetime] = None,
+                       filters: Optional[Dict[str, Iterable[str]]] = None) -> ExportQuery:
+    """Validate an export request and build its SELECT (rows ordered by time)"""
+    table = EXPORT_TABLES.get(dataset)
+    if table is None:
+        raise ExportRequestError(f"Unknown dataset {dataset!r}; expected one of {sorted(EXPORT_TABLES)}")
+    if fmt not in FORMATS:
+        raise ExportRequestError(f"Unknown format {fmt!r}; expected one of {list(FORMATS)}")
+    if fmt != "csv":
+        _require_pyarrow()
+
+    selected = list(columns) if columns else list(table.columns)
+    unknown = [column for column in selected if column not in table.columns]
+    if unknown:
+        raise ExportRequestError(f"Unknown {dataset} columns: {', '.join(unknown)}")
+    if len(set(selected)) != len(selected):
+        raise ExportRequestError("Duplicate columns requested")
+    types = [table.columns[column] for column in selected]
+
+    expressions = []
+    for column, column_type in zip(selected, types):
+        if fmt != "csv" and column_type == "timestamp":
+            expressions.append(f"(EXTRACT(EPOCH FROM {column}) * 1000000)::BIGINT AS {column}")
+        elif fmt != "csv" and column_type == "float":
+            expressions.append(f"{column}::FLOAT8 AS {column}")
+        else:
+            expressions.append(column)
+
+    conditions = []
+    args: List[Any] = []
+    if start is not None:
+        args.append(start)
+        conditions.append(f"{table.time_column} >= ${len(args)}")
+    if end is not None:
+        if start is not None and end <= start:
+            raise ExportRequestError("end must be after start")
+        args.append(end)
+        conditions.append(f"{table.time_column} < ${len(args)}")
+    for column, values in (filters or {}).items():
+        if column not in table.filters:
+            raise ExportRequestError(f"Cannot filter {dataset} on {column!r}; filterable: {', '.join(table.filters)}")
+        values = list(values)
+        if not values:
+            continue
+        if table.columns[column] == "bool":
+            values = [_parse_bool(value) for value in values]
+        args.append(values)
+        cast = "BOOLEAN[]" if table.columns[column] == "bool" else "TEXT[]"
+        conditions.append(f"{column} = ANY(${len(args)}::{cast})")
+
+    sql = f"SELECT {', '.join(expressions)} FROM {table.name}"
+    if conditions:
+        sql += f" WHERE {' AND '.join(conditions)}"
+    sql += f" ORDER BY {table.time_column}"
+    return ExportQuery(dataset, fmt, selected, types, sql, args)
+
+
+async def copy_chunks(conn, sql: str, args: List[Any], queue_size: int = 16, **copy_options) -> AsyncIterator[bytes]:
+    """COPY (sql) TO STDOUT as a stream of chunks; COPY waits while the queue is full"""
+    queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize=queue_size)
+
+    async def sink(data: bytes):
+        await queue.put(data)
+
+    async def run_copy():
+        # No end marker once cancelled: the consumer is gone and the queue
+        # may be full
+        try:
+            await conn.copy_from_query(sql, *args, output=sink, **copy_options)
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    task = asyncio.create_task(run_copy())
+    try:
+        while True:
+            chunk = await queue.get()
+            if chunk is None:
+                break
+            yield chunk
+        # Re-raise a COPY failure
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", "v": "\v", "\\": "\\"}
+_ESCAPE_RE = re.compile(r"\\(.)")
+
+
+def _unescape(field: str) -> str:
+    # COPY TO only emits single-character escapes (never octal/hex)
+    return _ESCAPE_RE.sub(lambda match: _ESCAPES.get(match.group(1), match.group(1)), field)
+
+
+_CONVERTERS = {
+    "text": lambda value: _unescape(value) if "\\" in value else value,
+    "int": int,
+    "timestamp": int,
+    "float": float,
+    "bool": lambda value: value == "t",
+}
+
+
+class TextCopyDecoder:
+    """Incrementally parses COPY text-format chunks into typed column lists"""
+
+    def __init__(self, types: List[str]):
+        self.types = types
+        self._converters = [_CONVERTERS[column_type] for column_type in types]
+        self._tail = b""
+        self._columns: List[List[Any]] = [[] for _ in types]
+        self.pending_rows = 0
+
+    def feed(self, chunk: bytes):
+        data = self._tail + chunk
+        cut = data.rfind(b"\n")
+        if cut < 0:
+            self._tail = data
+            return
+        # Literal newlines are escaped, so every \n ends a row (and never
+        # splits a UTF-8 sequence)
+        self._tail = data[cut + 1:]
+        columns = self._columns
+        converters = self._converters
+        lines = data[:cut].decode("utf-8").split("\n")
+        for line in lines:
+            fields = line.split("\t")
+            if len(fields) != len(converters):
+                raise ValueError(f"COPY row has {len(fields)} fields, expected {len(converters)}")
+            for values, convert, field in zip(columns, converters, fields):
+                values.append(None if field == "\\N" else convert(field))
+        self.pending_rows += len(lines)
+
+    def take(self) -> List[List[Any]]:
+        """Columns parsed so far (and reset)"""
+        columns, self._columns = self._columns, [[] for _ in self.types]
+        self.pending_rows = 0
+        return columns
+
+    def finish(self):
+        if self._tail:
+            raise ValueError("COPY output ended mid-row")
+
+
+class _ByteSink:
+    """Write-only file object whose contents are drained after each batch"""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def writable(self) -> bool:
+        return True
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+class ArrowChunkWriter:
+    """Writes column batches as Parquet row groups or Arrow IPC record batches"""
+
+    def __init__(self, fmt: str, columns: List[str], types: List[str], compression: str = "zstd"):
+        pa = _require_pyarrow()
+        arrow_types = {
+            "text": pa.string(), "int": pa.int64(), "float": pa.float64(),
+            "bool": pa.bool_(), "timestamp": pa.timestamp("us", tz="UTC"),
+        }
+        self._pa = pa
+        self.format = fmt
+        self.schema = pa.schema([pa.field(column, arrow_types[column_type]) for column, column_type in zip(columns, types)])
+        self._sink = _ByteSink()
+        if fmt == "parquet":
+            self._writer = pa.parquet.ParquetWriter(self._sink, self.schema, compression=compression)
+        else:
+            self._writer = pa.ipc.new_stream(self._sink, self.schema)
+
+    def write(self, columns: List[List[Any]]) -> bytes:
+        pa = self._pa
+        if columns and columns[0]:
+            arrays = []
+            for values, field in zip(columns, self.schema):
+                if pa.types.is_timestamp(field.type):
+                    arrays.append(pa.array(values, type=pa.int64()).cast(field.type))
+                else:
+                    arrays.append(pa.array(values, type=field.type))
+            batch = pa.RecordBatch.from_arrays(arrays, schema=self.schema)
+            if self.format == "parquet":
+                self._writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                self._writer.write_batch(batch)
+        return self._sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+async def stream_export(conn, query: ExportQuery, chunk_rows: int = 50000) -> AsyncIterator[bytes]:
+    """Export output for `query`, chunk by chunk"""
+    if query.format == "csv":
+        async for chunk in copy_chunks(conn, query.sql, query.args, format="csv", header=True):
+            yield chunk
+        return
+
+    decoder = TextCopyDecoder(query.types)
+    writer = ArrowChunkWriter(query.format, query.columns, query.types)
+    async for chunk in copy_chunks(conn, query.sql, query.args, format="text"):
+        decoder.feed(chunk)
+        if decoder.pending_rows >= chunk_rows:
+            data = writer.write(decoder.take())
+            if data:
+                yield data
+    decoder.finish()
+    data = writer.write(decoder.take()) + writer.close()
+    if data:
+        yield data
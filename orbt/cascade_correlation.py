@@ -0,0 +1,132 @@
+# ORBT Cascade Correlation
+# Groups escalation candidates that are one incident seen at several layers of
+# the agent hierarchy: a failing specialist is usually followed by its manager
+# and orchestrator failing too.
+#
+# A pattern is linked to an earlier pattern when its agent is an ancestor of
+# the earlier one's agent (failures propagate upward) and it started within
+# window_seconds of it. Patterns are swept in first_occurrence order while an
+# index maps every agent to the in-window patterns of its descendants, so each
+# pattern costs one dict lookup plus one update per ancestor instead of a
+# comparison with every other candidate.
+#
+# A group only ever spans one chain of the hierarchy: every pair of agents in
+# it is ancestor/descendant (or the same agent). An ancestor symptom that
+# follows failures in two sibling subtrees (system-orchestrator after both
+# stripe-handler and neon-integrator) joins the group with the earliest root
+# cause only; the other subtree stays its own incident.
+#
+# Each group escalates once, from its earliest pattern (the root cause), with
+# the others attached as linked patterns. Escalated groups are remembered for
+# one window, so a layer that crosses the escalation threshold a cycle later
+# attaches to the existing escalation instead of opening a new one.
+
+import logging
+from collections import deque
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class CascadeGroup:
+    """A root-cause pattern and the patterns it cascaded into"""
+
+    __slots__ = ("root", "children", "escalation_id")
+
+    def __init__(self, root: Any, children: List[Any], escalation_id: Optional[str] = None):
+        self.root = root
+        self.children = children
+        # Set when the group attaches to an escalation from an earlier cycle
+        self.escalation_id = escalation_id
+
+    @property
+    def patterns(self) -> List[Any]:
+        return [self.root] + self.children
+
+
+class CascadeCorrelator:
+    """Sorted-sweep correlation of error patterns along the delegation graph"""
+
+    def __init__(self, catalog, window_seconds: int = 600):
+        self.catalog = catalog
+        self.window = timedelta(seconds=window_seconds)
+        # (first_occurrence, pattern, escalation_id) of recently escalated patterns
+        self._escalated: List[tuple] = []
+
+    def correlate(self, patterns: List[Any]) -> List[CascadeGroup]:
+        """Group patterns into cascades; singletons come back as one-pattern groups"""
+        if not patterns:
+            return []
+
+        latest = max(p['first_occurrence'] for p in patterns)
+        self._escalated = [e for e in self._escalated if e[0] >= latest - self.window]
+
+        # Previously escalated patterns take part in the sweep but are never re-emitted
+        entries = [(p['first_occurrence'], p, None) for p in patterns] + self._escalated
+        order = sorted(range(len(entries)), key=lambda i: entries[i][0])
+
+        parent = list(range(len(entries)))
+        # Per component root: its agents (one chain) and its earliest start
+        chains: Dict[int, Set[str]] = {i: {entries[i][1]['agent_id']} for i in range(len(entries))}
+        first = {i: entries[i][0] for i in range(len(entries))}
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        active = deque()
+        descendants: Dict[str, Set[int]] = {}
+
+        for i in order:
+            started, pattern, _ = entries[i]
+            while active and started - entries[active[0]][0] > self.window:
+                expired = active.popleft()
+                for ancestor in self.catalog.ancestors(entries[expired][1]['agent_id']):
+                    descendants[ancestor].discard(expired)
+
+            roots = {find(j) for j in descendants.get(pattern['agent_id'], ())}
+            for root in sorted(roots, key=lambda r: (first[r], r)):
+                mine = find(i)
+                if not all(self.same_chain(a, b) for a in chains[root] for b in chains[mine]):
+                    continue
+                parent[mine] = root
+                chains[root] |= chains.pop(mine)
+                first[root] = min(first[root], first.pop(mine))
+
+            for ancestor in self.catalog.ancestors(pattern['agent_id']):
+                descendants.setdefault(ancestor, set()).add(i)
+            active.append(i)
+
+        components: Dict[int, List[int]] = {}
+        for i in order:
+            components.setdefault(find(i), []).append(i)
+
+        groups = []
+        for members in components.values():
+            new = [entries[i][1] for i in members if entries[i][2] is None]
+            if not new:
+                continue
+            escalated = [entries[i] for i in members if entries[i][2] is not None]
+            if escalated:
+                _, root, escalation_id = escalated[0]
+                groups.append(CascadeGroup(root, new, escalation_id))
+            else:
+                groups.append(CascadeGroup(new[0], new[1:]))
+
+        cascades = sum(1 for g in groups if g.children)
+        if cascades:
+            logger.info(f"Cascade correlation: {len(patterns)} patterns grouped into {len(groups)} incidents")
+        return groups
+
+    def same_chain(self, a: str, b: str) -> bool:
+        """Whether one agent is the other or reports to it, directly or transitively"""
+        return a == b or a in self.catalog.ancestors(b) or b in self.catalog.ancestors(a)
+
+    def remember(self, group: CascadeGroup, escalation_id: str):
+        """Keep an escalated group's patterns so later layers can attach to it"""
+        # An attached group's root is already remembered
+        for pattern in (group.children if group.escalation_id else group.patterns):
+            self._escalated.append((pattern['first_occurrence'], pattern, escalation_id))
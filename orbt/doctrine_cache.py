@@ -0,0 +1,238 @@
+# ORBT Doctrine Cache
+# In-process, indexed copy of dpr.dpr_doctrine for GET /api/dpr/doctrine.
+# Doctrine changes rarely and is read by every agent, so it is loaded once at
+# startup and only reloaded when shq.doctrine_schema_version moves or a
+# NOTIFY arrives on the doctrine channel.
+#
+# A LISTEN connection can die without notice (idle drop, failover), so the
+# stamp is still polled while listening, just rarely (listener_stamp_interval).
+# Once the listener is known to be gone the cache reloads and goes back to
+# polling every stamp_check_interval.
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Writers to dpr.dpr_doctrine should `NOTIFY orbt_doctrine_changed` (see
+# shq.notify_doctrine_change() in database/complete-heir-schema.sql)
+DOCTRINE_CHANNEL = "orbt_doctrine_changed"
+
+DOCTRINE_QUERY = """
+    SELECT
+        id,
+        section_number,
+        section_title,
+        doctrine_text,
+        doctrine_type,
+        enforcement_level,
+        doctrine_category,
+        sub_hive,
+        enforcement_target,
+        enforcement_scope,
+        created_at
+    FROM dpr.dpr_doctrine
+    ORDER BY section_number
+"""
+
+VERSION_STAMP_QUERY = """
+    SELECT version || '@' || applied_at::TEXT
+    FROM shq.doctrine_schema_version
+    ORDER BY applied_at DESC
+    LIMIT 1
+"""
+
+# Query parameter name -> doctrine column
+INDEXED_FIELDS = {
+    "section_number": "section_number",
+    "category": "doctrine_category",
+    "doctrine_type": "doctrine_type",
+    "enforcement_level": "enforcement_level",
+}
+
+
+class DoctrineCache:
+    """
+    Indexed, read-only doctrine store.
+
+    Records are kept in section_number order; each indexed field maps a value
+    to the ascending positions of the records carrying it, so filtered queries
+    never touch the database and keep the original ordering.
+    """
+
+    def __init__(self, stamp_check_interval: float = 30.0, listener_stamp_interval: float = 600.0):
+        self.stamp_check_interval = stamp_check_interval
+        self.listener_stamp_interval = listener_stamp_interval
+        self.version: Optional[str] = None
+        self.digest: Optional[str] = None
+        self._records: List[Dict[str, Any]] = []
+        self._indexes: Dict[str, Dict[str, List[int]]] = {}
+        self._stale = True
+        # Wall-clock time of the last change notification, so a reload can
+        # skip replicas that have not replayed the change yet
+        self.invalidated_at: Optional[float] = None
+        self._last_stamp_check = 0.0
+        self._listener_conn = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.digest is not None
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def build(self, rows, version: Optional[str]):
+        """Replace cache contents with rows (already ordered by section_number)"""
+        records = [self._prepare(row) for row in rows]
+        indexes: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+
+        for position, record in enumerate(records):
+            for field, column in INDEXED_FIELDS.items():
+                value = record.get(column)
+                if value is not None:
+                    indexes[field].setdefault(value, []).append(position)
+
+        digest = hashlib.sha1(
+            json.dumps(records, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+        # Swap in one step so concurrent readers never see a half-built index
+        self._records, self._indexes, self.digest = records, indexes, digest
+        self.version = version
+        self._stale = False
+        self._last_stamp_check = time.monotonic()
+
+    async def load(self, conn):
+        """Load all doctrine rows and the current schema version stamp"""
+        version = await conn.fetchval(VERSION_STAMP_QUERY)
+        rows = await conn.fetch(DOCTRINE_QUERY)
+        self.build(rows, version)
+        logger.info(f"Doctrine cache loaded {len(self._records)} records (version {version})")
+
+    def invalidate(self):
+        """Force a reload on the next request"""
+        self._stale = True
+        self.invalidated_at = time.time()
+
+    def needs_refresh(self) -> bool:
+        """True when the next request should consult the database"""
+        if self._listener_conn is not None and self._listener_conn.is_closed():
+            self._listener_lost("listener connection closed")
+        if self._stale or not self.loaded:
+            return True
+        # NOTIFY drives invalidation; the slow poll covers a silently dead listener
+        interval = self.stamp_check_interval if self._listener_conn is None else self.listener_stamp_interval
+        return time.monotonic() - self._last_stamp_check >= interval
+
+    async def refresh(self, conn) -> bool:
+        """Reload if stale or the version stamp moved. Returns True if reloaded."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if not self.needs_refresh():
+                return False
+
+            if self._stale or not self.loaded:
+                await self.load(conn)
+                return True
+
+            version = await conn.fetchval(VERSION_STAMP_QUERY)
+            self._last_stamp_check = time.monotonic()
+            if version != self.version:
+                await self.load(conn)
+                return True
+            return False
+
+    async def listen(self, conn):
+        """Subscribe a dedicated connection to doctrine change notifications"""
+        await conn.add_listener(DOCTRINE_CHANNEL, self._on_notify)
+        conn.add_termination_listener(self._on_terminated)
+        self._listener_conn = conn
+
+    async def close(self):
+        """Drop the notification listener, falling back to stamp polling"""
+        conn, self._listener_conn = self._listener_conn, None
+        if conn is not None:
+            conn.remove_termination_listener(self._on_terminated)
+            if not conn.is_closed():
+                await conn.remove_listener(DOCTRINE_CHANNEL, self._on_notify)
+                await conn.close()
+
+    def _on_terminated(self, connection):
+        if connection is self._listener_conn:
+            self._listener_lost("listener connection terminated")
+
+    def _listener_lost(self, reason: str):
+        # Notifications may have been missed while it was dying
+        logger.warning(f"Doctrine change listener lost ({reason}); reloading and polling the version stamp")
+        self._listener_conn = None
+        self.invalidate()
+
+    def _on_notify(self, connection, pid, channel, payload):
+        logger.info(f"Doctrine change notification received ({payload or 'no payload'})")
+        self.invalidate()
+
+    def query(
+        self,
+        section_number: Optional[str] = None,
+        category: Optional[str] = None,
+        doctrine_type: Optional[str] = None,
+        enforcement_level: Optional[str] = None,
+        limit: int = 100,
+    ) -> List[Dict[str, Any]]:
+        """Return matching doctrine records in section_number order"""
+        filters = {
+            "section_number": section_number,
+            "category": category,
+            "doctrine_type": doctrine_type,
+            "enforcement_level": enforcement_level,
+        }
+        active = [(field, value) for field, value in filters.items() if value is not None]
+
+        if not active:
+            return self._records[:limit]
+
+        # Walk the shortest posting list and check the remaining filters per record
+        postings = [(self._indexes[field].get(value, []), field, value) for field, value in active]
+        postings.sort(key=lambda posting: len(posting[0]))
+        positions, _, _ = postings[0]
+        remaining = [(INDEXED_FIELDS[field], value) for _, field, value in postings[1:]]
+
+        results = []
+        for position in positions:
+            record = self._records[position]
+            if all(record.get(column) == value for column, value in remaining):
+                results.append(record)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def etag(self, **filters) -> str:
+        """Strong ETag for a filtered view of the current doctrine contents"""
+        key = json.dumps(filters, sort_keys=True, default=str)
+        tag = hashlib.sha1(f"{self.digest}:{key}".encode("utf-8")).hexdigest()[:32]
+        return f'"{tag}"'
+
+    @staticmethod
+    def _prepare(row) -> Dict[str, Any]:
+        record = dict(row)
+        if record.get("id") is not None:
+            record["id"] = str(record["id"])
+        created_at = record.get("created_at")
+        if created_at is not None and hasattr(created_at, "isoformat"):
+            record["created_at"] = created_at.isoformat()
+        return record
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
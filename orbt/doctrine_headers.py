@@ -0,0 +1,225 @@
+# ORBT Doctrine Header Enforcement
+# Production counterpart of the header contract in
+# tests/unit/test_api_doctrine_headers.py, packaged as ASGI middleware so bad
+# requests are rejected before any handler (and any database work) runs.
+
+import hashlib
+import hmac
+import json
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+REQUIRED_HEADERS = ("unique_id", "process_id", "agent_signature", "blueprint_id")
+
+# [DB].[SUBHIVE].[MICROPROCESS].[TOOL].[ALTITUDE].[STEP]
+UNIQUE_ID_PATTERN = re.compile(r"^[^.]{2,3}\.[^.]+\.[^.]+\.[^.]+\.\d{5}\.\d{3}$")
+
+# VerbObject: letters only, leading capital, at least two capitals
+PROCESS_ID_PATTERN = re.compile(r"^[A-Z][A-Za-z]*[A-Z][A-Za-z]*$")
+
+# agent-id:YYYYMMDDHHMISS:hash
+AGENT_SIGNATURE_PATTERN = re.compile(r"^([^:]+):(\d{14}):([^:]+)$")
+
+WRITE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+
+class SignatureCache:
+    """LRU of verified agent signatures with a per-entry expiry"""
+
+    def __init__(self, max_entries: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, signature: str) -> bool:
+        expires_at = self._entries.get(signature)
+        if expires_at is None:
+            self.misses += 1
+            return False
+        if expires_at <= self.clock():
+            del self._entries[signature]
+            self.misses += 1
+            return False
+        self._entries.move_to_end(signature)
+        self.hits += 1
+        return True
+
+    def add(self, signature: str, ttl: float):
+        if ttl <= 0:
+            return
+        self._entries[signature] = self.clock() + ttl
+        self._entries.move_to_end(signature)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class DoctrineHeaderValidator:
+    """
+    Validates doctrine headers with precompiled patterns.
+
+    Signature verification (freshness and, when a signing key is configured,
+    the HMAC) is the expensive part, so verified signatures are remembered for
+    `signature_ttl` seconds or until they would expire, whichever is sooner.
+    """
+
+    def __init__(
+        self,
+        signing_key: Optional[str] = None,
+        max_signature_age: Optional[int] = 300,
+        signature_ttl: float = 60.0,
+        cache_size: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.signing_key = signing_key.encode("utf-8") if signing_key else None
+        self.max_signature_age = max_signature_age
+        self.signature_ttl = signature_ttl
+        self.clock = clock
+        self.signature_cache = SignatureCache(cache_size, clock=clock)
+
+    def validate(self, headers: Mapping[str, str]) -> Dict:
+        """Validate doctrine headers, returning {'valid': bool, 'errors': [...]}"""
+        errors: List[str] = []
+
+        unique_id = headers.get("unique_id")
+        if not unique_id:
+            errors.append("Missing unique_id header")
+        elif not UNIQUE_ID_PATTERN.match(unique_id):
+            errors.append("Invalid unique_id format")
+
+        process_id = headers.get("process_id")
+        if not process_id:
+            errors.append("Missing process_id header")
+        elif not PROCESS_ID_PATTERN.match(process_id):
+            errors.append("Invalid process_id format (must be VerbObject)")
+
+        signature = headers.get("agent_signature")
+        if not signature:
+            errors.append("Missing agent_signature header")
+        else:
+            signature_error = self.verify_signature(signature)
+            if signature_error:
+                errors.append(signature_error)
+
+        if not headers.get("blueprint_id"):
+            errors.append("Missing blueprint_id header")
+
+        return {
+            "valid": len(errors) == 0,
+            "errors": errors
+        }
+
+    def verify_signature(self, signature: str) -> Optional[str]:
+        """Return an error message, or None if the signature is acceptable"""
+        if signature in self.signature_cache:
+            return None
+
+        match = AGENT_SIGNATURE_PATTERN.match(signature)
+        if not match:
+            return "Invalid agent_signature format"
+        agent_id, timestamp, hash_part = match.groups()
+
+        remaining = self.signature_ttl
+        if self.max_signature_age is not None:
+            try:
+                signed_at = datetime.strptime(timestamp, "%Y%m%d%H%M%S").replace(tzinfo=timezone.utc)
+            except ValueError:
+                return "Invalid agent_signature format"
+            age = self.clock() - signed_at.timestamp()
+            if abs(age) > self.max_signature_age:
+                return "Expired agent_signature"
+            remaining = min(remaining, self.max_signature_age - age)
+
+        if self.signing_key is not None:
+            expected = sign_agent(self.signing_key, agent_id, timestamp)
+            if not hmac.compare_digest(expected, hash_part):
+                return "Invalid agent_signature hash"
+
+        self.signature_cache.add(signature, remaining)
+        return None
+
+
+def sign_agent(signing_key: bytes, agent_id: str, timestamp: str) -> str:
+    """Hash component of an agent signature when a signing key is configured"""
+    message = f"{agent_id}:{timestamp}".encode("utf-8")
+    return hmac.new(signing_key, message, hashlib.sha256).hexdigest()
+
+
+class DoctrineHeaderMiddleware:
+    """
+    ASGI middleware enforcing doctrine headers on write requests.
+
+    Headers are accepted in the documented underscore form (unique_id) and the
+    proxy-safe hyphen form (unique-id). Rejections are answered directly with
+    400 MISSING_HEADERS / INVALID_HEADERS and never reach the application.
+    """
+
+    def __init__(
+        self,
+        app,
+        validator: Optional[DoctrineHeaderValidator] = None,
+        methods: Iterable[str] = WRITE_METHODS,
+        exempt_paths: Iterable[str] = ("/api/orbt/health",),
+    ):
+        self.app = app
+        self.validator = validator or DoctrineHeaderValidator()
+        self.methods = frozenset(method.upper() for method in methods)
+        self.exempt_paths = frozenset(exempt_paths)
+        self.rejected = 0
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in self.methods
+            or scope["path"] in self.exempt_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        result = self.validator.validate(extract_doctrine_headers(scope["headers"]))
+        if result["valid"]:
+            await self.app(scope, receive, send)
+            return
+
+        self.rejected += 1
+        await send_rejection(send, result["errors"])
+
+
+def extract_doctrine_headers(raw_headers: Iterable[Tuple[bytes, bytes]]) -> Dict[str, str]:
+    """Pick doctrine headers out of raw ASGI (name, value) pairs"""
+    headers = {}
+    for name, value in raw_headers:
+        key = name.decode("latin-1").replace("-", "_")
+        if key in REQUIRED_HEADERS:
+            headers[key] = value.decode("latin-1")
+    return headers
+
+
+async def send_rejection(send, errors: List[str]):
+    code = "MISSING_HEADERS" if any(e.startswith("Missing") for e in errors) else "INVALID_HEADERS"
+    body = json.dumps({
+        "status": "REJECTED",
+        "error": {
+            "code": code,
+            "message": "Required doctrine headers not provided" if code == "MISSING_HEADERS"
+                       else "Doctrine headers failed validation",
+            "validation_errors": errors
+        }
+    }).encode("utf-8")
+
+    await send({
+        "type": "http.response.start",
+        "status": 400,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("latin-1")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
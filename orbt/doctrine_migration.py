@@ -0,0 +1,228 @@
+# DPR Doctrine Migration
+# Set-based, resumable replacement for shq.migrate_dpr_doctrine_exact().
+#
+# dpr_doctrine is partitioned by the leading segments of section_number
+# ([database].[subhive] by default). Each partition is copied into
+# shq.orbt_doctrine_hierarchy with one INSERT ... SELECT, verified by row
+# count and checksum, and checkpointed in shq.orbt_migration_checkpoints in
+# the same transaction. Partitions are disjoint on the section_number key,
+# so they run concurrently; a rerun skips partitions whose checkpointed
+# checksum still matches the source. The checkpoint table is defined in
+# database/complete-heir-schema.sql; the migration refuses to run without it.
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_NAME = "dpr_doctrine_exact"
+
+SOURCE_EXISTS_QUERY = "SELECT to_regclass('dpr_doctrine') IS NOT NULL"
+CHECKPOINT_TABLE_EXISTS_QUERY = "SELECT to_regclass('shq.orbt_migration_checkpoints') IS NOT NULL"
+CHECKPOINT_TABLE_MISSING = "shq.orbt_migration_checkpoints not found - apply database/complete-heir-schema.sql first"
+
+# Partition key: the first {depth} dot-separated segments of section_number
+PARTITION_EXPR = "array_to_string((string_to_array(section_number, '.'))[1:{depth}], '.')"
+
+# Row digests cover the fields the migration owns, normalised identically on both sides
+SOURCE_DIGEST = (
+    "d.section_number || '|' || md5(d.doctrine_text) || '|' || "
+    "COALESCE(d.doctrine_type, 'general') || '|' || COALESCE(d.enforcement_level, 'informational')"
+)
+TARGET_DIGEST = (
+    "h.section_number || '|' || md5(h.doctrine_text) || '|' || "
+    "h.doctrine_type || '|' || h.enforcement_level"
+)
+
+PLAN_QUERY = """
+    SELECT d.batch_key,
+           COUNT(*) AS row_count,
+           md5(string_agg({digest}, ',' ORDER BY d.section_number)) AS checksum,
+           MIN(d.section_number) AS first_section,
+           MAX(d.section_number) AS last_section
+    FROM (SELECT *, {partition} AS batch_key FROM dpr_doctrine) d
+    GROUP BY d.batch_key
+    ORDER BY d.batch_key
+"""
+
+CHECKPOINTS_QUERY = """
+    SELECT batch_key, checksum
+    FROM shq.orbt_migration_checkpoints
+    WHERE migration_name = $1
+"""
+
+INSERT_BATCH_SQL = """
+    INSERT INTO shq.orbt_doctrine_hierarchy (
+        section_number, section_title, database_id, subhive_id, subsubhive_id,
+        section_id, sequence_number, doctrine_text, doctrine_type, enforcement_level,
+        doctrine_category, sub_hive, enforcement_target, enforcement_scope,
+        original_dpr_id, behavioral_rules, escalation_triggers
+    )
+    SELECT
+        d.section_number,
+        COALESCE(d.section_title, 'Section ' || d.section_number),
+        SPLIT_PART(d.section_number, '.', 1)::VARCHAR(2),
+        LPAD(SPLIT_PART(d.section_number, '.', 2), 2, '0'),
+        LPAD(SPLIT_PART(d.section_number, '.', 3), 2, '0'),
+        LPAD(SPLIT_PART(d.section_number, '.', 4), 2, '0'),
+        LPAD(SPLIT_PART(d.section_number, '.', 5), 3, '0'),
+        d.doctrine_text,
+        COALESCE(d.doctrine_type, 'general'),
+        COALESCE(d.enforcement_level, 'informational'),
+        COALESCE(d.doctrine_category, 'general'),
+        COALESCE(d.sub_hive, 'unknown'),
+        d.enforcement_target,
+        d.enforcement_scope,
+        d.id::UUID,
+        string_to_array(
+            regexp_replace(d.doctrine_text, '.*?((?:must|shall|required)[^.]*\\.)', '\\1', 'gi'),
+            '.'
+        ),
+        string_to_array(
+            regexp_replace(d.doctrine_text, '.*?((?:escalate|notify|alert)[^.]*\\.)', '\\1', 'gi'),
+            '.'
+        )
+    FROM dpr_doctrine d
+    WHERE {partition} = $1
+    ON CONFLICT (section_number) DO UPDATE SET
+        section_title = EXCLUDED.section_title,
+        doctrine_text = EXCLUDED.doctrine_text,
+        doctrine_type = EXCLUDED.doctrine_type,
+        enforcement_level = EXCLUDED.enforcement_level,
+        doctrine_category = EXCLUDED.doctrine_category,
+        sub_hive = EXCLUDED.sub_hive,
+        enforcement_target = EXCLUDED.enforcement_target,
+        enforcement_scope = EXCLUDED.enforcement_scope,
+        original_dpr_id = EXCLUDED.original_dpr_id,
+        behavioral_rules = EXCLUDED.behavioral_rules,
+        escalation_triggers = EXCLUDED.escalation_triggers,
+        updated_at = NOW()
+"""
+
+VERIFY_BATCH_QUERY = """
+    SELECT COUNT(*) AS row_count,
+           md5(string_agg({digest}, ',' ORDER BY h.section_number)) AS checksum
+    FROM shq.orbt_doctrine_hierarchy h
+    JOIN dpr_doctrine d ON d.section_number = h.section_number
+    WHERE {partition} = $1
+"""
+
+CHECKPOINT_SQL = """
+    INSERT INTO shq.orbt_migration_checkpoints (
+        migration_name, batch_key, first_section, last_section,
+        row_count, checksum, duration_ms
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (migration_name, batch_key) DO UPDATE SET
+        first_section = EXCLUDED.first_section,
+        last_section = EXCLUDED.last_section,
+        row_count = EXCLUDED.row_count,
+        checksum = EXCLUDED.checksum,
+        duration_ms = EXCLUDED.duration_ms,
+        completed_at = NOW()
+"""
+
+
+class MigrationError(Exception):
+    """A batch failed verification"""
+
+
+class DoctrineMigration:
+    """Copies dpr_doctrine into shq.orbt_doctrine_hierarchy in checkpointed batches"""
+
+    def __init__(self, connect: Callable[[], Awaitable[Any]], workers: int = 4,
+                 prefix_depth: int = 2, migration_name: str = MIGRATION_NAME):
+        if not 1 <= prefix_depth <= 5:
+            raise ValueError("prefix_depth must be between 1 and 5 section_number segments")
+        self.connect = connect
+        self.workers = workers
+        self.migration_name = migration_name
+
+        partition = PARTITION_EXPR.format(depth=prefix_depth)
+        qualified = partition.replace("section_number", "d.section_number")
+        self.plan_query = PLAN_QUERY.format(digest=SOURCE_DIGEST, partition=partition)
+        self.insert_sql = INSERT_BATCH_SQL.format(partition=qualified)
+        self.verify_query = VERIFY_BATCH_QUERY.format(digest=TARGET_DIGEST, partition=qualified)
+
+    async def has_checkpoint_table(self, conn) -> bool:
+        return bool(await conn.fetchval(CHECKPOINT_TABLE_EXISTS_QUERY))
+
+    async def plan(self, conn) -> List[Dict[str, Any]]:
+        """Source partitions with their expected row counts and checksums"""
+        return [dict(row) for row in await conn.fetch(self.plan_query)]
+
+    async def pending(self, conn, batches: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Batches without a checkpoint, or whose source changed since it was taken"""
+        done = {row["batch_key"]: row["checksum"] for row in
+                await conn.fetch(CHECKPOINTS_QUERY, self.migration_name)}
+        return [batch for batch in batches if done.get(batch["batch_key"]) != batch["checksum"]]
+
+    async def migrate_batch(self, conn, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert, verify and checkpoint one partition atomically"""
+        started = time.monotonic()
+        async with conn.transaction():
+            await conn.execute(self.insert_sql, batch["batch_key"])
+
+            result = await conn.fetchrow(self.verify_query, batch["batch_key"])
+            if result["row_count"] != batch["row_count"] or result["checksum"] != batch["checksum"]:
+                raise MigrationError(
+                    f"Batch {batch['batch_key']} verification failed: expected "
+                    f"{batch['row_count']} rows ({batch['checksum']}), found "
+                    f"{result['row_count']} rows ({result['checksum']})"
+                )
+
+            duration_ms = int((time.monotonic() - started) * 1000)
+            await conn.execute(
+                CHECKPOINT_SQL,
+                self.migration_name, batch["batch_key"], batch["first_section"],
+                batch["last_section"], batch["row_count"], batch["checksum"], duration_ms
+            )
+
+        logger.info(f"Migrated batch {batch['batch_key']}: {batch['row_count']} rows in {duration_ms}ms")
+        return {"batch_key": batch["batch_key"], "row_count": batch["row_count"], "duration_ms": duration_ms}
+
+    async def run(self, restart: bool = False) -> Dict[str, Any]:
+        conn = await self.connect()
+        try:
+            if not await conn.fetchval(SOURCE_EXISTS_QUERY):
+                return {"status": "skipped", "message": "dpr_doctrine table not found - skipping migration"}
+            if not await self.has_checkpoint_table(conn):
+                return {"status": "failed", "message": CHECKPOINT_TABLE_MISSING}
+            planned = await self.plan(conn)
+            batches = planned if restart else await self.pending(conn, planned)
+        finally:
+            await conn.close()
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for batch in batches:
+            queue.put_nowait(batch)
+        migrated: List[Dict[str, Any]] = []
+        failed: List[Dict[str, str]] = []
+
+        async def worker():
+            conn = await self.connect()
+            try:
+                while True:
+                    try:
+                        batch = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    try:
+                        migrated.append(await self.migrate_batch(conn, batch))
+                    except Exception as e:
+                        logger.error(f"Batch {batch['batch_key']} failed: {str(e)}")
+                        failed.append({"batch_key": batch["batch_key"], "error": str(e)})
+            finally:
+                await conn.close()
+
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(batches)))))
+
+        return {
+            "status": "failed" if failed else "completed",
+            "batches": len(planned),
+            "skipped": len(planned) - len(batches),
+            "migrated_batches": len(migrated),
+            "migrated_rows": sum(batch["row_count"] for batch in migrated),
+            "failed": failed,
+        }
@@ -0,0 +1,250 @@
+# ORBT Error Clustering
+# Assigns near-duplicate errors (same failure, different stack frames or
+# reworded driver text) to one cluster id that escalation can group on.
+#
+# Each error's normalised message + stack is cut into word shingles and
+# summarised by a MinHash signature; the signature's bands are looked up in an
+# LSH table of cluster representatives, so finding candidates costs a few
+# dict lookups however many clusters exist. A candidate is accepted when the
+# estimated Jaccard similarity reaches the threshold, otherwise the error
+# starts a new cluster.
+#
+# Cluster ids are derived from the representative's signature, so processes
+# that see the same first error agree on the id. New representatives are
+# written to orbt_error_clusters (flush) and picked up by other processes on
+# refresh.
+#
+# The index holds at most max_clusters representatives and evicts the least
+# recently matched. Matches are written back as last_seen (flush_last_seen),
+# and refresh only loads clusters active within active_window_seconds, so a
+# restart does not pull in every cluster ever created. An error resembling an
+# evicted or dormant cluster starts a new one.
+
+import hashlib
+import logging
+import struct
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from orbt.fingerprint import normalize_error_message
+
+logger = logging.getLogger(__name__)
+
+# Stack traces can be long; leading frames are enough to tell failures apart
+MAX_STACK_CHARS = 2000
+
+CLUSTERS_QUERY = """
+    SELECT id, cluster_id, minhash_signature
+    FROM orbt_error_clusters
+    WHERE id > $1
+    AND last_seen >= NOW() - make_interval(secs => $2)
+    ORDER BY id
+"""
+
+INSERT_CLUSTER_SQL = """
+    INSERT INTO orbt_error_clusters (cluster_id, minhash_signature, representative_message)
+    VALUES ($1, $2, $3)
+    ON CONFLICT (cluster_id) DO NOTHING
+"""
+
+TOUCH_CLUSTERS_SQL = """
+    UPDATE orbt_error_clusters
+    SET last_seen = NOW()
+    WHERE cluster_id = ANY($1::VARCHAR[])
+"""
+
+
+def error_text(error_message: Optional[str], error_stack: Optional[str] = None) -> str:
+    """Normalised message followed by the normalised (truncated) stack"""
+    text = normalize_error_message(error_message)
+    if error_stack:
+        text = f"{text} {normalize_error_message(error_stack[:MAX_STACK_CHARS])}"
+    return text
+
+
+def shingles(text: str, size: int = 2) -> Set[bytes]:
+    """Every run of `size` words in the text"""
+    words = text.split()
+    if len(words) <= size:
+        return {" ".join(words).encode("utf-8")}
+    return {" ".join(words[i:i + size]).encode("utf-8") for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    MinHash with num_perm independent 32-bit hash functions.
+
+    One SHAKE-128 digest per shingle supplies all num_perm hash values, and
+    the per-function minimum is a column-wise min over the unpacked digests,
+    so the work per shingle stays in C.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: bytes = b"orbt-error-clusters"):
+        self.num_perm = num_perm
+        self.seed = seed
+        self._format = f">{num_perm}I"
+
+    def signature(self, shingle_set: Iterable[bytes]) -> Tuple[int, ...]:
+        size = self.num_perm * 4
+        unpack = struct.Struct(self._format).unpack
+        rows = [unpack(hashlib.shake_128(self.seed + shingle).digest(size)) for shingle in shingle_set]
+        return tuple(map(min, zip(*rows)))
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / len(a)
+
+
+def cluster_id_for(signature: Tuple[int, ...]) -> str:
+    digest = hashlib.sha1(struct.pack(f">{len(signature)}I", *signature)).hexdigest()
+    return f"CL-{digest[:16]}"
+
+
+class ErrorClusterIndex:
+    """
+    LSH index of cluster representatives.
+
+    With bands b of r rows each (num_perm = b * r), two errors become
+    candidates with probability 1 - (1 - s^r)^b for similarity s; the
+    defaults (16 x 4) put the steep part of that curve around 0.5.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, threshold: float = 0.5,
+                 cache_size: int = 50000, max_clusters: int = 100000,
+                 active_window_seconds: float = 30 * 86400):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.cache_size = cache_size
+        self.max_clusters = max_clusters
+        self.active_window_seconds = active_window_seconds
+        # Least recently matched first
+        self._signatures: "OrderedDict[str, Tuple[int, ...]]" = OrderedDict()
+        self._buckets: Dict[tuple, List[str]] = {}
+        # Normalised text digest -> cluster id; repeated errors skip MinHash entirely
+        self._cache: "OrderedDict[bytes, str]" = OrderedDict()
+        self.pending: List[tuple] = []
+        # Clusters matched since the last flush_last_seen
+        self._touched: Set[str] = set()
+        self.last_id = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._signatures)
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        r = self.rows
+        return [(band, signature[band * r:(band + 1) * r]) for band in range(self.bands)]
+
+    def add_cluster(self, cluster_id: str, signature: Tuple[int, ...]):
+        if cluster_id in self._signatures:
+            return
+        self._signatures[cluster_id] = signature
+        for key in self._band_keys(signature):
+            self._buckets.setdefault(key, []).append(cluster_id)
+        while len(self._signatures) > self.max_clusters:
+            self._evict()
+
+    def _evict(self):
+        cluster_id, signature = self._signatures.popitem(last=False)
+        for key in self._band_keys(signature):
+            bucket = self._buckets[key]
+            bucket.remove(cluster_id)
+            if not bucket:
+                del self._buckets[key]
+        self.evicted += 1
+
+    def _touch(self, cluster_id: str):
+        if cluster_id in self._signatures:
+            self._signatures.move_to_end(cluster_id)
+        self._touched.add(cluster_id)
+
+    def match(self, signature: Tuple[int, ...]) -> Optional[str]:
+        """Most similar cluster at or above the threshold, if any"""
+        best, best_score = None, self.threshold
+        seen = set()
+        for key in self._band_keys(signature):
+            for cluster_id in self._buckets.get(key, ()):
+                if cluster_id in seen:
+                    continue
+                seen.add(cluster_id)
+                score = similarity(signature, self._signatures[cluster_id])
+                if score >= best_score:
+                    best, best_score = cluster_id, score
+        return best
+
+    def assign(self, error_message: Optional[str], error_stack: Optional[str] = None) -> str:
+        """Cluster id for an error, creating a cluster if nothing is similar enough"""
+        text = error_text(error_message, error_stack)
+        key = hashlib.sha1(text.encode("utf-8")).digest()
+        cluster_id = self._cache.get(key)
+        if cluster_id is not None:
+            self._cache.move_to_end(key)
+            self._touch(cluster_id)
+            self.hits += 1
+            return cluster_id
+
+        self.misses += 1
+        signature = self.hasher.signature(shingles(text))
+        cluster_id = self.match(signature)
+        if cluster_id is None:
+            cluster_id = cluster_id_for(signature)
+            if cluster_id not in self._signatures:
+                self.add_cluster(cluster_id, signature)
+                self.pending.append((cluster_id, list(signature), (error_message or "")[:1000]))
+        self._touch(cluster_id)
+
+        self._cache[key] = cluster_id
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return cluster_id
+
+    async def refresh(self, conn) -> int:
+        """Load recently active clusters created since the last refresh (by this or other processes)"""
+        rows = await conn.fetch(CLUSTERS_QUERY, self.last_id, self.active_window_seconds)
+        for row in rows:
+            self.add_cluster(row["cluster_id"], tuple(row["minhash_signature"]))
+            self.last_id = max(self.last_id, row["id"])
+        if rows:
+            logger.info(f"Error clusters loaded: {len(rows)} new, {len(self)} total")
+        return len(rows)
+
+    async def flush(self, conn) -> int:
+        """Persist clusters created locally since the last flush"""
+        if not self.pending:
+            return 0
+        pending, self.pending = self.pending, []
+        try:
+            await conn.executemany(INSERT_CLUSTER_SQL, pending)
+        except Exception:
+            self.pending = pending + self.pending
+            raise
+        return len(pending)
+
+    async def flush_last_seen(self, conn) -> int:
+        """Record clusters matched since the last call as active"""
+        if not self._touched:
+            return 0
+        touched, self._touched = self._touched, set()
+        try:
+            await conn.execute(TOUCH_CLUSTERS_SQL, sorted(touched))
+        except Exception:
+            self._touched |= touched
+            raise
+        return len(touched)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "clusters": len(self._signatures),
+            "evicted": self.evicted,
+            "cached_texts": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "pending": len(self.pending),
+        }
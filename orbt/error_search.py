@@ -0,0 +1,165 @@
+# ORBT Error Search
+# Content search over orbt_error_log for GET /api/orbt/errors/search, backed
+# by the GIN indexes in database/orbt-error-log-schema.sql instead of
+# ad-hoc ILIKE scans of the whole table.
+#
+#   text       websearch syntax ("connection reset" -retry pool OR timeout)
+#              over message and stack head via orbt_error_search_vector();
+#              ranked by ts_rank_cd with the message weighted above the stack
+#   substring  case-insensitive substring (identifiers, paths, partial
+#              words, 3+ characters) via the trigram indexes; ranked by
+#              word_similarity to the message
+#
+# Every search is bounded to a time window, so the GIN bitmap is ANDed with
+# the timestamp index and old rows are never visited. Ranking runs over the
+# newest `candidates` matches in the window, which keeps a search for a
+# very common term cheap. Results carry highlight snippets with matches
+# wrapped in HIGHLIGHT_START / HIGHLIGHT_END.
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+MODES = ("text", "substring")
+
+# Must match the LEFT(..., 4000) in orbt_error_search_vector() and
+# idx_error_log_stack_trgm
+ERROR_SEARCH_STACK_CHARS = 4000
+
+HIGHLIGHT_START = "[["
+HIGHLIGHT_END = "]]"
+
+MIN_SUBSTRING_LENGTH = 3
+
+HEADLINE_OPTIONS = (
+    f'StartSel="{HIGHLIGHT_START}", StopSel="{HIGHLIGHT_END}", '
+    'MaxWords=35, MinWords=12, ShortWord=2, MaxFragments=2, FragmentDelimiter=" ... "'
+)
+
+RESULT_COLUMNS = "error_id, timestamp, agent_id, agent_hierarchy, orbt_status, error_type, error_cluster_id, resolved"
+
+
+class SearchRequestError(ValueError):
+    """Search text or parameters that cannot be run"""
+
+
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _filters(start: datetime, end: datetime, agent_ids: Optional[Iterable[str]],
+             statuses: Optional[Iterable[str]], args: List[Any]) -> str:
+    args.extend([start, end])
+    conditions = [f"timestamp >= ${len(args) - 1}", f"timestamp < ${len(args)}"]
+    if agent_ids:
+        args.append(sorted(agent_ids))
+        conditions.append(f"agent_id = ANY(${len(args)}::TEXT[])")
+    if statuses:
+        args.append(sorted(statuses))
+        conditions.append(f"orbt_status = ANY(${len(args)}::TEXT[])")
+    return " AND ".join(conditions)
+
+
+def build_search_query(text: str, mode: str, start: datetime, end: datetime,
+                       agent_ids: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None,
+                       limit: int = 50, candidates: int = 2000) -> Tuple[str, List[Any]]:
+    """SQL and arguments for one search"""
+    text = (text or "").strip()
+    if not text:
+        raise SearchRequestError("Search text is required")
+    if mode not in MODES:
+        raise SearchRequestError(f"Unknown search mode {mode!r}; expected one of {list(MODES)}")
+    if end <= start:
+        raise SearchRequestError("end must be after start")
+
+    if mode == "text":
+        args: List[Any] = [text]
+        where = _filters(start, end, agent_ids, statuses, args)
+        args.extend([candidates, limit])
+        sql = f"""
+            WITH q AS (SELECT websearch_to_tsquery('english', $1) AS query),
+            candidates AS (
+                SELECT {RESULT_COLUMNS}, error_message, error_stack,
+                       orbt_error_search_vector(error_message, error_stack) AS document
+                FROM orbt_error_log, q
+                WHERE orbt_error_search_vector(error_message, error_stack) @@ q.query
+                AND {where}
+                ORDER BY timestamp DESC
+                LIMIT ${len(args) - 1}
+            ),
+            ranked AS (
+                SELECT c.*, ts_rank_cd(c.document, q.query) AS rank
+                FROM candidates c, q
+                ORDER BY rank DESC, c.timestamp DESC
+                LIMIT ${len(args)}
+            )
+            SELECT {RESULT_COLUMNS}, rank,
+                   ts_headline('english', error_message, q.query, '{HEADLINE_OPTIONS}') AS message_snippet,
+                   CASE WHEN to_tsvector('english', LEFT(COALESCE(error_stack, ''), {ERROR_SEARCH_STACK_CHARS})) @@ q.query
+                        THEN ts_headline('english', LEFT(error_stack, {ERROR_SEARCH_STACK_CHARS}), q.query, '{HEADLINE_OPTIONS}')
+                   END AS stack_snippet
+            FROM ranked, q
+            ORDER BY rank DESC, timestamp DESC
+        """
+        return sql, args
+
+    if len(text) < MIN_SUBSTRING_LENGTH:
+        raise SearchRequestError(f"Substring search needs at least {MIN_SUBSTRING_LENGTH} characters")
+    args = [text, f"%{escape_like(text)}%"]
+    where = _filters(start, end, agent_ids, statuses, args)
+    args.extend([candidates, limit])
+    sql = f"""
+        WITH candidates AS (
+            SELECT {RESULT_COLUMNS}, error_message,
+                   LEFT(error_stack, {ERROR_SEARCH_STACK_CHARS}) AS stack_head
+            FROM orbt_error_log
+            WHERE (error_message ILIKE $2 OR LEFT(error_stack, {ERROR_SEARCH_STACK_CHARS}) ILIKE $2)
+            AND {where}
+            ORDER BY timestamp DESC
+            LIMIT ${len(args) - 1}
+        )
+        SELECT *, word_similarity($1, error_message) AS rank
+        FROM candidates
+        ORDER BY rank DESC, timestamp DESC
+        LIMIT ${len(args)}
+    """
+    return sql, args
+
+
+def highlight(text: Optional[str], needle: str, context: int = 80) -> Optional[str]:
+    """Snippet around the first case-insensitive occurrence of needle, or None"""
+    if not text:
+        return None
+    position = text.lower().find(needle.lower())
+    if position < 0:
+        return None
+    begin = max(0, position - context)
+    end = min(len(text), position + len(needle) + context)
+    return (
+        ("..." if begin > 0 else "")
+        + text[begin:position]
+        + HIGHLIGHT_START + text[position:position + len(needle)] + HIGHLIGHT_END
+        + text[position + len(needle):end]
+        + ("..." if end < len(text) else "")
+    )
+
+
+async def search_errors(conn, text: str, mode: str, start: datetime, end: datetime,
+                        agent_ids: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None,
+                        limit: int = 50, candidates: int = 2000) -> List[Dict[str, Any]]:
+    """Ranked matches with message/stack snippets"""
+    sql, args = build_search_query(text, mode, start, end, agent_ids, statuses, limit, candidates)
+    rows = await conn.fetch(sql, *args)
+
+    results = []
+    for row in rows:
+        result = {column: row[column] for column in RESULT_COLUMNS.split(", ")}
+        result["rank"] = round(float(row["rank"]), 4)
+        if mode == "text":
+            result["message_snippet"] = row["message_snippet"]
+            result["stack_snippet"] = row["stack_snippet"]
+        else:
+            needle = text.strip()
+            result["message_snippet"] = highlight(row["error_message"], needle)
+            result["stack_snippet"] = highlight(row["stack_head"], needle)
+        results.append(result)
+    return results
@@ -0,0 +1,48 @@
+# ORBT Fast JSON
+# Renders endpoint payloads straight to JSON bytes, so read endpoints skip
+# both the per-row dict()/isoformat() loops and FastAPI's jsonable_encoder
+# pass over the finished result.
+#
+# Rows can be passed as asyncpg Records: anything with items() is rendered as
+# an object. Datetimes become ISO 8601 strings (as isoformat() gives),
+# Decimals become int or float (as jsonable_encoder does), UUIDs strings.
+# orjson is used when installed, with a stdlib fallback giving the same
+# values.
+
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if hasattr(value, "items"):
+        # asyncpg Record (and other mappings)
+        return dict(value.items())
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_stdlib(payload: Any) -> bytes:
+    return json.dumps(payload, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+if orjson is not None:
+    def dumps(payload: Any) -> bytes:
+        """Payload as JSON bytes"""
+        return orjson.dumps(payload, default=_default)
+else:  # pragma: no cover
+    dumps = dumps_stdlib
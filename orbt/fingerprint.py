@@ -0,0 +1,44 @@
+# ORBT Error Fingerprints
+# Normalises error text so that errors differing only in volatile details
+# (ids, numbers, addresses, quoted values) share one fingerprint.
+
+import hashlib
+import re
+from typing import List, Optional
+
+# Applied in order; earlier patterns must not be broken up by later ones
+_VOLATILE_PATTERNS = [
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}"), "<uuid>"),
+    (re.compile(r"\b0x[0-9a-f]+\b"), "<hex>"),
+    (re.compile(r"\b[0-9a-f]{12,}\b"), "<hex>"),
+    (re.compile(r"'[^']*'|\"[^\"]*\""), "<str>"),
+    (re.compile(r"\d+(?:\.\d+)*"), "<n>"),
+    (re.compile(r"\s+"), " "),
+]
+
+# CONN_TIMEOUT, PAY_DECLINED, connection_failure, ...
+ERROR_CODE_PATTERN = re.compile(r"\b[A-Za-z][A-Za-z0-9]*_[A-Za-z0-9_]*[A-Za-z0-9]\b")
+
+
+def normalize_error_message(error_message: Optional[str]) -> str:
+    """Lower-case the message and mask volatile tokens"""
+    text = (error_message or "").lower()
+    for pattern, replacement in _VOLATILE_PATTERNS:
+        text = pattern.sub(replacement, text)
+    return text.strip()
+
+
+def error_fingerprint(error_type: Optional[str], error_message: Optional[str]) -> str:
+    """Stable 16-hex-digit fingerprint of (error_type, normalised message)"""
+    key = f"{(error_type or '').lower()}|{normalize_error_message(error_message)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def extract_error_codes(error_message: Optional[str]) -> List[str]:
+    """Upper-cased ERROR_CODE style tokens in order of appearance, deduplicated"""
+    seen = []
+    for match in ERROR_CODE_PATTERN.findall(error_message or ""):
+        code = match.upper()
+        if code not in seen:
+            seen.append(code)
+    return seen
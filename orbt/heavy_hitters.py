@@ -0,0 +1,180 @@
+# ORBT Heavy Hitters
+# Streaming top-K of the noisiest agents and error patterns, fed from ingest,
+# so "who is flooding the error log" never needs a GROUP BY over the table.
+#
+# Each window (5m, 1h, 24h) is a ring of time panes, and each pane is a
+# SpaceSaving summary of fixed capacity: O(1) per event, bounded memory, and
+# every reported count is an overestimate by at most its reported error.
+# A query merges the live panes of one window, so its cost depends on
+# panes x capacity, never on how many errors were logged. The window slides a
+# pane at a time: "5m" covers the last 4-5 minutes.
+#
+# Counts are per process; with several API workers each reports its share.
+
+import time
+from typing import Dict, List, Optional, Set
+
+# name -> (window seconds, panes)
+DEFAULT_WINDOWS = {
+    "5m": (300, 5),
+    "1h": (3600, 12),
+    "24h": (86400, 24),
+}
+
+DIMENSIONS = ("agents", "patterns")
+
+
+class SpaceSaving:
+    """
+    SpaceSaving summary (Metwally et al.) over unit-weight events.
+
+    Keys are grouped in buckets by count; since counts only grow by one, the
+    minimum bucket can be tracked without searching, so offer() is O(1).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, int] = {}
+        self._errors: Dict[str, int] = {}
+        self._labels: Dict[str, str] = {}
+        self._buckets: Dict[int, Set[str]] = {}
+        self._min = 0
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    @property
+    def min_count(self) -> int:
+        """Largest count an unmonitored key could have"""
+        return self._min if len(self._counts) >= self.capacity else 0
+
+    def offer(self, key: str, label: Optional[str] = None):
+        self.total += 1
+        count = self._counts.get(key)
+        if count is None:
+            if len(self._counts) < self.capacity:
+                count, error = 0, 0
+            else:
+                # Replace a minimum key; the newcomer inherits its count as error
+                count = self._min
+                evicted = self._buckets[count].pop()
+                del self._counts[evicted]
+                del self._errors[evicted]
+                self._labels.pop(evicted, None)
+                error = count
+            self._errors[key] = error
+        else:
+            self._buckets[count].discard(key)
+
+        if not self._buckets.get(count):
+            self._buckets.pop(count, None)
+        self._counts[key] = count + 1
+        self._buckets.setdefault(count + 1, set()).add(key)
+        if label is not None:
+            self._labels[key] = label
+
+        if count == 0:
+            self._min = 1
+        elif count == self._min and self._min not in self._buckets:
+            self._min += 1
+
+    def items(self):
+        """(key, count, error, label) for every monitored key"""
+        for key, count in self._counts.items():
+            yield key, count, self._errors[key], self._labels.get(key)
+
+
+class SlidingTopK:
+    """A ring of SpaceSaving panes covering one time window"""
+
+    def __init__(self, window_seconds: int, panes: int, capacity: int):
+        self.window_seconds = window_seconds
+        self.pane_seconds = window_seconds / panes
+        self.panes = panes
+        self.capacity = capacity
+        self._panes: Dict[int, SpaceSaving] = {}
+
+    def _live_panes(self, now: float) -> List[SpaceSaving]:
+        current = int(now // self.pane_seconds)
+        for epoch in [e for e in self._panes if e <= current - self.panes]:
+            del self._panes[epoch]
+        return list(self._panes.values())
+
+    def offer(self, key: str, label: Optional[str] = None, now: Optional[float] = None):
+        epoch = int((time.time() if now is None else now) // self.pane_seconds)
+        pane = self._panes.get(epoch)
+        if pane is None:
+            pane = self._panes[epoch] = SpaceSaving(self.capacity)
+            self._live_panes(epoch * self.pane_seconds)
+        pane.offer(key, label)
+
+    def top(self, limit: int = 10, now: Optional[float] = None) -> Dict:
+        panes = self._live_panes(time.time() if now is None else now)
+
+        counts: Dict[str, int] = {}
+        errors: Dict[str, int] = {}
+        labels: Dict[str, str] = {}
+        for pane in panes:
+            for key, count, error, label in pane.items():
+                counts[key] = counts.get(key, 0) + count
+                errors[key] = errors.get(key, 0) + error
+                if label is not None:
+                    labels[key] = label
+
+        # A key missing from a full pane may still have up to its min count there
+        full_panes = [pane for pane in panes if pane.min_count]
+        for key in counts:
+            for pane in full_panes:
+                if key not in pane:
+                    errors[key] += pane.min_count
+
+        ranked = sorted(counts, key=lambda k: (-counts[k], k))[:limit]
+        return {
+            "total": sum(pane.total for pane in panes),
+            "items": [
+                {
+                    "key": key,
+                    "count": counts[key],
+                    "max_error": errors[key],
+                    "label": labels.get(key),
+                }
+                for key in ranked
+            ],
+        }
+
+
+class HeavyHitters:
+    """Top agents and top patterns over each configured window"""
+
+    def __init__(self, capacity: int = 200, windows: Optional[Dict[str, tuple]] = None):
+        self.capacity = capacity
+        self.windows = windows or DEFAULT_WINDOWS
+        self._sketches: Dict[str, Dict[str, SlidingTopK]] = {
+            dimension: {
+                name: SlidingTopK(seconds, panes, capacity)
+                for name, (seconds, panes) in self.windows.items()
+            }
+            for dimension in DIMENSIONS
+        }
+
+    def record(self, agent_id: str, pattern_key: str, label: Optional[str] = None,
+               now: Optional[float] = None):
+        """Count one logged error against its agent and its pattern"""
+        now = time.time() if now is None else now
+        for sketch in self._sketches["agents"].values():
+            sketch.offer(agent_id, None, now)
+        for sketch in self._sketches["patterns"].values():
+            sketch.offer(pattern_key, label, now)
+
+    def top(self, dimension: str, window: str, limit: int = 10, now: Optional[float] = None) -> Dict:
+        if dimension not in self._sketches:
+            raise ValueError(f"Unknown dimension {dimension!r}; expected one of {', '.join(DIMENSIONS)}")
+        if window not in self.windows:
+            raise ValueError(f"Unknown window {window!r}; expected one of {', '.join(self.windows)}")
+        result = self._sketches[dimension][window].top(limit, now)
+        result.update(dimension=dimension, window=window, capacity=self.capacity)
+        return result
@@ -0,0 +1,157 @@
+# ORBT Ingest Deduplication
+# Collapses an agent's repeated error (same agent_id, error_type and exact
+# error_message) within a short window into the row written for its first
+# occurrence. The key is the exact text, not a fingerprint, because the
+# Rule 5 trigger groups by exact error_message: folding "timeout after 30s"
+# into a "timeout after 31s" row would count it under the wrong message.
+#
+# The first and second occurrences are inserted as usual; the second insert
+# is what fires the Rule 5 escalation trigger, so escalation is never held
+# back by the window. Later repeats inside the window are only counted in
+# memory and returned the second row's error_id; flush() adds the counts to
+# that row's repeat_count in one batched UPDATE. Escalation counts
+# 1 + repeat_count per row instead of rows (and the schema re-runs the check
+# on repeat_count updates), so Rule 5 sees every occurrence while a retry
+# storm costs two inserts per window plus one update per flush.
+#
+# Counts not yet flushed are lost if the process dies; flush often (the API
+# flushes every few seconds and on shutdown).
+#
+# Events carrying a client event id are remembered once accepted (accept),
+# so a client resending a batch after a timeout gets the original answer
+# (replayed) instead of counting the same event as another repeat.
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+FLUSH_SQL = """
+    UPDATE orbt_error_log
+    SET repeat_count = repeat_count + $2,
+        updated_at = NOW()
+    WHERE error_id = $1
+"""
+
+
+class DedupEntry:
+    """The row later repeats of a key are folded into, for the current window"""
+
+    __slots__ = ("key", "error_id", "expires_at", "pending", "occurrences", "response")
+
+    def __init__(self, key: Tuple[str, str, str], error_id: str, expires_at: float, response: Dict[str, Any]):
+        self.key = key
+        self.error_id = error_id
+        self.expires_at = expires_at
+        self.pending = 0
+        self.occurrences = 1
+        # Fields of the original ingest response, echoed for repeats
+        self.response = response
+
+
+class IngestDedupWindow:
+    """In-process dedup window keyed by (agent_id, error_type, error_message)"""
+
+    def __init__(self, window_seconds: float = 10.0, max_entries: int = 10000, max_events: int = 100000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self.max_events = max_events
+        self._entries: "OrderedDict[Tuple[str, str, str], DedupEntry]" = OrderedDict()
+        # Event key -> (error_id, response) for events already accepted
+        self._events: "OrderedDict[str, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        # Expired entries replaced before their repeats were flushed
+        self._retired: List[DedupEntry] = []
+        self.deduplicated = 0
+        self.rows_written = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(agent_id: str, error_type: Optional[str], error_message: Optional[str]) -> Tuple[str, str, str]:
+        return agent_id, error_type or "", error_message or ""
+
+    def hit(self, key: Tuple[str, str, str], now: Optional[float] = None) -> Optional[DedupEntry]:
+        """Count a repeat and return its entry, or None if the error must be written"""
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= (time.monotonic() if now is None else now):
+            return None
+        if entry.occurrences < 2:
+            # Second occurrence: written so its insert escalates right away
+            return None
+        entry.pending += 1
+        entry.occurrences += 1
+        self.deduplicated += 1
+        return entry
+
+    def remember(self, key: Tuple[str, str, str], error_id: str, response: Dict[str, Any],
+                 now: Optional[float] = None) -> bool:
+        """Open a window for a freshly written row; False when the table is full"""
+        self.rows_written += 1
+        existing = self._entries.get(key)
+        if existing is None and len(self._entries) >= self.max_entries:
+            return False
+        if existing is not None and existing.pending:
+            self._retired.append(existing)
+        now = time.monotonic() if now is None else now
+        entry = DedupEntry(key, error_id, now + self.window_seconds, response)
+        if existing is not None and existing.expires_at > now:
+            entry.occurrences = existing.occurrences + 1
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        return True
+
+    def replayed(self, event_key: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(error_id, response) an event was accepted with, if it is still remembered"""
+        return self._events.get(event_key)
+
+    def accept(self, event_key: str, error_id: str, response: Dict[str, Any]):
+        """Remember an accepted event, dropping the oldest past max_events"""
+        self._events[event_key] = (error_id, response)
+        if len(self._events) > self.max_events:
+            self._events.popitem(last=False)
+
+    async def flush(self, conn, now: Optional[float] = None) -> int:
+        """Write pending repeat counts and drop expired windows"""
+        now = time.monotonic() if now is None else now
+        flushed = [entry for entry in self._retired if entry.pending]
+        flushed.extend(entry for entry in self._entries.values() if entry.pending)
+        self._retired = []
+        updates: List[Tuple[str, int]] = [(entry.error_id, entry.pending) for entry in flushed]
+
+        if updates:
+            counts = [entry.pending for entry in flushed]
+            for entry in flushed:
+                entry.pending = 0
+            try:
+                await conn.executemany(FLUSH_SQL, updates)
+            except Exception:
+                # Put the counts back (plus anything counted meanwhile)
+                for entry, count in zip(flushed, counts):
+                    entry.pending += count
+                    if self._entries.get(entry.key) is not entry:
+                        self._retired.append(entry)
+                raise
+
+        self.expire(now)
+        return len(updates)
+
+    @property
+    def has_pending(self) -> bool:
+        return any(entry.pending for entry in self._retired) or any(
+            entry.pending for entry in self._entries.values()
+        )
+
+    def expire(self, now: Optional[float] = None):
+        """Drop expired windows whose counts have been written"""
+        now = time.monotonic() if now is None else now
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now and not e.pending]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        handled = self.deduplicated + self.rows_written
+        return {
+            "open_windows": len(self._entries),
+            "rows_written": self.rows_written,
+            "deduplicated": self.deduplicated,
+            "write_reduction": round(self.deduplicated / handled, 4) if handled else 0.0,
+        }
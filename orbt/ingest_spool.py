@@ -0,0 +1,377 @@
+# ORBT Ingest Spool
+# Durable local buffer for ingest writes while Postgres is down or slow, so
+# errors are not lost exactly when the system is failing.
+#
+# Records are appended to numbered segment files in the spool directory,
+# each framed as [length][crc32][json]. Appends are group-committed: every
+# writer waits for one fsync shared by all appends made within `sync_delay`,
+# so durability costs one fsync per batch rather than per request. A cursor
+# file records how far replay has got; fully replayed segments are deleted.
+#
+# While the spool holds records (or the breaker is tripped by a failed or
+# over-budget write) new writes go to the spool too, keeping ingest order.
+# replay() hands consecutive records of one kind to a writer callback in
+# batches; the cursor only moves after a batch commits. A crash between a
+# commit and the cursor write replays that batch again (at-least-once).
+# A batch that fails for any reason other than `unavailable_errors` is
+# retried record by record; records the database still rejects (a CHECK
+# constraint, an over-long value) go to the dead-letter file and the cursor
+# moves past them, so one bad row cannot hold the spool engaged forever.
+#
+#   receipt = await spool.append("error", payload)
+#   await spool.replay(conn, write_batch)   # background loop
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FRAME = struct.Struct(">II")
+SEGMENT_PREFIX = "segment-"
+SEGMENT_SUFFIX = ".log"
+CURSOR_FILE = "cursor.json"
+DEAD_LETTER_FILE = "dead-letter.log"
+
+BatchWriter = Callable[[Any, str, List[Dict[str, Any]]], Awaitable[None]]
+
+
+class SpoolFull(Exception):
+    """The spool reached max_bytes; the write cannot be accepted"""
+
+
+def segment_name(seq: int) -> str:
+    return f"{SEGMENT_PREFIX}{seq:010d}{SEGMENT_SUFFIX}"
+
+
+def read_records(path: str, offset: int = 0, limit: Optional[int] = None):
+    """Yield (offset after record, record) from a segment, stopping at a torn or corrupt frame"""
+    end = os.path.getsize(path) if limit is None else limit
+    with open(path, "rb") as handle:
+        handle.seek(offset)
+        while offset + FRAME.size <= end:
+            length, crc = FRAME.unpack(handle.read(FRAME.size))
+            if offset + FRAME.size + length > end:
+                return
+            body = handle.read(length)
+            if zlib.crc32(body) != crc:
+                return
+            offset += FRAME.size + length
+            yield offset, json.loads(body)
+
+
+class IngestSpool:
+    """Append-only, segmented, fsync-batched spool with an in-order replay cursor"""
+
+    def __init__(self, directory: str, max_segment_bytes: int = 8 * 1024 * 1024,
+                 max_bytes: int = 1024 * 1024 * 1024, sync_delay: float = 0.005,
+                 latency_budget: float = 1.0, unavailable_errors: Tuple[type, ...] = (OSError, asyncio.TimeoutError)):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_bytes = max_bytes
+        self.sync_delay = sync_delay
+        self.latency_budget = latency_budget
+        self.unavailable_errors = unavailable_errors
+        self.depth = 0
+        self.spooled = 0
+        self.replayed = 0
+        self.dead_lettered = 0
+        self.tripped = False
+        self.trip_reason: Optional[str] = None
+
+        self._segments: List[int] = []
+        self._sizes: Dict[int, int] = {}
+        self._cursor: Tuple[int, int] = (0, 0)
+        self._file = None
+        self._durable = 0
+        self._sync_future: Optional[asyncio.Future] = None
+        self._commit_task: Optional[asyncio.Task] = None
+        self._open()
+
+    # -- recovery ---------------------------------------------------------
+
+    def _path(self, seq: int) -> str:
+        return os.path.join(self.directory, segment_name(seq))
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self._segments = sorted(
+            int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)
+        )
+        self._cursor = self._load_cursor()
+
+        # Segments behind the cursor were replayed before a crash
+        for seq in [s for s in self._segments if s < self._cursor[0]]:
+            os.remove(self._path(seq))
+        self._segments = [s for s in self._segments if s >= self._cursor[0]]
+
+        for seq in self._segments:
+            path = self._path(seq)
+            start = self._cursor[1] if seq == self._cursor[0] else 0
+            valid = start
+            for valid, _ in read_records(path, start):
+                self.depth += 1
+            if seq == self._segments[-1] and valid < os.path.getsize(path):
+                # Torn write at the tail from a crash mid-append
+                logger.warning(f"Truncating torn spool tail in {path} at byte {valid}")
+                with open(path, "r+b") as handle:
+                    handle.truncate(valid)
+            self._sizes[seq] = os.path.getsize(path)
+
+        if not self._segments:
+            self._segments = [max(self._cursor[0], 1)]
+            self._sizes[self._segments[0]] = 0
+            if self._cursor[0] != self._segments[0]:
+                self._cursor = (self._segments[0], 0)
+        active = self._segments[-1]
+        self._file = open(self._path(active), "ab")
+        self._durable = self._sizes[active]
+        if self.depth:
+            self.trip(f"{self.depth} records left from a previous run")
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            with open(os.path.join(self.directory, CURSOR_FILE)) as handle:
+                cursor = json.load(handle)
+            return cursor["segment"], cursor["offset"]
+        except FileNotFoundError:
+            return (self._segments[0] if self._segments else 1), 0
+
+    def _save_cursor(self):
+        path = os.path.join(self.directory, CURSOR_FILE)
+        with open(path + ".tmp", "w") as handle:
+            json.dump({"segment": self._cursor[0], "offset": self._cursor[1]}, handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(path + ".tmp", path)
+
+    # -- breaker ----------------------------------------------------------
+
+    def trip(self, reason: str):
+        """Route writes to the spool until replay finds the database healthy"""
+        if not self.tripped:
+            logger.warning(f"Ingest spool engaged: {reason}")
+        self.tripped = True
+        self.trip_reason = reason
+
+    def record_write(self, latency: float):
+        """Latency of a direct database write; over budget trips the breaker"""
+        if latency > self.latency_budget:
+            self.trip(f"write took {latency * 1000:.0f}ms (budget {self.latency_budget * 1000:.0f}ms)")
+
+    def should_spool(self) -> bool:
+        return self.tripped or self.depth > 0
+
+    # -- append -----------------------------------------------------------
+
+    @property
+    def bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    async def append(self, kind: str, payload: Dict[str, Any], timestamp: Optional[float] = None) -> str:
+        """Append a record and return its receipt once it is on disk"""
+        if self.bytes >= self.max_bytes:
+            raise SpoolFull(f"Ingest spool is full ({self.max_bytes} bytes)")
+        body = json.dumps(
+            {"kind": kind, "ts": time.time() if timestamp is None else timestamp, "data": payload},
+            separators=(",", ":"), default=str
+        ).encode("utf-8")
+
+        seq = self._segments[-1]
+        offset = self._sizes[seq]
+        self._file.write(FRAME.pack(len(body), zlib.crc32(body)) + body)
+        self._sizes[seq] = offset + FRAME.size + len(body)
+        self.depth += 1
+        self.spooled += 1
+
+        await self._sync()
+        return f"SPOOL-{seq}-{offset}"
+
+    async def _sync(self):
+        if self._sync_future is None:
+            loop = asyncio.get_running_loop()
+            self._sync_future = loop.create_future()
+            self._commit_task = loop.create_task(self._group_commit(self._sync_future, self._commit_task))
+        await asyncio.shield(self._sync_future)
+
+    async def _group_commit(self, future: asyncio.Future, previous: Optional[asyncio.Task]):
+        await asyncio.sleep(self.sync_delay)
+        # One fsync at a time, so rotation never closes a file mid-fsync
+        if previous is not None and not previous.done():
+            await asyncio.wait([previous])
+        # Appends from here on belong to the next batch
+        if self._sync_future is future:
+            self._sync_future = None
+        try:
+            self._file.flush()
+            written = self._sizes[self._segments[-1]]
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._file.fileno())
+            self._durable = written
+            if written >= self.max_segment_bytes:
+                self._rotate()
+        except Exception as e:
+            future.set_exception(e)
+            return
+        future.set_result(None)
+
+    def _rotate(self):
+        # Appends made during the fsync are in this file but not yet synced
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        seq = self._segments[-1] + 1
+        self._segments.append(seq)
+        self._sizes[seq] = 0
+        self._file = open(self._path(seq), "ab")
+        self._durable = 0
+        # New segment's directory entry must survive a crash too
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    # -- replay -----------------------------------------------------------
+
+    def _pending(self, max_records: int) -> List[Tuple[int, int, Dict[str, Any]]]:
+        """Up to max_records durable records from the cursor: (segment, offset after, record)"""
+        records = []
+        seq, offset = self._cursor
+        for segment in self._segments:
+            if segment < seq:
+                continue
+            start = offset if segment == seq else 0
+            limit = self._durable if segment == self._segments[-1] else None
+            for end, record in read_records(self._path(segment), start, limit):
+                records.append((segment, end, record))
+                if len(records) >= max_records:
+                    return records
+        return records
+
+    def _advance(self, seq: int, offset: int):
+        # Drop segments that are fully replayed and no longer appended to
+        while self._segments[0] < seq:
+            self._remove_segment(self._segments[0])
+        if offset >= self._sizes[seq] and seq != self._segments[-1]:
+            self._remove_segment(seq)
+            seq, offset = self._segments[0], 0
+        self._cursor = (seq, offset)
+        self._save_cursor()
+
+    def _remove_segment(self, seq: int):
+        self._segments.remove(seq)
+        del self._sizes[seq]
+        os.remove(self._path(seq))
+
+    async def replay(self, conn, writer: BatchWriter, batch_size: int = 500, max_batches: int = 20) -> int:
+        """Write spooled records in order; resets the breaker once caught up within budget"""
+        written = 0
+        for _ in range(max_batches):
+            records = self._pending(batch_size)
+            if not records:
+                break
+            kind = records[0][2]["kind"]
+            batch = []
+            for seq, end, record in records:
+                if record["kind"] != kind:
+                    break
+                batch.append(record)
+                last = (seq, end)
+
+            started = time.monotonic()
+            try:
+                await writer(conn, kind, batch)
+            except self.unavailable_errors:
+                raise
+            except Exception as e:
+                logger.warning(f"Spooled {kind} batch rejected ({type(e).__name__}: {str(e)}); retrying record by record")
+                written += await self._replay_singly(conn, writer, kind, records[:len(batch)])
+                continue
+            latency = time.monotonic() - started
+            self._advance(*last)
+            self.depth -= len(batch)
+            self.replayed += len(batch)
+            written += len(batch)
+            if latency > self.latency_budget:
+                # Still slow: keep spooling and try again next round
+                return written
+
+        if self.depth == 0 and self.tripped:
+            if written == 0:
+                # Nothing to replay, so probe the database directly
+                started = time.monotonic()
+                await conn.fetchval("SELECT 1")
+                if time.monotonic() - started > self.latency_budget:
+                    return written
+            logger.info("Ingest spool drained; writing directly to the database again")
+            self.tripped = False
+            self.trip_reason = None
+        return written
+
+    async def _replay_singly(self, conn, writer: BatchWriter, kind: str,
+                             records: List[Tuple[int, int, Dict[str, Any]]]) -> int:
+        """Write records one at a time, dead-lettering the ones the database rejects"""
+        written = 0
+        position = None
+        try:
+            for seq, end, record in records:
+                try:
+                    await writer(conn, kind, [record])
+                    written += 1
+                except self.unavailable_errors:
+                    raise
+                except Exception as e:
+                    self._dead_letter(record, e)
+                position = (seq, end)
+                self.depth -= 1
+        finally:
+            # Records written so far must not be replayed again
+            if position is not None:
+                self._advance(*position)
+            self.replayed += written
+        return written
+
+    def _dead_letter(self, record: Dict[str, Any], error: Exception):
+        logger.error(f"Spooled {record['kind']} record rejected by the database, moved to {DEAD_LETTER_FILE}: "
+                     f"{type(error).__name__}: {str(error)}")
+        body = json.dumps({**record, "error": f"{type(error).__name__}: {str(error)}"},
+                          separators=(",", ":"), default=str).encode("utf-8")
+        with open(os.path.join(self.directory, DEAD_LETTER_FILE), "ab") as handle:
+            handle.write(FRAME.pack(len(body), zlib.crc32(body)) + body)
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.dead_lettered += 1
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        """Records moved aside by replay, each with the error that rejected it"""
+        path = os.path.join(self.directory, DEAD_LETTER_FILE)
+        if not os.path.exists(path):
+            return []
+        return [record for _, record in read_records(path)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "bytes": self.bytes,
+            "segments": len(self._segments),
+            "spooled": self.spooled,
+            "replayed": self.replayed,
+            "dead_lettered": self.dead_lettered,
+            "engaged": self.should_spool(),
+            "reason": self.trip_reason,
+        }
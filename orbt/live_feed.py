@@ -0,0 +1,196 @@
+# ORBT Live Feed
+# Server push of new errors, escalations and system status transitions to
+# dashboards, replacing polling of GET /api/orbt/status and /api/orbt/errors.
+#
+# One LISTEN connection per process receives `orbt_live_events` NOTIFYs
+# (see notify_orbt_live_event() in database/orbt-error-log-schema.sql) and
+# fans each event out to every matching subscriber. An event is encoded once
+# (JSON and SSE frame) however many subscribers receive it. Each subscriber
+# has a bounded queue; one that falls a full queue behind is dropped rather
+# than slowing the others, and can reconnect with Last-Event-ID to resume
+# from the recent-event ring.
+#
+#   subscription = live_feed.subscribe(agent_ids={"database-specialist"}, statuses={"RED"})
+#   event = await subscription.get(timeout=15)   # None on timeout (send a keepalive)
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+LIVE_CHANNEL = "orbt_live_events"
+
+EVENT_TYPES = ("error", "escalation", "status")
+
+
+class SubscriptionClosed(Exception):
+    """The subscription was dropped (too slow) or closed"""
+
+
+class LiveEvent:
+    """One event, pre-encoded for every subscriber"""
+
+    __slots__ = ("id", "type", "agent_id", "orbt_status", "json", "sse")
+
+    def __init__(self, event_id: str, fields: Dict[str, Any]):
+        self.id = event_id
+        self.type = fields.get("type")
+        self.agent_id = fields.get("agent_id")
+        self.orbt_status = fields.get("orbt_status")
+        self.json = json.dumps({"id": event_id, **fields}, separators=(",", ":"), default=str)
+        self.sse = f"id: {event_id}\nevent: {self.type}\ndata: {self.json}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """A subscriber's filters and bounded queue"""
+
+    def __init__(self, hub: "LiveFeedHub", agent_ids: Optional[Set[str]], statuses: Optional[Set[str]],
+                 types: Optional[Set[str]], queue_size: int):
+        self.hub = hub
+        self.agent_ids = agent_ids
+        self.statuses = statuses
+        self.types = types
+        self.queue: "asyncio.Queue[LiveEvent]" = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self.dropped = False
+
+    def matches(self, event: LiveEvent) -> bool:
+        # System-wide events (no agent / no status) reach every subscriber
+        if self.types and event.type not in self.types:
+            return False
+        if self.agent_ids and event.agent_id is not None and event.agent_id not in self.agent_ids:
+            return False
+        if self.statuses and event.orbt_status is not None and event.orbt_status not in self.statuses:
+            return False
+        return True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[LiveEvent]:
+        """Next event; None after `timeout` seconds without one"""
+        if self.closed and self.queue.empty():
+            raise SubscriptionClosed("dropped: too far behind" if self.dropped else "closed")
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            if self.closed:
+                raise SubscriptionClosed("dropped: too far behind" if self.dropped else "closed")
+            return None
+
+    def close(self):
+        self.closed = True
+        self.hub._subscribers.discard(self)
+
+
+class LiveFeedHub:
+    """Fans database notifications out to filtered subscribers"""
+
+    def __init__(self, queue_size: int = 100, replay_size: int = 1000):
+        self.queue_size = queue_size
+        # Event ids are "<boot>-<seq>" so a Last-Event-ID from another process
+        # (or before a restart) is recognised and not replayed from
+        self.boot = format(time.time_ns(), "x")
+        self._seq = 0
+        self._recent: Deque[tuple] = deque(maxlen=replay_size)
+        self._subscribers: Set[Subscription] = set()
+        self.published = 0
+        self.dropped_subscribers = 0
+        self._listener_conn = None
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, agent_ids: Optional[Iterable[str]] = None, statuses: Optional[Iterable[str]] = None,
+                  types: Optional[Iterable[str]] = None, last_event_id: Optional[str] = None) -> Subscription:
+        subscription = Subscription(
+            self,
+            set(agent_ids) if agent_ids else None,
+            set(statuses) if statuses else None,
+            set(types) if types else None,
+            self.queue_size,
+        )
+        for event in self._missed(last_event_id):
+            if subscription.matches(event):
+                if subscription.queue.full():
+                    subscription.queue.get_nowait()
+                subscription.queue.put_nowait(event)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def _missed(self, last_event_id: Optional[str]):
+        if not last_event_id:
+            return []
+        boot, _, seq = last_event_id.partition("-")
+        if boot != self.boot or not seq.isdigit():
+            return []
+        after = int(seq)
+        return [event for event_seq, event in self._recent if event_seq > after]
+
+    def publish(self, fields: Dict[str, Any]) -> LiveEvent:
+        self._seq += 1
+        event = LiveEvent(f"{self.boot}-{self._seq}", fields)
+        self._recent.append((self._seq, event))
+        self.published += 1
+
+        for subscription in list(self._subscribers):
+            if not subscription.matches(event):
+                continue
+            try:
+                subscription.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                subscription.dropped = True
+                subscription.close()
+                self.dropped_subscribers += 1
+        return event
+
+    def _on_notify(self, connection, pid, channel, payload):
+        try:
+            fields = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed live event payload: {payload[:200]}")
+            return
+        self.publish(fields)
+
+    async def run(self, connect: Callable[[], Awaitable[Any]], check_interval: float = 5.0):
+        """Hold the LISTEN connection, reconnecting whenever it is lost"""
+        while True:
+            try:
+                conn = await connect()
+                await conn.add_listener(LIVE_CHANNEL, self._on_notify)
+                self._listener_conn = conn
+                logger.info(f"Live feed listening on {LIVE_CHANNEL}")
+                while not conn.is_closed():
+                    await asyncio.sleep(check_interval)
+                logger.warning("Live feed listener connection lost; reconnecting")
+            except asyncio.CancelledError:
+                await self.close()
+                raise
+            except Exception as e:
+                logger.warning(f"Live feed listener failed: {str(e)}")
+            self._listener_conn = None
+            await asyncio.sleep(check_interval)
+
+    async def close(self):
+        conn, self._listener_conn = self._listener_conn, None
+        if conn is not None and not conn.is_closed():
+            await conn.remove_listener(LIVE_CHANNEL, self._on_notify)
+            await conn.close()
+        for subscription in list(self._subscribers):
+            subscription.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self._listener_conn is not None,
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
+
+
+def split_filter(value: Optional[str]) -> Optional[Set[str]]:
+    """Comma-separated query parameter -> set (None when absent)"""
+    if not value:
+        return None
+    return {part.strip() for part in value.split(",") if part.strip()} or None
@@ -0,0 +1,272 @@
+# ORBT Read Routing
+# Sends the read-only endpoints (error log, agent metrics, system status,
+# doctrine refreshes) to streaming replicas so dashboard traffic stops
+# competing with ingest on the primary. Writes never go through the router.
+#
+# Replica lag is measured in WAL position, not wall-clock timestamps: every
+# check samples the primary's pg_current_wal_lsn() and each replica's
+# pg_last_wal_replay_lsn(). A replica that has replayed past the sample taken
+# at time T has applied every transaction committed before T, so
+#   - lag = check time - newest such T (0 on an idle, caught-up replica)
+#   - read-your-writes: a read for a key written at W may use a replica only
+#     once it has applied through W; otherwise it goes to the primary.
+# Replicas over `max_lag`, unreachable, not in recovery or not checked
+# recently are skipped, and the read falls back to the primary. If the
+# primary itself cannot be probed, healthy replicas keep serving (stale
+# reads beat none).
+#
+#   async with read_router.connection(key=agent_id) as conn:   # replica or primary
+#       rows = await conn.fetch(...)
+#   ... after a committed write ...
+#   read_router.note_write(agent_id)
+#
+# Read-your-writes is tracked per process. To try it against two local
+# instances: pg_basebackup -R -D <dir> from the primary, start the standby on
+# another port, and run tests/unit/test_read_routing.py with
+# TEST_DATABASE_URL / TEST_REPLICA_DATABASE_URL set.
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PRIMARY_LSN_QUERY = "SELECT pg_current_wal_lsn() - '0/0'::pg_lsn"
+
+REPLICA_LSN_QUERY = """
+    SELECT pg_is_in_recovery() AS in_recovery,
+           pg_last_wal_replay_lsn() - '0/0'::pg_lsn AS replay_lsn
+"""
+
+# Why a read went to the primary
+PRIMARY_REASONS = ("no_replicas", "unhealthy", "lagging", "read_your_writes")
+
+Connect = Callable[[], Awaitable[Any]]
+
+
+class ReplicaState:
+    """Health and replay position of one replica"""
+
+    __slots__ = ("name", "connect", "healthy", "checked_at", "applied_through", "lag", "reads", "last_error")
+
+    def __init__(self, name: str, connect: Connect):
+        self.name = name
+        self.connect = connect
+        self.healthy = False
+        self.checked_at = 0.0
+        self.applied_through = 0.0
+        self.lag = float("inf")
+        self.reads = 0
+        self.last_error: Optional[str] = None
+
+
+class RoutedConnection:
+    """Async context manager yielding a replica or primary connection"""
+
+    __slots__ = ("router", "written_at", "conn", "replica")
+
+    def __init__(self, router: "ReadRouter", written_at: Optional[float]):
+        self.router = router
+        self.written_at = written_at
+        self.conn = None
+        self.replica: Optional[ReplicaState] = None
+
+    @property
+    def source(self) -> str:
+        return self.replica.name if self.replica is not None else "primary"
+
+    async def __aenter__(self):
+        router = self.router
+        replica, reason = router.choose(self.written_at)
+        if replica is not None:
+            try:
+                self.conn = await replica.connect()
+                self.replica = replica
+                replica.reads += 1
+                return self.conn
+            except router.unavailable_errors as e:
+                router.mark_down(replica, e)
+                reason = "unhealthy"
+        router.primary_reads[reason] += 1
+        self.conn = await router.connect_primary()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if self.replica is not None and isinstance(exc, self.router.unavailable_errors):
+            self.router.mark_down(self.replica, exc)
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.debug(f"Closing {self.source} connection failed: {str(e)}")
+        return False
+
+
+class ReadRouter:
+    """Routes reads across replicas by measured replay lag"""
+
+    def __init__(self, connect_primary: Connect, replicas: Optional[Dict[str, Connect]] = None,
+                 max_lag: float = 5.0, check_interval: float = 1.0, probe_timeout: float = 2.0,
+                 unavailable_errors: Tuple[type, ...] = (OSError, asyncio.TimeoutError),
+                 max_keys: int = 10000, clock: Callable[[], float] = time.time):
+        self.connect_primary = connect_primary
+        self.replicas: List[ReplicaState] = [
+            ReplicaState(name, connect) for name, connect in (replicas or {}).items()
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.unavailable_errors = unavailable_errors
+        self.max_keys = max_keys
+        self.clock = clock
+        # A measurement older than this is not trusted (checker stalled)
+        self.stale_after = max(3 * check_interval, probe_timeout + check_interval)
+        self.primary_reachable = True
+        self.primary_reads: Dict[str, int] = {reason: 0 for reason in PRIMARY_REASONS}
+        # (sample time, primary WAL position), oldest first
+        self._samples: Deque[Tuple[float, int]] = deque(maxlen=int(max_lag / check_interval) + 4)
+        self._writes: "OrderedDict[str, float]" = OrderedDict()
+        self._probes: Dict[str, Any] = {}
+        self._next = 0
+
+    def note_write(self, key: Optional[str], at: Optional[float] = None):
+        """Record a committed write so this key's next reads see it"""
+        if key is None:
+            return
+        self._writes[key] = self.clock() if at is None else at
+        self._writes.move_to_end(key)
+        if len(self._writes) > self.max_keys:
+            self._writes.popitem(last=False)
+
+    def last_write(self, key: Optional[str]) -> Optional[float]:
+        return self._writes.get(key) if key is not None else None
+
+    def connection(self, key: Optional[str] = None, written_at: Optional[float] = None) -> RoutedConnection:
+        """Connection for a read; `key` (e.g. agent_id) enables read-your-writes"""
+        last = self.last_write(key)
+        if last is not None and (written_at is None or last > written_at):
+            written_at = last
+        return RoutedConnection(self, written_at)
+
+    def choose(self, written_at: Optional[float] = None) -> Tuple[Optional[ReplicaState], str]:
+        """A replica able to serve the read, or (None, reason for the primary)"""
+        if not self.replicas:
+            return None, "no_replicas"
+
+        now = self.clock()
+        candidates = []
+        reason = "unhealthy"
+        for replica in self.replicas:
+            if not replica.healthy or now - replica.checked_at > self.stale_after:
+                continue
+            if self.primary_reachable:
+                if replica.lag > self.max_lag:
+                    reason = "lagging" if reason == "unhealthy" else reason
+                    continue
+                if written_at is not None and replica.applied_through < written_at:
+                    reason = "read_your_writes"
+                    continue
+            candidates.append(replica)
+
+        if not candidates:
+            return None, reason
+        self._next = (self._next + 1) % len(candidates)
+        return candidates[self._next], "replica"
+
+    def mark_down(self, replica: ReplicaState, error: BaseException):
+        """Take a replica out of rotation until its next successful check"""
+        if replica.healthy:
+            logger.warning(f"Read replica {replica.name} unavailable: {str(error)}")
+        replica.healthy = False
+        replica.last_error = f"{type(error).__name__}: {str(error)}"
+
+    async def _probe(self, name: str, connect: Connect, query: str):
+        conn = self._probes.get(name)
+        try:
+            if conn is None or conn.is_closed():
+                conn = self._probes[name] = await asyncio.wait_for(connect(), self.probe_timeout)
+            return await asyncio.wait_for(conn.fetchrow(query), self.probe_timeout)
+        except Exception:
+            self._probes.pop(name, None)
+            if conn is not None and not conn.is_closed():
+                conn.terminate()
+            raise
+
+    async def check(self):
+        """Sample the primary's WAL position, then each replica's replay position"""
+        if not self.replicas:
+            return
+
+        sampled_at = self.clock()
+        try:
+            row = await self._probe("primary", self.connect_primary, PRIMARY_LSN_QUERY)
+            self._samples.append((sampled_at, int(row[0])))
+            self.primary_reachable = True
+        except Exception as e:
+            if self.primary_reachable:
+                logger.warning(f"Read routing primary probe failed: {str(e)}")
+            self.primary_reachable = False
+
+        for replica in self.replicas:
+            try:
+                row = await self._probe(replica.name, replica.connect, REPLICA_LSN_QUERY)
+            except Exception as e:
+                self.mark_down(replica, e)
+                continue
+
+            now = self.clock()
+            if not row["in_recovery"]:
+                # Not a standby: it would serve diverging data
+                replica.healthy = False
+                replica.last_error = "not in recovery"
+                continue
+
+            replayed = int(row["replay_lsn"] or 0)
+            for sample_time, position in reversed(self._samples):
+                if position <= replayed:
+                    replica.applied_through = max(replica.applied_through, sample_time)
+                    break
+            if not replica.healthy:
+                logger.info(f"Read replica {replica.name} back in rotation")
+            replica.healthy = True
+            replica.last_error = None
+            replica.checked_at = now
+            replica.lag = max(0.0, now - replica.applied_through) if replica.applied_through else float("inf")
+
+    async def run(self):
+        """Keep replica lag current"""
+        while True:
+            try:
+                await self.check()
+            except asyncio.CancelledError:
+                await self.close()
+                raise
+            except Exception as e:
+                logger.warning(f"Read routing check failed: {str(e)}")
+            await asyncio.sleep(self.check_interval)
+
+    async def close(self):
+        probes, self._probes = self._probes, {}
+        for conn in probes.values():
+            if not conn.is_closed():
+                await conn.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_lag_seconds": self.max_lag,
+            "primary_reachable": self.primary_reachable,
+            "primary_reads": dict(self.primary_reads),
+            "replicas": [
+                {
+                    "name": replica.name,
+                    "healthy": replica.healthy,
+                    "lag_seconds": round(replica.lag, 3) if replica.lag != float("inf") else None,
+                    "reads": replica.reads,
+                    "last_error": replica.last_error,
+                }
+                for replica in self.replicas
+            ],
+        }
@@ -0,0 +1,157 @@
+# ORBT Resolution Lookup
+# Known-fix lookup for incoming errors, served from memory.
+# Entries from shq.orbt_resolution_library (by error_signature fingerprint) and
+# shq.orbt_troubleshooting_guide (by error_code) are preloaded into a
+# size-bounded LRU so attaching a known fix never costs a database round trip.
+
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from orbt.fingerprint import error_fingerprint, extract_error_codes
+
+logger = logging.getLogger(__name__)
+
+# Least valuable first: later rows are more recently used in the LRU
+LIBRARY_QUERY = """
+    SELECT
+        resolution_id,
+        error_signature,
+        error_type,
+        error_code,
+        fix_title,
+        fix_description,
+        fix_commands,
+        verification_commands,
+        approved_for_automation,
+        success_rate
+    FROM shq.orbt_resolution_library
+    ORDER BY application_count DESC, last_applied DESC NULLS LAST
+    LIMIT $1
+"""
+
+GUIDE_QUERY = """
+    SELECT
+        lookup_key,
+        error_code,
+        error_type,
+        error_title,
+        immediate_action,
+        resolution_steps,
+        auto_resolvable,
+        success_rate
+    FROM shq.orbt_troubleshooting_guide
+    ORDER BY last_seen DESC NULLS LAST, success_rate DESC
+    LIMIT $1
+"""
+
+
+class ResolutionLookup:
+    """
+    In-memory known-fix index keyed by error fingerprint.
+
+    Library entries are keyed by the fingerprint of (error_type,
+    error_signature); troubleshooting guide entries by "guide:<ERROR_CODE>".
+    A library match (exact fix) wins over a guide match (general playbook).
+    """
+
+    def __init__(self, max_entries: int = 5000, refresh_interval: float = 900.0):
+        self.max_entries = max_entries
+        self.refresh_interval = refresh_interval
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._loaded_at: Optional[float] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def load(self, conn):
+        """Preload the most used library and guide entries"""
+        guide_rows = await conn.fetch(GUIDE_QUERY, self.max_entries)
+        library_rows = await conn.fetch(LIBRARY_QUERY, self.max_entries)
+        self.build(guide_rows, library_rows)
+        logger.info(f"Resolution lookup loaded {len(self._entries)} known fixes")
+
+    def build(self, guide_rows, library_rows):
+        entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Queries return most valuable first; insert in reverse so they end up
+        # at the most-recently-used end and survive eviction longest
+        for row in reversed(list(guide_rows)):
+            entries[f"guide:{row['error_code'].upper()}"] = {
+                "source": "troubleshooting_guide",
+                "key": row["lookup_key"],
+                "title": row["error_title"],
+                "action": row["immediate_action"],
+                "steps": list(row["resolution_steps"] or []),
+                "auto_resolvable": row["auto_resolvable"],
+                "success_rate": float(row["success_rate"] or 0),
+            }
+
+        for row in reversed(list(library_rows)):
+            entries[error_fingerprint(row["error_type"], row["error_signature"])] = {
+                "source": "resolution_library",
+                "key": row["resolution_id"],
+                "title": row["fix_title"],
+                "action": row["fix_description"],
+                "steps": list(row["fix_commands"] or []),
+                "auto_resolvable": bool(row["approved_for_automation"]),
+                "success_rate": float(row["success_rate"] or 0),
+            }
+
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+        self._entries = entries
+        self._loaded_at = time.monotonic()
+
+    def needs_refresh(self) -> bool:
+        return (
+            self._loaded_at is None
+            or time.monotonic() - self._loaded_at >= self.refresh_interval
+        )
+
+    async def refresh(self, conn) -> bool:
+        """Reload when the refresh interval has elapsed. Returns True if reloaded."""
+        if not self.needs_refresh():
+            return False
+        await self.load(conn)
+        return True
+
+    def remember(self, key: str, entry: Dict[str, Any]):
+        """Add or update one entry (e.g. a freshly recorded resolution)"""
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def lookup(self, error_type: Optional[str], error_message: Optional[str],
+               fingerprint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Known fix for an error, or None. Never touches the database."""
+        keys = [fingerprint or error_fingerprint(error_type, error_message)]
+        keys.extend(f"guide:{code}" for code in extract_error_codes(error_message))
+
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        self.misses += 1
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
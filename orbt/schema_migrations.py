@@ -0,0 +1,257 @@
+# HEIR Schema Migration Runner
+# Applies database/complete-heir-schema.sql as versioned steps instead of one
+# psql pass. Each banner section of the schema file is a step, recorded in
+# shq.doctrine_schema_version as "<release>.<NN>" with a checksum of its SQL;
+# unchanged steps are skipped, so redeploying an up-to-date database only
+# compares checksums. Steps are idempotent DDL, so a step whose SQL changed
+# is simply re-applied.
+#
+# CREATE INDEX statements are pulled out of their step and built with
+# CREATE INDEX CONCURRENTLY outside any transaction, so building an index
+# never blocks writes to the table. Transactional DDL runs with a
+# lock_timeout and fails fast rather than queueing behind live traffic.
+#
+# New sections should be appended to the schema file: step numbers follow
+# section order.
+
+import hashlib
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RELEASE = "1.0.0"
+
+BANNER_PATTERN = re.compile(r"^-- =+[ \t]*\n-- (?P<title>[^\n]+?)[ \t]*\n-- =+[ \t]*$", re.M)
+RELEASE_PATTERN = re.compile(
+    r"INSERT INTO shq\.doctrine_schema_version\s*\([^)]*\)\s*VALUES\s*\(\s*'([^']+)'", re.I
+)
+DOLLAR_TAG_PATTERN = re.compile(r"\$(?:[A-Za-z_][A-Za-z_0-9]*)?\$")
+INDEX_PATTERN = re.compile(
+    r"^CREATE\s+(?P<unique>UNIQUE\s+)?INDEX\s+(?:CONCURRENTLY\s+)?(?:IF\s+NOT\s+EXISTS\s+)?"
+    r"(?P<name>[\w.\"]+)\s+ON\s+(?:ONLY\s+)?(?P<table>[\w.\"]+)(?P<rest>.*)$",
+    re.I | re.S
+)
+
+# Bootstraps the version table, including on databases deployed before checksums
+VERSION_TABLE_SQL = """
+    CREATE SCHEMA IF NOT EXISTS shq;
+    CREATE TABLE IF NOT EXISTS shq.doctrine_schema_version (
+        version VARCHAR(20) NOT NULL,
+        applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+        applied_by VARCHAR(100) NOT NULL,
+        rollback_sql TEXT NULL,
+        notes TEXT NULL,
+        PRIMARY KEY (version)
+    );
+    ALTER TABLE shq.doctrine_schema_version ADD COLUMN IF NOT EXISTS checksum VARCHAR(64) NULL;
+    ALTER TABLE shq.doctrine_schema_version ADD COLUMN IF NOT EXISTS duration_ms INTEGER NULL;
+"""
+
+APPLIED_QUERY = """
+    SELECT version, checksum FROM shq.doctrine_schema_version
+"""
+
+RECORD_SQL = """
+    INSERT INTO shq.doctrine_schema_version (version, applied_by, notes, checksum, duration_ms)
+    VALUES ($1, $2, $3, $4, $5)
+    ON CONFLICT (version) DO UPDATE SET
+        applied_at = NOW(),
+        applied_by = EXCLUDED.applied_by,
+        notes = EXCLUDED.notes,
+        checksum = EXCLUDED.checksum,
+        duration_ms = EXCLUDED.duration_ms
+"""
+
+INDEX_VALID_QUERY = """
+    SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass($1)
+"""
+
+
+def split_statements(sql: str) -> List[str]:
+    """Split SQL on top-level semicolons, respecting quotes, comments and dollar quoting"""
+    statements = []
+    start = i = 0
+    n = len(sql)
+
+    while i < n:
+        if sql.startswith("--", i):
+            end = sql.find("\n", i)
+            i = n if end == -1 else end + 1
+        elif sql.startswith("/*", i):
+            end = sql.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+        elif sql[i] in ("'", '"'):
+            quote = sql[i]
+            i += 1
+            while i < n:
+                if sql[i] == quote:
+                    if sql.startswith(quote * 2, i):
+                        i += 2
+                        continue
+                    break
+                i += 1
+            i += 1
+        elif sql[i] == "$" and DOLLAR_TAG_PATTERN.match(sql, i):
+            tag = DOLLAR_TAG_PATTERN.match(sql, i).group(0)
+            end = sql.find(tag, i + len(tag))
+            i = n if end == -1 else end + len(tag)
+        elif sql[i] == ";":
+            statements.append(sql[start:i])
+            start = i = i + 1
+        else:
+            i += 1
+
+    statements.append(sql[start:])
+    return [s.strip() for s in statements if strip_comments(s)]
+
+
+def strip_comments(statement: str) -> str:
+    """Statement text without leading comment lines"""
+    lines = [line for line in statement.strip().splitlines() if not line.strip().startswith("--")]
+    return "\n".join(lines).strip()
+
+
+def checksum(sql: str) -> str:
+    normalised = "\n".join(line.rstrip() for line in sql.strip().splitlines())
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()
+
+
+class IndexBuild:
+    """A CREATE INDEX statement rewritten to build concurrently"""
+
+    __slots__ = ("name", "qualified_name", "sql")
+
+    def __init__(self, statement: str):
+        match = INDEX_PATTERN.match(strip_comments(statement))
+        self.name = match.group("name")
+        table = match.group("table")
+        schema = table.rsplit(".", 1)[0] if "." in table else "public"
+        self.qualified_name = self.name if "." in self.name else f"{schema}.{self.name}"
+        self.sql = (
+            f"CREATE {match.group('unique') or ''}INDEX CONCURRENTLY IF NOT EXISTS "
+            f"{self.name} ON {table}{match.group('rest')}"
+        )
+
+
+class MigrationStep:
+    """One versioned section of the schema file"""
+
+    __slots__ = ("version", "title", "statements", "indexes", "checksum")
+
+    def __init__(self, version: str, title: str, sql: str):
+        self.version = version
+        self.title = title
+        self.checksum = checksum(sql)
+        self.statements: List[str] = []
+        self.indexes: List[IndexBuild] = []
+        for statement in split_statements(sql):
+            if INDEX_PATTERN.match(strip_comments(statement)):
+                self.indexes.append(IndexBuild(statement))
+            else:
+                self.statements.append(statement)
+
+
+def load_steps(schema_sql: str, release: Optional[str] = None):
+    """Split a schema file into (release, steps) on its section banners"""
+    if release is None:
+        match = RELEASE_PATTERN.search(schema_sql)
+        release = match.group(1) if match else DEFAULT_RELEASE
+
+    banners = list(BANNER_PATTERN.finditer(schema_sql))
+    sections = [("Bootstrap", schema_sql[:banners[0].start()] if banners else schema_sql)]
+    for current, following in zip(banners, banners[1:] + [None]):
+        end = following.start() if following else len(schema_sql)
+        sections.append((current.group("title"), schema_sql[current.end():end]))
+
+    steps = [
+        MigrationStep(f"{release}.{number:02d}", title, sql)
+        for number, (title, sql) in enumerate(sections)
+        if split_statements(sql)
+    ]
+    return release, steps
+
+
+class SchemaMigrationRunner:
+    """Applies pending schema steps over one connection"""
+
+    def __init__(self, conn, applied_by: str = "migrate-schema.py", lock_timeout: str = "5s"):
+        self.conn = conn
+        self.applied_by = applied_by
+        self.lock_timeout = lock_timeout
+
+    async def applied(self) -> Dict[str, Optional[str]]:
+        await self.conn.execute(VERSION_TABLE_SQL)
+        return {row["version"]: row["checksum"] for row in await self.conn.fetch(APPLIED_QUERY)}
+
+    async def run(self, release: str, steps: List[MigrationStep], dry_run: bool = False) -> List[Dict[str, Any]]:
+        """Apply changed steps in order; returns a report per step"""
+        applied = await self.applied()
+        report = []
+
+        for step in steps:
+            previous = applied.get(step.version, False)
+            if previous == step.checksum:
+                report.append({"version": step.version, "title": step.title, "status": "skipped", "duration_ms": 0})
+                continue
+
+            status = "applied" if previous is False else "reapplied"
+            duration_ms = 0 if dry_run else await self.apply_step(step)
+            report.append({
+                "version": step.version,
+                "title": step.title,
+                "status": f"pending ({status})" if dry_run else status,
+                "duration_ms": duration_ms,
+            })
+
+        changed = [entry for entry in report if entry["status"] != "skipped"]
+        release_checksum = checksum("\n".join(step.checksum for step in steps))
+        # Written whenever it is missing or stale, not only when a step ran:
+        # rollback-database.sh deletes just the release row, and the redeploy
+        # that follows finds every step up to date
+        if applied.get(release, False) != release_checksum and not dry_run:
+            # Recorded last so it stays the current version for the deploy/rollback scripts
+            await self.conn.execute(
+                RECORD_SQL, release, self.applied_by,
+                f"{len(steps)} steps, {len(changed)} applied", release_checksum,
+                sum(entry["duration_ms"] for entry in report)
+            )
+        return report
+
+    async def apply_step(self, step: MigrationStep) -> int:
+        started = time.monotonic()
+
+        if step.statements:
+            async with self.conn.transaction():
+                await self.conn.execute(f"SET LOCAL lock_timeout = '{self.lock_timeout}'")
+                for statement in step.statements:
+                    await self.conn.execute(statement)
+                if not step.indexes:
+                    await self._record(step, started)
+
+        if step.indexes:
+            for index in step.indexes:
+                await self.build_index(index)
+            await self._record(step, started)
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        logger.info(f"Applied {step.version} {step.title} in {duration_ms}ms")
+        return duration_ms
+
+    async def build_index(self, index: IndexBuild):
+        # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+        if await self.conn.fetchval(INDEX_VALID_QUERY, index.qualified_name) is False:
+            logger.warning(f"Rebuilding invalid index {index.qualified_name}")
+            await self.conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index.qualified_name}")
+
+        started = time.monotonic()
+        await self.conn.execute(index.sql)
+        logger.info(f"Index {index.qualified_name} ready in {int((time.monotonic() - started) * 1000)}ms")
+
+    async def _record(self, step: MigrationStep, started: float):
+        await self.conn.execute(
+            RECORD_SQL, step.version, self.applied_by, step.title, step.checksum,
+            int((time.monotonic() - started) * 1000)
+        )
@@ -0,0 +1,218 @@
+# ORBT Structured Logging
+# Log pipeline for long-running daemons (automation/orbt-escalation-system.py):
+# log calls on the event loop only enqueue a record; a QueueListener thread
+# formats and writes it, so disk I/O never stalls a monitoring cycle.
+#
+#   file     one JSON object per line, rotated by size and by time with
+#            numbered backups (orbt_escalation.log.1, .2, ...)
+#   console  the plain text format the daemon has always printed
+#
+# Fields bound with log_context() (cycle_id, escalation_id, ...) are copied
+# onto every record logged inside the block, including from nested awaits;
+# contextvars keep concurrent tasks apart. `extra=` fields are kept too.
+#
+#   pipeline = configure_logging("orbt_escalation.log")
+#   with log_context(cycle_id=cycle_id):
+#       logger.info("Monitoring cycle completed", extra={"cycle_ms": 812})
+#   pipeline.stop()   # drains the queue
+#
+# Configure once at startup; importing this module changes nothing.
+
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Optional, Union
+
+CONSOLE_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from extra=
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "context"}
+
+_context: contextvars.ContextVar = contextvars.ContextVar("orbt_log_context", default={})
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Attach fields to every record logged inside the block"""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def current_log_context() -> Dict[str, Any]:
+    return dict(_context.get())
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: time, level, logger, message, context and extra fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "context", None) or {})
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        if record.stack_info:
+            entry["stack_info"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without formatting them; drops (and counts) when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only what must be captured on the calling thread: the context, and
+        # the message itself in case its args are mutated after the call.
+        # Formatting, JSON and tracebacks happen on the listener thread.
+        record.context = _context.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if self.dropped:
+            record.dropped_records = self.dropped
+            self.dropped = 0
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1 + getattr(record, "dropped_records", 0)
+
+
+class _DeferredFlush:
+    """Handler mixin: emit() only writes; the listener flushes once its queue is drained"""
+
+    def flush(self):
+        pass
+
+    def flush_now(self):
+        super().flush()
+
+    def close(self):
+        self.flush_now()
+        super().close()
+
+
+class DeferredFlushStreamHandler(_DeferredFlush, logging.StreamHandler):
+    pass
+
+
+class SizeAndTimeRotatingFileHandler(_DeferredFlush, logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also rolls over every `interval` seconds (aligned to UTC)"""
+
+    def __init__(self, filename: str, max_bytes: int = 50 * 1024 * 1024, backup_count: int = 10,
+                 interval: float = 86400, clock: Callable[[], float] = time.time, encoding: str = "utf-8"):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding, delay=True)
+        self.interval = interval
+        self.clock = clock
+        # A file left over from an earlier interval rolls on the first write
+        try:
+            started = os.path.getmtime(self.baseFilename)
+        except OSError:
+            started = clock()
+        self.rollover_at = self.next_rollover(started)
+
+    def next_rollover(self, moment: float) -> float:
+        return (moment // self.interval + 1) * self.interval if self.interval else float("inf")
+
+    def shouldRollover(self, record: logging.LogRecord) -> int:
+        # Size is checked against what is already written rather than by
+        # formatting the record a second time, so a file can overshoot
+        # max_bytes by one record
+        if self.stream is None:
+            self.stream = self._open()
+        position = self.stream.tell()
+        if self.clock() >= self.rollover_at:
+            if position > 0:
+                return 1
+            self.rollover_at = self.next_rollover(self.clock())
+        return int(0 < self.maxBytes <= position)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self.next_rollover(self.clock())
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    def dequeue(self, block: bool) -> logging.LogRecord:
+        # One flush per burst of records instead of one per record
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            for handler in self.handlers:
+                getattr(handler, "flush_now", handler.flush)()
+            return self.queue.get(block)
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail to stop when the queue is full
+        self.queue.put(self._sentinel)
+
+
+class LogPipeline:
+    """Root logger -> ContextQueueHandler -> QueueListener thread -> file/console handlers"""
+
+    def __init__(self, queue_handler: ContextQueueHandler, listener: logging.handlers.QueueListener, handlers):
+        self.queue_handler = queue_handler
+        self.listener = listener
+        self.handlers = handlers
+
+    def stop(self):
+        """Flush queued records and close the handlers"""
+        self.listener.stop()
+        logging.getLogger().removeHandler(self.queue_handler)
+        for handler in self.handlers:
+            handler.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.queue_handler.queue.qsize(), "dropped": self.queue_handler.dropped}
+
+
+def configure_logging(path: Optional[str] = "orbt_escalation.log", level: Union[int, str] = logging.INFO,
+                      max_bytes: int = 50 * 1024 * 1024, backup_count: int = 10, rotate_interval: float = 86400,
+                      console: bool = True, queue_size: int = 10000, console_stream=None) -> LogPipeline:
+    """Replace the root logger's handlers with the queued pipeline and start its thread"""
+    handlers = []
+    if path:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        file_handler = SizeAndTimeRotatingFileHandler(path, max_bytes, backup_count, rotate_interval)
+        file_handler.setFormatter(JsonFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = DeferredFlushStreamHandler(console_stream or sys.stderr)
+        console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+        handlers.append(console_handler)
+
+    queue_handler = ContextQueueHandler(queue.Queue(queue_size))
+    listener = _DrainingQueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener.start()
+    return LogPipeline(queue_handler, listener, handlers)
@@ -0,0 +1,372 @@
+# ORBT Todo Dependency Scheduler
+# In-memory DAG of shq.orbt_project_todos per project, built from the
+# depends_on_todo_ids / blocks_todo_ids arrays and kept current from
+# shq.orbt_todo_progress, so "what can start now" and the critical path are
+# answered without recursive array queries against Postgres.
+#
+# Each todo keeps a count of unfinished dependencies. A status change only
+# touches the todo's direct dependents, and the ready set is maintained as
+# counts reach zero. Todos on a dependency cycle are reported and never
+# become ready.
+
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+TODOS_QUERY = """
+    SELECT id, todo_id, project_name, status, priority, estimated_minutes,
+           depends_on_todo_ids, blocks_todo_ids
+    FROM shq.orbt_project_todos
+    WHERE id > $1
+    ORDER BY id
+"""
+
+PROGRESS_CURSOR_QUERY = """
+    SELECT COALESCE(MAX(id), 0) FROM shq.orbt_todo_progress
+"""
+
+# Current todo status is the source of truth; progress rows only say what changed
+PROGRESS_QUERY = """
+    SELECT p.id, p.todo_id, t.project_name, t.status
+    FROM shq.orbt_todo_progress p
+    JOIN shq.orbt_project_todos t ON t.todo_id = p.todo_id
+    WHERE p.id > $1
+    ORDER BY p.id
+    LIMIT $2
+"""
+
+# Dependents may proceed once a dependency is finished either way
+DONE_STATUSES = frozenset({"completed", "cancelled"})
+PRIORITY_RANK = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
+DEFAULT_ESTIMATE_MINUTES = 30
+
+
+class TodoNode:
+    """A todo and its edges within one project graph"""
+
+    __slots__ = ("todo_id", "status", "priority", "estimated_minutes",
+                 "depends_on", "dependents", "unmet")
+
+    def __init__(self, todo_id: str, status: str, priority: Optional[str],
+                 estimated_minutes: Optional[int]):
+        self.todo_id = todo_id
+        self.status = status
+        self.priority = priority or "MEDIUM"
+        self.estimated_minutes = estimated_minutes
+        self.depends_on: Set[str] = set()
+        self.dependents: Set[str] = set()
+        self.unmet = 0
+
+    @property
+    def done(self) -> bool:
+        return self.status in DONE_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "todo_id": self.todo_id,
+            "status": self.status,
+            "priority": self.priority,
+            "estimated_minutes": self.estimated_minutes,
+        }
+
+
+class TodoGraph:
+    """Dependency graph of one project's todos"""
+
+    def __init__(self, project_name: str):
+        self.project_name = project_name
+        self.nodes: Dict[str, TodoNode] = {}
+        self.cycles: List[List[str]] = []
+        self._ready: Set[str] = set()
+        self._cyclic: Set[str] = set()
+        self._critical_path: Optional[Dict[str, Any]] = None
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def build(self, rows: Iterable[Any]):
+        self.nodes = {}
+        for row in rows:
+            self._add_node(row)
+        for row in rows:
+            self._link(row)
+
+        for node in self.nodes.values():
+            node.unmet = sum(1 for dep in node.depends_on if not self.nodes[dep].done)
+
+        self._detect_cycles()
+        self._ready = {todo_id for todo_id in self.nodes if self._is_ready(todo_id)}
+        self._critical_path = None
+
+    def add_todo(self, row) -> bool:
+        """Add a newly created todo; returns False if it would close a cycle"""
+        if row["todo_id"] in self.nodes:
+            self.update_status(row["todo_id"], row["status"])
+            return True
+
+        node = self._add_node(row)
+        self._link(row)
+        node.unmet = sum(1 for dep in node.depends_on if not self.nodes[dep].done)
+
+        # Pre-existing todos can only depend on the new one through blocks_todo_ids;
+        # a todo that is added already completed blocks none of them
+        if not node.done:
+            for dependent in node.dependents - {node.todo_id}:
+                self.nodes[dependent].unmet += 1
+                self._ready.discard(dependent)
+
+        if node.depends_on and node.dependents and self._reaches(node.dependents, node.depends_on | {node.todo_id}):
+            self._detect_cycles()
+            self._ready = {todo_id for todo_id in self.nodes if self._is_ready(todo_id)}
+            self._critical_path = None
+            return False
+
+        if self._is_ready(node.todo_id):
+            self._ready.add(node.todo_id)
+        self._critical_path = None
+        return True
+
+    def update_status(self, todo_id: str, status: str):
+        node = self.nodes.get(todo_id)
+        if node is None or node.status == status:
+            return
+
+        was_done = node.done
+        node.status = status
+        if node.done != was_done:
+            delta = -1 if node.done else 1
+            for dependent in node.dependents:
+                self.nodes[dependent].unmet += delta
+                self._refresh_ready(dependent)
+
+        self._refresh_ready(todo_id)
+        self._critical_path = None
+
+    def ready(self) -> List[Dict[str, Any]]:
+        """Todos that can start now, most urgent first"""
+        nodes = [self.nodes[todo_id] for todo_id in self._ready]
+        nodes.sort(key=lambda n: (PRIORITY_RANK.get(n.priority, len(PRIORITY_RANK)), n.todo_id))
+        return [node.to_dict() for node in nodes]
+
+    def blockers(self, todo_id: str) -> List[str]:
+        node = self.nodes.get(todo_id)
+        if node is None:
+            return []
+        return sorted(dep for dep in node.depends_on if not self.nodes[dep].done)
+
+    def critical_path(self) -> Dict[str, Any]:
+        """Longest chain of unfinished work by estimated minutes (cached until the graph changes)"""
+        if self._critical_path is None:
+            self._critical_path = self._compute_critical_path()
+        return self._critical_path
+
+    def summary(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for node in self.nodes.values():
+            statuses[node.status] = statuses.get(node.status, 0) + 1
+        return {
+            "project_name": self.project_name,
+            "todos": len(self.nodes),
+            "statuses": statuses,
+            "ready": len(self._ready),
+            "cycles": self.cycles,
+        }
+
+    def _add_node(self, row) -> TodoNode:
+        node = TodoNode(row["todo_id"], row["status"], row["priority"], row["estimated_minutes"])
+        self.nodes[node.todo_id] = node
+        return node
+
+    def _link(self, row):
+        todo_id = row["todo_id"]
+        for dep in row["depends_on_todo_ids"] or []:
+            self._add_edge(dep, todo_id)
+        for blocked in row["blocks_todo_ids"] or []:
+            self._add_edge(todo_id, blocked)
+
+    def _add_edge(self, dep: str, dependent: str):
+        if dep not in self.nodes or dependent not in self.nodes:
+            logger.debug(f"Ignoring dependency {dep} -> {dependent}: todo not in {self.project_name}")
+            return
+        self.nodes[dep].dependents.add(dependent)
+        self.nodes[dependent].depends_on.add(dep)
+
+    def _is_ready(self, todo_id: str) -> bool:
+        node = self.nodes[todo_id]
+        return node.status == "pending" and node.unmet == 0 and todo_id not in self._cyclic
+
+    def _refresh_ready(self, todo_id: str):
+        if self._is_ready(todo_id):
+            self._ready.add(todo_id)
+        else:
+            self._ready.discard(todo_id)
+
+    def _reaches(self, starts: Iterable[str], targets: Set[str]) -> bool:
+        stack = list(starts)
+        seen: Set[str] = set()
+        while stack:
+            todo_id = stack.pop()
+            if todo_id in targets:
+                return True
+            if todo_id in seen:
+                continue
+            seen.add(todo_id)
+            stack.extend(self.nodes[todo_id].dependents)
+        return False
+
+    def _detect_cycles(self):
+        """Tarjan's strongly connected components, iteratively"""
+        self.cycles = [[todo_id] for todo_id in self.nodes
+                       if todo_id in self.nodes[todo_id].depends_on]
+        index: Dict[str, int] = {}
+        lowlink: Dict[str, int] = {}
+        on_stack: Set[str] = set()
+        stack: List[str] = []
+        counter = 0
+
+        for root in self.nodes:
+            if root in index:
+                continue
+            work = [(root, iter(sorted(self.nodes[root].dependents)))]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack.add(root)
+
+            while work:
+                todo_id, children = work[-1]
+                advanced = False
+                for child in children:
+                    if child not in index:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.nodes[child].dependents))))
+                        advanced = True
+                        break
+                    if child in on_stack:
+                        lowlink[todo_id] = min(lowlink[todo_id], index[child])
+                if advanced:
+                    continue
+
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[todo_id])
+                if lowlink[todo_id] == index[todo_id]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == todo_id:
+                            break
+                    if len(component) > 1:
+                        self.cycles.append(sorted(component))
+
+        self._cyclic = {todo_id for cycle in self.cycles for todo_id in cycle}
+        if self.cycles:
+            logger.warning(f"Dependency cycles in {self.project_name}: {self.cycles}")
+
+    def _compute_critical_path(self) -> Dict[str, Any]:
+        pending = {todo_id for todo_id, node in self.nodes.items()
+                   if not node.done and todo_id not in self._cyclic}
+        remaining = {todo_id: sum(1 for dep in self.nodes[todo_id].depends_on if dep in pending)
+                     for todo_id in pending}
+        queue = [todo_id for todo_id, count in remaining.items() if count == 0]
+        finish: Dict[str, int] = {}
+        previous: Dict[str, Optional[str]] = {}
+
+        while queue:
+            todo_id = queue.pop()
+            node = self.nodes[todo_id]
+            best = None
+            for dep in node.depends_on:
+                if dep in finish and (best is None or finish[dep] > finish[best]):
+                    best = dep
+            minutes = node.estimated_minutes if node.estimated_minutes is not None else DEFAULT_ESTIMATE_MINUTES
+            finish[todo_id] = minutes + (finish[best] if best else 0)
+            previous[todo_id] = best
+
+            for dependent in node.dependents:
+                if dependent in remaining:
+                    remaining[dependent] -= 1
+                    if remaining[dependent] == 0:
+                        queue.append(dependent)
+
+        if not finish:
+            return {"todo_ids": [], "total_minutes": 0}
+
+        end = max(finish, key=lambda todo_id: (finish[todo_id], todo_id))
+        path = []
+        todo_id: Optional[str] = end
+        while todo_id is not None:
+            path.append(todo_id)
+            todo_id = previous[todo_id]
+        path.reverse()
+        return {"todo_ids": path, "total_minutes": finish[end]}
+
+
+class TodoScheduler:
+    """Per-project todo graphs, synced incrementally from the progress log"""
+
+    def __init__(self, refresh_interval: float = 300.0, batch_size: int = 1000):
+        self.refresh_interval = refresh_interval
+        self.batch_size = batch_size
+        self.graphs: Dict[str, TodoGraph] = {}
+        self.last_todo_id = 0
+        self.last_progress_id = 0
+        self._loaded_at: Optional[float] = None
+
+    def graph(self, project_name: str) -> Optional[TodoGraph]:
+        return self.graphs.get(project_name)
+
+    def build(self, rows: Iterable[Any]):
+        by_project: Dict[str, List[Any]] = {}
+        for row in rows:
+            by_project.setdefault(row["project_name"], []).append(row)
+            self.last_todo_id = max(self.last_todo_id, row["id"])
+
+        graphs = {}
+        for project_name, project_rows in by_project.items():
+            graph = TodoGraph(project_name)
+            graph.build(project_rows)
+            graphs[project_name] = graph
+        self.graphs = graphs
+        self._loaded_at = time.monotonic()
+
+    async def load(self, conn):
+        """Full rebuild; also picks up edited dependency arrays"""
+        # Read the progress cursor first so no update between the two reads is lost
+        progress_id = await conn.fetchval(PROGRESS_CURSOR_QUERY)
+        self.last_todo_id = 0
+        self.build(await conn.fetch(TODOS_QUERY, 0))
+        self.last_progress_id = progress_id
+        logger.info(f"Todo scheduler loaded {sum(len(g) for g in self.graphs.values())} todos "
+                    f"across {len(self.graphs)} projects")
+
+    async def sync(self, conn):
+        """Apply new todos and progress since the last sync"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            await self.load(conn)
+            return
+
+        for row in await conn.fetch(TODOS_QUERY, self.last_todo_id):
+            graph = self.graphs.get(row["project_name"])
+            if graph is None:
+                graph = self.graphs[row["project_name"]] = TodoGraph(row["project_name"])
+            graph.add_todo(row)
+            self.last_todo_id = row["id"]
+
+        while True:
+            rows = await conn.fetch(PROGRESS_QUERY, self.last_progress_id, self.batch_size)
+            for row in rows:
+                graph = self.graphs.get(row["project_name"])
+                if graph is not None:
+                    graph.update_status(row["todo_id"], row["status"])
+                self.last_progress_id = row["id"]
+            if len(rows) < self.batch_size:
+                break
@@ -0,0 +1,265 @@
+# ORBT Todo Generation Engine
+# Evaluates shq.orbt_todo_generation_rules against newly ingested errors and
+# escalations and bulk-inserts deduplicated shq.orbt_project_todos rows.
+#
+# All enabled rules' trigger_keywords are compiled into one Aho-Corasick
+# automaton, so matching an event costs O(len(text)) regardless of how many
+# rules exist. Keyword semantics follow shq.generate_project_todos():
+# case-insensitive substring match (ILIKE '%keyword%').
+#
+# Rules with project_types only fire for events whose project type is known:
+# the event row's own project_type if it has one, else the type configured
+# for its project_context (project_types={"HEIR-SYSTEM": "heir_project"}).
+# Like p_project_type = ANY(project_types), an unknown type matches none.
+
+import hashlib
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from orbt.fingerprint import error_fingerprint
+
+logger = logging.getLogger(__name__)
+
+RULES_QUERY = """
+    SELECT rule_id, trigger_keywords, project_types, todo_template,
+           auto_assign, priority_override
+    FROM shq.orbt_todo_generation_rules
+    WHERE enabled = TRUE
+    ORDER BY rule_id
+"""
+
+NEW_ERRORS_QUERY = """
+    SELECT id, agent_id, error_type, error_message, project_context
+    FROM orbt_error_log
+    WHERE id > $1
+    AND timestamp >= NOW() - INTERVAL '1 day'
+    ORDER BY id
+    LIMIT $2
+"""
+
+NEW_ESCALATIONS_QUERY = """
+    SELECT q.id, e.agent_id, e.error_type, e.error_message, e.project_context
+    FROM orbt_escalation_queue q
+    JOIN orbt_error_log e ON e.error_id = q.error_id
+    WHERE q.id > $1
+    AND q.escalated_at >= NOW() - INTERVAL '1 day'
+    ORDER BY q.id
+    LIMIT $2
+"""
+
+INSERT_TODOS_QUERY = """
+    INSERT INTO shq.orbt_project_todos (
+        todo_id, project_name, project_session, agent_id, todo_title,
+        todo_description, todo_category, priority, status, estimated_minutes,
+        assigned_to, created_by, orbt_stage
+    )
+    SELECT todo_id, project_name, project_session, agent_id, todo_title,
+           todo_description, todo_category, priority, 'pending', estimated_minutes,
+           assigned_to, 'auto_generation_system', orbt_stage
+    FROM unnest(
+        $1::VARCHAR[], $2::VARCHAR[], $3::VARCHAR[], $4::VARCHAR[], $5::VARCHAR[],
+        $6::TEXT[], $7::VARCHAR[], $8::VARCHAR[], $9::INTEGER[], $10::VARCHAR[],
+        $11::VARCHAR[]
+    ) AS t(todo_id, project_name, project_session, agent_id, todo_title,
+           todo_description, todo_category, priority, estimated_minutes,
+           assigned_to, orbt_stage)
+    ON CONFLICT (todo_id) DO NOTHING
+    RETURNING todo_id
+"""
+
+INSERT_COLUMNS = (
+    "todo_id", "project_name", "project_session", "agent_id", "todo_title",
+    "todo_description", "todo_category", "priority", "estimated_minutes",
+    "assigned_to", "orbt_stage",
+)
+
+DEFAULT_PROJECT = "orbt-monitoring"
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton mapping lower-cased keywords to rule indexes"""
+
+    def __init__(self, keywords: Dict[str, Set[int]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[frozenset] = [frozenset()]
+
+        for keyword, payload in keywords.items():
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(frozenset())
+                node = nxt
+            self._out[node] = self._out[node] | frozenset(payload)
+
+        # Breadth-first fail links; outputs inherit their fail node's outputs
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                if self._out[self._fail[child]]:
+                    self._out[child] = self._out[child] | self._out[self._fail[child]]
+
+    def search(self, text: str) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        found: Set[int] = set()
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                found |= out[node]
+        return found
+
+
+class TodoRuleEngine:
+    """Compiles generation rules and turns matching events into todo rows"""
+
+    def __init__(self, batch_size: int = 1000, refresh_interval: float = 300.0,
+                 project_types: Optional[Dict[str, str]] = None):
+        self.batch_size = batch_size
+        self.refresh_interval = refresh_interval
+        self.project_types = dict(project_types or {})
+        self._rules: List[Dict[str, Any]] = []
+        self._matcher: Optional[KeywordMatcher] = None
+        self._loaded_at: Optional[float] = None
+        self.last_error_id = 0
+        self.last_escalation_id = 0
+
+    @property
+    def rule_count(self) -> int:
+        return len(self._rules)
+
+    def compile(self, rules: Iterable[Any]):
+        compiled = []
+        keywords: Dict[str, Set[int]] = {}
+
+        for rule in rules:
+            template = rule["todo_template"]
+            if isinstance(template, str):
+                template = json.loads(template)
+
+            index = len(compiled)
+            compiled.append({
+                "rule_id": rule["rule_id"],
+                "project_types": set(rule["project_types"]) if rule["project_types"] else None,
+                "template": template,
+                "auto_assign": bool(rule["auto_assign"]),
+                "priority_override": rule["priority_override"],
+            })
+            for keyword in rule["trigger_keywords"] or []:
+                keyword = keyword.strip().lower()
+                if keyword:
+                    keywords.setdefault(keyword, set()).add(index)
+
+        self._rules = compiled
+        self._matcher = KeywordMatcher(keywords)
+        self._loaded_at = time.monotonic()
+
+    async def load_rules(self, conn):
+        self.compile(await conn.fetch(RULES_QUERY))
+        logger.info(f"Todo rule engine compiled {len(self._rules)} enabled rules")
+
+    def match(self, text: Optional[str]) -> List[int]:
+        if self._matcher is None or not text:
+            return []
+        return sorted(self._matcher.search(text))
+
+    def project_type(self, event: Any) -> Optional[str]:
+        """The event's project type, or None when it cannot be resolved"""
+        if "project_type" in event.keys() and event["project_type"]:
+            return event["project_type"]
+        return self.project_types.get(event["project_context"] or DEFAULT_PROJECT)
+
+    def evaluate(self, events: Iterable[Any], source: str) -> List[Dict[str, Any]]:
+        """Todo rows for a batch of events, deduplicated by deterministic todo_id"""
+        session = f"ORBT-{datetime.now().strftime('%Y%m%d')}"
+        todos: Dict[str, Dict[str, Any]] = {}
+
+        for event in events:
+            rule_indexes = self.match(event["error_message"])
+            if not rule_indexes:
+                continue
+
+            project_name = event["project_context"] or DEFAULT_PROJECT
+            project_type = self.project_type(event)
+            fingerprint = error_fingerprint(event["error_type"], event["error_message"])
+
+            for index in rule_indexes:
+                rule = self._rules[index]
+                if rule["project_types"] and project_type not in rule["project_types"]:
+                    continue
+
+                todo_id = "TODO-AUTO-" + hashlib.sha1(
+                    f"{rule['rule_id']}|{project_name}|{fingerprint}".encode("utf-8")
+                ).hexdigest()[:20]
+                if todo_id in todos:
+                    continue
+
+                template = rule["template"]
+                todos[todo_id] = {
+                    "todo_id": todo_id,
+                    "project_name": project_name[:100],
+                    "project_session": session,
+                    "agent_id": event["agent_id"],
+                    "todo_title": f"{template.get('title', 'Investigate error')} for {project_name}"[:200],
+                    "todo_description": (template.get("description") or "{requirement}").replace(
+                        "{requirement}", f"{source}: {event['error_message'][:500]}"
+                    ),
+                    "todo_category": template.get("category") or "development",
+                    "priority": rule["priority_override"] or template.get("priority") or "MEDIUM",
+                    "estimated_minutes": template.get("estimated_minutes"),
+                    "assigned_to": event["agent_id"] if rule["auto_assign"] else None,
+                    "orbt_stage": template.get("orbt_stage") or "repair",
+                }
+
+        return list(todos.values())
+
+    async def insert(self, conn, todos: List[Dict[str, Any]]) -> int:
+        """Bulk insert in one statement; returns the number of new todos"""
+        if not todos:
+            return 0
+        columns = [[todo[column] for todo in todos] for column in INSERT_COLUMNS]
+        inserted = await conn.fetch(INSERT_TODOS_QUERY, *columns)
+        return len(inserted)
+
+    async def run_batch(self, conn) -> Dict[str, int]:
+        """Evaluate one batch of new errors and escalations"""
+        if self._loaded_at is None or time.monotonic() - self._loaded_at >= self.refresh_interval:
+            await self.load_rules(conn)
+
+        errors = await conn.fetch(NEW_ERRORS_QUERY, self.last_error_id, self.batch_size)
+        escalations = await conn.fetch(NEW_ESCALATIONS_QUERY, self.last_escalation_id, self.batch_size)
+
+        todos = self.evaluate(errors, "error") + self.evaluate(escalations, "escalation")
+        # The same todo can come from an error and its escalation
+        todos = list({todo["todo_id"]: todo for todo in todos}.values())
+        created = await self.insert(conn, todos)
+
+        if errors:
+            self.last_error_id = errors[-1]["id"]
+        if escalations:
+            self.last_escalation_id = escalations[-1]["id"]
+
+        return {
+            "errors": len(errors),
+            "escalations": len(escalations),
+            "matched": len(todos),
+            "created": created,
+        }
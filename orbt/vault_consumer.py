@@ -0,0 +1,210 @@
+# Vault Event Consumer
+# Tails shq.vault_events past a per-group cursor in shq.vault_consumer_offsets.
+#
+#   consumer = VaultEventConsumer(conn, "audit-export")
+#   await consumer.start()
+#   async for batch in consumer.stream(follow=True):
+#       handle(batch)          # the cursor advances only once this returns
+#
+# Delivery is at-least-once: a batch's offset is committed when the caller
+# asks for the next batch, so a crash mid-batch redelivers it (as does
+# breaking out of the loop: the last batch was never acknowledged). Batches are
+# keyset pages (id > cursor LIMIT n), so memory stays constant however large
+# the backlog. Each group has one active consumer at a time (advisory lock);
+# other instances of the same group wait as standbys.
+#
+# Ids are assigned at insert but become visible at commit, so a gap in the ids
+# past the cursor may be a transaction still in progress. The consumer stops
+# at the first gap and only moves past it once every transaction that was
+# running when the gap was seen has ended (the snapshot xmin has passed the
+# xmax noted then) and the gap is at least settle_seconds old; an id still
+# missing after that was rolled back or lost from the sequence cache. A long
+# transaction therefore delays delivery instead of being skipped.
+# vault_events has RLS enabled: consumers must connect as the table owner or a
+# role with a SELECT policy on it.
+
+import asyncio
+import logging
+from typing import Any, AsyncIterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+VAULT_CHANNEL = "orbt_vault_events"
+
+LOCK_QUERY = "SELECT pg_try_advisory_lock(hashtext('vault_consumer:' || $1))"
+UNLOCK_QUERY = "SELECT pg_advisory_unlock(hashtext('vault_consumer:' || $1))"
+
+REGISTER_GROUP_SQL = """
+    INSERT INTO shq.vault_consumer_offsets (consumer_group, last_event_id, last_created_at)
+    SELECT $1,
+           CASE WHEN $2 THEN COALESCE(MAX(id), 0) ELSE 0 END,
+           CASE WHEN $2 THEN MAX(created_at) END
+    FROM shq.vault_events
+    ON CONFLICT (consumer_group) DO NOTHING
+"""
+
+OFFSET_QUERY = """
+    SELECT last_event_id, last_created_at, events_consumed
+    FROM shq.vault_consumer_offsets
+    WHERE consumer_group = $1
+"""
+
+EVENTS_QUERY = """
+    SELECT id, event_id, agent_id, event_type, event_data, gatekeeper_signature, created_at
+    FROM shq.vault_events
+    WHERE id > $1
+    ORDER BY id
+    LIMIT $2
+"""
+
+# txid_* rather than pg_snapshot_* so PostgreSQL 12 is still supported; both
+# values are epoch-extended, so they compare safely across xid wraparound
+SNAPSHOT_QUERY = """
+    SELECT txid_snapshot_xmin(snapshot) AS xmin, txid_snapshot_xmax(snapshot) AS xmax
+    FROM txid_current_snapshot() AS snapshot
+"""
+
+COMMIT_SQL = """
+    UPDATE shq.vault_consumer_offsets
+    SET last_event_id = $2,
+        last_created_at = $3,
+        events_consumed = events_consumed + $4,
+        updated_at = NOW()
+    WHERE consumer_group = $1
+"""
+
+RESET_SQL = """
+    UPDATE shq.vault_consumer_offsets
+    SET last_event_id = $2, updated_at = NOW()
+    WHERE consumer_group = $1
+"""
+
+
+class VaultEventConsumer:
+    """One consumer group's cursor over shq.vault_events"""
+
+    def __init__(self, conn, group: str, batch_size: int = 500, settle_seconds: float = 1.0,
+                 poll_interval: float = 5.0, start_at: str = "earliest"):
+        if start_at not in ("earliest", "latest"):
+            raise ValueError("start_at must be 'earliest' or 'latest'")
+        self.conn = conn
+        self.group = group
+        self.batch_size = batch_size
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.start_at = start_at
+        self.last_event_id = 0
+        self.last_created_at = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._listening = False
+        self._locked = False
+        # (first missing id, snapshot xmax when first seen, loop time when first seen)
+        self._gap: Optional[Tuple[int, int, float]] = None
+
+    async def start(self, wait: bool = True):
+        """Register the group if new, take its lock and load the cursor"""
+        await self.conn.execute(REGISTER_GROUP_SQL, self.group, self.start_at == "latest")
+
+        while not await self.conn.fetchval(LOCK_QUERY, self.group):
+            if not wait:
+                raise RuntimeError(f"Consumer group {self.group} is active on another connection")
+            logger.info(f"Consumer group {self.group} is active elsewhere; waiting as standby")
+            await asyncio.sleep(self.poll_interval)
+        self._locked = True
+
+        offset = await self.conn.fetchrow(OFFSET_QUERY, self.group)
+        self.last_event_id = offset["last_event_id"]
+        self.last_created_at = offset["last_created_at"]
+        logger.info(f"Consumer group {self.group} starting after event {self.last_event_id}")
+
+    async def stop(self):
+        if self._listening:
+            await self.conn.remove_listener(VAULT_CHANNEL, self._on_notify)
+            self._listening = False
+        if self._locked:
+            await self.conn.fetchval(UNLOCK_QUERY, self.group)
+            self._locked = False
+
+    async def reset(self, event_id: int = 0):
+        """Move the group's cursor, e.g. to replay from the beginning"""
+        await self.conn.execute(RESET_SQL, self.group, event_id)
+        self.last_event_id = event_id
+        self._gap = None
+
+    async def fetch_batch(self) -> List[Any]:
+        """Next page past the cursor, cut short at an id gap that may still fill"""
+        rows = await self.conn.fetch(EVENTS_QUERY, self.last_event_id, self.batch_size)
+        expected = self.last_event_id + 1
+        for index, row in enumerate(rows):
+            if row["id"] != expected and not await self._gap_settled(expected):
+                return rows[:index]
+            expected = row["id"] + 1
+        return rows
+
+    @property
+    def held_at_gap(self) -> bool:
+        return self._gap is not None and self._gap[0] == self.last_event_id + 1
+
+    async def _gap_settled(self, missing_id: int) -> bool:
+        snapshot = await self.conn.fetchrow(SNAPSHOT_QUERY)
+        now = asyncio.get_running_loop().time()
+        if self._gap is None or self._gap[0] != missing_id:
+            # The snapshot is taken after the page was read, so its xmax covers
+            # every transaction that could have been holding the missing ids
+            self._gap = (missing_id, snapshot["xmax"], now)
+            return False
+        _, xmax, first_seen = self._gap
+        if snapshot["xmin"] < xmax or now - first_seen < self.settle_seconds:
+            return False
+        logger.info(f"Consumer group {self.group} skipping event ids from {missing_id}: never committed")
+        self._gap = None
+        return True
+
+    async def commit(self, batch: List[Any]):
+        last = batch[-1]
+        await self.conn.execute(COMMIT_SQL, self.group, last["id"], last["created_at"], len(batch))
+        self.last_event_id = last["id"]
+        self.last_created_at = last["created_at"]
+
+    async def stream(self, follow: bool = False) -> AsyncIterator[List[Any]]:
+        """Yield batches; each is committed when the next one is requested"""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if follow and not self._listening:
+            await self.conn.add_listener(VAULT_CHANNEL, self._on_notify)
+            self._listening = True
+
+        while True:
+            # Cleared before reading so a notify during the fetch is not lost
+            self._wakeup.clear()
+            batch = await self.fetch_batch()
+            if batch:
+                yield batch
+                await self.commit(batch)
+                if len(batch) == self.batch_size:
+                    continue
+
+            if not follow:
+                return
+            if self.held_at_gap:
+                # Re-check soon rather than wait for a notify that already came
+                await asyncio.sleep(max(self.settle_seconds, 0.1))
+            else:
+                await self._wait()
+
+    async def _wait(self) -> bool:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def _on_notify(self, connection, pid, channel, payload):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def lag(self) -> int:
+        """Approximate events not yet consumed (id distance; an index lookup, not a count)"""
+        return await self.conn.fetchval(
+            "SELECT GREATEST(COALESCE(MAX(id), 0) - $1, 0) FROM shq.vault_events", self.last_event_id
+        )
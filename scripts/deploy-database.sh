@@ -125,6 +125,17 @@ create_backup() {
 deploy_schema() {
     log "Deploying HEIR schema..."
     
+    # Prefer the step runner: skips applied steps and builds indexes concurrently
+    if command -v python3 &> /dev/null && python3 -c "import asyncpg" 2>/dev/null; then
+        if python3 "${SCRIPT_DIR}/migrate-schema.py" --schema-file "$SCHEMA_FILE"; then
+            log "Schema deployment successful ✓"
+        else
+            error "Schema deployment failed. Check database logs."
+            exit 1
+        fi
+        return
+    fi
+    
     # Execute schema file with transaction
     if psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f "$SCHEMA_FILE" > /dev/null 2>&1; then
         log "Schema deployment successful ✓"
@@ -218,7 +229,7 @@ main() {
     log "Next steps:"
     log "1. Update heir-drop-in.js to connect to this database"
     log "2. Run: node heir-drop-in.js to verify connection"
-    log "3. Optional: Run shq.migrate_dpr_doctrine_exact() to import existing doctrine"
+    log "3. Optional: Run python scripts/migrate-dpr-doctrine.py to import existing doctrine"
     log ""
     log "Rollback command if needed:"
     log "bash scripts/rollback-database.sh 1.0.0"
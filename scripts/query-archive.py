@@ -0,0 +1,56 @@
+# ORBT Archive Query
+# Reads rows the escalation daemon moved into the archive tier, as JSON lines
+# on stdout. Only segments whose time range and agents can match are opened.
+#
+# Usage:
+#   export ORBT_ARCHIVE_DIR=/var/lib/orbt/archive
+#   python scripts/query-archive.py --table orbt_error_log --start 2025-01-01 --end 2025-02-01
+#   python scripts/query-archive.py --table orbt_agent_metrics --agent database-specialist --limit 100
+#   python scripts/query-archive.py --stats
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from orbt.archive_tier import ARCHIVE_TABLES, ArchiveTier
+
+
+def main():
+    """Main entry point for querying the archive"""
+    parser = argparse.ArgumentParser(description="Query archived ORBT rows")
+    parser.add_argument("--archive-dir", default=os.getenv("ORBT_ARCHIVE_DIR", "orbt_archive"), help="Archive directory (default: $ORBT_ARCHIVE_DIR or orbt_archive)")
+    parser.add_argument("--table", choices=sorted(ARCHIVE_TABLES), help="Archived table to read")
+    parser.add_argument("--start", type=datetime.fromisoformat, help="Earliest row time, ISO 8601 (UTC if no offset)")
+    parser.add_argument("--end", type=datetime.fromisoformat, help="Row time upper bound (exclusive)")
+    parser.add_argument("--agent", action="append", dest="agents", help="Agent id to include (repeatable)")
+    parser.add_argument("--limit", type=int, help="Stop after this many rows")
+    parser.add_argument("--segments", action="store_true", help="List the matching segments instead of rows")
+    parser.add_argument("--stats", action="store_true", help="Print archive totals per table and exit")
+
+    args = parser.parse_args()
+    archive = ArchiveTier(args.archive_dir)
+
+    if args.stats:
+        print(json.dumps(archive.stats(), indent=2))
+        return
+    if not args.table:
+        parser.error("--table is required")
+
+    if args.segments:
+        for entry in archive.segments(args.table, args.start, args.end, args.agents):
+            print(json.dumps(entry))
+        return
+
+    for row in archive.query(args.table, args.start, args.end, args.agents, limit=args.limit):
+        sys.stdout.write(json.dumps(row) + "\n")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        pass
@@ -0,0 +1,12 @@
+"""
+HEIR System - shared pytest configuration
+Makes the repository root importable so tests can load the orbt package.
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -0,0 +1,116 @@
+"""
+HEIR System - Ingest Admission Control Tests
+Tests per-agent/per-project token buckets and the adaptive concurrency limit.
+"""
+
+import pytest
+
+from orbt.admission_control import AdaptiveConcurrencyLimit, AdmissionController, TokenBucket
+
+
+class TestTokenBucket:
+    """Test token bucket refill and wait hints."""
+
+    def test_burst_then_rate(self):
+        """Test that a bucket allows its burst, then refills at its rate."""
+        bucket = TokenBucket(rate=2.0, burst=3, now=0)
+        for _ in range(3):
+            assert bucket.wait_time(0) == 0
+            bucket.take()
+
+        assert bucket.wait_time(0) == pytest.approx(0.5)
+        assert bucket.wait_time(0.5) == 0
+        assert bucket.wait_time(100) == 0
+        assert bucket.tokens == 3
+
+
+class TestAdmissionController:
+    """Test shedding decisions and counters."""
+
+    def test_noisy_agent_does_not_starve_others(self):
+        """Test that one agent over its rate is shed while others are admitted."""
+        admission = AdmissionController(agent_rate=1, agent_burst=2)
+        results = []
+        for _ in range(5):
+            decision = admission.admit('errors', 'noisy-agent', now=0)
+            results.append(decision.admitted)
+            if decision.admitted:
+                admission.release()
+
+        assert results == [True, True, False, False, False]
+        assert admission.admit('errors', 'quiet-agent', now=0).admitted
+
+        shed = admission.admit('errors', 'noisy-agent', now=0)
+        assert shed.reason == 'agent_rate'
+        assert shed.retry_after_header == '1'
+        assert admission.stats()['shed']['errors']['agent_rate'] == 4
+
+    def test_project_bucket_spans_agents(self):
+        """Test that agents sharing a project share its bucket, without losing agent tokens."""
+        admission = AdmissionController(agent_rate=10, agent_burst=10, project_rate=1, project_burst=2)
+        assert admission.admit('metrics', 'agent-a', 'proj', now=0).admitted
+        assert admission.admit('metrics', 'agent-b', 'proj', now=0).admitted
+        assert admission.admit('metrics', 'agent-c', 'proj', now=0).reason == 'project_rate'
+        assert admission.agents.get('agent-c', 0).tokens == 10
+
+        # No project context: only the agent bucket applies
+        assert admission.admit('metrics', 'agent-c', None, now=0).admitted
+
+    def test_concurrency_limit_sheds(self):
+        """Test that writes past the in-flight limit are shed with a hint."""
+        admission = AdmissionController(concurrency=AdaptiveConcurrencyLimit(initial=2, min_limit=1))
+        assert admission.admit('errors', 'a', now=0).admitted
+        assert admission.admit('errors', 'b', now=0).admitted
+        decision = admission.admit('errors', 'c', now=0)
+
+        assert not decision.admitted
+        assert decision.reason == 'concurrency'
+        admission.release(0.01, now=0)
+        assert admission.admit('errors', 'c', now=0).admitted
+        assert admission.stats()['admitted'] == {'errors': 3}
+
+
+class TestAdaptiveConcurrencyLimit:
+    """Test AIMD behaviour against write latency."""
+
+    def test_slow_writes_shrink_limit_once_per_round_trip(self):
+        """Test multiplicative decrease, damped to once per baseline latency."""
+        limit = AdaptiveConcurrencyLimit(initial=20, min_limit=2, backoff=0.5)
+        limit.try_acquire()
+        limit.release(0.010, now=0.0)
+
+        for _ in range(10):
+            limit.try_acquire()
+            limit.release(0.100, now=1.0)
+        assert limit.limit == 10
+
+        limit.try_acquire()
+        limit.release(0.100, now=1.02)
+        assert limit.limit == 5
+
+    def test_failures_shrink_and_fast_writes_grow(self):
+        """Test that failures back off and sustained fast writes recover the limit."""
+        limit = AdaptiveConcurrencyLimit(initial=4, min_limit=2, max_limit=6, backoff=0.5)
+        limit.try_acquire()
+        limit.release(0.010, failed=True, now=0.0)
+        assert limit.limit == 2
+
+        now = 1.0
+        for _ in range(100):
+            while limit.try_acquire():
+                pass
+            limit.release(0.010, now=now)
+            now += 0.01
+        assert limit.limit == 6
+
+    def test_unused_limit_does_not_grow(self):
+        """Test that idle capacity is not inflated by fast writes."""
+        limit = AdaptiveConcurrencyLimit(initial=20)
+        for i in range(100):
+            limit.try_acquire()
+            limit.release(0.010, now=i)
+        assert limit.limit == 20
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
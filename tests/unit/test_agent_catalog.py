@@ -0,0 +1,118 @@
+"""
+HEIR System - Agent Catalog Tests
+Tests catalog merging, the precomputed delegation graph and the compiled cache.
+"""
+
+import json
+import os
+
+import pytest
+
+from orbt.agent_catalog import AgentCatalog, load_catalog, parse_catalogs
+
+SAMPLE_CATALOG = {
+    "meta_system_agents": {
+        "system-orchestrator": {"level": 0, "delegates_to": ["all_agents"]}
+    },
+    "domain_orchestrators": {
+        "data-orchestrator": {"level": 1, "coordinates_with": ["db-specialist", "api-orchestrator"]},
+        "api-orchestrator": {"level": 1, "delegates_to": ["auth-specialist", "missing-agent"]}
+    },
+    "specialist_library": {
+        "// DATA SPECIALISTS": "comment",
+        "db-specialist": {"level": 2, "coordinates_with": ["data-orchestrator"]},
+        "auth-specialist": {"level": 2}
+    }
+}
+
+
+def write_catalog(directory, name, document):
+    path = os.path.join(str(directory), name)
+    with open(path, "w") as f:
+        json.dump(document, f)
+    return path
+
+
+class TestAgentCatalog:
+    """Test the indexed agent catalog."""
+
+    def test_repository_catalogs(self, tmp_path):
+        """Test the shipped catalogs: tiers, levels and ancestors resolve."""
+        catalog = load_catalog(cache_dir=str(tmp_path))
+
+        assert catalog.tier("database-specialist") == "specialist"
+        assert catalog.level("database-specialist") == 2
+        assert catalog.tier("data-orchestrator") == "orchestrator"
+        assert {"data-orchestrator", "master-orchestrator"} <= catalog.ancestors("database-specialist")
+
+    def test_group_expansion_and_peer_edges(self):
+        """Test group delegation and that coordinates_with only delegates downward."""
+        catalog = AgentCatalog(parse_catalogs([SAMPLE_CATALOG]))
+
+        assert set(catalog.delegates("system-orchestrator")) == {
+            "data-orchestrator", "api-orchestrator", "db-specialist", "auth-specialist"
+        }
+        assert catalog.delegates("data-orchestrator") == ("db-specialist",)
+        assert catalog.delegates("db-specialist") == ()
+        assert catalog.delegates("api-orchestrator") == ("auth-specialist",)
+
+    def test_escalation_chain_nearest_first(self):
+        """Test that the chain lists direct supervisors before theirs."""
+        catalog = AgentCatalog(parse_catalogs([SAMPLE_CATALOG]))
+
+        assert catalog.escalation_chain("db-specialist") == ["data-orchestrator", "system-orchestrator"]
+        assert catalog.ancestors("auth-specialist") == {"api-orchestrator", "system-orchestrator"}
+
+    def test_earlier_catalog_wins_and_edges_merge(self):
+        """Test that scalar fields come from the first file and edges from all."""
+        later = {"specialists": {"auth-specialist": {"level": 3, "role": "Auth"}},
+                 "orchestrators": {"data-orchestrator": {"level": 1, "delegates_to": ["auth-specialist"]}}}
+        catalog = AgentCatalog(parse_catalogs([SAMPLE_CATALOG, later]))
+
+        assert catalog.level("auth-specialist") == 2
+        assert catalog.get("auth-specialist").role == "Auth"
+        assert set(catalog.delegates("data-orchestrator")) == {"db-specialist", "auth-specialist"}
+
+    def test_unknown_agent(self):
+        """Test that unknown agents resolve to empty results."""
+        catalog = AgentCatalog(parse_catalogs([SAMPLE_CATALOG]))
+
+        assert "nobody" not in catalog
+        assert catalog.tier("nobody") is None
+        assert catalog.level("nobody") is None
+        assert catalog.ancestors("nobody") == frozenset()
+        assert catalog.escalation_chain("nobody") == []
+
+    def test_compiled_cache_roundtrip(self, tmp_path):
+        """Test that a second load reads the cache and a changed file recompiles."""
+        cache_dir = tmp_path / "cache"
+        path = write_catalog(tmp_path, "catalog.json", SAMPLE_CATALOG)
+
+        first = load_catalog([path], cache_dir=str(cache_dir))
+        cached = os.listdir(str(cache_dir))
+        assert len(cached) == 1
+
+        second = load_catalog([path], cache_dir=str(cache_dir))
+        assert second.ancestors("db-specialist") == first.ancestors("db-specialist")
+        assert second.get("data-orchestrator").delegates_to == ("db-specialist",)
+
+        changed = dict(SAMPLE_CATALOG, managers={"data-manager": {"level": 2}})
+        write_catalog(tmp_path, "catalog.json", changed)
+        third = load_catalog([path], cache_dir=str(cache_dir))
+        assert third.tier("data-manager") == "manager"
+        assert len(os.listdir(str(cache_dir))) == 2
+
+    def test_corrupt_cache_is_ignored(self, tmp_path):
+        """Test that an unreadable cache file falls back to parsing."""
+        path = write_catalog(tmp_path, "catalog.json", SAMPLE_CATALOG)
+        load_catalog([path], cache_dir=str(tmp_path / "cache"))
+        for name in os.listdir(str(tmp_path / "cache")):
+            (tmp_path / "cache" / name).write_text("{not json")
+
+        catalog = load_catalog([path], cache_dir=str(tmp_path / "cache"))
+
+        assert len(catalog) == 5
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,188 @@
+"""
+HEIR System - Agent Client Tests
+Tests batching, retries, sampling and operation timing.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from orbt.agent_client import OrbtAgentClient
+from orbt.batch_codec import decode_batch
+from orbt.doctrine_headers import DoctrineHeaderValidator
+
+
+class FakeResponse:
+    def __init__(self, status_code, body=None, headers=None):
+        self.status_code = status_code
+        self._body = body or {}
+        self.headers = headers or {}
+
+    def json(self):
+        return self._body
+
+
+class FakeHTTP:
+    """Replays scripted responses and records every request."""
+
+    def __init__(self, responses=None):
+        self.responses = list(responses or [])
+        self.requests = []
+
+    async def post(self, url, content, headers):
+        events = decode_batch(content, headers.get('content-encoding'))
+        self.requests.append((url, events, dict(headers)))
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return FakeResponse(200, {'results': [{'status_code': 200} for _ in events]})
+
+
+def make_client(http, **kwargs):
+    options = dict(
+        unique_id='HEI.99.01.00.25000.001', process_id='LogAgentEvents',
+        blueprint_id='orbt-monitor', http=http, rng=random.Random(1), flush_interval=0.01
+    )
+    options.update(kwargs)
+    return OrbtAgentClient('http://ops.local/', 'database-specialist', **options)
+
+
+class TestOrbtAgentClient:
+    """Test buffered sending."""
+
+    def test_events_sent_in_batches_with_doctrine_headers(self):
+        """Test that buffered events go out as batches with valid doctrine headers."""
+        http = FakeHTTP()
+
+        async def run():
+            async with make_client(http, batch_size=10) as client:
+                for i in range(25):
+                    client.log_error('connection', f'timeout #{i}')
+                client.record_metrics('repair', 120)
+            return client
+
+        client = asyncio.run(run())
+        error_batches = [events for url, events, _ in http.requests if url.endswith('/errors/batch')]
+        assert [len(batch) for batch in error_batches] == [10, 10, 5]
+        assert error_batches[0][0]['agent_id'] == 'database-specialist'
+        assert any(url == 'http://ops.local/api/orbt/metrics/batch' for url, _, _ in http.requests)
+        assert client.stats['sent'] == 26
+
+        headers = http.requests[0][2]
+        doctrine = {name.replace('-', '_'): value for name, value in headers.items()}
+        assert DoctrineHeaderValidator().validate(doctrine)['valid']
+
+    def test_retries_with_retry_after(self):
+        """Test that transport errors and 503s are retried until the batch lands."""
+        http = FakeHTTP([ConnectionError('reset'), FakeResponse(503, headers={'retry-after': '0'})])
+
+        async def run():
+            client = make_client(http)
+            client.log_error('connection', 'timeout')
+            await client.flush()
+            return client
+
+        client = asyncio.run(run())
+        assert len(http.requests) == 3
+        assert client.stats['retried'] == 2
+        assert client.stats['sent'] == 1
+
+    def test_retried_batch_keeps_event_ids(self):
+        """Test that a retried batch resends each error with the same event_id."""
+        http = FakeHTTP([FakeResponse(503, headers={'retry-after': '0'})])
+
+        async def run():
+            client = make_client(http)
+            client.log_error('connection', 'timeout')
+            client.log_error('connection', 'refused')
+            await client.flush()
+
+        asyncio.run(run())
+        first, retry = [[event['event_id'] for event in events] for _, events, _ in http.requests]
+        assert first == retry
+        assert len(set(first)) == 2
+
+    def test_shed_items_requeued(self):
+        """Test that items shed inside an accepted batch are sent again."""
+        shed = {'status_code': 429, 'error': {'retry_after_seconds': 0}}
+        http = FakeHTTP([FakeResponse(200, {'results': [{'status_code': 200}, shed]})])
+
+        async def run():
+            client = make_client(http)
+            client.log_error('connection', 'first')
+            client.log_error('connection', 'second')
+            await client.close()
+            return client
+
+        client = asyncio.run(run())
+        assert [event['error_message'] for event in http.requests[1][1]] == ['second']
+        assert client.stats['sent'] == 2
+
+    def test_rejected_batch_dropped(self):
+        """Test that a non-retryable rejection drops the batch instead of retrying."""
+        http = FakeHTTP([FakeResponse(400)])
+
+        async def run():
+            client = make_client(http)
+            client.log_error('validation', 'bad')
+            await client.close()
+            return client
+
+        client = asyncio.run(run())
+        assert len(http.requests) == 1
+        assert client.stats['dropped'] == 1
+
+    def test_metrics_sampling_keeps_failures(self):
+        """Test that successes are sampled while failures are always kept."""
+        client = make_client(FakeHTTP(), metrics_sample_rate=0.1)
+        for _ in range(1000):
+            client.record_metrics('build', 10, success=True)
+        for _ in range(10):
+            client.record_metrics('build', 10, success=False)
+
+        buffered = [event for event, _ in client._buffers['metric']]
+        assert sum(1 for event in buffered if not event['success']) == 10
+        assert 50 < sum(1 for event in buffered if event['success']) < 150
+
+    def test_buffer_bounded(self):
+        """Test that the oldest events are dropped past max_buffer."""
+        client = make_client(FakeHTTP(), max_buffer=3)
+        for i in range(5):
+            client.log_error('connection', f'#{i}')
+
+        assert [event['error_message'] for event, _ in client._buffers['error']] == ['#2', '#3', '#4']
+        assert client.stats['dropped'] == 2
+
+    def test_track_records_timing(self):
+        """Test that track() times operations as context manager and decorator."""
+        client = make_client(FakeHTTP())
+
+        @client.track('build', token_usage=10)
+        async def build():
+            await asyncio.sleep(0.02)
+
+        async def run():
+            await build()
+            with pytest.raises(RuntimeError):
+                async with client.track('repair'):
+                    raise RuntimeError('boom')
+
+        asyncio.run(run())
+        built, repaired = [event for event, _ in client._buffers['metric']]
+        assert built['execution_time_ms'] >= 20
+        assert built['token_usage'] == 10 and built['success']
+        assert not repaired['success'] and repaired['error_count'] == 1
+
+    def test_invalid_doctrine_ids_rejected(self):
+        """Test that malformed doctrine identifiers fail at construction."""
+        with pytest.raises(ValueError):
+            make_client(FakeHTTP(), process_id='log_events')
+        with pytest.raises(ValueError):
+            make_client(FakeHTTP(), unique_id='not-a-unique-id')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,101 @@
+"""
+HEIR System - Error Rate Anomaly Detection Tests
+Tests EWMA/seasonal baselines, spike scoring and bounded per-key state.
+"""
+
+import pytest
+
+from orbt.anomaly_detection import RateAnomalyDetector, agent_key, pattern_key
+
+BUCKET = 300
+DAY_BUCKETS = 86400 // BUCKET
+
+
+def feed(detector, key, buckets, per_bucket, start=0):
+    for bucket in range(start, start + buckets):
+        for i in range(per_bucket(bucket) if callable(per_bucket) else per_bucket):
+            detector.observe(key, bucket * BUCKET + i)
+
+
+class TestRateAnomalyDetector:
+    """Test streaming error-rate anomaly scores."""
+
+    def test_no_score_before_warmup(self):
+        """Test that a new key has no baseline for its first buckets."""
+        detector = RateAnomalyDetector(warmup_buckets=12)
+        feed(detector, 'agent:new', 5, 3)
+
+        assert detector.score('agent:new', 5 * BUCKET) is None
+        assert detector.score('agent:unknown') is None
+
+    def test_chronic_rate_scores_low(self):
+        """Test that a steady low rate is not anomalous."""
+        detector = RateAnomalyDetector()
+        feed(detector, 'agent:chronic', 100, 2)
+
+        assert detector.score('agent:chronic', 99 * BUCKET + 60) < 1.0
+        assert detector.anomalies(99 * BUCKET + 60) == []
+
+    def test_spike_flagged_within_batch(self):
+        """Test that a burst is flagged before its bucket closes."""
+        detector = RateAnomalyDetector()
+        feed(detector, 'agent:steady', 100, 2)
+        detector.anomalies()
+
+        for i in range(40):
+            detector.observe('agent:steady', 100 * BUCKET + i)
+
+        flagged = detector.anomalies(100 * BUCKET + 60)
+        assert [key for key, _ in flagged] == ['agent:steady']
+        assert flagged[0][1] >= detector.critical_threshold
+
+    def test_spike_still_reported_after_bucket_closes(self):
+        """Test that the last full bucket's score survives into a quiet open bucket."""
+        detector = RateAnomalyDetector()
+        feed(detector, 'agent:burst', 100, lambda b: 30 if b == 99 else 1)
+        detector.observe('agent:burst', 100 * BUCKET)
+
+        assert detector.score('agent:burst', 100 * BUCKET + 10) >= detector.threshold
+        assert detector.score('agent:burst', 103 * BUCKET) == 0.0
+
+    def test_seasonal_baseline(self):
+        """Test that a daily peak hour is expected once a day of history exists."""
+        detector = RateAnomalyDetector(seasonal_alpha=0.5)
+        peak_hour = 9
+
+        def per_bucket(bucket):
+            return 20 if (bucket % DAY_BUCKETS) // 12 == peak_hour else 1
+
+        feed(detector, 'agent:daily', 3 * DAY_BUCKETS, per_bucket)
+        peak = 3 * DAY_BUCKETS + peak_hour * 12
+        feed(detector, 'agent:daily', peak - 3 * DAY_BUCKETS, per_bucket, start=3 * DAY_BUCKETS)
+        feed(detector, 'agent:daily', 1, 20, start=peak)
+
+        assert detector.score('agent:daily', peak * BUCKET + 299) < detector.threshold
+
+    def test_long_silence_decays_baseline(self):
+        """Test that days of silence decay the baseline without per-bucket work."""
+        detector = RateAnomalyDetector()
+        feed(detector, 'agent:noisy', 50, 10)
+        feed(detector, 'agent:noisy', 1, 10, start=50 + 10 * DAY_BUCKETS)
+
+        assert detector.score('agent:noisy', (50 + 10 * DAY_BUCKETS) * BUCKET + 60) >= detector.threshold
+
+    def test_key_count_is_bounded(self):
+        """Test that the least recently seen keys are evicted past max_keys."""
+        detector = RateAnomalyDetector(max_keys=3)
+        for i in range(5):
+            detector.observe(f'agent:{i}', 0)
+
+        assert len(detector) == 3
+        assert detector.score('agent:0') is None
+
+    def test_keys(self):
+        """Test agent and pattern key construction."""
+        assert agent_key('database-specialist') == 'agent:database-specialist'
+        assert pattern_key('CL-1', 'connection', 'timeout') == 'pattern:CL-1'
+        assert pattern_key(None, 'connection', 'timeout after 3s') == pattern_key(None, 'connection', 'timeout after 9s')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,152 @@
+"""
+HEIR System - Archive Tier Tests
+Tests moving aged rows into compressed day segments and pruned archive queries.
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from orbt import archive_tier
+from orbt.archive_tier import ArchiveTier
+
+NOW = datetime(2026, 3, 1, 12, tzinfo=timezone.utc)
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.snapshot = {table: list(rows) for table, rows in self.conn.tables.items()}
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.conn.tables = self.snapshot
+        return False
+
+
+class FakeArchiveConnection:
+    """Applies the archive DELETE ... RETURNING to in-memory tables."""
+
+    # Python stand-ins for ArchiveTable.where
+    ARCHIVABLE = {
+        'orbt_error_log': lambda row, cutoff: row['timestamp'] < cutoff and row['orbt_status'] != 'RED',
+        'orbt_agent_metrics': lambda row, cutoff: row['timestamp'] < cutoff,
+    }
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def fetch(self, query, cutoff, limit):
+        table = query.split('DELETE FROM')[1].split()[0]
+        rows = sorted(self.tables[table], key=lambda row: row['timestamp'])
+        taken = [row for row in rows if self.ARCHIVABLE[table](row, cutoff)][:limit]
+        self.tables[table] = [row for row in self.tables[table] if row not in taken]
+        return taken
+
+
+def error_row(i, agent_id='database-specialist', days_ago=100, status='GREEN'):
+    return {
+        'id': i,
+        'error_id': f'01.99.01.00.25000.{i:03d}',
+        'orbt_status': status,
+        'timestamp': NOW - timedelta(days=days_ago, minutes=i),
+        'agent_id': agent_id,
+        'error_message': f'Database timeout #{i}',
+    }
+
+
+def archive_errors(archive, rows, **kwargs):
+    conn = FakeArchiveConnection({'orbt_error_log': rows})
+    moved = asyncio.run(archive.archive(conn, 'orbt_error_log', NOW - timedelta(days=90), **kwargs))
+    return moved, conn
+
+
+class TestArchiveTier:
+    """Test archiving and querying aged rows."""
+
+    def test_rows_moved_into_day_segments(self, tmp_path):
+        """Test that aged rows leave the table and land in one segment per day."""
+        archive = ArchiveTier(str(tmp_path), codec='gzip')
+        rows = [error_row(i, days_ago=100 + i % 3) for i in range(30)]
+        rows += [error_row(100, days_ago=1), error_row(101, days_ago=120, status='RED')]
+
+        moved, conn = archive_errors(archive, rows)
+
+        assert moved == 30
+        assert sorted(row['id'] for row in conn.tables['orbt_error_log']) == [100, 101]
+        segments = archive.segments('orbt_error_log')
+        assert len(segments) == 3
+        assert all(os.path.exists(tmp_path / entry['file']) for entry in segments)
+        assert segments[0]['agents'] == ['database-specialist']
+        assert archive.stats()['tables']['orbt_error_log']['rows'] == 30
+
+    def test_index_survives_restart(self, tmp_path):
+        """Test that a new ArchiveTier reads the persisted index and segments."""
+        archive_errors(ArchiveTier(str(tmp_path), codec='gzip'), [error_row(i) for i in range(5)])
+
+        reopened = ArchiveTier(str(tmp_path))
+        rows = list(reopened.query('orbt_error_log'))
+        assert sorted(row['error_message'] for row in rows) == [f'Database timeout #{i}' for i in range(5)]
+        assert rows[0]['timestamp'].endswith('+00:00')
+
+    def test_query_prunes_segments(self, tmp_path):
+        """Test that time and agent filters skip segments that cannot match."""
+        archive = ArchiveTier(str(tmp_path), codec='gzip')
+        rows = [error_row(i, agent_id='database-specialist', days_ago=100) for i in range(5)]
+        rows += [error_row(10 + i, agent_id='payment-specialist', days_ago=110) for i in range(5)]
+        archive_errors(archive, rows)
+
+        start = NOW - timedelta(days=101)
+        assert len(archive.segments('orbt_error_log', start=start)) == 1
+        assert len(archive.segments('orbt_error_log', agent_ids={'payment-specialist'})) == 1
+        assert archive.segments('orbt_error_log', start=start, agent_ids={'payment-specialist'}) == []
+
+        opened = []
+        original = archive._open_segment
+        archive._open_segment = lambda entry: opened.append(entry['file']) or original(entry)
+        found = list(archive.query('orbt_error_log', agent_ids={'payment-specialist'}, limit=3))
+        assert [row['agent_id'] for row in found] == ['payment-specialist'] * 3
+        assert len(opened) == 1
+
+    def test_failed_write_keeps_rows(self, tmp_path, monkeypatch):
+        """Test that a segment write failure rolls the delete back."""
+        archive = ArchiveTier(str(tmp_path), codec='gzip')
+
+        def fail(path, data):
+            raise OSError('disk full')
+
+        monkeypatch.setattr(archive_tier, '_write_atomic', fail)
+        with pytest.raises(OSError):
+            archive_errors(archive, [error_row(i) for i in range(5)])
+        assert archive.segments('orbt_error_log') == []
+
+    def test_batches_and_duplicates(self, tmp_path):
+        """Test batched moves, and that a row archived twice is returned once."""
+        archive = ArchiveTier(str(tmp_path), codec='gzip', batch_size=4)
+        moved, conn = archive_errors(archive, [error_row(i) for i in range(10)], max_batches=2)
+        assert moved == 8
+        assert len(conn.tables['orbt_error_log']) == 2
+
+        # A crash after the index write but before the commit archives a row again
+        archive_errors(archive, [error_row(9)])
+        assert len(list(archive.query('orbt_error_log'))) == 8
+
+    def test_codec_selection(self, tmp_path, monkeypatch):
+        """Test that gzip is the fallback when zstandard is not installed."""
+        monkeypatch.setattr(archive_tier, 'zstandard', None)
+        assert ArchiveTier(str(tmp_path)).codec == 'gzip'
+        with pytest.raises(ValueError):
+            ArchiveTier(str(tmp_path), codec='zstd')
+        with pytest.raises(ValueError):
+            ArchiveTier(str(tmp_path), codec='lz4')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,130 @@
+"""
+HEIR System - Auto-Resolution Executor Tests
+Tests handler matching, bounded concurrency and timeouts.
+"""
+
+import asyncio
+
+import pytest
+
+from orbt.auto_resolution import AutoResolutionExecutor
+
+
+def candidate(message, agent_id='database-specialist'):
+    return {
+        'error_message': message,
+        'agent_id': agent_id,
+        'all_error_ids': ['01.99.01.00.25000.001', '01.99.01.00.25000.002'],
+        'latest_error_id': '01.99.01.00.25000.002',
+    }
+
+
+def pattern(signature, known_solution=None, pattern_id='PAT-001'):
+    return {
+        'pattern_id': pattern_id,
+        'error_signature': signature,
+        'known_solution': known_solution,
+    }
+
+
+class TestAutoResolutionExecutor:
+    """Test the auto-resolution stage run before human escalation."""
+
+    @pytest.fixture
+    def executor(self):
+        executor = AutoResolutionExecutor(max_workers=2, default_timeout=1.0)
+
+        @executor.handler("restart_connection_pool", error_codes=["CONN_TIMEOUT"])
+        async def restart_pool(context):
+            return "Pool recycled"
+
+        return executor
+
+    def test_empty_executor_is_falsy(self):
+        """Test that an executor without handlers reports as disabled."""
+        assert not AutoResolutionExecutor()
+
+    def test_match_by_known_solution(self, executor):
+        """Test that known_solution naming a handler selects it."""
+        handler = executor.match(pattern('anything', known_solution='restart_connection_pool'))
+
+        assert handler.name == 'restart_connection_pool'
+
+    def test_match_by_error_code(self, executor):
+        """Test that error codes in the signature select a handler."""
+        handler = executor.match(pattern('ProcessData CONN_TIMEOUT after <n> retries'))
+
+        assert handler.name == 'restart_connection_pool'
+        assert executor.match(pattern('unrelated failure')) is None
+
+    def test_plan_pairs_candidates_by_normalised_signature(self, executor):
+        """Test that candidates are paired with patterns despite volatile details."""
+        candidates = [
+            candidate('CONN_TIMEOUT after 3 retries'),
+            candidate('Validation failed for field email'),
+        ]
+        patterns = [pattern('CONN_TIMEOUT after 5 retries')]
+
+        jobs = executor.plan(candidates, patterns)
+
+        assert len(jobs) == 1
+        assert jobs[0][0] is candidates[0]
+        assert jobs[0][2].name == 'restart_connection_pool'
+
+    def test_successful_outcome(self, executor):
+        """Test that a handler's notes are reported on success."""
+        jobs = executor.plan([candidate('CONN_TIMEOUT')], [pattern('CONN_TIMEOUT')])
+
+        outcomes = asyncio.run(executor.run_all(jobs))
+
+        assert outcomes[0]['success'] is True
+        assert outcomes[0]['notes'] == 'Pool recycled'
+        assert outcomes[0]['pattern_id'] == 'PAT-001'
+
+    def test_failures_and_timeouts_never_raise(self):
+        """Test that raising, False-returning and slow handlers all fail cleanly."""
+        executor = AutoResolutionExecutor(max_workers=4)
+
+        async def boom(context):
+            raise RuntimeError("pool unavailable")
+
+        async def slow(context):
+            await asyncio.sleep(5)
+
+        executor.register("boom", boom)
+        executor.register("refuse", lambda context: False)
+        executor.register("slow", slow, timeout=0.05)
+        jobs = [
+            (candidate('a'), pattern('a'), executor.match(pattern('a', 'boom'))),
+            (candidate('b'), pattern('b'), executor.match(pattern('b', 'refuse'))),
+            (candidate('c'), pattern('c'), executor.match(pattern('c', 'slow'))),
+        ]
+
+        outcomes = asyncio.run(executor.run_all(jobs))
+
+        assert [o['success'] for o in outcomes] == [False, False, False]
+        assert outcomes[0]['notes'] == 'RuntimeError: pool unavailable'
+        assert outcomes[2]['notes'].startswith('Timed out')
+
+    def test_worker_pool_is_bounded(self):
+        """Test that no more than max_workers handlers run at once."""
+        executor = AutoResolutionExecutor(max_workers=3)
+        state = {'running': 0, 'peak': 0}
+
+        async def tracked(context):
+            state['running'] += 1
+            state['peak'] = max(state['peak'], state['running'])
+            await asyncio.sleep(0.01)
+            state['running'] -= 1
+
+        handler = executor.register("tracked", tracked)
+        jobs = [(candidate(str(i)), pattern(str(i)), handler) for i in range(10)]
+
+        outcomes = asyncio.run(executor.run_all(jobs))
+
+        assert all(o['success'] for o in outcomes)
+        assert state['peak'] == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
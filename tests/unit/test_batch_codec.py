@@ -0,0 +1,43 @@
+"""
+HEIR System - Batch Codec Tests
+Tests the batched ingest wire format and its decode limits.
+"""
+
+import gzip
+import json
+
+import pytest
+
+from orbt.batch_codec import BatchDecodeError, decode_batch, encode_batch
+
+
+class TestBatchEncoding:
+    """Test the batch wire format."""
+
+    def test_roundtrip_and_compression(self):
+        """Test that large batches are gzipped and decode back to the same events."""
+        events = [{'agent_id': 'a', 'error_message': 'timeout ' * 20} for _ in range(50)]
+        body, headers = encode_batch(events)
+        assert headers['content-encoding'] == 'gzip'
+        assert len(body) < len(json.dumps(events)) / 5
+        assert decode_batch(body, 'gzip') == events
+
+        small, headers = encode_batch([{'agent_id': 'a'}])
+        assert 'content-encoding' not in headers
+        assert decode_batch(small) == [{'agent_id': 'a'}]
+
+    def test_decode_limits(self):
+        """Test that oversized, overlong and malformed bodies are rejected."""
+        bomb = gzip.compress(b'[' + b' ' * 100000 + b']')
+        with pytest.raises(BatchDecodeError):
+            decode_batch(bomb, 'gzip', max_bytes=1000)
+        with pytest.raises(BatchDecodeError):
+            decode_batch(json.dumps([{}] * 3).encode(), max_events=2)
+        with pytest.raises(BatchDecodeError):
+            decode_batch(b'{"agent_id": "a"}')
+        with pytest.raises(BatchDecodeError):
+            decode_batch(b'[]', 'br')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
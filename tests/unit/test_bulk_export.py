@@ -0,0 +1,176 @@
+"""
+HEIR System - Bulk Export Tests
+Tests export query pushdown, COPY chunk streaming and columnar decoding.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from orbt.bulk_export import (
+    ExportRequestError, TextCopyDecoder, build_export_query, copy_chunks, stream_export
+)
+
+
+class FakeCopyConnection:
+    """Emits scripted COPY output in chunks and records the call."""
+
+    def __init__(self, chunks, fail_after=None):
+        self.chunks = chunks
+        self.fail_after = fail_after
+        self.calls = []
+        self.sent = 0
+        self.cancelled = False
+
+    async def copy_from_query(self, query, *args, output, **options):
+        self.calls.append((query, args, options))
+        try:
+            for chunk in self.chunks:
+                if self.fail_after is not None and self.sent >= self.fail_after:
+                    raise ConnectionResetError('connection lost')
+                await output(chunk)
+                self.sent += 1
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return f'COPY {len(self.chunks)}'
+
+
+async def collect(iterator):
+    return [chunk async for chunk in iterator]
+
+
+class TestBuildExportQuery:
+    """Test validation and pushdown of export requests."""
+
+    def test_columns_and_filters_pushed_down(self):
+        """Test that column selection, time range and filters end up in the SELECT."""
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        end = datetime(2026, 2, 1, tzinfo=timezone.utc)
+        query = build_export_query(
+            'errors', columns=['timestamp', 'agent_id', 'error_message'], start=start, end=end,
+            filters={'orbt_status': ['RED', 'YELLOW'], 'resolved': ['false']}
+        )
+
+        assert query.sql == (
+            'SELECT timestamp, agent_id, error_message FROM orbt_error_log'
+            ' WHERE timestamp >= $1 AND timestamp < $2'
+            ' AND orbt_status = ANY($3::TEXT[]) AND resolved = ANY($4::BOOLEAN[])'
+            ' ORDER BY timestamp'
+        )
+        assert query.args == [start, end, ['RED', 'YELLOW'], [False]]
+        assert query.types == ['timestamp', 'text', 'text']
+
+    def test_defaults_to_all_columns(self):
+        """Test that without a column list every column is exported."""
+        query = build_export_query('metrics')
+        assert query.columns[:3] == ['id', 'metric_id', 'agent_id']
+        assert 'WHERE' not in query.sql
+
+    def test_invalid_requests_rejected(self):
+        """Test that unknown datasets, columns, filters and ranges are refused."""
+        with pytest.raises(ExportRequestError):
+            build_export_query('escalations')
+        with pytest.raises(ExportRequestError):
+            build_export_query('errors', columns=['error_message; DROP TABLE orbt_error_log'])
+        with pytest.raises(ExportRequestError):
+            build_export_query('errors', filters={'error_message': ['timeout']})
+        with pytest.raises(ExportRequestError):
+            build_export_query('metrics', filters={'success': ['maybe']})
+        with pytest.raises(ExportRequestError):
+            build_export_query('errors', 'xlsx')
+        moment = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        with pytest.raises(ExportRequestError):
+            build_export_query('errors', start=moment, end=moment)
+
+
+class TestCopyStreaming:
+    """Test streaming COPY output with a bounded queue."""
+
+    def test_csv_passed_through(self):
+        """Test that CSV chunks are yielded unchanged with a header requested."""
+        chunks = [b'agent_id,error_message\n', b'a,"multi\nline"\n', b'b,plain\n']
+        conn = FakeCopyConnection(chunks)
+        query = build_export_query('errors', columns=['agent_id', 'error_message'])
+
+        assert asyncio.run(collect(stream_export(conn, query))) == chunks
+        assert conn.calls[0][2] == {'format': 'csv', 'header': True}
+
+    def test_backpressure_and_early_close(self):
+        """Test that COPY runs at most a queue ahead and is cancelled when the consumer stops."""
+        conn = FakeCopyConnection([b'row\n'] * 100)
+
+        async def run():
+            stream = copy_chunks(conn, 'SELECT 1', [], queue_size=4)
+            received = [await stream.__anext__() for _ in range(3)]
+            await asyncio.sleep(0.01)
+            ahead = conn.sent - len(received)
+            await stream.aclose()
+            return ahead
+
+        ahead = asyncio.run(run())
+        assert ahead <= 5
+        assert conn.cancelled
+
+    def test_copy_failure_raised(self):
+        """Test that a COPY error reaches the consumer after the chunks sent so far."""
+        conn = FakeCopyConnection([b'row\n'] * 5, fail_after=2)
+        received = []
+
+        async def run():
+            async for chunk in copy_chunks(conn, 'SELECT 1', []):
+                received.append(chunk)
+
+        with pytest.raises(ConnectionResetError):
+            asyncio.run(run())
+        assert len(received) == 2
+
+
+class TestTextCopyDecoder:
+    """Test parsing of COPY text format for the columnar writers."""
+
+    def test_rows_split_across_chunks(self):
+        """Test typed values, NULLs, escapes and rows split mid-chunk."""
+        decoder = TextCopyDecoder(['timestamp', 'text', 'int', 'float', 'bool'])
+        decoder.feed(b'1767225600000000\tline one\\nline two\t3\t1.5\tt\n17672256')
+        assert decoder.pending_rows == 1
+        decoder.feed('00000001\ttab\\there \\\\ café\t\\N\t\\N\tf\n'.encode('utf-8'))
+        decoder.finish()
+
+        timestamps, texts, ints, floats, bools = decoder.take()
+        assert timestamps == [1767225600000000, 1767225600000001]
+        assert texts == ['line one\nline two', 'tab\there \\ café']
+        assert ints == [3, None]
+        assert floats == [1.5, None]
+        assert bools == [True, False]
+        assert decoder.pending_rows == 0
+
+    def test_truncated_output_detected(self):
+        """Test that output ending mid-row or with the wrong width is an error."""
+        decoder = TextCopyDecoder(['text', 'text'])
+        decoder.feed(b'a\tb\nc')
+        with pytest.raises(ValueError):
+            decoder.finish()
+        with pytest.raises(ValueError):
+            TextCopyDecoder(['text', 'text']).feed(b'only-one-field\n')
+
+    def test_parquet_roundtrip(self):
+        """Test that a parquet export reads back with the selected columns and types."""
+        pa = pytest.importorskip('pyarrow')
+        import io
+        import pyarrow.parquet as pq
+
+        query = build_export_query('metrics', 'parquet', columns=['timestamp', 'agent_id', 'success'])
+        assert '(EXTRACT(EPOCH FROM timestamp) * 1000000)::BIGINT AS timestamp' in query.sql
+        conn = FakeCopyConnection([b'1767225600000000\ta\tt\n', b'1767225601000000\tb\tf\n'])
+
+        data = b''.join(asyncio.run(collect(stream_export(conn, query, chunk_rows=1))))
+        table = pq.read_table(io.BytesIO(data))
+        assert table.column_names == ['timestamp', 'agent_id', 'success']
+        assert table.column('agent_id').to_pylist() == ['a', 'b']
+        assert table.schema.field('timestamp').type == pa.timestamp('us', tz='UTC')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
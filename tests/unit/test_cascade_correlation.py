@@ -0,0 +1,158 @@
+"""
+HEIR System - Cascade Correlation Tests
+Tests grouping of error patterns along the agent delegation hierarchy.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from orbt.agent_catalog import AgentCatalog, parse_catalogs
+from orbt.cascade_correlation import CascadeCorrelator
+
+CATALOG = {
+    "orchestrators": {
+        "data-orchestrator": {"level": 1, "delegates_to": ["data-manager"]},
+        "api-orchestrator": {"level": 1, "delegates_to": ["api-manager"]}
+    },
+    "managers": {
+        "data-manager": {"level": 2, "delegates_to": ["db-specialist"]},
+        "api-manager": {"level": 2, "delegates_to": ["auth-specialist"]}
+    },
+    "specialists": {
+        "db-specialist": {"level": 3},
+        "auth-specialist": {"level": 3}
+    }
+}
+
+T0 = datetime(2025, 8, 1, 12, 0)
+
+
+def pattern(agent_id, seconds, message="boom"):
+    return {
+        'agent_id': agent_id,
+        'error_message': f"{agent_id}: {message}",
+        'first_occurrence': T0 + timedelta(seconds=seconds),
+        'occurrence_count': 2,
+    }
+
+
+@pytest.fixture
+def correlator():
+    return CascadeCorrelator(AgentCatalog(parse_catalogs([CATALOG])), window_seconds=300)
+
+
+def agents(group):
+    return [p['agent_id'] for p in group.patterns]
+
+
+class TestCascadeCorrelator:
+    """Test cascade grouping of escalation candidates."""
+
+    def test_cascade_up_hierarchy_is_one_group(self, correlator):
+        """Test that specialist -> manager -> orchestrator failures share one root."""
+        groups = correlator.correlate([
+            pattern('data-orchestrator', 60),
+            pattern('db-specialist', 0),
+            pattern('data-manager', 30),
+        ])
+
+        assert len(groups) == 1
+        assert agents(groups[0]) == ['db-specialist', 'data-manager', 'data-orchestrator']
+        assert groups[0].escalation_id is None
+
+    def test_unrelated_agents_stay_separate(self, correlator):
+        """Test that failures in different subtrees are not linked."""
+        groups = correlator.correlate([pattern('db-specialist', 0), pattern('api-manager', 10)])
+
+        assert sorted(len(g.patterns) for g in groups) == [1, 1]
+
+    def test_window_and_direction(self, correlator):
+        """Test that links need the ancestor to fail after its descendant, within the window."""
+        late = correlator.correlate([pattern('db-specialist', 0), pattern('data-manager', 301)])
+        assert len(late) == 2
+
+        upward_first = correlator.correlate([pattern('data-manager', 0), pattern('db-specialist', 10)])
+        assert len(upward_first) == 2
+
+    def test_two_roots_joined_by_common_ancestor(self, correlator):
+        """Test that the earliest pattern becomes the root of a merged group."""
+        groups = correlator.correlate([
+            pattern('db-specialist', 5, 'disk full'),
+            pattern('db-specialist', 0, 'timeout'),
+            pattern('data-manager', 20),
+        ])
+
+        assert len(groups) == 1
+        assert groups[0].root['error_message'] == 'db-specialist: timeout'
+        assert len(groups[0].children) == 2
+
+    def test_shared_ancestor_does_not_merge_sibling_subtrees(self):
+        """Test that a common ancestor's symptom joins one subtree's incident, not both."""
+        catalog = AgentCatalog(parse_catalogs([{
+            "orchestrators": {
+                "system-orchestrator": {"level": 1, "delegates_to": ["payments-manager", "database-manager"]}
+            },
+            "managers": {
+                "payments-manager": {"level": 2, "delegates_to": ["stripe-handler"]},
+                "database-manager": {"level": 2, "delegates_to": ["neon-integrator"]}
+            },
+            "specialists": {
+                "stripe-handler": {"level": 3},
+                "neon-integrator": {"level": 3}
+            }
+        }]))
+        correlator = CascadeCorrelator(catalog, window_seconds=300)
+
+        groups = correlator.correlate([
+            pattern('stripe-handler', 0, 'card declined storm'),
+            pattern('neon-integrator', 10, 'connection refused'),
+            pattern('payments-manager', 20),
+            pattern('system-orchestrator', 40),
+        ])
+
+        assert len(groups) == 2
+        by_root = {g.root['agent_id']: agents(g) for g in groups}
+        assert by_root['stripe-handler'] == ['stripe-handler', 'payments-manager', 'system-orchestrator']
+        assert by_root['neon-integrator'] == ['neon-integrator']
+
+    def test_later_layer_attaches_to_existing_escalation(self, correlator):
+        """Test that a layer escalating a cycle later links to the earlier escalation."""
+        first = correlator.correlate([pattern('db-specialist', 0)])
+        correlator.remember(first[0], 'ESC_1')
+
+        second = correlator.correlate([pattern('data-orchestrator', 120), pattern('auth-specialist', 130)])
+
+        attached = [g for g in second if g.escalation_id]
+        assert len(attached) == 1
+        assert attached[0].escalation_id == 'ESC_1'
+        assert attached[0].root['agent_id'] == 'db-specialist'
+        assert agents(attached[0])[1:] == ['data-orchestrator']
+
+        correlator.remember(attached[0], 'ESC_1')
+        assert len(correlator._escalated) == 2
+
+    def test_remembered_escalations_expire(self, correlator):
+        """Test that escalations older than the window are forgotten."""
+        correlator.remember(correlator.correlate([pattern('db-specialist', 0)])[0], 'ESC_1')
+
+        groups = correlator.correlate([pattern('data-manager', 900)])
+
+        assert groups[0].escalation_id is None
+        assert correlator._escalated == []
+
+    def test_large_batch(self, correlator):
+        """Test a wide batch: each cascade collapses to one group."""
+        patterns = []
+        for i in range(500):
+            base = i * 400
+            patterns += [pattern('db-specialist', base, str(i)), pattern('data-manager', base + 5, str(i))]
+
+        groups = correlator.correlate(patterns)
+
+        assert len(groups) == 500
+        assert all(agents(g) == ['db-specialist', 'data-manager'] for g in groups)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,230 @@
+"""
+HEIR System - Doctrine Cache Tests
+Tests the in-process doctrine store behind GET /api/dpr/doctrine.
+"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from orbt.doctrine_cache import DoctrineCache, DOCTRINE_CHANNEL, etag_matches
+
+
+DOCTRINE_FILE = os.path.join(os.path.dirname(__file__), '..', '..', 'dpr_doctrine.json')
+
+
+class FakeConnection:
+    """Minimal asyncpg-like connection serving canned doctrine rows."""
+
+    def __init__(self, rows, version="1.0.0@2025-01-01"):
+        self.rows = rows
+        self.version = version
+        self.fetch_calls = 0
+        self.fetchval_calls = 0
+        self.listeners = {}
+        self.termination_listeners = []
+        self.closed = False
+
+    async def fetch(self, query, *args):
+        self.fetch_calls += 1
+        return sorted(self.rows, key=lambda row: row['section_number'])
+
+    async def fetchval(self, query, *args):
+        self.fetchval_calls += 1
+        return self.version
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    def remove_termination_listener(self, callback):
+        self.termination_listeners.remove(callback)
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+    async def close(self):
+        self.closed = True
+
+
+class TestDoctrineCache:
+    """Test doctrine cache indexing, filtering and invalidation."""
+
+    @pytest.fixture
+    def doctrine_rows(self):
+        """Doctrine rows shipped with the repository."""
+        with open(DOCTRINE_FILE) as f:
+            return json.load(f)
+
+    @pytest.fixture
+    def loaded_cache(self, doctrine_rows):
+        cache = DoctrineCache(stamp_check_interval=3600)
+        conn = FakeConnection(doctrine_rows)
+        asyncio.run(cache.load(conn))
+        return cache, conn
+
+    def test_load_indexes_all_rows(self, loaded_cache, doctrine_rows):
+        """Test that every doctrine row is loaded and ordered by section."""
+        cache, _ = loaded_cache
+
+        assert len(cache) == len(doctrine_rows)
+        sections = [record['section_number'] for record in cache.query(limit=1000)]
+        assert sections == sorted(sections)
+
+    def test_filtered_query_matches_linear_scan(self, loaded_cache, doctrine_rows):
+        """Test that indexed filtering returns the same rows as a full scan."""
+        cache, _ = loaded_cache
+        sample = doctrine_rows[0]
+
+        expected = sorted(
+            (row for row in doctrine_rows
+             if row['doctrine_type'] == sample['doctrine_type']
+             and row['enforcement_level'] == sample['enforcement_level']),
+            key=lambda row: row['section_number']
+        )
+        result = cache.query(
+            doctrine_type=sample['doctrine_type'],
+            enforcement_level=sample['enforcement_level'],
+            limit=1000
+        )
+
+        assert [r['id'] for r in result] == [r['id'] for r in expected]
+
+    def test_section_number_lookup(self, loaded_cache, doctrine_rows):
+        """Test exact section_number lookups use the section index."""
+        cache, _ = loaded_cache
+        section = doctrine_rows[0]['section_number']
+
+        result = cache.query(section_number=section)
+
+        assert result
+        assert all(record['section_number'] == section for record in result)
+
+    def test_unknown_filter_value_returns_nothing(self, loaded_cache):
+        """Test that an unindexed value short-circuits to no results."""
+        cache, _ = loaded_cache
+
+        assert cache.query(category='does-not-exist') == []
+
+    def test_limit_is_respected(self, loaded_cache):
+        """Test that limit caps the number of records returned."""
+        cache, _ = loaded_cache
+
+        assert len(cache.query(limit=5)) == 5
+
+    def test_etag_stable_and_filter_specific(self, loaded_cache):
+        """Test ETags are stable for the same view and differ across filters."""
+        cache, _ = loaded_cache
+
+        first = cache.etag(category='structure', limit=100)
+        assert first == cache.etag(category='structure', limit=100)
+        assert first != cache.etag(category='compliance', limit=100)
+
+    def test_etag_matches_if_none_match(self):
+        """Test If-None-Match parsing for 304 responses."""
+        assert etag_matches('"abc"', '"abc"')
+        assert etag_matches('"x", W/"abc"', '"abc"')
+        assert etag_matches('*', '"abc"')
+        assert not etag_matches(None, '"abc"')
+        assert not etag_matches('"other"', '"abc"')
+
+    def test_unchanged_version_does_not_reload(self, doctrine_rows):
+        """Test that a stamp check without a version change skips the reload."""
+        cache = DoctrineCache(stamp_check_interval=0)
+        conn = FakeConnection(doctrine_rows)
+        asyncio.run(cache.load(conn))
+
+        reloaded = asyncio.run(cache.refresh(conn))
+
+        assert reloaded is False
+        assert conn.fetch_calls == 1
+
+    def test_version_change_reloads_and_changes_etag(self, doctrine_rows):
+        """Test that a new schema version stamp reloads the cache."""
+        cache = DoctrineCache(stamp_check_interval=0)
+        conn = FakeConnection(doctrine_rows)
+        asyncio.run(cache.load(conn))
+        old_etag = cache.etag(limit=100)
+
+        conn.version = "1.1.0@2025-02-01"
+        conn.rows = doctrine_rows[:10]
+        reloaded = asyncio.run(cache.refresh(conn))
+
+        assert reloaded is True
+        assert len(cache) == 10
+        assert cache.etag(limit=100) != old_etag
+
+    def test_notify_invalidates_cache(self, doctrine_rows):
+        """Test that a NOTIFY on the doctrine channel forces a reload."""
+        cache = DoctrineCache(stamp_check_interval=3600)
+        conn = FakeConnection(doctrine_rows)
+
+        async def scenario():
+            await cache.load(conn)
+            await cache.listen(conn)
+            assert cache.needs_refresh() is False
+            conn.listeners[DOCTRINE_CHANNEL](conn, 1, DOCTRINE_CHANNEL, 'dpr.dpr_doctrine')
+            assert cache.needs_refresh() is True
+            return await cache.refresh(conn)
+
+        assert asyncio.run(scenario()) is True
+        assert conn.fetch_calls == 2
+
+    def test_lost_listener_reloads_and_polls(self, doctrine_rows):
+        """Test that a terminated or silently closed listener falls back to stamp polling."""
+        cache = DoctrineCache(stamp_check_interval=0, listener_stamp_interval=3600)
+        conn = FakeConnection(doctrine_rows)
+        listener = FakeConnection(doctrine_rows)
+
+        async def scenario():
+            await cache.load(conn)
+            await cache.listen(listener)
+            assert cache.needs_refresh() is False
+
+            # Server-side drop: the termination callback fires
+            listener.terminate()
+            assert cache.needs_refresh() is True
+            assert await cache.refresh(conn) is True
+
+            # Polling again every stamp_check_interval
+            assert cache.needs_refresh() is True
+            assert await cache.refresh(conn) is False
+
+            # A listener found closed without a callback is dropped too
+            silent = FakeConnection(doctrine_rows)
+            await cache.listen(silent)
+            await cache.refresh(conn)
+            silent.closed = True
+            assert cache.needs_refresh() is True
+            await cache.close()
+
+        asyncio.run(scenario())
+
+    def test_listener_still_polls_slowly(self, doctrine_rows):
+        """Test that the version stamp is still checked while listening, at the slower interval."""
+        cache = DoctrineCache(stamp_check_interval=3600, listener_stamp_interval=0)
+        conn = FakeConnection(doctrine_rows)
+
+        async def scenario():
+            await cache.load(conn)
+            await cache.listen(conn)
+            conn.version = "1.1.0@2025-02-01"
+            return await cache.refresh(conn)
+
+        assert asyncio.run(scenario()) is True
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,244 @@
+"""
+HEIR System - Doctrine Header Middleware Tests
+Tests the production validator and ASGI middleware for doctrine headers.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from orbt.doctrine_headers import (
+    DoctrineHeaderMiddleware,
+    DoctrineHeaderValidator,
+    SignatureCache,
+    sign_agent,
+)
+
+
+SIGNED_AT = datetime(2025, 1, 13, 15, 32, 1, tzinfo=timezone.utc).timestamp()
+
+
+class FakeClock:
+    """Controllable clock for freshness and TTL checks."""
+
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run_request(middleware, method="POST", path="/api/orbt/errors", headers=None):
+    """Drive the middleware with a single HTTP request and capture the response."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "headers": [(k.encode("latin-1"), v.encode("latin-1")) for k, v in (headers or {}).items()],
+    }
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+class TestDoctrineHeaderValidator:
+    """Test the compiled-pattern header validator."""
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock(SIGNED_AT + 10)
+
+    @pytest.fixture
+    def validator(self, clock):
+        return DoctrineHeaderValidator(clock=clock)
+
+    @pytest.fixture
+    def valid_doctrine_headers(self):
+        return {
+            "unique_id": "DB.03.PROC.API.10000.001",
+            "process_id": "ProcessPayment",
+            "blueprint_id": "payment-processing-v1",
+            "agent_signature": "payment-specialist:20250113153201:abc123hash",
+        }
+
+    def test_valid_headers_pass(self, validator, valid_doctrine_headers):
+        """Test that valid doctrine headers pass validation."""
+        assert validator.validate(valid_doctrine_headers) == {'valid': True, 'errors': []}
+
+    @pytest.mark.parametrize("unique_id", [
+        "DB.03.PROC",
+        "DB.03.PROC.API.10000.001.EXTRA",
+        "DB.03.PROC.API.1000.001",
+        "DB.03.PROC.API.10000.01",
+        "D.03.PROC.API.10000.001",
+    ])
+    def test_invalid_unique_id_rejected(self, validator, valid_doctrine_headers, unique_id):
+        """Test that malformed unique_ids are rejected."""
+        headers = dict(valid_doctrine_headers, unique_id=unique_id)
+
+        result = validator.validate(headers)
+
+        assert result['valid'] is False
+        assert "Invalid unique_id format" in result['errors']
+
+    @pytest.mark.parametrize("process_id", [
+        "processPayment", "Process", "ProcessPayment123", "Process Payment", "Process-Payment",
+    ])
+    def test_invalid_process_id_rejected(self, validator, valid_doctrine_headers, process_id):
+        """Test that non-VerbObject process_ids are rejected."""
+        headers = dict(valid_doctrine_headers, process_id=process_id)
+
+        result = validator.validate(headers)
+
+        assert result['valid'] is False
+        assert "Invalid process_id format (must be VerbObject)" in result['errors']
+
+    @pytest.mark.parametrize("signature", [
+        "payment-specialist",
+        "payment-specialist:20250113153201",
+        ":20250113153201:abc123hash",
+        "payment-specialist:2025011315:abc123hash",
+        "payment-specialist:20250113153201:",
+    ])
+    def test_invalid_signature_rejected(self, validator, valid_doctrine_headers, signature):
+        """Test that malformed agent signatures are rejected."""
+        headers = dict(valid_doctrine_headers, agent_signature=signature)
+
+        result = validator.validate(headers)
+
+        assert result['valid'] is False
+        assert "Invalid agent_signature format" in result['errors']
+
+    def test_missing_headers_all_reported(self, validator):
+        """Test that every missing header is reported."""
+        result = validator.validate({})
+
+        assert result['errors'] == [
+            "Missing unique_id header",
+            "Missing process_id header",
+            "Missing agent_signature header",
+            "Missing blueprint_id header",
+        ]
+
+    def test_stale_signature_rejected(self, clock, validator, valid_doctrine_headers):
+        """Test that signatures older than the freshness window are rejected."""
+        clock.now = SIGNED_AT + 301
+
+        result = validator.validate(valid_doctrine_headers)
+
+        assert "Expired agent_signature" in result['errors']
+
+    def test_signing_key_checks_hash(self, clock, valid_doctrine_headers):
+        """Test HMAC verification when a signing key is configured."""
+        validator = DoctrineHeaderValidator(signing_key="secret", clock=clock)
+        good_hash = sign_agent(b"secret", "payment-specialist", "20250113153201")
+
+        assert validator.verify_signature("payment-specialist:20250113153201:bad") == \
+            "Invalid agent_signature hash"
+        assert validator.verify_signature(f"payment-specialist:20250113153201:{good_hash}") is None
+
+    def test_verified_signature_is_cached(self, validator, valid_doctrine_headers):
+        """Test that a verified signature is served from the cache."""
+        validator.validate(valid_doctrine_headers)
+        validator.validate(valid_doctrine_headers)
+
+        assert validator.signature_cache.hits == 1
+        assert len(validator.signature_cache) == 1
+
+    def test_cached_signature_expires_with_freshness(self, clock, validator, valid_doctrine_headers):
+        """Test that cache entries never outlive the signature freshness window."""
+        validator.validate(valid_doctrine_headers)
+        clock.now = SIGNED_AT + 301
+
+        result = validator.validate(valid_doctrine_headers)
+
+        assert "Expired agent_signature" in result['errors']
+
+
+class TestSignatureCache:
+    """Test the LRU/TTL signature cache."""
+
+    def test_lru_eviction(self):
+        """Test that the least recently used signature is evicted."""
+        cache = SignatureCache(max_entries=2, clock=FakeClock(0))
+        cache.add("a", 10)
+        cache.add("b", 10)
+        assert "a" in cache
+        cache.add("c", 10)
+
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL."""
+        clock = FakeClock(0)
+        cache = SignatureCache(clock=clock)
+        cache.add("a", 5)
+        clock.now = 6
+
+        assert "a" not in cache
+        assert len(cache) == 0
+
+
+class TestDoctrineHeaderMiddleware:
+    """Test request handling in the ASGI middleware."""
+
+    @pytest.fixture
+    def downstream(self):
+        calls = []
+
+        async def app(scope, receive, send):
+            calls.append(scope["path"])
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        app.calls = calls
+        return app
+
+    @pytest.fixture
+    def middleware(self, downstream):
+        validator = DoctrineHeaderValidator(clock=FakeClock(SIGNED_AT))
+        return DoctrineHeaderMiddleware(downstream, validator=validator)
+
+    def test_rejects_before_handler(self, middleware, downstream):
+        """Test that bad writes get a 400 without reaching the handler."""
+        sent = run_request(middleware, headers={"operation_type": "POST"})
+
+        assert downstream.calls == []
+        assert sent[0]["status"] == 400
+        body = json.loads(sent[1]["body"])
+        assert body["status"] == "REJECTED"
+        assert body["error"]["code"] == "MISSING_HEADERS"
+        assert middleware.rejected == 1
+
+    def test_valid_write_passes(self, middleware, downstream):
+        """Test that writes with valid hyphenated headers reach the handler."""
+        sent = run_request(middleware, headers={
+            "unique-id": "DB.03.PROC.API.10000.001",
+            "process-id": "LogError",
+            "blueprint-id": "orbt",
+            "agent-signature": "payment-specialist:20250113153201:abc123",
+        })
+
+        assert downstream.calls == ["/api/orbt/errors"]
+        assert sent[0]["status"] == 200
+
+    def test_reads_and_exempt_paths_pass(self, middleware, downstream):
+        """Test that GETs and exempt paths are not validated."""
+        run_request(middleware, method="GET")
+        run_request(middleware, path="/api/orbt/health")
+
+        assert downstream.calls == ["/api/orbt/errors", "/api/orbt/health"]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
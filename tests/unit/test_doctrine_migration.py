@@ -0,0 +1,170 @@
+"""
+HEIR System - Doctrine Migration Tests
+Tests batch planning, checkpoint-based resume and verification failures.
+"""
+
+import asyncio
+
+import pytest
+
+from orbt.doctrine_migration import DoctrineMigration, MigrationError
+
+
+def batch(key, rows=10, checksum=None):
+    return {
+        'batch_key': key,
+        'row_count': rows,
+        'checksum': checksum or f'sum-{key}',
+        'first_section': f'{key}.00.10.001',
+        'last_section': f'{key}.00.10.0{rows:02d}',
+    }
+
+
+class FakeDatabase:
+    """Shared state behind every connection the migration opens"""
+
+    def __init__(self, batches, checkpoints=None, corrupt=(), checkpoint_table=True):
+        self.batches = batches
+        self.checkpoint_table = checkpoint_table
+        self.checkpoints = dict(checkpoints or {})
+        self.corrupt = set(corrupt)
+        self.inserted = []
+        self.open_connections = 0
+        self.peak_connections = 0
+
+    async def connect(self):
+        self.open_connections += 1
+        self.peak_connections = max(self.peak_connections, self.open_connections)
+        return FakeConnection(self)
+
+
+class FakeTransaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    async def __aenter__(self):
+        self.conn.staged = []
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            for key, checksum in self.conn.staged:
+                self.conn.db.checkpoints[key] = checksum
+        return False
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.staged = []
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    async def fetchval(self, query):
+        if 'orbt_migration_checkpoints' in query:
+            return self.db.checkpoint_table
+        return True
+
+    async def fetch(self, query, *args):
+        if 'orbt_migration_checkpoints' in query:
+            return [{'batch_key': k, 'checksum': c} for k, c in self.db.checkpoints.items()]
+        return self.db.batches
+
+    async def fetchrow(self, query, key):
+        expected = next(b for b in self.db.batches if b['batch_key'] == key)
+        checksum = 'mismatch' if key in self.db.corrupt else expected['checksum']
+        return {'row_count': expected['row_count'], 'checksum': checksum}
+
+    async def execute(self, query, *args):
+        if 'INSERT INTO shq.orbt_doctrine_hierarchy' in query:
+            self.db.inserted.append(args[0])
+            await asyncio.sleep(0.001)
+        elif 'INSERT INTO shq.orbt_migration_checkpoints' in query:
+            self.staged.append((args[1], args[5]))
+
+    async def close(self):
+        self.db.open_connections -= 1
+
+
+class TestDoctrineMigration:
+    """Test the batched doctrine migration."""
+
+    def test_partition_expression_depth(self):
+        """Test that batches are keyed on the configured section_number prefix."""
+        migration = DoctrineMigration(connect=None, prefix_depth=3)
+
+        assert "[1:3]" in migration.plan_query
+        assert "d.section_number" in migration.insert_sql
+        with pytest.raises(ValueError):
+            DoctrineMigration(connect=None, prefix_depth=6)
+
+    def test_full_run_checkpoints_every_batch(self):
+        """Test that every batch is migrated, verified and checkpointed."""
+        db = FakeDatabase([batch('1.01'), batch('1.02', 5), batch('1.05', 20)])
+
+        result = asyncio.run(DoctrineMigration(db.connect, workers=2).run())
+
+        assert result['status'] == 'completed'
+        assert result['migrated_rows'] == 35
+        assert sorted(db.inserted) == ['1.01', '1.02', '1.05']
+        assert set(db.checkpoints) == {'1.01', '1.02', '1.05'}
+        assert db.open_connections == 0
+
+    def test_resume_skips_unchanged_batches(self):
+        """Test that checkpointed batches are skipped unless their checksum changed."""
+        db = FakeDatabase(
+            [batch('1.01'), batch('1.02'), batch('1.05')],
+            checkpoints={'1.01': 'sum-1.01', '1.02': 'stale-checksum'}
+        )
+
+        result = asyncio.run(DoctrineMigration(db.connect).run())
+
+        assert sorted(db.inserted) == ['1.02', '1.05']
+        assert result['skipped'] == 1
+
+        db.inserted = []
+        asyncio.run(DoctrineMigration(db.connect).run(restart=True))
+        assert sorted(db.inserted) == ['1.01', '1.02', '1.05']
+
+    def test_failed_verification_is_not_checkpointed(self):
+        """Test that a checksum mismatch fails only its own batch."""
+        db = FakeDatabase([batch('1.01'), batch('1.02')], corrupt={'1.02'})
+
+        result = asyncio.run(DoctrineMigration(db.connect).run())
+
+        assert result['status'] == 'failed'
+        assert result['failed'][0]['batch_key'] == '1.02'
+        assert 'verification failed' in result['failed'][0]['error']
+        assert set(db.checkpoints) == {'1.01'}
+
+    def test_migrate_batch_raises_on_row_count_mismatch(self):
+        """Test that a row count mismatch raises MigrationError."""
+        db = FakeDatabase([batch('1.01', rows=10)])
+        conn = asyncio.run(db.connect())
+
+        with pytest.raises(MigrationError):
+            asyncio.run(DoctrineMigration(db.connect).migrate_batch(conn, batch('1.01', rows=11)))
+
+    def test_missing_checkpoint_table_fails_before_migrating(self):
+        """Test that the migration relies on the schema file's checkpoint table."""
+        db = FakeDatabase([batch('1.01')], checkpoint_table=False)
+
+        result = asyncio.run(DoctrineMigration(db.connect).run())
+
+        assert result['status'] == 'failed'
+        assert 'complete-heir-schema.sql' in result['message']
+        assert db.inserted == []
+        assert db.open_connections == 0
+
+    def test_workers_bounded(self):
+        """Test that no more than the configured number of connections migrate at once."""
+        db = FakeDatabase([batch(f'1.{n:02d}') for n in range(12)])
+
+        asyncio.run(DoctrineMigration(db.connect, workers=3).run())
+
+        assert len(db.inserted) == 12
+        assert db.peak_connections == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
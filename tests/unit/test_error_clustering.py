@@ -0,0 +1,160 @@
+"""
+HEIR System - Error Clustering Tests
+Tests MinHash signatures, LSH cluster assignment and cluster persistence.
+"""
+
+import asyncio
+
+import pytest
+
+from orbt.error_clustering import ErrorClusterIndex, MinHasher, error_text, shingles, similarity
+
+STACK = "\n".join([
+    "Traceback (most recent call last):",
+    "  File \"/app/agents/database_specialist.py\", line 118, in run_query",
+    "  File \"/app/db/pool.py\", line 52, in acquire",
+    "  File \"/usr/lib/python3.11/site-packages/asyncpg/pool.py\", line 871, in _acquire",
+    "  File \"/usr/lib/python3.11/asyncio/tasks.py\", line 479, in wait_for",
+    "asyncio.exceptions.TimeoutError",
+])
+
+
+class FakeConnection:
+    """In-memory orbt_error_clusters"""
+
+    def __init__(self):
+        self.rows = []
+        self.now = 0.0
+
+    async def fetch(self, query, last_id, window):
+        return [row for row in self.rows if row['id'] > last_id and row['last_seen'] >= self.now - window]
+
+    async def execute(self, query, cluster_ids):
+        for row in self.rows:
+            if row['cluster_id'] in cluster_ids:
+                row['last_seen'] = self.now
+
+    async def executemany(self, query, args):
+        existing = {row['cluster_id'] for row in self.rows}
+        for cluster_id, signature, message in args:
+            if cluster_id not in existing:
+                self.rows.append({'id': len(self.rows) + 1, 'cluster_id': cluster_id,
+                                  'minhash_signature': signature, 'representative_message': message,
+                                  'last_seen': self.now})
+
+
+class TestErrorClustering:
+    """Test near-duplicate error clustering."""
+
+    def test_signature_estimates_jaccard(self):
+        """Test that signature similarity tracks shingle-set Jaccard similarity."""
+        hasher = MinHasher(num_perm=256)
+        a = shingles("alpha beta gamma delta epsilon zeta eta theta iota kappa")
+        b = shingles("alpha beta gamma delta epsilon zeta eta theta lambda mu")
+
+        jaccard = len(a & b) / len(a | b)
+        estimate = similarity(hasher.signature(a), hasher.signature(b))
+
+        assert abs(estimate - jaccard) < 0.1
+        assert hasher.signature(a) == MinHasher(num_perm=256).signature(a)
+
+    def test_near_duplicates_share_cluster(self):
+        """Test that changed line numbers, reworded text and an extra frame cluster together."""
+        index = ErrorClusterIndex()
+        base = index.assign("Database connection timeout after 30s on pool main", STACK)
+
+        assert index.assign("Database connection timeout after 45s on pool main",
+                            STACK.replace("line 52", "line 57")) == base
+        assert index.assign("Database connection timed out after 30s on pool main",
+                            STACK.replace("  File \"/app/db/pool.py\"",
+                                          "  File \"/app/db/retry.py\", line 9, in wrapper\n  File \"/app/db/pool.py\"")) == base
+        assert len(index) == 1
+
+    def test_different_failures_get_different_clusters(self):
+        """Test that unrelated errors are not merged."""
+        index = ErrorClusterIndex()
+        timeout = index.assign("Database connection timeout after 30s on pool main", STACK)
+        declined = index.assign("Stripe payment declined for customer cus_123: card_declined",
+                                "  File \"/app/billing/charge.py\", line 40, in charge\nstripe.error.CardError")
+
+        assert timeout != declined
+        assert len(index) == 2
+
+    def test_repeated_text_skips_minhash(self):
+        """Test that identical normalised text is served from the text cache."""
+        index = ErrorClusterIndex()
+        index.assign("Render deployment dep-1 exited with status 1", None)
+        index.assign("Render deployment dep-2 exited with status 137", None)
+
+        assert index.misses == 1
+        assert index.hits == 1
+        assert error_text("Status 1", "Line 2") == "status <n> line <n>"
+
+    def test_cluster_ids_agree_across_processes(self):
+        """Test that a cluster published by one index is reused by another."""
+        conn = FakeConnection()
+        api, daemon = ErrorClusterIndex(), ErrorClusterIndex()
+
+        cluster_id = api.assign("Database connection timeout after 30s on pool main", STACK)
+        assert api.pending
+        assert asyncio.run(api.flush(conn)) == 1
+        assert api.pending == []
+
+        assert asyncio.run(daemon.refresh(conn)) == 1
+        assert daemon.assign("Database connection timeout after 45s on pool main",
+                             STACK.replace("line 118", "line 120")) == cluster_id
+        assert daemon.pending == []
+        assert asyncio.run(daemon.refresh(conn)) == 0
+
+    def test_failed_flush_keeps_pending(self):
+        """Test that clusters stay pending when the insert fails."""
+        class BrokenConnection:
+            async def executemany(self, query, args):
+                raise ConnectionError("database unavailable")
+
+        index = ErrorClusterIndex()
+        index.assign("Schema validation failed: field email is required", None)
+
+        with pytest.raises(ConnectionError):
+            asyncio.run(index.flush(BrokenConnection()))
+        assert len(index.pending) == 1
+
+    def test_least_recently_matched_cluster_evicted(self):
+        """Test that the index keeps at most max_clusters representatives."""
+        index = ErrorClusterIndex(max_clusters=2)
+        timeout = index.assign("Database connection timeout after 30s on pool main", STACK)
+        index.assign("Stripe payment declined for customer 42: card expired")
+        assert index.assign("Database connection timeout after 30s on pool main", STACK) == timeout
+
+        index.assign("Render deploy failed: build step 3 exited with code 2")
+
+        assert len(index) == 2 and index.stats()['evicted'] == 1
+        assert index.match(index.hasher.signature(shingles(error_text("Stripe payment declined for customer 7: card expired")))) is None
+        assert index.match(index.hasher.signature(shingles(error_text("Database connection timeout after 30s on pool main", STACK)))) == timeout
+
+    def test_refresh_loads_only_recently_active_clusters(self):
+        """Test that dormant clusters are skipped and matches keep a cluster active."""
+        conn = FakeConnection()
+        api = ErrorClusterIndex()
+        timeout = api.assign("Database connection timeout after 30s on pool main", STACK)
+        api.assign("Stripe payment declined for customer 42: card expired")
+        asyncio.run(api.flush(conn))
+        asyncio.run(api.flush_last_seen(conn))
+
+        conn.now = 40 * 86400.0
+        api.assign("Database connection timeout after 45s on pool main", STACK)
+        assert asyncio.run(api.flush_last_seen(conn)) == 1
+        assert next(row for row in conn.rows if row['cluster_id'] == timeout)['last_seen'] == conn.now
+
+        daemon = ErrorClusterIndex(active_window_seconds=30 * 86400)
+        assert asyncio.run(daemon.refresh(conn)) == 1
+        assert daemon.assign("Database connection timeout after 60s on pool main", STACK) == timeout
+
+    def test_invalid_banding(self):
+        """Test that num_perm must split evenly into bands."""
+        with pytest.raises(ValueError):
+            ErrorClusterIndex(num_perm=64, bands=10)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
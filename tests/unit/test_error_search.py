@@ -0,0 +1,111 @@
+"""
+HEIR System - Error Search Tests
+Tests search query construction, window pruning and highlight snippets.
+"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from orbt.error_search import (
+    HIGHLIGHT_END, HIGHLIGHT_START, SearchRequestError, build_search_query, escape_like, highlight, search_errors
+)
+
+END = datetime(2026, 3, 1, tzinfo=timezone.utc)
+START = END - timedelta(days=7)
+
+
+class FakeSearchConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    async def fetch(self, query, *args):
+        self.calls.append((query, args))
+        return self.rows
+
+
+def result_row(message, stack=None, **extra):
+    row = {
+        'error_id': '01.99.01.00.25000.001', 'timestamp': END, 'agent_id': 'database-specialist',
+        'agent_hierarchy': 'specialist', 'orbt_status': 'RED', 'error_type': 'connection',
+        'error_cluster_id': None, 'resolved': False, 'rank': 0.5,
+        'error_message': message, 'stack_head': stack,
+    }
+    row.update(extra)
+    return row
+
+
+class TestBuildSearchQuery:
+    """Test the SQL generated for each search mode."""
+
+    def test_text_search_uses_index_expression_and_window(self):
+        """Test that text search matches the GIN expression inside the time window."""
+        sql, args = build_search_query(
+            'connection reset', 'text', START, END, agent_ids={'database-specialist'}, statuses={'RED'}, limit=20
+        )
+        assert "websearch_to_tsquery('english', $1)" in sql
+        assert 'orbt_error_search_vector(error_message, error_stack) @@ q.query' in sql
+        assert 'timestamp >= $2 AND timestamp < $3' in sql
+        assert 'ts_rank_cd' in sql and 'ts_headline' in sql
+        assert args == ['connection reset', START, END, ['database-specialist'], ['RED'], 2000, 20]
+
+    def test_substring_search_escapes_pattern(self):
+        """Test that LIKE wildcards in the search text match literally."""
+        sql, args = build_search_query('100%_done', 'substring', START, END)
+        assert args[:2] == ['100%_done', '%100\\%\\_done%']
+        assert 'error_message ILIKE $2' in sql
+        assert 'LEFT(error_stack, 4000) ILIKE $2' in sql
+        assert 'word_similarity($1, error_message)' in sql
+        assert escape_like('a\\b') == 'a\\\\b'
+
+    def test_invalid_searches_rejected(self):
+        """Test that empty text, short substrings, bad modes and empty windows are refused."""
+        with pytest.raises(SearchRequestError):
+            build_search_query('  ', 'text', START, END)
+        with pytest.raises(SearchRequestError):
+            build_search_query('ab', 'substring', START, END)
+        with pytest.raises(SearchRequestError):
+            build_search_query('timeout', 'regex', START, END)
+        with pytest.raises(SearchRequestError):
+            build_search_query('timeout', 'text', END, START)
+
+
+class TestSearchResults:
+    """Test result shaping and highlight snippets."""
+
+    def test_highlight(self):
+        """Test that the first match is wrapped and long text is trimmed around it."""
+        text = 'x' * 200 + ' ECONNRESET while calling payments ' + 'y' * 200
+        snippet = highlight(text, 'econnreset', context=10)
+        assert snippet == f'...{"x" * 9} {HIGHLIGHT_START}ECONNRESET{HIGHLIGHT_END} while cal...'
+        assert highlight('short', 'missing') is None
+        assert highlight(None, 'anything') is None
+
+    def test_substring_results_get_snippets(self):
+        """Test that substring results carry message and stack snippets."""
+        conn = FakeSearchConnection([
+            result_row('Pool exhausted: ECONNRESET on db-3', 'File "pool.py", line 9, in acquire'),
+            result_row('Retry budget spent', 'raise ConnectionError("ECONNRESET")'),
+        ])
+        results = asyncio.run(search_errors(conn, 'econnreset', 'substring', START, END))
+
+        assert results[0]['message_snippet'] == f'Pool exhausted: {HIGHLIGHT_START}ECONNRESET{HIGHLIGHT_END} on db-3'
+        assert results[0]['stack_snippet'] is None
+        assert results[1]['message_snippet'] is None
+        assert HIGHLIGHT_START in results[1]['stack_snippet']
+        assert results[0]['rank'] == 0.5
+        assert 'error_message' not in results[0]
+
+    def test_text_results_use_server_headlines(self):
+        """Test that text-mode snippets come from ts_headline."""
+        headline = f'Database {HIGHLIGHT_START}timeout{HIGHLIGHT_END} after 30s'
+        conn = FakeSearchConnection([result_row(None, message_snippet=headline, stack_snippet=None)])
+        results = asyncio.run(search_errors(conn, 'timeout', 'text', START, END))
+        assert results[0]['message_snippet'] == headline
+        assert results[0]['agent_id'] == 'database-specialist'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,70 @@
+"""
+HEIR System - Fast JSON Rendering Tests
+Tests that fast_json renders records, datetimes and decimals like the old path.
+"""
+
+import json
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+from orbt import fast_json
+
+
+class FakeRecord:
+    """Minimal asyncpg.Record stand-in."""
+
+    def __init__(self, data):
+        self._data = data
+
+    def items(self):
+        return self._data.items()
+
+
+ROW = {
+    'error_id': '01.99.01.00.25000.001',
+    'timestamp': datetime(2025, 3, 1, 12, 30, 5, 250000, tzinfo=timezone.utc),
+    'day': date(2025, 3, 1),
+    'memory_usage_mb': Decimal('512.25'),
+    'token_usage': Decimal('1200'),
+    'trace_id': UUID('12345678-1234-5678-1234-567812345678'),
+    'resolved': False,
+    'resolution_notes': None,
+}
+
+EXPECTED = {
+    'error_id': '01.99.01.00.25000.001',
+    'timestamp': '2025-03-01T12:30:05.250000+00:00',
+    'day': '2025-03-01',
+    'memory_usage_mb': 512.25,
+    'token_usage': 1200,
+    'trace_id': '12345678-1234-5678-1234-567812345678',
+    'resolved': False,
+    'resolution_notes': None,
+}
+
+
+class TestFastJson:
+    """Test JSON rendering of endpoint payloads."""
+
+    @pytest.mark.parametrize('dumps', [fast_json.dumps, fast_json.dumps_stdlib])
+    def test_records_rendered_directly(self, dumps):
+        """Test that records inside a payload render like dict() + isoformat()."""
+        body = dumps({'status': 'success', 'errors': [FakeRecord(ROW)]})
+        assert isinstance(body, bytes)
+        assert json.loads(body) == {'status': 'success', 'errors': [EXPECTED]}
+
+    def test_non_ascii_kept(self):
+        """Test that non-ASCII text is emitted as UTF-8, not escaped."""
+        assert fast_json.dumps_stdlib({'message': 'délai'}) == '{"message":"délai"}'.encode('utf-8')
+
+    def test_unknown_type_rejected(self):
+        """Test that unsupported values raise TypeError."""
+        with pytest.raises(TypeError):
+            fast_json.dumps({'value': object()})
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,102 @@
+"""
+HEIR System - Heavy Hitter Sketch Tests
+Tests SpaceSaving error bounds and sliding-window top-K queries.
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from orbt.heavy_hitters import HeavyHitters, SlidingTopK, SpaceSaving
+
+
+class TestSpaceSaving:
+    """Test the SpaceSaving summary."""
+
+    def test_exact_below_capacity(self):
+        """Test that counts are exact while every key fits."""
+        summary = SpaceSaving(capacity=10)
+        for key in "aababcabcd":
+            summary.offer(key)
+
+        assert {k: (c, e) for k, c, e, _ in summary.items()} == {
+            'a': (4, 0), 'b': (3, 0), 'c': (2, 0), 'd': (1, 0)
+        }
+        assert summary.min_count == 0
+
+    def test_bounds_on_skewed_stream(self):
+        """Test that true counts lie within [count - error, count] and memory stays bounded."""
+        rng = random.Random(7)
+        summary = SpaceSaving(capacity=50)
+        truth = Counter()
+        for _ in range(50000):
+            key = f"agent-{int(rng.paretovariate(1.1))}"
+            summary.offer(key)
+            truth[key] += 1
+
+        assert len(summary) == 50
+        for key, count, error, _ in summary.items():
+            assert count - error <= truth[key] <= count
+        top = sorted(summary.items(), key=lambda item: -item[1])[:5]
+        assert [item[0] for item in top] == [key for key, _ in truth.most_common(5)]
+
+    def test_eviction_keeps_label_of_survivors(self):
+        """Test that labels follow their keys through evictions."""
+        summary = SpaceSaving(capacity=2)
+        summary.offer('a', 'first')
+        summary.offer('a', 'first')
+        summary.offer('b', 'second')
+        summary.offer('c', 'third')
+
+        labels = {k: label for k, _, _, label in summary.items()}
+        assert labels == {'a': 'first', 'c': 'third'}
+        assert summary.min_count == 2
+
+
+class TestSlidingWindows:
+    """Test windowed top-K queries."""
+
+    def test_window_slides(self):
+        """Test that events older than the window stop counting."""
+        sketch = SlidingTopK(window_seconds=300, panes=5, capacity=10)
+        for second in range(0, 60):
+            sketch.offer('old', now=second)
+        for second in range(240, 300):
+            sketch.offer('new', now=second)
+
+        assert [i['key'] for i in sketch.top(now=299)['items']] == ['new', 'old']
+        assert [i['key'] for i in sketch.top(now=301)['items']] == ['new']
+        assert sketch.top(now=1000)['total'] == 0
+
+    def test_merged_error_covers_missing_panes(self):
+        """Test that a key absent from a full pane carries that pane's minimum as error."""
+        sketch = SlidingTopK(window_seconds=120, panes=2, capacity=1)
+        sketch.offer('a', now=0)
+        sketch.offer('b', now=61)
+
+        items = {i['key']: i for i in sketch.top(now=61)['items']}
+        assert items['a']['max_error'] == 1
+        assert items['b']['max_error'] == 1
+
+    def test_agents_and_patterns(self):
+        """Test the per-dimension, per-window API."""
+        hitters = HeavyHitters(capacity=20)
+        for i in range(100):
+            hitters.record('render-database-specialist', 'CL-db', 'Database timeout', now=1000 + i)
+        hitters.record('stripe-payment-specialist', 'CL-pay', 'Card declined', now=1050)
+
+        agents = hitters.top('agents', '5m', now=1100)
+        assert agents['total'] == 101
+        assert agents['items'][0] == {'key': 'render-database-specialist', 'count': 100,
+                                      'max_error': 0, 'label': None}
+
+        patterns = hitters.top('patterns', '24h', limit=1, now=1100)
+        assert [(i['key'], i['label']) for i in patterns['items']] == [('CL-db', 'Database timeout')]
+
+        with pytest.raises(ValueError):
+            hitters.top('agents', '7d')
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,226 @@
+"""
+HEIR System - Ingest Deduplication Tests
+Tests the per-agent dedup window and its batched repeat_count flush.
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from orbt.ingest_dedup import FLUSH_SQL, IngestDedupWindow
+
+
+class FakeConnection:
+    """Records executemany batches; fails while `fail` is set."""
+
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+
+    async def executemany(self, query, args):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        self.batches.append(list(args))
+
+
+def write(window, key, error_id, now):
+    """Ingest an occurrence that must be written as its own row"""
+    assert window.hit(key, now=now) is None
+    window.remember(key, error_id, {'cluster_id': 'CL-1'}, now=now)
+
+
+class TestIngestDedupWindow:
+    """Test collapsing repeated errors into their first row."""
+
+    def test_repeats_share_first_error_id(self):
+        """Test that repeats after the second occurrence return its row and are counted."""
+        window = IngestDedupWindow(window_seconds=10)
+        key = window.key('database-specialist', 'connection', 'timeout after 3s')
+        write(window, key, 'ERR-1', now=0)
+        write(window, key, 'ERR-2', now=1)
+
+        for second in range(2, 5):
+            entry = window.hit(key, now=second)
+            assert entry.error_id == 'ERR-2'
+        assert entry.occurrences == 5
+        assert entry.response == {'cluster_id': 'CL-1'}
+
+        # The same message from another agent is not folded
+        assert window.hit(window.key('payment-specialist', 'connection', 'timeout after 3s'), now=1) is None
+
+    def test_second_occurrence_always_written(self):
+        """Test that the Rule 5 trigger occurrence is inserted, never folded into the first row."""
+        window = IngestDedupWindow(window_seconds=10)
+        conn = FakeConnection()
+        key = window.key('database-specialist', 'connection', 'timeout after 3s')
+        write(window, key, 'ERR-1', now=0)
+
+        # The second occurrence gets its own insert (which escalates) ...
+        assert window.hit(key, now=1) is None
+        window.remember(key, 'ERR-2', {}, now=1)
+        # ... and only the third onward is folded, into that row
+        assert window.hit(key, now=2).error_id == 'ERR-2'
+
+        asyncio.run(window.flush(conn, now=3))
+        assert conn.batches == [[('ERR-2', 1)]]
+        assert window.stats()['rows_written'] == 2
+
+    def test_messages_differing_in_numbers_not_folded(self):
+        """Test that messages differing only in numbers each get their own rows, as the trigger groups them."""
+        window = IngestDedupWindow(window_seconds=10)
+        conn = FakeConnection()
+        messages = ['timeout after 30s', 'timeout after 31s', 'timeout after 32s']
+        keys = [window.key('a', 'connection', message) for message in messages]
+        assert len(set(keys)) == 3
+
+        for second, key in enumerate(keys):
+            write(window, key, f'ERR-{second}', now=second)
+        assert len(window) == 3
+        assert window.stats()['rows_written'] == 3
+
+        # Each message's second occurrence is written too, not folded into another message's row
+        for second, key in enumerate(keys):
+            assert window.hit(key, now=3 + second) is None
+        asyncio.run(window.flush(conn, now=6))
+        assert conn.batches == []
+
+    def test_flush_batches_pending_counts(self):
+        """Test that one flush writes every pending count in a single batch."""
+        window = IngestDedupWindow(window_seconds=10)
+        conn = FakeConnection()
+        for agent, error_id in (('a', 'ERR-A'), ('b', 'ERR-B'), ('c', 'ERR-C')):
+            write(window, window.key(agent, 'x', 'boom'), error_id + '1', now=0)
+            write(window, window.key(agent, 'x', 'boom'), error_id, now=0)
+        for _ in range(3):
+            window.hit(window.key('a', 'x', 'boom'), now=1)
+        window.hit(window.key('b', 'x', 'boom'), now=1)
+
+        assert asyncio.run(window.flush(conn, now=2)) == 2
+        assert sorted(conn.batches[0]) == [('ERR-A', 3), ('ERR-B', 1)]
+        assert not window.has_pending
+        assert asyncio.run(window.flush(conn, now=3)) == 0
+        assert len(conn.batches) == 1
+
+    def test_failed_flush_keeps_counts(self):
+        """Test that counts survive a failed flush and are written on the next one."""
+        window = IngestDedupWindow(window_seconds=10)
+        conn = FakeConnection()
+        key = window.key('a', 'x', 'boom')
+        write(window, key, 'ERR-A1', now=0)
+        write(window, key, 'ERR-A', now=0)
+        window.hit(key, now=1)
+
+        conn.fail = True
+        with pytest.raises(ConnectionError):
+            asyncio.run(window.flush(conn, now=2))
+        window.hit(key, now=3)
+
+        conn.fail = False
+        asyncio.run(window.flush(conn, now=4))
+        assert conn.batches == [[('ERR-A', 2)]]
+
+    def test_expired_window_opens_new_row(self):
+        """Test that a repeat after the window is written, and the old row still gets its counts."""
+        window = IngestDedupWindow(window_seconds=10)
+        conn = FakeConnection()
+        key = window.key('a', 'x', 'boom')
+        write(window, key, 'ERR-0', now=0)
+        write(window, key, 'ERR-1', now=0)
+        window.hit(key, now=5)
+
+        # A new window starts over: first and second occurrence written again
+        write(window, key, 'ERR-2', now=11)
+        assert window.hit(key, now=12) is None
+        window.remember(key, 'ERR-3', {}, now=12)
+        window.hit(key, now=13)
+
+        asyncio.run(window.flush(conn, now=13))
+        assert sorted(conn.batches[0]) == [('ERR-1', 1), ('ERR-3', 1)]
+
+        asyncio.run(window.flush(conn, now=30))
+        assert len(window) == 0
+
+    def test_full_table_writes_through(self):
+        """Test that keys past max_entries are written without a window."""
+        window = IngestDedupWindow(window_seconds=10, max_entries=1)
+        assert window.remember(window.key('a', 'x', 'boom'), 'ERR-A', {}, now=0)
+        assert not window.remember(window.key('b', 'x', 'boom'), 'ERR-B', {}, now=0)
+        assert window.hit(window.key('b', 'x', 'boom'), now=1) is None
+
+    def test_accepted_events_replayed(self):
+        """Test that a resent event gets its original answer and the oldest events are forgotten."""
+        window = IngestDedupWindow(max_events=2)
+        assert window.replayed('a\nev-1') is None
+        window.accept('a\nev-1', 'ERR-1', {'status': 'logged'})
+        window.accept('a\nev-2', 'ERR-2', {'status': 'logged'})
+        assert window.replayed('a\nev-1') == ('ERR-1', {'status': 'logged'})
+
+        window.accept('a\nev-3', 'ERR-3', {'status': 'spooled'})
+        assert window.replayed('a\nev-1') is None
+        assert window.replayed('a\nev-3') == ('ERR-3', {'status': 'spooled'})
+        # Replays are not repeats
+        assert window.stats()['deduplicated'] == 0
+
+    def test_stats(self):
+        """Test write-reduction reporting."""
+        window = IngestDedupWindow()
+        assert window.stats()['write_reduction'] == 0.0
+
+        key = window.key('a', 'x', 'boom')
+        write(window, key, 'ERR-A1', now=0)
+        write(window, key, 'ERR-A', now=0)
+        for second in range(6):
+            window.hit(key, now=second)
+
+        stats = window.stats()
+        assert stats == {'open_windows': 1, 'rows_written': 2, 'deduplicated': 6, 'write_reduction': 0.75}
+
+
+@pytest.mark.integration
+class TestRepeatEscalationTrigger:
+    """Test the schema's Rule 5 check on folded repeats (database/orbt-error-log-schema.sql)."""
+
+    def test_folded_second_occurrence_escalates(self):
+        """Test that a repeat_count flush alone escalates a pattern seen twice."""
+        database_url = os.getenv('TEST_DATABASE_URL')
+        if not database_url:
+            pytest.skip("TEST_DATABASE_URL not set, skipping integration test")
+        asyncpg = pytest.importorskip('asyncpg')
+
+        async def run():
+            conn = await asyncpg.connect(database_url)
+            transaction = conn.transaction()
+            await transaction.start()
+            try:
+                error_id = f"TEST.{uuid.uuid4().hex[:12]}"
+                await conn.execute("""
+                    INSERT INTO orbt_error_log (error_id, orbt_status, agent_id, agent_hierarchy, error_type, error_message)
+                    VALUES ($1, 'YELLOW', 'dedup-test-agent', 'specialist', 'connection', $2)
+                """, error_id, f"dedup trigger test {error_id}")
+                assert await conn.fetchval(
+                    "SELECT requires_human FROM orbt_error_log WHERE error_id = $1", error_id
+                ) is False
+
+                # The second occurrence folded into the first row's repeat_count
+                await conn.execute(FLUSH_SQL, error_id, 1)
+
+                row = await conn.fetchrow(
+                    "SELECT requires_human, occurrence_count FROM orbt_error_log WHERE error_id = $1", error_id
+                )
+                escalations = await conn.fetchval(
+                    "SELECT COUNT(*) FROM orbt_escalation_queue WHERE error_id = $1", error_id
+                )
+                return row, escalations
+            finally:
+                await transaction.rollback()
+                await conn.close()
+
+        row, escalations = asyncio.run(run())
+        assert row['requires_human'] and row['occurrence_count'] == 2
+        assert escalations == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,182 @@
+"""
+HEIR System - Ingest Spool Tests
+Tests durable append, crash recovery and in-order batched replay.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from orbt.ingest_spool import IngestSpool, SpoolFull, segment_name
+
+
+class FakeConnection:
+    async def fetchval(self, query):
+        return 1
+
+
+class RecordingWriter:
+    """Batch writer that records batches; fails while `fail` is set."""
+
+    def __init__(self, reject=()):
+        self.batches = []
+        self.fail = False
+        # Records the database refuses (as a CHECK constraint would)
+        self.reject = set(reject)
+
+    async def __call__(self, conn, kind, records):
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        if any(record['data']['n'] in self.reject for record in records):
+            raise ValueError("new row violates check constraint")
+        self.batches.append((kind, [record['data']['n'] for record in records]))
+
+
+async def append_all(spool, kind, numbers):
+    return await asyncio.gather(*(spool.append(kind, {'n': n}) for n in numbers))
+
+
+class TestIngestSpool:
+    """Test spooling writes while the database is unavailable."""
+
+    def test_replay_in_order_by_kind(self, tmp_path):
+        """Test that replay keeps order and batches consecutive records of one kind."""
+        spool = IngestSpool(str(tmp_path))
+        writer = RecordingWriter()
+
+        async def run():
+            await append_all(spool, 'error', [1, 2])
+            await spool.append('metric', {'n': 3})
+            await append_all(spool, 'error', [4, 5])
+            return await spool.replay(FakeConnection(), writer)
+
+        assert asyncio.run(run()) == 5
+        assert writer.batches == [('error', [1, 2]), ('metric', [3]), ('error', [4, 5])]
+        assert spool.depth == 0
+
+    def test_group_commit_receipts(self, tmp_path):
+        """Test that concurrent appends share a commit and get distinct receipts."""
+        spool = IngestSpool(str(tmp_path))
+        receipts = asyncio.run(append_all(spool, 'error', range(50)))
+
+        assert len(set(receipts)) == 50
+        assert spool.stats()['depth'] == 50
+
+    def test_failed_replay_keeps_records(self, tmp_path):
+        """Test that a failed batch stays spooled and the breaker stays engaged."""
+        spool = IngestSpool(str(tmp_path))
+        spool.trip('connection refused')
+        writer = RecordingWriter()
+        writer.fail = True
+
+        async def run():
+            await append_all(spool, 'error', [1, 2, 3])
+            with pytest.raises(ConnectionError):
+                await spool.replay(FakeConnection(), writer)
+            assert spool.should_spool()
+            writer.fail = False
+            await spool.replay(FakeConnection(), writer)
+
+        asyncio.run(run())
+        assert writer.batches == [('error', [1, 2, 3])]
+        assert not spool.should_spool()
+
+    def test_rejected_record_dead_lettered(self, tmp_path):
+        """Test that a row the database rejects is set aside and replay moves past it."""
+        spool = IngestSpool(str(tmp_path))
+        spool.trip('connection refused')
+        writer = RecordingWriter(reject={3})
+
+        async def run():
+            await append_all(spool, 'error', [1, 2, 3, 4])
+            await spool.append('metric', {'n': 5})
+            return await spool.replay(FakeConnection(), writer)
+
+        assert asyncio.run(run()) == 4
+        assert writer.batches == [('error', [1]), ('error', [2]), ('error', [4]), ('metric', [5])]
+        assert spool.depth == 0
+        assert not spool.should_spool()
+        assert spool.stats()['dead_lettered'] == 1
+
+        dead = spool.dead_letters()
+        assert [record['data']['n'] for record in dead] == [3]
+        assert 'check constraint' in dead[0]['error']
+
+        # The cursor moved past it for good
+        spool.close()
+        assert IngestSpool(str(tmp_path)).depth == 0
+
+    def test_recovery_after_restart(self, tmp_path):
+        """Test that unreplayed records survive a restart, from the saved cursor."""
+        spool = IngestSpool(str(tmp_path))
+        writer = RecordingWriter()
+
+        async def first_run():
+            await append_all(spool, 'error', [1, 2])
+            await spool.replay(FakeConnection(), writer, batch_size=2, max_batches=1)
+            await append_all(spool, 'error', [3, 4])
+
+        asyncio.run(first_run())
+        spool.close()
+
+        restarted = IngestSpool(str(tmp_path))
+        assert restarted.depth == 2
+        assert restarted.should_spool()
+        asyncio.run(restarted.replay(FakeConnection(), writer))
+        assert writer.batches == [('error', [1, 2]), ('error', [3, 4])]
+
+    def test_torn_tail_truncated(self, tmp_path):
+        """Test that a partial record from a crash mid-append is discarded."""
+        spool = IngestSpool(str(tmp_path))
+        asyncio.run(append_all(spool, 'error', [1, 2]))
+        spool.close()
+        with open(os.path.join(str(tmp_path), segment_name(1)), 'ab') as handle:
+            handle.write(b'\x00\x00\x01\x00partial')
+
+        restarted = IngestSpool(str(tmp_path))
+        writer = RecordingWriter()
+        asyncio.run(restarted.append('error', {'n': 3}))
+        asyncio.run(restarted.replay(FakeConnection(), writer))
+        assert writer.batches == [('error', [1, 2, 3])]
+
+    def test_replayed_segments_deleted(self, tmp_path):
+        """Test that segments rotate by size and are removed once replayed."""
+        spool = IngestSpool(str(tmp_path), max_segment_bytes=200)
+        writer = RecordingWriter()
+
+        async def run():
+            for n in range(20):
+                await spool.append('error', {'n': n})
+            assert spool.stats()['segments'] > 1
+            await spool.replay(FakeConnection(), writer, batch_size=7)
+
+        asyncio.run(run())
+        assert [n for _, batch in writer.batches for n in batch] == list(range(20))
+        assert spool.stats()['segments'] == 1
+
+    def test_slow_write_trips_breaker(self, tmp_path):
+        """Test that an over-budget direct write routes later writes to the spool."""
+        spool = IngestSpool(str(tmp_path), latency_budget=0.5)
+        spool.record_write(0.1)
+        assert not spool.should_spool()
+        spool.record_write(2.0)
+        assert spool.should_spool()
+
+        asyncio.run(spool.replay(FakeConnection(), RecordingWriter()))
+        assert not spool.should_spool()
+
+    def test_full_spool_rejects(self, tmp_path):
+        """Test that appends past max_bytes raise SpoolFull."""
+        spool = IngestSpool(str(tmp_path), max_bytes=100)
+
+        async def run():
+            for n in range(10):
+                await spool.append('error', {'n': n, 'message': 'x' * 20})
+
+        with pytest.raises(SpoolFull):
+            asyncio.run(run())
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,149 @@
+"""
+HEIR System - Live Feed Tests
+Tests notification fan-out, subscriber filters, slow-consumer drops and resume.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from orbt.live_feed import LIVE_CHANNEL, LiveFeedHub, SubscriptionClosed, split_filter
+
+
+def error_event(agent_id, status='RED', message='Database timeout'):
+    return {'type': 'error', 'agent_id': agent_id, 'orbt_status': status, 'error_message': message}
+
+
+class FakeListenerConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.pop(channel, None)
+
+    def is_closed(self):
+        return self.closed
+
+    async def close(self):
+        self.closed = True
+
+
+class TestLiveFeedHub:
+    """Test fan-out to filtered subscribers."""
+
+    def test_filters(self):
+        """Test agent, status and type filters; system events reach everyone."""
+        async def run():
+            hub = LiveFeedHub()
+            db = hub.subscribe(agent_ids={'database-specialist'})
+            red = hub.subscribe(statuses={'RED'}, types={'error', 'status'})
+
+            hub.publish(error_event('database-specialist', 'YELLOW'))
+            hub.publish(error_event('payment-specialist', 'RED'))
+            hub.publish({'type': 'status', 'orbt_status': 'RED', 'previous_status': 'GREEN'})
+
+            db_events = [await db.get(0.01) for _ in range(2)]
+            red_events = [await red.get(0.01) for _ in range(2)]
+            assert await db.get(0.01) is None
+            return db_events, red_events
+
+        db_events, red_events = asyncio.run(run())
+        assert [(e.type, e.agent_id) for e in db_events] == [('error', 'database-specialist'), ('status', None)]
+        assert [(e.type, e.agent_id) for e in red_events] == [('error', 'payment-specialist'), ('status', None)]
+
+    def test_event_encoded_once(self):
+        """Test the SSE frame carries the id, type and JSON payload."""
+        async def run():
+            hub = LiveFeedHub()
+            subscription = hub.subscribe()
+            hub.publish(error_event('a'))
+            return await subscription.get(0.01)
+
+        event = asyncio.run(run())
+        lines = event.sse.decode().split('\n')
+        assert lines[0] == f'id: {event.id}'
+        assert lines[1] == 'event: error'
+        assert json.loads(lines[2][len('data: '):])['agent_id'] == 'a'
+
+    def test_slow_consumer_dropped(self):
+        """Test that a full queue drops that subscriber without affecting others."""
+        async def run():
+            hub = LiveFeedHub(queue_size=3)
+            slow = hub.subscribe()
+            fast = hub.subscribe()
+            received = []
+            for i in range(5):
+                hub.publish(error_event('a', message=f'#{i}'))
+                received.append(await fast.get(0.01))
+
+            assert slow.dropped and len(hub) == 1
+            # Queued events drain before the drop is reported
+            drained = [await slow.get(0.01) for _ in range(3)]
+            with pytest.raises(SubscriptionClosed):
+                await slow.get(0.01)
+            return hub, received, drained
+
+        hub, received, drained = asyncio.run(run())
+        assert len(received) == 5
+        assert len(drained) == 3
+        assert hub.stats()['dropped_subscribers'] == 1
+
+    def test_resume_from_last_event_id(self):
+        """Test that a reconnecting client gets the events it missed, and only this process's."""
+        async def run():
+            hub = LiveFeedHub()
+            first = hub.publish(error_event('a', message='first'))
+            hub.publish(error_event('a', message='second'))
+            hub.publish(error_event('b', message='other agent'))
+
+            resumed = hub.subscribe(agent_ids={'a'}, last_event_id=first.id)
+            missed = [json.loads((await resumed.get(0.01)).json)['error_message']]
+            assert await resumed.get(0.01) is None
+
+            foreign = hub.subscribe(last_event_id='ffff-1')
+            assert await foreign.get(0.01) is None
+            return missed
+
+        assert asyncio.run(run()) == ['second']
+
+    def test_notifications_published(self):
+        """Test that NOTIFY payloads on the live channel reach subscribers."""
+        conn = FakeListenerConnection()
+
+        async def connect():
+            return conn
+
+        async def run():
+            hub = LiveFeedHub()
+            subscription = hub.subscribe()
+            task = asyncio.create_task(hub.run(connect, check_interval=0.01))
+            await asyncio.sleep(0.02)
+            callback = conn.listeners[LIVE_CHANNEL]
+            callback(conn, 1, LIVE_CHANNEL, json.dumps(error_event('a')))
+            callback(conn, 1, LIVE_CHANNEL, 'not json')
+            event = await subscription.get(0.1)
+            stats = hub.stats()
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return event, stats
+
+        event, stats = asyncio.run(run())
+        assert event.agent_id == 'a'
+        assert stats['listening'] and stats['published'] == 1
+        assert conn.closed
+
+    def test_split_filter(self):
+        """Test comma-separated filter parsing."""
+        assert split_filter(None) is None
+        assert split_filter(' RED, YELLOW ,') == {'RED', 'YELLOW'}
+        assert split_filter(',') is None
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,240 @@
+"""
+HEIR System - Read Routing Tests
+Tests replica selection by replay lag, read-your-writes and primary fallback.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from orbt.read_routing import ReadRouter
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeServer:
+    """A primary (WAL position) or standby (replay position)."""
+
+    def __init__(self, name, lsn=0, in_recovery=False):
+        self.name = name
+        self.lsn = lsn
+        self.in_recovery = in_recovery
+        self.down = False
+        self.opened = 0
+
+    async def connect(self):
+        if self.down:
+            raise ConnectionRefusedError(f'{self.name} is down')
+        self.opened += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, server):
+        self.server = server
+        self.closed = False
+
+    async def fetchrow(self, query):
+        if self.server.down:
+            raise ConnectionResetError('connection lost')
+        if 'pg_current_wal_lsn' in query:
+            return (self.server.lsn,)
+        return {'in_recovery': self.server.in_recovery, 'replay_lsn': self.server.lsn}
+
+    async def fetchval(self, query):
+        return self.server.name
+
+    def is_closed(self):
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+    async def close(self):
+        self.closed = True
+
+
+def make_router(replica_count=1, **kwargs):
+    clock = FakeClock()
+    primary = FakeServer('primary', lsn=100)
+    replicas = [FakeServer(f'replica-{i}', lsn=100, in_recovery=True) for i in range(1, replica_count + 1)]
+    router = ReadRouter(
+        primary.connect, {replica.name: replica.connect for replica in replicas},
+        max_lag=5.0, check_interval=1.0, clock=clock, **kwargs
+    )
+    return router, clock, primary, replicas
+
+
+async def read_source(router, **kwargs):
+    async with router.connection(**kwargs) as conn:
+        return await conn.fetchval('SELECT current_database()')
+
+
+class TestReadRouter:
+    """Test routing decisions against fake primary/standby servers."""
+
+    def test_caught_up_replicas_serve_reads(self):
+        """Test that reads spread over caught-up replicas and connections are closed."""
+        router, clock, primary, replicas = make_router(replica_count=2)
+
+        async def run():
+            await router.check()
+            return [await read_source(router) for _ in range(4)]
+
+        sources = asyncio.run(run())
+        assert sorted(sources) == ['replica-1', 'replica-1', 'replica-2', 'replica-2']
+        assert router.stats()['replicas'][0]['lag_seconds'] == 0
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Test that a replica behind by more than max_lag is skipped."""
+        router, clock, primary, (replica,) = make_router()
+
+        async def run():
+            await router.check()
+            # The primary moves on; the replica stops replaying
+            for _ in range(7):
+                clock.now += 1
+                primary.lsn += 10
+                await router.check()
+            lagging = await read_source(router)
+
+            replica.lsn = primary.lsn
+            clock.now += 1
+            await router.check()
+            return lagging, await read_source(router)
+
+        lagging, recovered = asyncio.run(run())
+        assert lagging == 'primary'
+        assert recovered == 'replica-1'
+        assert router.primary_reads['lagging'] == 1
+
+    def test_read_your_writes(self):
+        """Test that an agent's reads stay on the primary until its write is replayed."""
+        router, clock, primary, (replica,) = make_router()
+
+        async def run():
+            await router.check()
+            clock.now += 0.5
+            primary.lsn = 150
+            router.note_write('database-specialist')
+
+            clock.now += 0.5
+            await router.check()
+            writer_before = await read_source(router, key='database-specialist')
+            other = await read_source(router, key='payment-specialist')
+
+            replica.lsn = 150
+            clock.now += 1
+            await router.check()
+            writer_after = await read_source(router, key='database-specialist')
+            return writer_before, other, writer_after
+
+        writer_before, other, writer_after = asyncio.run(run())
+        assert writer_before == 'primary'
+        assert other == 'replica-1'
+        assert writer_after == 'replica-1'
+        assert router.primary_reads['read_your_writes'] == 1
+
+    def test_unreachable_replica_taken_out_of_rotation(self):
+        """Test that a failed replica connection falls back and marks it down."""
+        router, clock, primary, (replica,) = make_router(unavailable_errors=(OSError,))
+
+        async def run():
+            await router.check()
+            replica.down = True
+            first = await read_source(router)
+            second = await read_source(router)
+            replica.down = False
+            clock.now += 1
+            await router.check()
+            return first, second, await read_source(router)
+
+        first, second, recovered = asyncio.run(run())
+        assert (first, second, recovered) == ('primary', 'primary', 'replica-1')
+        assert router.primary_reads['unhealthy'] == 2
+
+    def test_stale_measurement_and_non_standby_skipped(self):
+        """Test that unchecked replicas and servers not in recovery are never used."""
+        router, clock, primary, (replica,) = make_router()
+
+        async def run():
+            unchecked = await read_source(router)
+            await router.check()
+            clock.now += 10
+            stale = await read_source(router)
+            replica.in_recovery = False
+            await router.check()
+            return unchecked, stale, await read_source(router)
+
+        assert asyncio.run(run()) == ('primary', 'primary', 'primary')
+        assert router.stats()['replicas'][0]['last_error'] == 'not in recovery'
+
+    def test_primary_down_serves_replicas(self):
+        """Test that healthy replicas keep serving when the primary cannot be probed."""
+        router, clock, primary, (replica,) = make_router()
+
+        async def run():
+            await router.check()
+            router.note_write('database-specialist', at=clock.now + 1)
+            primary.down = True
+            clock.now += 30
+            await router.check()
+            return await read_source(router, key='database-specialist')
+
+        assert asyncio.run(run()) == 'replica-1'
+        assert not router.stats()['primary_reachable']
+
+    def test_no_replicas(self):
+        """Test that without replicas every read goes to the primary."""
+        primary = FakeServer('primary')
+        router = ReadRouter(primary.connect)
+
+        async def run():
+            await router.check()
+            return await read_source(router)
+
+        assert asyncio.run(run()) == 'primary'
+        assert router.primary_reads['no_replicas'] == 1
+
+
+@pytest.mark.integration
+class TestReadRouterPostgres:
+    """Test against a real primary and streaming standby."""
+
+    def test_routes_to_standby(self):
+        """Test lag measurement and routing with two local Postgres instances."""
+        primary_url = os.getenv('TEST_DATABASE_URL')
+        replica_url = os.getenv('TEST_REPLICA_DATABASE_URL')
+        if not primary_url or not replica_url:
+            pytest.skip("TEST_DATABASE_URL / TEST_REPLICA_DATABASE_URL not set, skipping integration test")
+        asyncpg = pytest.importorskip('asyncpg')
+
+        async def run():
+            router = ReadRouter(
+                lambda: asyncpg.connect(primary_url),
+                {'replica-1': lambda: asyncpg.connect(replica_url)}
+            )
+            try:
+                for _ in range(3):
+                    await router.check()
+                    await asyncio.sleep(router.check_interval)
+                async with router.connection() as conn:
+                    in_recovery = await conn.fetchval('SELECT pg_is_in_recovery()')
+                return in_recovery, router.stats()
+            finally:
+                await router.close()
+
+        in_recovery, stats = asyncio.run(run())
+        assert stats['replicas'][0]['healthy'], stats
+        assert in_recovery
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
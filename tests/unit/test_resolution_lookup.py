@@ -0,0 +1,145 @@
+"""
+HEIR System - Resolution Lookup Tests
+Tests error fingerprints and the in-memory known-fix lookup.
+"""
+
+import asyncio
+
+import pytest
+
+from orbt.fingerprint import error_fingerprint, extract_error_codes, normalize_error_message
+from orbt.resolution_lookup import ResolutionLookup
+
+
+def guide_row(lookup_key, error_code, error_type='connection'):
+    return {
+        'lookup_key': lookup_key,
+        'error_code': error_code,
+        'error_type': error_type,
+        'error_title': f'{error_code} title',
+        'immediate_action': 'Retry connection',
+        'resolution_steps': ['Restart connection pool'],
+        'auto_resolvable': True,
+        'success_rate': 85.0,
+    }
+
+
+def library_row(resolution_id, error_signature, error_type='connection'):
+    return {
+        'resolution_id': resolution_id,
+        'error_signature': error_signature,
+        'error_type': error_type,
+        'error_code': 'CONN_RESET',
+        'fix_title': 'Recycle pool',
+        'fix_description': 'Recycle the connection pool',
+        'fix_commands': ['SELECT pg_terminate_backend(pid)'],
+        'verification_commands': ['SELECT 1'],
+        'approved_for_automation': False,
+        'success_rate': 100.0,
+    }
+
+
+class TestErrorFingerprint:
+    """Test error message normalisation and fingerprints."""
+
+    def test_volatile_tokens_masked(self):
+        """Test that ids, numbers and quoted values do not change the fingerprint."""
+        first = "Timeout after 30s on host 'db-1' (pid 4411)"
+        second = "Timeout after 45s on host 'db-7' (pid 90)"
+
+        assert normalize_error_message(first) == normalize_error_message(second)
+        assert error_fingerprint('connection', first) == error_fingerprint('connection', second)
+
+    def test_error_type_is_part_of_fingerprint(self):
+        """Test that the same message under different types differs."""
+        assert error_fingerprint('connection', 'boom') != error_fingerprint('validation', 'boom')
+
+    def test_extract_error_codes(self):
+        """Test ERROR_CODE token extraction."""
+        message = "ProcessData failed: CONN_TIMEOUT then connection_failure, CONN_TIMEOUT again"
+
+        assert extract_error_codes(message) == ['CONN_TIMEOUT', 'CONNECTION_FAILURE']
+
+
+class TestResolutionLookup:
+    """Test known-fix lookup behaviour and metrics."""
+
+    @pytest.fixture
+    def lookup(self):
+        lookup = ResolutionLookup(max_entries=10)
+        lookup.build(
+            [guide_row('ProcessData:CONN_TIMEOUT', 'CONN_TIMEOUT')],
+            [library_row('RES-001', 'connection reset by peer on port 5432')]
+        )
+        return lookup
+
+    def test_library_match_by_fingerprint(self, lookup):
+        """Test that a library entry matches errors with the same fingerprint."""
+        fix = lookup.lookup('connection', 'Connection reset by peer on port 6543')
+
+        assert fix['source'] == 'resolution_library'
+        assert fix['key'] == 'RES-001'
+
+    def test_guide_match_by_error_code(self, lookup):
+        """Test that a guide entry matches an embedded error code."""
+        fix = lookup.lookup('connection', 'ProcessData: CONN_TIMEOUT after 3 retries')
+
+        assert fix['source'] == 'troubleshooting_guide'
+        assert fix['key'] == 'ProcessData:CONN_TIMEOUT'
+        assert fix['auto_resolvable'] is True
+
+    def test_unknown_error_misses(self, lookup):
+        """Test that unknown errors return None and count as misses."""
+        assert lookup.lookup('validation', 'field x is required') is None
+        assert lookup.stats()['misses'] == 1
+
+    def test_hit_rate_metrics(self, lookup):
+        """Test hit-rate accounting."""
+        lookup.lookup('connection', 'CONN_TIMEOUT')
+        lookup.lookup('connection', 'CONN_TIMEOUT')
+        lookup.lookup('validation', 'nope')
+        lookup.lookup('validation', 'nope')
+
+        stats = lookup.stats()
+        assert stats['hits'] == 2
+        assert stats['misses'] == 2
+        assert stats['hit_rate'] == 0.5
+
+    def test_size_bound_evicts_least_recently_used(self):
+        """Test that the LRU never exceeds max_entries."""
+        lookup = ResolutionLookup(max_entries=2)
+        lookup.build([guide_row(f'P:CODE_{i}', f'CODE_{i}') for i in range(3)], [])
+
+        assert len(lookup) == 2
+        # Rows arrive most valuable first, so the last one is evicted
+        assert lookup.lookup('connection', 'CODE_2') is None
+        assert lookup.lookup('connection', 'CODE_0') is not None
+
+        lookup.remember('guide:CODE_9', {'source': 'troubleshooting_guide'})
+        assert len(lookup) == 2
+        assert lookup.stats()['evictions'] == 1
+        assert lookup.lookup('connection', 'CODE_1') is None
+
+    def test_load_issues_only_preload_queries(self):
+        """Test that load preloads both tables and lookups stay in memory."""
+        class FakeConnection:
+            def __init__(self):
+                self.queries = []
+
+            async def fetch(self, query, *args):
+                self.queries.append(query)
+                if 'orbt_troubleshooting_guide' in query:
+                    return [guide_row('ProcessData:CONN_TIMEOUT', 'CONN_TIMEOUT')]
+                return []
+
+        conn = FakeConnection()
+        lookup = ResolutionLookup()
+        asyncio.run(lookup.load(conn))
+        lookup.lookup('connection', 'CONN_TIMEOUT')
+
+        assert len(conn.queries) == 2
+        assert asyncio.run(lookup.refresh(conn)) is False
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,175 @@
+"""
+HEIR System - Schema Migration Runner Tests
+Tests statement splitting, step loading and checksum-based skipping.
+"""
+
+import asyncio
+import os
+
+import pytest
+
+from orbt.schema_migrations import (
+    IndexBuild, SchemaMigrationRunner, load_steps, split_statements, strip_comments
+)
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'complete-heir-schema.sql')
+
+SAMPLE_SCHEMA = """
+CREATE SCHEMA IF NOT EXISTS shq;
+
+-- =============================================================================
+-- TABLES
+-- =============================================================================
+
+CREATE TABLE IF NOT EXISTS shq.items (id SERIAL PRIMARY KEY, note TEXT DEFAULT 'a;b');
+CREATE INDEX IF NOT EXISTS idx_items_note ON shq.items(note);
+
+-- =============================================================================
+-- FUNCTIONS
+-- =============================================================================
+
+CREATE OR REPLACE FUNCTION shq.touch() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.note := 'touched;';  -- a comment; with semicolons
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+INSERT INTO shq.doctrine_schema_version (version, applied_by, notes)
+VALUES ('2.1.0', 'deploy-database.sh', 'test');
+"""
+
+
+class FakeConnection:
+    """Records executed SQL and whether it ran inside a transaction"""
+
+    def __init__(self):
+        self.versions = {}
+        self.executed = []
+        self.in_transaction = False
+
+    def transaction(self):
+        conn = self
+
+        class Transaction:
+            async def __aenter__(self):
+                conn.in_transaction = True
+
+            async def __aexit__(self, *exc):
+                conn.in_transaction = False
+                return False
+
+        return Transaction()
+
+    async def execute(self, sql, *args):
+        if 'INSERT INTO shq.doctrine_schema_version' in sql and args:
+            self.versions[args[0]] = args[3]
+        self.executed.append((sql, self.in_transaction))
+
+    async def fetch(self, sql, *args):
+        return [{'version': v, 'checksum': c} for v, c in self.versions.items()]
+
+    async def fetchval(self, sql, *args):
+        return None
+
+
+class TestSchemaMigrationRunner:
+    """Test versioned schema deployment."""
+
+    def test_split_statements_respects_quoting(self):
+        """Test that semicolons in strings, comments and dollar quotes do not split."""
+        statements = split_statements(SAMPLE_SCHEMA)
+
+        assert len(statements) == 5
+        assert strip_comments(statements[3]).startswith('CREATE OR REPLACE FUNCTION')
+        assert statements[3].endswith('LANGUAGE plpgsql')
+
+    def test_load_steps_from_banners(self):
+        """Test that banner sections become numbered steps with indexes split out."""
+        release, steps = load_steps(SAMPLE_SCHEMA)
+
+        assert release == '2.1.0'
+        assert [(s.version, s.title) for s in steps] == [
+            ('2.1.0.00', 'Bootstrap'), ('2.1.0.01', 'TABLES'), ('2.1.0.02', 'FUNCTIONS')
+        ]
+        assert len(steps[1].statements) == 1
+        assert steps[1].indexes[0].qualified_name == 'shq.idx_items_note'
+
+    def test_index_rewritten_concurrently(self):
+        """Test that index builds are rewritten to CONCURRENTLY IF NOT EXISTS."""
+        index = IndexBuild("-- lookup\nCREATE UNIQUE INDEX idx_a ON public.a USING btree (b) WHERE c")
+
+        assert index.sql == "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON public.a USING btree (b) WHERE c"
+        assert index.qualified_name == 'public.idx_a'
+
+    def test_repository_schema_loads(self):
+        """Test the shipped schema: every index is built concurrently, versions unique."""
+        with open(SCHEMA_PATH) as f:
+            schema = f.read()
+        release, steps = load_steps(schema)
+
+        assert release == '1.0.0'
+        assert len({s.version for s in steps}) == len(steps)
+        assert sum(len(s.indexes) for s in steps) == schema.count('CREATE INDEX')
+        assert not any('CREATE INDEX' in sql for s in steps for sql in s.statements)
+
+    def test_rerun_skips_applied_steps(self):
+        """Test apply, no-op rerun, and reapplying only a changed step."""
+        conn = FakeConnection()
+        release, steps = load_steps(SAMPLE_SCHEMA)
+        runner = SchemaMigrationRunner(conn)
+
+        first = asyncio.run(runner.run(release, steps))
+        assert [e['status'] for e in first] == ['applied'] * 3
+        assert list(conn.versions)[-1] == '2.1.0'
+
+        conn.executed = []
+        second = asyncio.run(runner.run(release, steps))
+        assert [e['status'] for e in second] == ['skipped'] * 3
+        assert len(conn.executed) == 1  # version table bootstrap only
+
+        _, changed = load_steps(SAMPLE_SCHEMA.replace('DEFAULT \'a;b\'', 'DEFAULT \'c\''))
+        third = asyncio.run(runner.run(release, changed))
+        assert [e['status'] for e in third] == ['skipped', 'reapplied', 'skipped']
+
+    def test_redeploy_after_rollback_records_release(self):
+        """Test that removing only the release row (rollback-database.sh) is repaired by a redeploy."""
+        conn = FakeConnection()
+        release, steps = load_steps(SAMPLE_SCHEMA)
+        runner = SchemaMigrationRunner(conn)
+        asyncio.run(runner.run(release, steps))
+        release_checksum = conn.versions['2.1.0']
+
+        del conn.versions['2.1.0']
+        report = asyncio.run(runner.run(release, steps))
+
+        assert [e['status'] for e in report] == ['skipped'] * 3
+        assert conn.versions['2.1.0'] == release_checksum
+        assert list(conn.versions)[-1] == '2.1.0'
+
+    def test_indexes_built_outside_transactions(self):
+        """Test that DDL runs transactionally and index builds do not."""
+        conn = FakeConnection()
+        release, steps = load_steps(SAMPLE_SCHEMA)
+
+        asyncio.run(SchemaMigrationRunner(conn).run(release, steps))
+
+        index_runs = [in_tx for sql, in_tx in conn.executed if 'CONCURRENTLY' in sql]
+        table_runs = [in_tx for sql, in_tx in conn.executed if 'CREATE TABLE IF NOT EXISTS shq.items' in sql]
+        assert index_runs == [False]
+        assert table_runs == [True]
+        assert any('lock_timeout' in sql and in_tx for sql, in_tx in conn.executed)
+
+    def test_dry_run_changes_nothing(self):
+        """Test that a dry run reports pending steps without applying them."""
+        conn = FakeConnection()
+        release, steps = load_steps(SAMPLE_SCHEMA)
+
+        report = asyncio.run(SchemaMigrationRunner(conn).run(release, steps, dry_run=True))
+
+        assert all(e['status'] == 'pending (applied)' for e in report)
+        assert conn.versions == {}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,166 @@
+"""
+HEIR System - Structured Logging Tests
+Tests JSON records with bound context, the queued pipeline and log rotation.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import queue
+import sys
+
+import pytest
+
+from orbt.structured_logging import (
+    ContextQueueHandler, JsonFormatter, SizeAndTimeRotatingFileHandler, configure_logging, current_log_context,
+    log_context
+)
+
+
+def make_record(message, *args, **extra):
+    record = logging.LogRecord('orbt.escalation', logging.INFO, __file__, 1, message, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+@pytest.fixture
+def root_logger():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    yield root
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    for handler in handlers:
+        root.addHandler(handler)
+    root.setLevel(level)
+
+
+class TestJsonRecords:
+    """Test JSON formatting and context binding."""
+
+    def test_context_and_extra_fields(self):
+        """Test that bound context and extra= fields appear in the JSON record."""
+        handler = ContextQueueHandler(queue.Queue())
+        with log_context(cycle_id='c1'):
+            with log_context(escalation_id='ESC_1'):
+                record = handler.prepare(make_record('Created %s', 'ESC_1', cycle_ms=812.5))
+            assert current_log_context() == {'cycle_id': 'c1'}
+        assert current_log_context() == {}
+
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry['message'] == 'Created ESC_1'
+        assert entry['cycle_id'] == 'c1' and entry['escalation_id'] == 'ESC_1'
+        assert entry['cycle_ms'] == 812.5
+        assert entry['level'] == 'INFO' and entry['logger'] == 'orbt.escalation'
+        assert 'context' not in entry and 'args' not in entry
+
+    def test_exception_formatted(self):
+        """Test that tracebacks end up in the record as text."""
+        try:
+            raise ConnectionResetError('db gone')
+        except ConnectionResetError:
+            record = logging.LogRecord('x', logging.ERROR, __file__, 1, 'cycle failed', None, sys.exc_info())
+        entry = json.loads(JsonFormatter().format(record))
+        assert 'ConnectionResetError: db gone' in entry['exc_info']
+
+    def test_context_isolated_between_tasks(self):
+        """Test that concurrent tasks keep their own bound ids."""
+        handler = ContextQueueHandler(queue.Queue())
+
+        async def escalate(escalation_id):
+            with log_context(escalation_id=escalation_id):
+                await asyncio.sleep(0)
+                return handler.prepare(make_record('notify')).context
+
+        async def run():
+            with log_context(cycle_id='c2'):
+                return await asyncio.gather(escalate('ESC_A'), escalate('ESC_B'))
+
+        contexts = asyncio.run(run())
+        assert contexts == [{'cycle_id': 'c2', 'escalation_id': 'ESC_A'}, {'cycle_id': 'c2', 'escalation_id': 'ESC_B'}]
+
+    def test_full_queue_drops_and_reports(self):
+        """Test that a full queue drops records and the next record says how many."""
+        handler = ContextQueueHandler(queue.Queue(maxsize=1))
+        handler.handle(make_record('one'))
+        handler.handle(make_record('two'))
+        handler.handle(make_record('three'))
+        assert handler.dropped == 2
+
+        handler.queue.get_nowait()
+        handler.handle(make_record('four'))
+        assert handler.queue.get_nowait().dropped_records == 2
+        assert handler.dropped == 0
+
+
+class TestPipeline:
+    """Test the queued pipeline end to end."""
+
+    def test_records_written_by_listener(self, tmp_path, root_logger):
+        """Test that records reach the JSON file and console after stop()."""
+        console = io.StringIO()
+        path = tmp_path / 'logs' / 'orbt_escalation.log'
+        pipeline = configure_logging(str(path), console_stream=console)
+        assert [type(h) for h in root_logger.handlers] == [ContextQueueHandler]
+
+        logger = logging.getLogger('orbt.escalation.test')
+        with log_context(cycle_id='c3'):
+            for i in range(100):
+                logger.info(f'record {i}')
+        logger.debug('below level')
+        pipeline.stop()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 100
+        assert json.loads(lines[-1])['message'] == 'record 99'
+        assert json.loads(lines[0])['cycle_id'] == 'c3'
+        assert console.getvalue().count(' - INFO - record ') == 100
+        assert root_logger.handlers == []
+
+
+class TestRotation:
+    """Test rotation by size and by time."""
+
+    def test_rotates_by_size(self, tmp_path):
+        """Test that the file rolls over to numbered backups past max_bytes."""
+        path = tmp_path / 'daemon.log'
+        handler = SizeAndTimeRotatingFileHandler(str(path), max_bytes=200, backup_count=2, interval=0)
+        for i in range(30):
+            handler.handle(make_record(f'message number {i:03d}'))
+        handler.close()
+
+        assert sorted(os.listdir(tmp_path)) == ['daemon.log', 'daemon.log.1', 'daemon.log.2']
+        assert os.path.getsize(path) <= 200 + 30
+
+    def test_rotates_by_time(self, tmp_path):
+        """Test that the file rolls over at the interval boundary and empty files are left alone."""
+        now = [1000.0]
+        path = tmp_path / 'daemon.log'
+        handler = SizeAndTimeRotatingFileHandler(str(path), max_bytes=0, interval=60, clock=lambda: now[0])
+        assert handler.rollover_at == 1020.0
+
+        handler.handle(make_record('before'))
+        now[0] = 1030.0
+        handler.handle(make_record('after'))
+        handler.flush_now()
+        assert (tmp_path / 'daemon.log.1').read_text() == 'before\n'
+        assert path.read_text() == 'after\n'
+        assert handler.rollover_at == 1080.0
+
+        handler.close()
+        path.write_text('')
+        os.utime(path, (1030.0, 1030.0))
+        now[0] = 1100.0
+        handler = SizeAndTimeRotatingFileHandler(str(path), max_bytes=0, interval=60, clock=lambda: now[0])
+        assert handler.rollover_at == 1080.0
+        handler.handle(make_record('fresh'))
+        handler.close()
+        assert not (tmp_path / 'daemon.log.2').exists()
+        assert path.read_text() == 'fresh\n'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
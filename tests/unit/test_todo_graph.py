@@ -0,0 +1,153 @@
+"""
+HEIR System - Todo Dependency Scheduler Tests
+Tests readiness tracking, critical paths, cycle detection and progress sync.
+"""
+
+import asyncio
+
+import pytest
+
+from orbt.todo_graph import TodoGraph, TodoScheduler
+
+
+def todo(todo_id, depends_on=None, blocks=None, status='pending', priority='MEDIUM',
+         minutes=None, project='HEIR-SYSTEM', id=0):
+    return {
+        'id': id,
+        'todo_id': todo_id,
+        'project_name': project,
+        'status': status,
+        'priority': priority,
+        'estimated_minutes': minutes,
+        'depends_on_todo_ids': depends_on,
+        'blocks_todo_ids': blocks,
+    }
+
+
+def ready_ids(graph):
+    return [t['todo_id'] for t in graph.ready()]
+
+
+class TestTodoGraph:
+    """Test the per-project dependency graph."""
+
+    @pytest.fixture
+    def graph(self):
+        # schema -> api -> deploy, schema -> ui (via blocks), docs independent
+        graph = TodoGraph('HEIR-SYSTEM')
+        graph.build([
+            todo('schema', blocks=['ui'], minutes=60),
+            todo('api', depends_on=['schema'], minutes=120),
+            todo('ui', minutes=30),
+            todo('deploy', depends_on=['api', 'ui'], minutes=15),
+            todo('docs', priority='HIGH', minutes=10),
+        ])
+        return graph
+
+    def test_initial_ready_set(self, graph):
+        """Test that only todos without unfinished dependencies are ready."""
+        assert ready_ids(graph) == ['docs', 'schema']
+        assert graph.blockers('deploy') == ['api', 'ui']
+
+    def test_completion_unblocks_dependents(self, graph):
+        """Test that completing a todo readies dependents whose deps are all done."""
+        graph.update_status('schema', 'completed')
+
+        assert ready_ids(graph) == ['docs', 'api', 'ui']
+
+        graph.update_status('api', 'completed')
+        graph.update_status('ui', 'cancelled')
+
+        assert 'deploy' in ready_ids(graph)
+
+    def test_reopening_blocks_again(self, graph):
+        """Test that moving a todo back out of completed re-blocks dependents."""
+        graph.update_status('schema', 'completed')
+        graph.update_status('schema', 'in_progress')
+
+        assert ready_ids(graph) == ['docs']
+        assert graph.blockers('api') == ['schema']
+
+    def test_critical_path(self, graph):
+        """Test the longest chain of remaining estimated work."""
+        assert graph.critical_path() == {'todo_ids': ['schema', 'api', 'deploy'], 'total_minutes': 195}
+
+        graph.update_status('schema', 'completed')
+
+        assert graph.critical_path() == {'todo_ids': ['api', 'deploy'], 'total_minutes': 135}
+
+    def test_cycles_are_reported_and_never_ready(self):
+        """Test that todos on a cycle are listed and excluded from scheduling."""
+        graph = TodoGraph('HEIR-SYSTEM')
+        graph.build([
+            todo('a', depends_on=['c']),
+            todo('b', depends_on=['a']),
+            todo('c', depends_on=['b']),
+            todo('d', depends_on=['d']),
+            todo('e'),
+        ])
+
+        assert sorted(graph.cycles) == [['a', 'b', 'c'], ['d']]
+        assert ready_ids(graph) == ['e']
+        assert graph.critical_path()['todo_ids'] == ['e']
+
+    def test_add_todo_incrementally(self, graph):
+        """Test that new todos are linked and a cycle-closing todo is flagged."""
+        assert graph.add_todo(todo('monitoring', depends_on=['deploy'])) is True
+        assert graph.blockers('monitoring') == ['deploy']
+
+        assert graph.add_todo(todo('rollback', depends_on=['deploy'], blocks=['schema'])) is False
+        assert graph.cycles == [['api', 'deploy', 'rollback', 'schema', 'ui']]
+        assert 'schema' not in ready_ids(graph)
+
+    def test_add_completed_todo_keeps_dependents_ready(self, graph):
+        """Test that adding an already completed blocker leaves its ready dependents ready."""
+        assert graph.add_todo(todo('audit', blocks=['docs'], status='completed')) is True
+
+        assert 'docs' in ready_ids(graph)
+        assert graph.blockers('docs') == []
+
+
+class TestTodoScheduler:
+    """Test syncing graphs from the database."""
+
+    def test_sync_applies_new_todos_and_progress(self):
+        """Test the initial load then incremental todo and progress updates."""
+        class FakeConnection:
+            def __init__(self):
+                self.todos = [
+                    todo('schema', id=1),
+                    todo('api', depends_on=['schema'], id=2),
+                    todo('landing', project='MARKETING', id=3),
+                ]
+                self.progress = []
+
+            async def fetchval(self, query):
+                return max([p['id'] for p in self.progress], default=0)
+
+            async def fetch(self, query, *args):
+                if 'orbt_todo_progress p' in query:
+                    return [p for p in self.progress if p['id'] > args[0]][:args[1]]
+                return [t for t in self.todos if t['id'] > args[0]]
+
+        conn = FakeConnection()
+        scheduler = TodoScheduler()
+
+        asyncio.run(scheduler.sync(conn))
+
+        assert set(scheduler.graphs) == {'HEIR-SYSTEM', 'MARKETING'}
+        assert ready_ids(scheduler.graph('HEIR-SYSTEM')) == ['schema']
+
+        conn.todos.append(todo('tests', depends_on=['api'], id=4))
+        conn.progress.append({'id': 1, 'todo_id': 'schema', 'project_name': 'HEIR-SYSTEM', 'status': 'completed'})
+        asyncio.run(scheduler.sync(conn))
+
+        graph = scheduler.graph('HEIR-SYSTEM')
+        assert ready_ids(graph) == ['api']
+        assert graph.blockers('tests') == ['api']
+        assert scheduler.last_progress_id == 1
+        assert scheduler.last_todo_id == 4
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
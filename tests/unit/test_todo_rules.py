@@ -0,0 +1,153 @@
+"""
+HEIR System - Todo Generation Engine Tests
+Tests keyword compilation, rule evaluation and deduplicated bulk inserts.
+"""
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from orbt.todo_rules import KeywordMatcher, TodoRuleEngine
+
+
+def rule(rule_id, keywords, project_types=None, priority_override=None, auto_assign=False, **template):
+    return {
+        'rule_id': rule_id,
+        'trigger_keywords': keywords,
+        'project_types': project_types,
+        'todo_template': json.dumps(dict({
+            'title': f'{rule_id} title',
+            'description': 'Investigate {requirement}',
+            'category': 'repair',
+            'priority': 'HIGH',
+            'estimated_minutes': 15,
+        }, **template)),
+        'auto_assign': auto_assign,
+        'priority_override': priority_override,
+    }
+
+
+def event(message, agent_id='database-specialist', project='HEIR-SYSTEM', error_type='connection', id=1):
+    return {
+        'id': id,
+        'agent_id': agent_id,
+        'error_type': error_type,
+        'error_message': message,
+        'project_context': project,
+    }
+
+
+class TestKeywordMatcher:
+    """Test the compiled multi-keyword matcher."""
+
+    def test_overlapping_keywords(self):
+        """Test that nested and overlapping keywords are all reported."""
+        matcher = KeywordMatcher({'he': {0}, 'she': {1}, 'his': {2}, 'hers': {3}})
+
+        assert matcher.search('ushers') == {0, 1, 3}
+
+    def test_matches_ilike_semantics(self):
+        """Test agreement with case-insensitive substring matching on random input."""
+        rng = random.Random(7)
+        alphabet = 'abc_'
+        keywords = {''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(60)}
+        payload = {keyword: {i} for i, keyword in enumerate(sorted(keywords))}
+        matcher = KeywordMatcher(payload)
+
+        for _ in range(200):
+            text = ''.join(rng.choice(alphabet + 'ABC') for _ in range(rng.randint(0, 30)))
+            expected = {i for keyword, ids in payload.items() for i in ids if keyword in text.lower()}
+            assert matcher.search(text) == expected
+
+
+class TestTodoRuleEngine:
+    """Test rule evaluation into orbt_project_todos rows."""
+
+    @pytest.fixture
+    def engine(self):
+        engine = TodoRuleEngine(project_types={'HEIR-SYSTEM': 'heir_project'})
+        engine.compile([
+            rule('DATABASE_SETUP', ['database', 'schema', 'migration']),
+            rule('PAYMENT', ['stripe', 'payment'], priority_override='CRITICAL', auto_assign=True),
+            rule('HEIR_ONLY', ['database'], project_types=['heir_project']),
+            rule('DISABLED_KEYWORDS', []),
+        ])
+        return engine
+
+    def test_rule_matching(self, engine):
+        """Test that keywords select the right rules case-insensitively."""
+        assert engine.match('Database connection refused') == [0, 2]
+        assert engine.match('Stripe PAYMENT declined') == [1]
+        assert engine.match('nothing relevant') == []
+
+    def test_evaluate_builds_todo_from_template(self, engine):
+        """Test todo fields derived from the template and rule settings."""
+        todos = engine.evaluate([event('Stripe payment declined', agent_id='payment-specialist')], 'error')
+
+        assert len(todos) == 1
+        todo = todos[0]
+        assert todo['todo_title'] == 'PAYMENT title for HEIR-SYSTEM'
+        assert todo['todo_description'] == 'Investigate error: Stripe payment declined'
+        assert todo['priority'] == 'CRITICAL'
+        assert todo['assigned_to'] == 'payment-specialist'
+        assert todo['estimated_minutes'] == 15
+        assert len(todo['todo_id']) <= 50
+
+    def test_project_type_filter(self, engine):
+        """Test that project_types restricts rules when the event has a type."""
+        other = dict(event('database down'), project_type='marketing_site')
+
+        rule_ids = {t['todo_title'].split(' ')[0] for t in engine.evaluate([other], 'error')}
+
+        assert rule_ids == {'DATABASE_SETUP'}
+
+    def test_project_type_resolved_from_project_context(self, engine):
+        """Test that the type comes from the project and unknown types skip restricted rules."""
+        def rule_ids(project):
+            return {t['todo_title'].split(' ')[0] for t in engine.evaluate([event('database down', project=project)], 'error')}
+
+        assert rule_ids('HEIR-SYSTEM') == {'DATABASE_SETUP', 'HEIR_ONLY'}
+        assert rule_ids('marketing-site') == {'DATABASE_SETUP'}
+        assert rule_ids(None) == {'DATABASE_SETUP'}
+
+    def test_duplicate_errors_produce_one_todo(self, engine):
+        """Test that repeats of the same error fingerprint are deduplicated."""
+        events = [event(f'database timeout after {n}s', id=n) for n in range(50)]
+
+        todos = engine.evaluate(events, 'error')
+
+        assert len(todos) == 2
+        assert todos == engine.evaluate(events[:1], 'error')
+
+    def test_run_batch_bulk_inserts_and_advances_cursor(self, engine):
+        """Test one batch: single insert statement, cursors advance."""
+        class FakeConnection:
+            def __init__(self):
+                self.inserts = []
+
+            async def fetch(self, query, *args):
+                if 'orbt_todo_generation_rules' in query:
+                    return [rule('DATABASE_SETUP', ['database'])]
+                if 'INSERT INTO' in query:
+                    self.inserts.append(args)
+                    return [{'todo_id': todo_id} for todo_id in args[0]]
+                if 'orbt_escalation_queue' in query:
+                    return [event('database escalation', id=7)]
+                return [event('database timeout', id=41), event('database timeout', id=42)]
+
+        conn = FakeConnection()
+        engine = TodoRuleEngine()
+
+        result = asyncio.run(engine.run_batch(conn))
+
+        assert result == {'errors': 2, 'escalations': 1, 'matched': 2, 'created': 2}
+        assert len(conn.inserts) == 1
+        assert len(conn.inserts[0]) == 11
+        assert engine.last_error_id == 42
+        assert engine.last_escalation_id == 7
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])
@@ -0,0 +1,225 @@
+"""
+HEIR System - Vault Event Consumer Tests
+Tests cursor persistence, at-least-once delivery and consumer groups.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from orbt.vault_consumer import VaultEventConsumer
+
+
+class FakeVault:
+    """In-memory shq.vault_events and shq.vault_consumer_offsets"""
+
+    def __init__(self, count=0):
+        self.events = []
+        self.offsets = {}
+        self.locks = set()
+        self.largest_page = 0
+        self.uncommitted = set()
+        self.snapshot = {'xmin': 100, 'xmax': 100}
+        for _ in range(count):
+            self.append()
+
+    def append(self):
+        event_id = len(self.events) + 1
+        self.events.append({
+            'id': event_id,
+            'event_id': f'EVT-{event_id}',
+            'agent_id': 'database-gatekeeper',
+            'event_type': 'write',
+            'event_data': '{}',
+            'gatekeeper_signature': 'database-gatekeeper:sig',
+            'created_at': datetime(2025, 8, 1),
+        })
+
+
+class FakeConnection:
+    def __init__(self, vault):
+        self.vault = vault
+        self.listeners = []
+
+    async def execute(self, query, *args):
+        offsets = self.vault.offsets
+        if 'INSERT INTO shq.vault_consumer_offsets' in query:
+            group, latest = args
+            if group not in offsets:
+                offsets[group] = {'last_event_id': len(self.vault.events) if latest else 0,
+                                  'last_created_at': None, 'events_consumed': 0}
+        elif 'events_consumed = events_consumed' in query:
+            group, last_id, created_at, count = args
+            offsets[group].update(last_event_id=last_id, last_created_at=created_at)
+            offsets[group]['events_consumed'] += count
+        elif 'UPDATE shq.vault_consumer_offsets' in query:
+            offsets[args[0]]['last_event_id'] = args[1]
+
+    async def fetchval(self, query, *args):
+        key = (args[0], self)
+        if 'pg_try_advisory_lock' in query:
+            if any(group == args[0] and holder is not self for group, holder in self.vault.locks):
+                return False
+            self.vault.locks.add(key)
+            return True
+        if 'pg_advisory_unlock' in query:
+            self.vault.locks.discard(key)
+            return True
+        return len(self.vault.events) - args[0]
+
+    async def fetchrow(self, query, *args):
+        if 'txid_current_snapshot' in query:
+            return dict(self.vault.snapshot)
+        return self.vault.offsets[args[0]]
+
+    async def fetch(self, query, after_id, limit):
+        visible = [e for e in self.vault.events if e['id'] not in self.vault.uncommitted]
+        page = [e for e in visible if e['id'] > after_id][:limit]
+        self.vault.largest_page = max(self.vault.largest_page, len(page))
+        return page
+
+    async def add_listener(self, channel, callback):
+        self.listeners.append(callback)
+
+    async def remove_listener(self, channel, callback):
+        self.listeners.remove(callback)
+
+    def notify(self):
+        for callback in self.listeners:
+            callback(self, 0, 'orbt_vault_events', 'shq.vault_events')
+
+
+def consume(vault, group, fail_after_batches=None, **options):
+    async def run():
+        consumer = VaultEventConsumer(FakeConnection(vault), group, **options)
+        await consumer.start()
+        seen = []
+        try:
+            async for batch in consumer.stream():
+                if fail_after_batches is not None and len(seen) == fail_after_batches:
+                    raise RuntimeError("handler crashed")
+                seen.append([event['id'] for event in batch])
+        finally:
+            await consumer.stop()
+        return seen
+
+    return asyncio.run(run())
+
+
+class TestVaultEventConsumer:
+    """Test tailing shq.vault_events."""
+
+    def test_streams_backlog_in_bounded_batches(self):
+        """Test that the backlog is paged and the cursor persisted."""
+        vault = FakeVault(count=25)
+
+        batches = consume(vault, 'audit', batch_size=10)
+
+        assert [len(b) for b in batches] == [10, 10, 5]
+        assert vault.largest_page == 10
+        assert vault.offsets['audit']['last_event_id'] == 25
+        assert vault.offsets['audit']['events_consumed'] == 25
+
+        vault.append()
+        assert consume(vault, 'audit', batch_size=10) == [[26]]
+
+    def test_failed_batch_is_redelivered(self):
+        """Test at-least-once delivery: a batch whose handler fails is not acknowledged."""
+        vault = FakeVault(count=30)
+
+        with pytest.raises(RuntimeError):
+            consume(vault, 'audit', batch_size=10, fail_after_batches=1)
+
+        assert vault.offsets['audit']['last_event_id'] == 10
+        assert consume(vault, 'audit', batch_size=10)[0][0] == 11
+
+    def test_consumer_groups_are_independent(self):
+        """Test that each group keeps its own cursor and new groups can start at the tail."""
+        vault = FakeVault(count=5)
+
+        consume(vault, 'audit')
+        vault.append()
+
+        assert consume(vault, 'audit') == [[6]]
+        assert consume(vault, 'replica') == [[1, 2, 3, 4, 5, 6]]
+        assert consume(vault, 'alerts', start_at='latest') == []
+
+    def test_second_consumer_in_group_is_refused(self):
+        """Test that a group has a single active consumer."""
+        vault = FakeVault(count=1)
+
+        async def run():
+            first = VaultEventConsumer(FakeConnection(vault), 'audit')
+            await first.start()
+            second = VaultEventConsumer(FakeConnection(vault), 'audit')
+            with pytest.raises(RuntimeError):
+                await second.start(wait=False)
+            await first.stop()
+            await second.start(wait=False)
+
+        asyncio.run(run())
+
+    def test_follow_wakes_on_notify(self):
+        """Test that a following consumer picks up new events on NOTIFY, not the poll timer."""
+        vault = FakeVault(count=1)
+
+        async def run():
+            conn = FakeConnection(vault)
+            consumer = VaultEventConsumer(conn, 'audit', settle_seconds=0, poll_interval=30)
+            await consumer.start()
+            received = []
+            async for batch in consumer.stream(follow=True):
+                received.extend(event['id'] for event in batch)
+                if len(received) == 2:
+                    break
+                vault.append()
+                asyncio.get_running_loop().call_later(0.01, conn.notify)
+            return received
+
+        assert asyncio.run(asyncio.wait_for(run(), timeout=5)) == [1, 2]
+
+
+    def test_stops_at_id_from_transaction_in_progress(self):
+        """Test that a lower id committed late is delivered, not skipped."""
+        vault = FakeVault(count=5)
+        vault.uncommitted.add(3)
+        vault.snapshot = {'xmin': 99, 'xmax': 101}
+
+        async def run():
+            consumer = VaultEventConsumer(FakeConnection(vault), 'audit', settle_seconds=0)
+            await consumer.start()
+            first = [[e['id'] for e in batch] async for batch in consumer.stream()]
+            assert consumer.held_at_gap
+            second = [[e['id'] for e in batch] async for batch in consumer.stream()]
+            vault.uncommitted.discard(3)
+            third = [[e['id'] for e in batch] async for batch in consumer.stream()]
+            await consumer.stop()
+            return first, second, third
+
+        assert asyncio.run(run()) == ([[1, 2]], [], [[3, 4, 5]])
+        assert vault.offsets['audit']['last_event_id'] == 5
+
+    def test_skips_gap_once_older_transactions_end(self):
+        """Test that a rolled-back id is skipped only after the snapshot xmin passes it."""
+        vault = FakeVault(count=4)
+        vault.uncommitted.add(2)
+        vault.snapshot = {'xmin': 99, 'xmax': 101}
+
+        async def run():
+            consumer = VaultEventConsumer(FakeConnection(vault), 'audit', settle_seconds=0)
+            await consumer.start()
+            delivered = []
+            for xmin in (99, 100, 101):
+                vault.snapshot['xmin'] = xmin
+                async for batch in consumer.stream():
+                    delivered.append([e['id'] for e in batch])
+            await consumer.stop()
+            return delivered
+
+        assert asyncio.run(run()) == [[1], [3, 4]]
+        assert vault.offsets['audit']['last_event_id'] == 4
+
+
+if __name__ == '__main__':
+    pytest.main([__file__])